@@ -2,13 +2,16 @@
 # It also takes in a number of days and meals per day between breakfast, lunch, dinner, snack and dessert.
 # It outputs a structured macronutrtient set and seving sizes for each meal over the number of days specified.
 # For example 4 days 3 meals per day, might output a rule for dinner 1 that can be used 3 times and a rule for dinner 2 which can be used once.
+import functools
+
 from backend.src.langgraph_tools.nutrition import (
     get_macronutrient_distribution,
     get_reccomended_daily_calorie_intake,
 )
 from langchain.agents import create_agent
 from backend.src.common.llms import get_gemini_flash
-from backend.src.mealprep.proto.meal_plan_p2p import MealPlan
+from backend.src.common.utils import get_env_bool
+from backend.src.models import MealPlan
 
 
 # System prompt for the nutritionist agent
@@ -20,16 +23,23 @@ system_prompt = (
     "If you make a mistake, you will be asked to fix it."
 )
 
-llm = get_gemini_flash()
-
-
 nutritionist_toolkit = [
     get_reccomended_daily_calorie_intake,
     get_macronutrient_distribution,
 ]
-agent = create_agent(
-    tools=nutritionist_toolkit, model=llm, debug=True, response_format=MealPlan
-)
+
+
+@functools.cache
+def get_nutritionist_agent():
+    """Build the nutritionist agent on first use and share it for the life of the process."""
+    llm = get_gemini_flash()
+    return create_agent(
+        tools=nutritionist_toolkit,
+        model=llm,
+        # Prints every graph step; very verbose, so off unless asked for
+        debug=get_env_bool("SNAPTOP_AGENT_DEBUG", False),
+        response_format=MealPlan,
+    )
 
 
 if __name__ == "__main__":
@@ -39,7 +49,7 @@ if __name__ == "__main__":
         " Person 2: 40-year-old male, 80kg, 180cm, light activity level, gluten-free.\n"
         " The meal plan should include breakfast, lunch, dinner, and snacks for each day."
     )
-    result = agent.invoke(
+    result = get_nutritionist_agent().invoke(
         {
             "messages": [
                 {"role": "system", "content": system_prompt},
@@ -1,7 +1,11 @@
-from backend.src.langgraph_tools.nutrition import get_nutrition
+import functools
+
+from backend.src.langgraph_tools.nutrition import get_ingredient_nutrition, get_nutrition_batch
 from backend.src.langgraph_tools.recipe_search import fetch_url_content, search_tool
 from langchain.agents import create_agent
-from backend.src.common.llms import get_gemini_flash
+from backend.src.common.llms import get_gemini_flash, get_gemini_flash_lite, get_gemini_pro
+from backend.src.common.model_router import ModelRoute, ModelRouterMiddleware
+from backend.src.common.utils import get_env_bool
 from backend.src.models.recipe import Recipe
 
 # System prompt for the agent
@@ -9,10 +13,11 @@ system_prompt = (
     "You are a highly skilled chef specializing in adapting recipes to meet clients' dietary restrictions and preferences. "
     "When creating a recipe, use the recipe search tool for inspiration and to learn about cooking methods, but do not copy recipes directly. "
     "You can use the fetch URL tool to dive deeper into any of the recipes you found for inspiration, extracting details or clarifying cooking steps. "
-    "Use the nutrition search tool to look up nutrition information for each individual ingredient, not for entire recipes. "
-    "Sum the nutrition values for all ingredients to provide accurate macros for the final recipe. "
-    "IMPORTANT: The nutrition facts (calories, protein, carbs, fat, etc.) must be for the ENTIRE recipe (total for ALL servings), NOT per serving. "
-    "Add up all the nutrition from all ingredients to get the total nutrition for the complete recipe. "
+    "Give every ingredient an exact quantity and a standard unit (g, ml, tsp, tbsp, cup, oz, lb, or a count such as piece or clove): "
+    "the recipe's nutrition totals are calculated from the ingredient list, so you do not need to add up nutrition yourself. "
+    "When you need nutrition data to choose ingredients and quantities that meet the requested macros, "
+    "look up all the ingredients in a single get_nutrition_batch call rather than one ingredient at a time. "
+    "If you fill in the nutrition field, it is for the ENTIRE recipe (total for ALL servings), NOT per serving. "
     "Your output must be a valid JSON object matching the Recipe schema. "
     "Always cite sources for inspiration in the citations field. "
     "If a user requests substitutions or has dietary restrictions, adapt the recipe accordingly and explain your choices in the instructions. "
@@ -20,20 +25,50 @@ system_prompt = (
     "If you make a mistake, you will be asked to fix it."
 )
 
-# Choose Gemini model (flash, pro, ultra)
-llm = get_gemini_flash(system_prompt=system_prompt)
-# llm = get_gemini_pro(system_prompt=system_prompt)
-# llm = get_gemini_ultra(system_prompt=system_prompt)
+recipe_toolkit = [search_tool, fetch_url_content, get_nutrition_batch, get_ingredient_nutrition]
 
-recipe_toolkit = [search_tool, fetch_url_content, get_nutrition]
+_MODEL_FACTORIES = {
+    "flash-lite": get_gemini_flash_lite,
+    "flash": get_gemini_flash,
+    "pro": get_gemini_pro,
+}
 
-agent = create_agent(
-    tools=recipe_toolkit, model=llm, debug=True, response_format=Recipe
-)
+
+def recipe_model(tier: str):
+    """The (cached) chat model for a routing tier, with the recipe system prompt."""
+    return _MODEL_FACTORIES[tier](system_prompt=system_prompt)
+
+
+@functools.cache
+def get_recipe_agent():
+    """
+    Build the recipe agent on first use and share it for the life of the process.
+
+    Importing this module does not touch credentials or model clients; they are
+    created here, either by the server's warm-up or by the first request.
+    """
+    # The router picks the model per run and per turn (see common/model_router.py);
+    # this one is only the default it replaces
+    llm = get_gemini_flash(system_prompt=system_prompt)
+    return create_agent(
+        tools=recipe_toolkit,
+        model=llm,
+        # Nutrition lookups come last, right before the recipe is written
+        middleware=[
+            ModelRouterMiddleware(
+                recipe_model,
+                answer_after=(get_nutrition_batch.name, get_ingredient_nutrition.name),
+            )
+        ],
+        context_schema=ModelRoute,
+        # Prints every graph step; very verbose, so off unless asked for
+        debug=get_env_bool("SNAPTOP_AGENT_DEBUG", False),
+        response_format=Recipe,
+    )
 
 
 if __name__ == "__main__":
-    result = agent.invoke(
+    result = get_recipe_agent().invoke(
         {
             "messages": [
                 {"role": "system", "content": system_prompt},
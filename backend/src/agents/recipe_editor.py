@@ -0,0 +1,48 @@
+import functools
+
+from pydantic import BaseModel, Field
+
+from backend.src.common.llms import get_gemini_flash
+from backend.src.models import Ingredient, InstructionSection
+
+# System prompt for the editor: a single structured call, no tools
+system_prompt = (
+    "You are a chef editing an existing recipe according to the user's instructions. "
+    "Return only what changes: ingredients to remove (by their exact listed name), ingredients to add, "
+    "and new text only for the fields and instruction sections that must change. "
+    "To change an ingredient's amount, remove it and add it again with the new quantity. "
+    "Leave every other field empty so the original is kept as is. "
+    "When an instruction section changes, return the whole section with the same section_name; "
+    "return a section with no steps to delete it. "
+    "Do not compute nutrition; it is recalculated from the ingredients."
+)
+
+
+class RecipeEdit(BaseModel):
+    """Changes to apply to a recipe; empty fields keep the original."""
+
+    remove_ingredients: list[str] = Field(
+        default_factory=list, description="Names of existing ingredients to remove, as listed"
+    )
+    add_ingredients: list[Ingredient] = Field(
+        default_factory=list, description="New ingredients, or new amounts of removed ones"
+    )
+    title: str | None = Field(None, description="New title, if it must change")
+    description: str | None = Field(None, description="New description, if it must change")
+    instructions: list[InstructionSection] = Field(
+        default_factory=list, description="Rewritten or new instruction sections only"
+    )
+    prep_time_minutes: int | None = Field(None, description="New preparation time, if it changes")
+    cook_time_minutes: int | None = Field(None, description="New cooking time, if it changes")
+    servings: int | None = Field(None, description="New number of servings, if it changes")
+    serving_size: str | None = Field(None, description="New serving size, if it changes")
+
+
+@functools.cache
+def get_recipe_editor():
+    """
+    Build the recipe editor on first use: the chef model with `RecipeEdit`
+    as structured output. Unlike the recipe agent it has no tools, so an
+    edit is one model call.
+    """
+    return get_gemini_flash(system_prompt=system_prompt).with_structured_output(RecipeEdit)
@@ -0,0 +1,107 @@
+"""LangChain callback handler that records agent step and tool metrics."""
+
+import threading
+import time
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from backend.src.common.metrics import record_timing, registry
+
+agent_step_seconds = registry.histogram(
+    "snaptop_agent_step_duration_seconds",
+    "Duration of a single model turn of an agent",
+    ("model",),
+)
+tool_seconds = registry.histogram(
+    "snaptop_tool_duration_seconds",
+    "Duration of agent tool calls",
+    ("tool", "outcome"),
+)
+tool_calls_total = registry.counter(
+    "snaptop_tool_calls_total",
+    "Agent tool calls",
+    ("tool",),
+)
+tool_calls_per_run = registry.histogram(
+    "snaptop_agent_tool_calls_per_run",
+    "Tool calls made during one agent run",
+    buckets=(0, 1, 2, 3, 5, 8, 12, 20, 30, 50),
+)
+
+
+class AgentMetricsHandler(BaseCallbackHandler):
+    """
+    Times model turns and tool calls of one agent run.
+
+    Create one handler per run and pass it in the run's `callbacks` config; call
+    `finish()` once the run is over to record its tool call count. Durations are
+    also attributed to the current request's `Server-Timing` breakdown.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # run_id -> (label, start time)
+        self._started: dict[UUID, tuple[str, float]] = {}
+        self.tool_calls = 0
+
+    def _start(self, run_id: UUID, label: str):
+        with self._lock:
+            self._started[run_id] = (label, time.perf_counter())
+
+    def _stop(self, run_id: UUID) -> tuple[str, float] | None:
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started is None:
+            return None
+        label, started_at = started
+        return label, time.perf_counter() - started_at
+
+    @staticmethod
+    def _model_name(serialized: dict | None, kwargs: dict) -> str:
+        params = kwargs.get("invocation_params") or {}
+        return (
+            params.get("model_name")
+            or params.get("model")
+            or (serialized or {}).get("name")
+            or "unknown"
+        )
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, self._model_name(serialized, kwargs))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, self._model_name(serialized, kwargs))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        stopped = self._stop(run_id)
+        if stopped:
+            model, elapsed = stopped
+            agent_step_seconds.observe(elapsed, model=model)
+            record_timing("agent.llm", elapsed)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.on_llm_end(None, run_id=run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, (serialized or {}).get("name") or "unknown")
+
+    def _end_tool(self, run_id: UUID, outcome: str):
+        stopped = self._stop(run_id)
+        if stopped:
+            tool, elapsed = stopped
+            tool_seconds.observe(elapsed, tool=tool, outcome=outcome)
+            tool_calls_total.inc(tool=tool)
+            record_timing(f"tool.{tool}", elapsed)
+            with self._lock:
+                self.tool_calls += 1
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end_tool(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end_tool(run_id, "error")
+
+    def finish(self):
+        """Record the number of tool calls made during the run."""
+        tool_calls_per_run.observe(self.tool_calls)
@@ -0,0 +1,191 @@
+"""Two-tier cache for external API results.
+
+Results of remote lookups (FatSecret, OpenFoodFacts) are cached in an
+in-process `LRUCache` and, when a path is configured, in a SQLite file that
+survives restarts and is shared by every server process on the host. A lookup
+checks memory first, then disk (promoting what it finds), and only then the
+remote API.
+
+Empty results are cached too ("negative caching"), for a shorter TTL, so a
+query nothing matches is not sent again on every recipe. Failed calls are not
+cached at all.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from backend.src.common.cache import LRUCache
+from backend.src.common.ingredient_names import normalize_name
+from backend.src.common.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+lookups_total = registry.counter(
+    "snaptop_api_cache_lookups_total",
+    "External API cache lookups, by cache and the tier that answered (memory, disk or miss)",
+    ("cache", "tier"),
+)
+
+
+def cache_key(query: str, **params) -> str:
+    """Key of a lookup: the normalized query plus its other parameters, in a stable order."""
+    return json.dumps({"q": normalize_name(query), **params}, sort_keys=True, separators=(",", ":"))
+
+
+def _is_empty(value) -> bool:
+    return value is None or (isinstance(value, (list, dict)) and not value)
+
+
+class TieredCache:
+    """
+    LRU cache in front of an optional SQLite store.
+
+    Values must be JSON-serializable. Several caches can share one SQLite file;
+    each keeps its rows under its own `name`.
+
+    Args:
+        name (str): Cache name, used for the SQLite namespace and metrics.
+        max_entries (int): Entries kept in memory.
+        ttl (float): Seconds a non-empty result stays valid.
+        negative_ttl (float): Seconds an empty result stays valid.
+        path (str, optional): SQLite file; None keeps the cache in memory only.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        ttl: float,
+        negative_ttl: float,
+        path: str | None = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.path = path
+        self._memory = LRUCache(max_entries=max_entries, ttl=ttl)
+        self._lock = threading.Lock()
+        self._counts = {"memory": 0, "disk": 0, "miss": 0, "negative": 0}
+        if path:
+            self._init_db()
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS api_cache (
+                  namespace TEXT NOT NULL,
+                  key TEXT NOT NULL,
+                  value TEXT NOT NULL,
+                  expires_at REAL NOT NULL,
+                  PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            removed = conn.execute(
+                "DELETE FROM api_cache WHERE namespace = ? AND expires_at <= ?",
+                (self.name, time.time()),
+            ).rowcount
+        if removed:
+            logger.info("Removed %s expired %s cache entries from %s", removed, self.name, self.path)
+
+    @contextmanager
+    def _connect(self):
+        # One connection per call, as in SQLiteJobStore: safe from any thread or process
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _count(self, tier: str, value=None):
+        with self._lock:
+            self._counts[tier] += 1
+            if tier != "miss" and _is_empty(value):
+                self._counts["negative"] += 1
+        lookups_total.inc(cache=self.name, tier=tier)
+
+    def get(self, key: str, default=MISSING):
+        """Cached value for `key` from memory or disk, or `default`."""
+        value = self._memory.get(key, MISSING)
+        if value is not MISSING:
+            self._count("memory", value)
+            return value
+        if self.path:
+            now = time.time()
+            try:
+                with self._connect() as conn:
+                    row = conn.execute(
+                        "SELECT value, expires_at FROM api_cache "
+                        "WHERE namespace = ? AND key = ? AND expires_at > ?",
+                        (self.name, key, now),
+                    ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("Reading the %s cache failed: %s", self.name, e)
+                row = None
+            if row is not None:
+                value = json.loads(row[0])
+                self._memory.put(key, value, ttl=row[1] - now)
+                self._count("disk", value)
+                return value
+        self._count("miss")
+        return default
+
+    def put(self, key: str, value, ttl: float | None = None):
+        """Store a result in both tiers; empty results get `negative_ttl` unless `ttl` is given."""
+        if ttl is None:
+            ttl = self.negative_ttl if _is_empty(value) else self.ttl
+        self._memory.put(key, value, ttl=ttl)
+        if self.path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO api_cache (namespace, key, value, expires_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (self.name, key, json.dumps(value), time.time() + ttl),
+                    )
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning("Writing the %s cache failed: %s", self.name, e)
+
+    def __contains__(self, key: str) -> bool:
+        """Whether `key` is cached in either tier, without counting a lookup."""
+        if self._memory.peek(key, MISSING) is not MISSING:
+            return True
+        if not self.path:
+            return False
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT 1 FROM api_cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.name, key, time.time()),
+            ).fetchone() is not None
+
+    def stats(self) -> dict:
+        """Hits per tier, misses, negative hits and entries per tier."""
+        with self._lock:
+            stats = {
+                "memory_hits": self._counts["memory"],
+                "disk_hits": self._counts["disk"],
+                "misses": self._counts["miss"],
+                "negative_hits": self._counts["negative"],
+            }
+        stats["memory_entries"] = len(self._memory)
+        if self.path:
+            try:
+                with self._connect() as conn:
+                    stats["disk_entries"] = conn.execute(
+                        "SELECT COUNT(*) FROM api_cache WHERE namespace = ? AND expires_at > ?",
+                        (self.name, time.time()),
+                    ).fetchone()[0]
+            except sqlite3.Error:
+                pass
+        return stats
@@ -0,0 +1,107 @@
+import sqlite3
+
+import pytest
+
+from backend.src.common import api_cache, cache
+from backend.src.common.api_cache import MISSING, TieredCache, cache_key
+
+
+class FakeClock:
+    """Stands in for the `time` module of the caches; `advance` moves both clocks."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(api_cache, "time", fake)
+    monkeypatch.setattr(cache, "time", fake)
+    return fake
+
+
+def _cache(path=None, **kwargs) -> TieredCache:
+    options = {"max_entries": 100, "ttl": 3600.0, "negative_ttl": 60.0, **kwargs}
+    return TieredCache("test", path=path, **options)
+
+
+def test_cache_key_normalizes_the_query():
+    assert cache_key("Chicken Breast!", max_results=5) == cache_key("  chicken   breast", max_results=5)
+    assert cache_key("chicken breast", max_results=5) != cache_key("chicken breast", max_results=10)
+
+
+def test_results_expire_after_their_ttl(clock):
+    tiered = _cache()
+    tiered.put("k", [{"food_id": "1"}])
+    clock.advance(3599)
+    assert tiered.get("k") == [{"food_id": "1"}]
+    clock.advance(2)
+    assert tiered.get("k") is MISSING
+    assert tiered.get("k", None) is None
+
+
+def test_empty_results_use_the_negative_ttl(clock):
+    tiered = _cache()
+    tiered.put("none", [])
+    tiered.put("explicit", [], ttl=600)
+    clock.advance(59)
+    assert tiered.get("none") == []
+    assert tiered.stats()["negative_hits"] == 1
+    clock.advance(2)
+    assert "none" not in tiered
+    assert tiered.get("explicit") == []
+
+
+def test_sqlite_tier_is_shared_and_promoted_to_memory(tmp_path, clock):
+    path = str(tmp_path / "api_cache.db")
+    _cache(path).put("k", {"calories": 165})
+
+    # A second process: empty memory, same file
+    other = _cache(path)
+    assert "k" in other
+    assert other.get("k") == {"calories": 165}
+    assert other.get("k") == {"calories": 165}
+    stats = other.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+    assert (stats["memory_entries"], stats["disk_entries"]) == (1, 1)
+
+    # Caches sharing the file keep separate namespaces
+    assert TieredCache("other", 100, 3600.0, 60.0, path=path).get("k") is MISSING
+
+
+def test_promoted_entries_keep_their_disk_expiry(tmp_path, clock):
+    path = str(tmp_path / "api_cache.db")
+    _cache(path).put("k", ["hit"])
+    clock.advance(3000)
+    other = _cache(path)
+    assert other.get("k") == ["hit"]
+    clock.advance(601)
+    assert other.get("k") is MISSING
+
+
+def test_expired_rows_are_purged_on_open(tmp_path, clock):
+    path = str(tmp_path / "api_cache.db")
+    tiered = _cache(path)
+    tiered.put("fresh", ["x"])
+    tiered.put("stale", [])
+    TieredCache("other", 100, 1.0, 1.0, path=path).put("elsewhere", ["y"])
+    clock.advance(120)
+
+    _cache(path)
+    conn = sqlite3.connect(path)
+    try:
+        rows = sorted(conn.execute("SELECT namespace, key FROM api_cache").fetchall())
+    finally:
+        conn.close()
+    # Only this cache's namespace is purged when it opens the file
+    assert rows == [("other", "elsewhere"), ("test", "fresh")]
@@ -0,0 +1,160 @@
+"""In-process caching primitives shared across the backend."""
+
+import asyncio
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and optional size bound in bytes.
+
+    Entries are evicted least-recently-used first when either `max_entries` or
+    `max_bytes` is exceeded, and lazily once they are older than `ttl` seconds.
+
+    Args:
+        max_entries (int): Maximum number of entries.
+        ttl (float | None): Seconds an entry stays valid; None keeps entries forever.
+        max_bytes (int | None): Maximum total size of all entries, as measured by `sizeof`.
+        sizeof (callable, optional): Returns an entry's size in bytes. Defaults to `sys.getsizeof`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float | None = None,
+        max_bytes: int | None = None,
+        sizeof=None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or sys.getsizeof
+        self._lock = threading.Lock()
+        # key -> (value, expires_at, size)
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Return the cached value for `key`, or `default` if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at, _size = entry
+            if expires_at is not None and expires_at <= now:
+                self._remove_locked(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key, default=None):
+        """Like `get`, but without touching recency or hit/miss counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[1] is not None and entry[1] <= time.monotonic()):
+                return default
+            return entry[0]
+
+    def put(self, key, value, ttl: float | None = None):
+        """
+        Store a value, evicting older entries as needed.
+
+        Values larger than `max_bytes` on their own are not cached.
+        """
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove_locked(oldest)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        """Remove and return an entry, ignoring its expiry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._remove_locked(key)
+            return entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current occupancy."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _remove_locked(self, key):
+        _value, _expires_at, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent async calls that share a key into one execution.
+
+    The first caller for a key starts the work as its own task; everyone who
+    asks for the same key while it is running awaits that task. A caller being
+    cancelled does not cancel the shared work for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: dict = {}
+
+    def __contains__(self, key) -> bool:
+        return key in self._in_flight
+
+    async def do(self, key, func):
+        """
+        Run `func()` (a coroutine function) once per key at a time.
+
+        Returns:
+            tuple: (result, shared) where `shared` is True if this caller joined
+                a call another caller had already started.
+        """
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        return await asyncio.shield(task), shared
+
+    def _finished(self, key, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,106 @@
+"""Shared HTTP clients for calls to external APIs.
+
+Every tool used to call `requests.get`/`requests.post` directly, which opens a
+new TCP and TLS connection per call. The clients here are created once per
+process and keep connections alive in per-host pools:
+
+- `get_session()`: a `requests.Session` for the synchronous tools (they run on
+  worker threads inside the agent). It also downloads recipe pages.
+- `get_async_client()`: an `httpx.AsyncClient` for code on the event loop, with
+  optional HTTP/2 (SNAPTOP_HTTP2=true, requires the `h2` package).
+
+Both apply the configured timeouts to every request that does not pass its own.
+"""
+
+import functools
+import importlib.util
+import logging
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend.src.common.utils import get_env_bool, get_env_float, get_env_int
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "SnapTop/1.0 (contact: dev@snaptop.example)"
+
+# Hosts with their own connection pool, and connections kept per host
+POOL_HOSTS = get_env_int("SNAPTOP_HTTP_POOL_HOSTS", 16)
+POOL_SIZE = get_env_int("SNAPTOP_HTTP_POOL_SIZE", 32)
+# Seconds to establish a connection, and to wait for data once connected
+CONNECT_TIMEOUT = get_env_float("SNAPTOP_HTTP_CONNECT_TIMEOUT", 3.05)
+READ_TIMEOUT = get_env_float("SNAPTOP_HTTP_READ_TIMEOUT", 10.0)
+# Idle keep-alive connections are closed after this many seconds (async client)
+KEEPALIVE_EXPIRY = get_env_float("SNAPTOP_HTTP_KEEPALIVE_EXPIRY", 30.0)
+
+
+class _PooledSession(requests.Session):
+    """A `requests.Session` that applies the default timeouts."""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+        return super().request(method, url, **kwargs)
+
+
+@functools.cache
+def get_session() -> requests.Session:
+    """
+    The process-wide synchronous HTTP session, created on first use.
+
+    Sessions are safe to share between the worker threads that run tools: the
+    urllib3 pool behind the adapter hands each request its own connection.
+    """
+    session = _PooledSession()
+    # Retries are decided by callers, which know whether a request is idempotent
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def _http2_enabled() -> bool:
+    if not get_env_bool("SNAPTOP_HTTP2", False):
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("SNAPTOP_HTTP2 is set but the h2 package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+_async_client: httpx.AsyncClient | None = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    The process-wide asynchronous HTTP client, created on first use.
+
+    Must be called from the server's event loop; the client's pools belong to it.
+    """
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            http2=_http2_enabled(),
+            limits=httpx.Limits(
+                max_connections=POOL_HOSTS * POOL_SIZE,
+                max_keepalive_connections=POOL_SIZE,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+        )
+    return _async_client
+
+
+async def close_http_clients():
+    """Close pooled connections; called on server shutdown."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if get_session.cache_info().currsize:
+        get_session().close()
+        get_session.cache_clear()
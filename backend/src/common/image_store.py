@@ -0,0 +1,113 @@
+"""Content-addressed storage for generated recipe images.
+
+Images are stored under the SHA-256 of their bytes, so an image's address
+never changes once written. That lets the API serve them with strong ETags
+and `Cache-Control: immutable`, and lets recipes carry a short URL instead of
+megabytes of inline base64.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+
+# URL path under which the API serves stored images
+IMAGE_URL_PREFIX = "/api/images/"
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_valid_digest(digest: str) -> bool:
+    """True if `digest` looks like a SHA-256 hex digest produced by `put`."""
+    return bool(_DIGEST_RE.match(digest))
+
+
+def image_url(digest: str) -> str:
+    """API URL for a stored image."""
+    return f"{IMAGE_URL_PREFIX}{digest}"
+
+
+def digest_from_url(url: str | None) -> str | None:
+    """Extract the digest from a URL built by `image_url`, or None."""
+    if not url or not url.startswith(IMAGE_URL_PREFIX):
+        return None
+    digest = url[len(IMAGE_URL_PREFIX):]
+    return digest if is_valid_digest(digest) else None
+
+
+class ImageStore(ABC):
+    """Interface for content-addressed image storage (hash -> bytes)."""
+
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        """Store image bytes and return their SHA-256 hex digest."""
+
+    @abstractmethod
+    def get(self, digest: str) -> bytes | None:
+        """Return the bytes stored under `digest`, or None if absent."""
+
+    @abstractmethod
+    def exists(self, digest: str) -> bool:
+        """True if an image is stored under `digest`."""
+
+
+class FilesystemImageStore(ImageStore):
+    """
+    Stores images as files under a root directory, sharded by digest prefix.
+
+    Args:
+        root (str): Directory that holds the images.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        if not is_valid_digest(digest):
+            raise ValueError(f"Invalid image digest: {digest}")
+        return os.path.join(self.root, digest[:2], f"{digest}.png")
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest
+
+    def get(self, digest: str) -> bytes | None:
+        if not is_valid_digest(digest):
+            return None
+        try:
+            with open(self._path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def exists(self, digest: str) -> bool:
+        return is_valid_digest(digest) and os.path.exists(self._path(digest))
+
+
+def get_image_store_dir() -> str:
+    """
+    Returns the image store directory from the SNAPTOP_IMAGE_STORE_DIR env var,
+    or a `snaptop-images` directory under the system temp dir if not set.
+    """
+    return os.getenv(
+        "SNAPTOP_IMAGE_STORE_DIR", os.path.join(tempfile.gettempdir(), "snaptop-images")
+    )
+
+
+image_store: ImageStore = FilesystemImageStore(get_image_store_dir())
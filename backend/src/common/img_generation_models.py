@@ -1,11 +1,15 @@
+import functools
+
 import vertexai
 from vertexai.preview.vision_models import ImageGenerationModel
 from backend.src.common.utils import get_project_name
 
 
+@functools.cache
 def initialize_vertexai(project=None, location="us-central1"):
     """
     Initialize Vertex AI with the specified project and location.
+    Runs once per (project, location); later calls are no-ops.
 
     Args:
         project (str, optional): GCP project name. Defaults to get_project_name().
@@ -16,6 +20,7 @@ def initialize_vertexai(project=None, location="us-central1"):
     vertexai.init(project=project, location=location)
 
 
+@functools.cache
 def get_imagen_fast(project=None):
     """
     Get the Imagen 3.0 Fast model for quick image generation.
@@ -24,12 +29,13 @@ def get_imagen_fast(project=None):
         project (str, optional): GCP project name. Defaults to get_project_name().
 
     Returns:
-        ImageGenerationModel: Initialized Imagen model
+        ImageGenerationModel: Initialized Imagen model, shared across calls
     """
     initialize_vertexai(project=project)
     return ImageGenerationModel.from_pretrained("imagen-3.0-fast-generate-001")
 
 
+@functools.cache
 def get_imagen_standard(project=None):
     """
     Get the standard Imagen 3.0 model for higher quality image generation.
@@ -38,7 +44,7 @@ def get_imagen_standard(project=None):
         project (str, optional): GCP project name. Defaults to get_project_name().
 
     Returns:
-        ImageGenerationModel: Initialized Imagen model
+        ImageGenerationModel: Initialized Imagen model, shared across calls
     """
     initialize_vertexai(project=project)
     return ImageGenerationModel.from_pretrained("imagen-3.0-generate-001")
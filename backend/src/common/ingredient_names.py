@@ -0,0 +1,264 @@
+"""Canonical ingredient names and IDs.
+
+Recipes spell the same ingredient many ways ("Chicken Breasts", "chicken
+breast, diced", "boneless skinless chicken breasts"). Two levels of
+canonicalization are provided:
+
+- `canonical_name` reduces a name to a stable string: lower-cased, accents
+  removed, without preparation notes and descriptors, head noun singular.
+- `IngredientIndex` maps names to canonical IDs from a synonym table
+  (`ingredient_synonyms.py`). A name whose canonical form is a known synonym
+  resolves with one dict lookup. Otherwise only a misspelling of a synonym is
+  accepted: the closest synonym by character n-gram similarity (Dice
+  coefficient over an inverted index) with the same number of words and the
+  same head noun, scoring at least `min_score`. Anything else keeps its
+  canonical name as its ID, so "potato chips" never becomes "potato" and
+  "red wine vinegar" never becomes "rice vinegar". Compound lines such as
+  "salt and pepper" name two ingredients and stay unmatched for the same
+  reason.
+
+`canonical_id` is what nutrition lookups, their caches, request cache keys and
+shopping lists group by, so every variant of an ingredient shares one key.
+Results are memoized, so repeated names resolve in well under a microsecond.
+"""
+
+import functools
+import json
+import logging
+import os
+import re
+import unicodedata
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+
+from backend.src.common.ingredient_synonyms import SYNONYMS
+from backend.src.common.utils import get_env_float, get_env_int
+
+logger = logging.getLogger(__name__)
+
+# Descriptors that do not change what is bought
+_DESCRIPTORS = frozenset(
+    """
+    a an of or to for the as needed taste optional about approximately
+    fresh freshly organic raw large small medium extra
+    chopped diced minced sliced thinly thickly finely roughly coarsely cubed halved quartered
+    grated shredded crushed peeled seeded pitted trimmed rinsed drained softened melted
+    beaten sifted packed heaping level divided room temperature
+    boneless skinless cut into pieces inch inches
+    """.split()
+)
+
+# Irregular plurals of common ingredient nouns
+_IRREGULAR_SINGULARS = {
+    "leaves": "leaf",
+    "cookies": "cookie",
+    "pies": "pie",
+    "brownies": "brownie",
+    "smoothies": "smoothie",
+    "loaves": "loaf",
+    "halves": "half",
+    "knives": "knife",
+    "chives": "chives",
+    "molasses": "molasses",
+    "hummus": "hummus",
+    "asparagus": "asparagus",
+    "couscous": "couscous",
+    "swiss": "swiss",
+    "greens": "greens",
+    "oats": "oats",
+    "grits": "grits",
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _fold(text: str) -> str:
+    """Lower-case and strip accents ("jalapeño" -> "jalapeno")."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_name(name: str) -> str:
+    """Lower-case a name, strip accents and collapse punctuation and whitespace."""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", _fold(name)).split())
+
+
+def singularize(word: str) -> str:
+    """Singular form of an English ingredient noun, by simple suffix rules."""
+    if word in _IRREGULAR_SINGULARS:
+        return _IRREGULAR_SINGULARS[word]
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "sses", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+@functools.lru_cache(maxsize=16384)
+def canonical_name(name: str) -> str:
+    """
+    Reduce an ingredient name to its canonical form.
+
+    Text after a comma or inside parentheses is a preparation note and is
+    dropped, as are descriptors such as "fresh" or "diced".
+
+    Args:
+        name (str): Ingredient name as written, e.g. `"Chicken Breasts, diced"`
+
+    Returns:
+        str: Canonical name, e.g. `"chicken breast"`
+    """
+    text = re.sub(r"\(.*?\)", " ", _fold(name)).split(",", 1)[0]
+    words = [w for w in _WORD.findall(text) if w not in _DESCRIPTORS]
+    if not words:
+        return normalize_name(name)
+    words[-1] = singularize(words[-1])
+    return " ".join(words)
+
+
+@dataclass(frozen=True)
+class IngredientMatch:
+    """How a name resolved to a canonical ID."""
+
+    id: str
+    score: float  # 1.0 for exact synonym matches, n-gram similarity for fuzzy ones
+    method: str  # "exact", "fuzzy" or "unknown"
+
+
+def _ngrams(text: str, n: int) -> set[str]:
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+
+class IngredientIndex:
+    """
+    Resolves free-text ingredient names to canonical IDs.
+
+    Args:
+        synonyms (dict): `{id: [synonym, ...]}`; each ID is also a synonym of itself.
+        ngram (int): Length of the character n-grams used for fuzzy matching.
+        min_score (float): Minimum Dice similarity of a fuzzy (misspelling) match.
+        cache_size (int): Number of resolved names memoized.
+    """
+
+    def __init__(
+        self,
+        synonyms: dict[str, Iterable[str]],
+        ngram: int = 3,
+        min_score: float = 0.85,
+        cache_size: int = 16384,
+    ):
+        self.ngram = ngram
+        self.min_score = min_score
+        # Canonical form of every synonym -> ID, and ID -> its synonyms' canonical forms
+        self._exact: dict[str, str] = {}
+        self._synonyms: dict[str, list[str]] = {}
+        for ingredient_id, names in synonyms.items():
+            for name in (ingredient_id, *names):
+                key = canonical_name(name)
+                existing = self._exact.setdefault(key, ingredient_id)
+                if existing != ingredient_id:
+                    logger.debug("Synonym %r of %r already maps to %r", name, ingredient_id, existing)
+                elif key not in self._synonyms.setdefault(ingredient_id, []):
+                    self._synonyms[ingredient_id].append(key)
+
+        # Inverted index: n-gram -> indices of the terms containing it
+        self._terms = list(self._exact)
+        postings: dict[str, list[int]] = {}
+        sizes = []
+        for index, term in enumerate(self._terms):
+            grams = _ngrams(term, ngram)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(index)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._term_sizes = np.array(sizes, dtype=np.float64)
+        self.match = functools.lru_cache(maxsize=cache_size)(self._match)
+
+    def __len__(self) -> int:
+        """Number of distinct synonym terms."""
+        return len(self._terms)
+
+    def _match(self, name: str) -> IngredientMatch:
+        key = canonical_name(name)
+        ingredient_id = self._exact.get(key)
+        if ingredient_id is not None:
+            return IngredientMatch(ingredient_id, 1.0, "exact")
+
+        grams = _ngrams(key, self.ngram)
+        shared = np.zeros(len(self._terms), dtype=np.float64)
+        for gram in grams:
+            ids = self._postings.get(gram)
+            if ids is not None:
+                shared[ids] += 1.0
+        if shared.any():
+            scores = 2.0 * shared / (len(grams) + self._term_sizes)
+            words = key.split()
+            # Best candidates first; only those above the threshold are considered
+            for best in np.argsort(-scores, kind="stable"):
+                if scores[best] < self.min_score:
+                    break
+                term = self._terms[best].split()
+                # A misspelling keeps its words: no dropped or added tokens, same head noun
+                if len(term) == len(words) and term[-1] == words[-1]:
+                    return IngredientMatch(self._exact[self._terms[best]], float(scores[best]), "fuzzy")
+        return IngredientMatch(key, 0.0, "unknown")
+
+    def canonical_id(self, name: str) -> str:
+        """Canonical ID of an ingredient name (its canonical form if it is unknown)."""
+        return self.match(name).id
+
+    def synonyms(self, ingredient_id: str) -> list[str]:
+        """Canonical forms of the synonyms of an ID, the ID itself first; empty if it is unknown."""
+        return list(self._synonyms.get(ingredient_id, ()))
+
+    def canonical_ids(self, names: Iterable[str]) -> list[str]:
+        """Canonical IDs of many names, resolving each distinct name once."""
+        names = list(names)
+        resolved = {name: self.match(name).id for name in dict.fromkeys(names)}
+        return [resolved[name] for name in names]
+
+
+def load_synonyms(path: str | None = None) -> dict[str, list[str]]:
+    """
+    The built-in synonym table, extended with a JSON file of the same shape.
+
+    Args:
+        path (str, optional): JSON file (`{"id": ["synonym", ...]}`); defaults
+            to SNAPTOP_INGREDIENT_SYNONYMS_FILE
+    """
+    synonyms = {ingredient_id: list(names) for ingredient_id, names in SYNONYMS.items()}
+    path = path or os.getenv("SNAPTOP_INGREDIENT_SYNONYMS_FILE")
+    if path:
+        with open(path, "r") as f:
+            for ingredient_id, names in json.load(f).items():
+                synonyms.setdefault(canonical_name(ingredient_id), []).extend(names)
+    return synonyms
+
+
+@functools.cache
+def get_ingredient_index() -> IngredientIndex:
+    """The process-wide ingredient index, built on first use."""
+    index = IngredientIndex(
+        load_synonyms(),
+        min_score=get_env_float("SNAPTOP_INGREDIENT_MATCH_MIN_SCORE", 0.85),
+        cache_size=get_env_int("SNAPTOP_INGREDIENT_MATCH_CACHE_SIZE", 16384),
+    )
+    logger.info("Ingredient index built with %s synonyms", len(index))
+    return index
+
+
+def canonical_id(name: str) -> str:
+    """Canonical ID of an ingredient name, using the process-wide index."""
+    return get_ingredient_index().canonical_id(name)
+
+
+def canonical_ids(names: Iterable[str]) -> list[str]:
+    """Canonical IDs of many ingredient names, using the process-wide index."""
+    return get_ingredient_index().canonical_ids(names)
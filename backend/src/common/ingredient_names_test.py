@@ -0,0 +1,70 @@
+import pytest
+
+from backend.src.common.ingredient_names import IngredientIndex, canonical_id, canonical_name, load_synonyms
+
+
+@pytest.mark.parametrize(
+    "name, other",
+    [
+        ("chicken sausage", "ground chicken"),
+        ("turkey bacon", "ground turkey"),
+        ("vegan butter", "butter"),
+        ("almond butter", "butter"),
+        ("butter cookies", "butter"),
+        ("red wine vinegar", "rice vinegar"),
+        ("chickpea flour", "chickpea"),
+        ("potato chips", "potato"),
+        ("tomato soup", "tomato"),
+        ("garlic bread", "garlic"),
+        ("apple juice", "apple"),
+        ("onion rings", "green onion"),
+        ("chocolate milk", "dark chocolate"),
+    ],
+)
+def test_different_ingredients_keep_their_identity(name, other):
+    assert canonical_id(name) != canonical_id(other)
+    assert canonical_id(name) == canonical_name(name)
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("Chicken Breasts, diced", "chicken breast"),
+        ("boneless skinless chicken breasts", "chicken breast"),
+        ("scallions", "green onion"),
+        ("garbanzo beans", "chickpea"),
+        ("unsalted butter", "butter"),
+        ("rice wine vinegar", "rice vinegar"),
+        ("Jalapeño (seeded)", "jalapeno"),
+    ],
+)
+def test_synonyms_resolve_to_one_id(name, expected):
+    assert canonical_id(name) == expected
+
+
+def test_and_is_part_of_the_name():
+    assert canonical_name("half and half") == "half and half"
+
+
+@pytest.mark.parametrize("name", ["salt and pepper", "Salt and pepper, to taste", "oil and vinegar"])
+def test_compound_lines_stay_unmatched(name):
+    match = IngredientIndex(load_synonyms()).match(name)
+    assert match.method == "unknown"
+    assert match.id not in {"salt", "black pepper", "vegetable oil", "vinegar"}
+
+
+def test_plural_cookies():
+    assert canonical_name("butter cookies") == "butter cookie"
+
+
+def test_fuzzy_match_accepts_a_close_misspelling_only():
+    index = IngredientIndex({"worcestershire sauce": ()}, min_score=0.85)
+    match = index.match("worchestershire sauce")
+    assert (match.id, match.method) == ("worcestershire sauce", "fuzzy")
+    assert match.score >= 0.85
+
+
+def test_fuzzy_match_never_drops_words():
+    index = IngredientIndex({"rice vinegar": (), "butter": ()}, min_score=0.5)
+    assert index.match("red wine vinegar").method == "unknown"
+    assert index.match("vegan butter").method == "unknown"
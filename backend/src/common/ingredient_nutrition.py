@@ -0,0 +1,173 @@
+"""Per-ingredient nutrition: per-100 g profiles and the amounts a recipe line contributes.
+
+Profiles come from the local nutrition database (`nutrition_db.py`) when one is
+configured and has the ingredient, and otherwise from the FatSecret search
+behind the `get_nutrition` tool, whose results describe each food as e.g.
+`"Per 100g - Calories: 165kcal | Fat: 3.57g | Carbs: 0.00g | Protein: 31.02g"`.
+They are scaled to 100 g and cached per canonical ingredient ID, so an
+ingredient is looked up once per process no matter how many recipes use it or
+how they spell it.
+
+FatSecret search results carry calories, fat, carbs and protein only; fiber,
+sugar and sodium are left as None in the profiles built from them.
+"""
+
+import contextvars
+import logging
+import re
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.src.common.cache import LRUCache
+from backend.src.common.ingredient_names import canonical_id, canonical_ids
+from backend.src.common.nutrition_db import NUTRIENT_FIELDS, get_nutrition_db
+from backend.src.common.units import to_grams
+from backend.src.common.utils import get_env_float, get_env_int
+from backend.src.langgraph_tools.nutrition import food_entries, get_nutrition
+from backend.src.models import NutritionProfile
+
+logger = logging.getLogger(__name__)
+
+# Labels of a FatSecret food description -> nutrient field
+_DESCRIPTION_LABELS = {
+    "calories": "calories",
+    "protein": "protein_grams",
+    "carbs": "carbs_grams",
+    "fat": "fat_grams",
+    "fiber": "fiber_grams",
+    "sugar": "sugar_grams",
+    "sodium": "sodium_mg",
+}
+
+_SERVING = re.compile(r"^\s*per\s+([\d./]+)\s*([a-z .]*?)\s*-", re.IGNORECASE)
+_NUTRIENT = re.compile(r"([a-z]+)\s*:\s*([\d.]+)\s*(kcal|mg|g)?", re.IGNORECASE)
+
+# Canonical ingredient ID -> per-100 g profile, or None when nothing matched
+_PROFILE_CACHE = LRUCache(
+    max_entries=get_env_int("SNAPTOP_INGREDIENT_NUTRITION_CACHE_MAX_ENTRIES", 4096),
+    ttl=get_env_float("SNAPTOP_INGREDIENT_NUTRITION_CACHE_TTL", 86400.0),
+)
+# Misses are remembered for a shorter time so new data is picked up
+_MISS_TTL = 600.0
+_MISS = object()
+
+# Distinct ingredients are looked up concurrently, up to this many at a time
+MAX_LOOKUP_WORKERS = 8
+
+
+def _parse_number(text: str) -> float | None:
+    try:
+        if "/" in text:
+            numerator, denominator = text.split("/", 1)
+            return float(numerator) / float(denominator)
+        return float(text)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def parse_food_description(description: str, name: str | None = None) -> dict | None:
+    """
+    Turn a FatSecret food description into a per-100 g profile.
+
+    Args:
+        description (str): e.g. `"Per 1 cup - Calories: 206kcal | Fat: 0.44g | ..."`
+        name (str, optional): Food name, used to convert volume and piece servings
+
+    Returns:
+        dict | None: `{field: value per 100 g}` for the nutrients in the
+            description, or None if the serving size cannot be converted to grams
+    """
+    serving = _SERVING.match(description or "")
+    if serving is None:
+        return None
+    amount = _parse_number(serving.group(1))
+    grams = to_grams(amount, serving.group(2), name) if amount else None
+    if not grams:
+        return None
+    nutrients_text = description[serving.end():]
+    profile = {}
+    for label, value, _unit in _NUTRIENT.findall(nutrients_text):
+        field = _DESCRIPTION_LABELS.get(label.lower())
+        if field is not None:
+            profile[field] = float(value) * 100.0 / grams
+    return profile or None
+
+
+def lookup_profile(name: str) -> dict | None:
+    """
+    Per-100 g nutrition of an ingredient, from the cache, the local database or FatSecret.
+
+    Args:
+        name (str): Ingredient name as written in the recipe
+
+    Returns:
+        dict | None: `{field: value per 100 g}`, or None if no search result
+            could be converted
+    """
+    key = canonical_id(name)
+    cached = _PROFILE_CACHE.get(key)
+    if cached is not None:
+        return None if cached is _MISS else cached
+
+    db = get_nutrition_db()
+    profile = db.lookup(key) if db is not None else None
+    if profile:
+        _PROFILE_CACHE.put(key, profile)
+        return profile
+
+    try:
+        result = get_nutrition.invoke({"query": key})
+    except Exception as e:
+        # Errors are not cached: the next request tries again
+        logger.warning("Nutrition lookup for %r failed: %s", key, e)
+        return None
+
+    for food in food_entries(result):
+        profile = parse_food_description(
+            food.get("food_description", ""), food.get("food_name") or key
+        )
+        if profile:
+            _PROFILE_CACHE.put(key, profile)
+            return profile
+    _PROFILE_CACHE.put(key, _MISS, ttl=_MISS_TTL)
+    return None
+
+
+def lookup_profiles(names: Iterable[str]) -> dict[str, dict | None]:
+    """
+    `lookup_profile` for many ingredients, each distinct one looked up once.
+
+    Lookups run concurrently, since cache misses wait on FatSecret.
+
+    Returns:
+        dict: Canonical ID -> per-100 g profile, or None if it could not be resolved
+    """
+    ids = list(dict.fromkeys(canonical_ids(names)))
+    if not ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(MAX_LOOKUP_WORKERS, len(ids))) as executor:
+        # Each lookup gets its own context copy so its timings reach the caller's request
+        futures = [
+            executor.submit(contextvars.copy_context().run, lookup_profile, ingredient_id)
+            for ingredient_id in ids
+        ]
+        return {ingredient_id: future.result() for ingredient_id, future in zip(ids, futures)}
+
+
+def profile_to_nutrition(totals: dict) -> NutritionProfile:
+    """Build a `NutritionProfile` from `{field: total}`, rounding like the agent does."""
+    values = {}
+    for field in NUTRIENT_FIELDS:
+        value = totals.get(field)
+        if value is None:
+            values[field] = None
+        elif field == "calories":
+            values[field] = max(0, round(value))
+        else:
+            values[field] = max(0.0, round(value, 1))
+    return NutritionProfile(**values)
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters of the per-ingredient profile cache."""
+    return _PROFILE_CACHE.stats()
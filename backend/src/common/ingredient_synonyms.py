@@ -0,0 +1,210 @@
+"""Canonical ingredient IDs and the names that refer to them.
+
+Keys are canonical IDs: singular, lower-case names that double as nutrition
+search queries and shopping-list item names. Values are other spellings,
+regional names and common variants. Descriptors such as "fresh", "diced" or
+"boneless" need not be listed; `canonical_name` strips them before lookup.
+Extra entries can be loaded from the JSON file named by
+SNAPTOP_INGREDIENT_SYNONYMS_FILE (same shape: `{"id": ["synonym", ...]}`).
+"""
+
+SYNONYMS: dict[str, tuple[str, ...]] = {
+    # Poultry, meat and fish
+    "chicken breast": ("chicken breast fillet", "chicken breast meat", "chicken breast half", "chicken cutlet"),
+    "chicken thigh": ("chicken thigh fillet", "chicken thigh meat", "dark meat chicken"),
+    "chicken drumstick": ("chicken leg", "drumstick"),
+    "chicken wing": ("wing", "buffalo wing"),
+    "whole chicken": ("roasting chicken", "broiler chicken", "fryer chicken"),
+    "ground chicken": ("minced chicken", "chicken mince"),
+    "ground turkey": ("minced turkey", "turkey mince"),
+    "turkey breast": ("turkey breast fillet", "turkey cutlet"),
+    "ground beef": ("minced beef", "beef mince", "hamburger meat", "lean ground beef", "ground chuck"),
+    "beef steak": ("steak", "sirloin steak", "ribeye steak", "rib eye steak", "strip steak", "flank steak", "skirt steak"),
+    "beef chuck": ("chuck roast", "stewing beef", "beef stew meat", "braising steak"),
+    "pork chop": ("pork loin chop", "bone in pork chop"),
+    "pork tenderloin": ("pork fillet",),
+    "pork shoulder": ("pork butt", "boston butt"),
+    "ground pork": ("minced pork", "pork mince"),
+    "bacon": ("bacon strip", "streaky bacon", "bacon rasher", "rasher"),
+    "ham": ("cooked ham", "deli ham"),
+    "sausage": ("pork sausage", "sausage link", "italian sausage"),
+    "lamb": ("lamb shoulder", "lamb leg", "leg of lamb"),
+    "ground lamb": ("minced lamb", "lamb mince"),
+    "salmon": ("salmon fillet", "atlantic salmon", "salmon steak"),
+    "tuna": ("tuna steak", "ahi tuna"),
+    "canned tuna": ("tinned tuna", "tuna in water", "tuna in oil"),
+    "cod": ("cod fillet", "atlantic cod"),
+    "white fish": ("white fish fillet", "tilapia", "haddock", "pollock", "hake"),
+    "shrimp": ("prawn", "king prawn", "tiger prawn", "jumbo shrimp"),
+    "tofu": ("firm tofu", "extra firm tofu", "silken tofu", "bean curd"),
+    "tempeh": (),
+    "egg": ("chicken egg", "brown egg", "white egg", "free range egg"),
+    "egg white": ("egg whites",),
+    "egg yolk": ("yolk",),
+    # Dairy
+    "milk": ("whole milk", "cow milk", "dairy milk", "2 milk", "semi skimmed milk", "skim milk", "skimmed milk"),
+    "almond milk": ("unsweetened almond milk",),
+    "oat milk": ("oat drink",),
+    "soy milk": ("soya milk",),
+    "coconut milk": ("canned coconut milk", "full fat coconut milk", "light coconut milk"),
+    "butter": ("unsalted butter", "salted butter", "sweet cream butter"),
+    "heavy cream": ("double cream", "whipping cream", "heavy whipping cream"),
+    "sour cream": ("soured cream",),
+    "cream cheese": ("soft cheese",),
+    "greek yogurt": ("greek yoghurt", "strained yogurt", "plain greek yogurt"),
+    "yogurt": ("yoghurt", "plain yogurt", "natural yogurt"),
+    "cheddar cheese": ("cheddar", "sharp cheddar", "mature cheddar"),
+    "mozzarella cheese": ("mozzarella", "fresh mozzarella", "buffalo mozzarella"),
+    "parmesan cheese": ("parmesan", "parmigiano reggiano", "parmigiano", "grana padano"),
+    "feta cheese": ("feta",),
+    "cottage cheese": (),
+    "ricotta cheese": ("ricotta",),
+    # Grains, pasta and bread
+    "white rice": ("rice", "long grain rice", "jasmine rice", "basmati rice", "long grain white rice"),
+    "brown rice": ("wholegrain rice", "whole grain rice"),
+    "quinoa": ("white quinoa", "red quinoa"),
+    "rolled oats": ("oats", "oatmeal", "old fashioned oats", "porridge oats", "quick oats"),
+    "pasta": ("spaghetti", "penne", "fusilli", "macaroni", "linguine", "fettuccine", "rigatoni", "dried pasta"),
+    "egg noodle": ("egg noodles",),
+    "rice noodle": ("rice vermicelli", "rice stick"),
+    "couscous": (),
+    "bread": ("white bread", "sandwich bread", "loaf bread"),
+    "whole wheat bread": ("wholemeal bread", "whole grain bread", "wholegrain bread"),
+    "tortilla": ("flour tortilla", "wrap", "corn tortilla"),
+    "all purpose flour": ("flour", "plain flour", "white flour", "ap flour"),
+    "whole wheat flour": ("wholemeal flour",),
+    "almond flour": ("ground almond", "almond meal"),
+    "cornstarch": ("corn starch", "cornflour"),
+    "breadcrumb": ("bread crumb", "panko", "panko breadcrumb"),
+    "granola": ("muesli",),
+    # Legumes, nuts and seeds
+    "black bean": ("black turtle bean", "canned black bean"),
+    "kidney bean": ("red kidney bean", "canned kidney bean"),
+    "chickpea": ("garbanzo bean", "garbanzo", "canned chickpea"),
+    "lentil": ("red lentil", "green lentil", "brown lentil", "dried lentil"),
+    "white bean": ("cannellini bean", "navy bean", "great northern bean", "butter bean"),
+    "edamame": ("soybean", "soy bean"),
+    "peanut butter": ("smooth peanut butter", "crunchy peanut butter"),
+    "almond": ("whole almond", "raw almond", "sliced almond", "slivered almond"),
+    "walnut": ("walnut half", "walnut piece"),
+    "cashew": ("cashew nut", "raw cashew"),
+    "peanut": ("roasted peanut",),
+    "chia seed": ("chia",),
+    "flaxseed": ("flax seed", "linseed", "ground flaxseed"),
+    "sesame seed": ("sesame",),
+    # Vegetables
+    "onion": ("yellow onion", "white onion", "brown onion", "sweet onion"),
+    "red onion": ("purple onion", "spanish onion"),
+    "green onion": ("scallion", "spring onion", "salad onion"),
+    "shallot": ("eschalot",),
+    "garlic": ("garlic clove", "clove garlic", "clove of garlic"),
+    "ginger": ("ginger root", "fresh ginger root"),
+    "tomato": ("roma tomato", "plum tomato", "vine tomato", "beefsteak tomato"),
+    "cherry tomato": ("grape tomato",),
+    "canned tomato": ("tinned tomato", "chopped tomato", "crushed tomato", "tomato puree", "passata"),
+    "tomato paste": ("tomato concentrate",),
+    "potato": ("russet potato", "yukon gold potato", "baking potato", "white potato", "red potato"),
+    "sweet potato": ("yam", "kumara"),
+    "carrot": ("baby carrot",),
+    "celery": ("celery stalk", "celery rib", "stalk celery"),
+    "bell pepper": ("red bell pepper", "green bell pepper", "yellow bell pepper", "sweet pepper", "capsicum", "red pepper", "green pepper"),
+    "jalapeno": ("jalapeno pepper", "jalapeño", "jalapeño pepper"),
+    "chili pepper": ("chilli", "chili", "red chili", "green chili", "thai chili", "serrano pepper"),
+    "zucchini": ("courgette",),
+    "eggplant": ("aubergine",),
+    "broccoli": ("broccoli floret", "broccoli crown"),
+    "cauliflower": ("cauliflower floret",),
+    "spinach": ("baby spinach", "spinach leaf", "spinach leaves"),
+    "kale": ("curly kale", "lacinato kale", "tuscan kale", "cavolo nero"),
+    "lettuce": ("romaine", "romaine lettuce", "iceberg lettuce", "cos lettuce", "mixed greens", "salad greens"),
+    "cabbage": ("green cabbage", "white cabbage", "savoy cabbage"),
+    "mushroom": ("button mushroom", "cremini mushroom", "white mushroom", "baby bella mushroom", "chestnut mushroom"),
+    "cucumber": ("english cucumber", "persian cucumber"),
+    "avocado": ("hass avocado",),
+    "corn": ("sweetcorn", "sweet corn", "corn kernel", "corn on the cob"),
+    "green pea": ("pea", "frozen pea", "garden pea"),
+    "green bean": ("string bean", "french bean", "haricot vert"),
+    "asparagus": ("asparagus spear",),
+    "butternut squash": ("butternut", "winter squash"),
+    # Fruit
+    "apple": ("granny smith apple", "gala apple", "fuji apple", "honeycrisp apple", "red apple", "green apple"),
+    "banana": ("ripe banana",),
+    "lemon": (),
+    "lemon juice": ("juice of lemon", "fresh lemon juice"),
+    "lime": (),
+    "lime juice": ("juice of lime", "fresh lime juice"),
+    "orange": ("navel orange",),
+    "strawberry": (),
+    "blueberry": (),
+    "raspberry": (),
+    "mixed berry": ("berry", "frozen berry", "mixed berries"),
+    "mango": (),
+    "pineapple": (),
+    "raisin": ("sultana",),
+    "date": ("medjool date", "pitted date"),
+    # Oils, condiments and baking
+    "olive oil": ("extra virgin olive oil", "evoo", "virgin olive oil", "light olive oil"),
+    "vegetable oil": ("canola oil", "rapeseed oil", "sunflower oil", "neutral oil", "cooking oil", "corn oil"),
+    "coconut oil": ("virgin coconut oil",),
+    "sesame oil": ("toasted sesame oil",),
+    "soy sauce": ("shoyu", "tamari", "light soy sauce", "low sodium soy sauce"),
+    "fish sauce": (),
+    "vinegar": ("white vinegar", "distilled vinegar"),
+    "apple cider vinegar": ("cider vinegar",),
+    "balsamic vinegar": ("balsamic",),
+    "rice vinegar": ("rice wine vinegar",),
+    "mayonnaise": ("mayo",),
+    "dijon mustard": ("mustard", "dijon", "yellow mustard"),
+    "ketchup": ("tomato ketchup", "catsup"),
+    "hot sauce": ("sriracha", "tabasco", "chili sauce"),
+    "pizza sauce": ("marinara sauce", "marinara", "pasta sauce", "tomato sauce"),
+    "salsa": ("tomato salsa",),
+    "chicken broth": ("chicken stock", "chicken bouillon", "low sodium chicken broth"),
+    "vegetable broth": ("vegetable stock", "veggie broth", "veggie stock"),
+    "beef broth": ("beef stock",),
+    "honey": ("raw honey",),
+    "maple syrup": ("pure maple syrup",),
+    "sugar": ("white sugar", "granulated sugar", "caster sugar", "superfine sugar"),
+    "brown sugar": ("light brown sugar", "dark brown sugar"),
+    "powdered sugar": ("icing sugar", "confectioners sugar"),
+    "baking powder": (),
+    "baking soda": ("bicarbonate of soda", "bicarb"),
+    "vanilla extract": ("vanilla", "vanilla essence", "pure vanilla extract"),
+    "cocoa powder": ("unsweetened cocoa powder", "cocoa"),
+    "dark chocolate": ("chocolate", "semisweet chocolate", "chocolate chip", "dark chocolate chip"),
+    "yeast": ("active dry yeast", "instant yeast", "dried yeast"),
+    # Herbs and spices
+    "salt": ("kosher salt", "sea salt", "table salt", "flaky salt"),
+    "black pepper": ("pepper", "ground black pepper", "cracked black pepper", "peppercorn"),
+    "basil": ("basil leaf", "sweet basil"),
+    "cilantro": ("coriander leaf", "fresh coriander", "coriander"),
+    "parsley": ("flat leaf parsley", "italian parsley", "curly parsley"),
+    "thyme": ("thyme sprig", "thyme leaf"),
+    "rosemary": ("rosemary sprig",),
+    "oregano": ("dried oregano",),
+    "dill": ("dill weed",),
+    "mint": ("mint leaf",),
+    "bay leaf": ("bay",),
+    "ground cumin": ("cumin", "cumin powder"),
+    "cumin seed": (),
+    "paprika": ("sweet paprika",),
+    "smoked paprika": ("pimenton",),
+    "chili powder": ("chilli powder",),
+    "cayenne pepper": ("cayenne", "ground cayenne"),
+    "red pepper flake": ("crushed red pepper", "chili flake", "chilli flake", "red chili flake"),
+    "ground cinnamon": ("cinnamon", "cinnamon powder"),
+    "ground turmeric": ("turmeric", "turmeric powder"),
+    "ground ginger": ("ginger powder",),
+    "garlic powder": ("granulated garlic",),
+    "onion powder": ("granulated onion",),
+    "curry powder": ("curry",),
+    "garam masala": (),
+    "italian seasoning": ("mixed herb", "dried mixed herb", "herbes de provence"),
+    "nutmeg": ("ground nutmeg",),
+    # Drinks and misc
+    "water": ("cold water", "warm water", "boiling water", "hot water", "tap water"),
+    "coffee": ("brewed coffee", "espresso"),
+    "white wine": ("dry white wine",),
+    "red wine": ("dry red wine",),
+    "protein powder": ("whey protein", "whey protein powder", "vanilla protein powder"),
+}
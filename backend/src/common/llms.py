@@ -1,10 +1,23 @@
-import google.generativeai as genai
+import functools
+
 from langchain_google_vertexai import ChatVertexAI
-from backend.src.common.utils import get_gcp_secret, get_project_name
+from backend.src.common.utils import get_secret, get_project_name
+
+
+@functools.cache
+def configure_genai():
+    """
+    Configure the google.generativeai client with the project API key.
+    Runs once per process, the first time it is called.
+    """
+    import google.generativeai as genai
 
-genai.configure(api_key=get_gcp_secret("google-cloud-api-key", version="1"))
+    genai.configure(api_key=get_secret("google-cloud-api-key", version="1"))
 
 
+# Model clients are cached per (system_prompt, project) so every caller shares
+# one client and its connection pool instead of building a new one per request.
+@functools.cache
 def get_gemini_flash(system_prompt=None, project=None):
     if project is None:
         project = get_project_name()
@@ -13,6 +26,7 @@ def get_gemini_flash(system_prompt=None, project=None):
     )
 
 
+@functools.cache
 def get_gemini_pro(system_prompt=None, project=None):
     if project is None:
         project = get_project_name()
@@ -21,6 +35,7 @@ def get_gemini_pro(system_prompt=None, project=None):
     )
 
 
+@functools.cache
 def get_gemini_flash_lite(system_prompt=None, project=None):
     if project is None:
         project = get_project_name()
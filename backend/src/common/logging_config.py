@@ -0,0 +1,228 @@
+"""Process logging: structured, size-capped and written off the request path.
+
+`configure_logging()` routes every record through a bounded queue to a single
+listener thread, which does all formatting and I/O. Callers therefore only pay
+for creating the record. Large payloads (agent results, recipes) should be
+logged with `%s` arguments wrapped in `summarize()`, so they are rendered lazily
+on the listener thread, with every string field truncated, and only if the
+record is actually emitted; an object mutated right after the call may be
+logged in its later state. Records marked `extra={"verbose": True}` are
+sampled.
+
+Settings:
+    LOG_LEVEL: Root log level (default: info).
+    SNAPTOP_LOG_FORMAT: `text` (default) or `json`.
+    SNAPTOP_LOG_MAX_MESSAGE_CHARS: Cap on a rendered message (default: 4000).
+    SNAPTOP_LOG_MAX_FIELD_CHARS: Cap on each string inside a summarized payload
+        and on each structured field (default: 500).
+    SNAPTOP_LOG_VERBOSE_SAMPLE_RATE: Fraction of verbose records kept (default: 0.05).
+    SNAPTOP_LOG_QUEUE_SIZE: Records buffered for the listener before new ones
+        are dropped (default: 10000).
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+
+from backend.src.common.utils import get_env_float, get_env_int
+
+MAX_MESSAGE_CHARS = get_env_int("SNAPTOP_LOG_MAX_MESSAGE_CHARS", 4000)
+MAX_FIELD_CHARS = get_env_int("SNAPTOP_LOG_MAX_FIELD_CHARS", 500)
+
+# Longest list rendered by `summarize` before the rest is elided
+_MAX_ITEMS = 50
+_MAX_DEPTH = 6
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "verbose"}
+
+
+def truncate(text: str, limit: int) -> str:
+    """Cut `text` to `limit` characters, noting how much was dropped."""
+    if limit <= 0 or len(text) <= limit:
+        return text
+    return f"{text[:limit]}...[+{len(text) - limit} chars]"
+
+
+def _shrink(value, limit: int, depth: int = 0):
+    """Copy of `value` reduced to JSON-friendly types with long strings and lists cut."""
+    if depth >= _MAX_DEPTH:
+        return truncate(repr(value), limit)
+    if hasattr(value, "model_dump"):
+        # Pydantic models, including LangChain messages
+        try:
+            value = value.model_dump()
+        except Exception:
+            return truncate(repr(value), limit)
+    if isinstance(value, str):
+        return truncate(value, limit)
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _shrink(v, limit, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        items = [_shrink(v, limit, depth + 1) for v in list(value)[:_MAX_ITEMS]]
+        if len(value) > _MAX_ITEMS:
+            items.append(f"...[+{len(value) - _MAX_ITEMS} items]")
+        return items
+    return truncate(str(value), limit)
+
+
+class _Summary:
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value, limit: int):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        try:
+            return json.dumps(_shrink(self.value, self.limit), default=str)
+        except Exception:
+            return truncate(repr(self.value), self.limit)
+
+    __repr__ = __str__
+
+
+def summarize(value, limit: int | None = None) -> _Summary:
+    """
+    Lazy, truncated rendering of a log argument.
+
+    Nothing is computed until the record is formatted on the listener thread,
+    so a payload that is filtered out or sampled away costs nothing.
+
+    Example:
+        logger.info("Agent result: %s", summarize(result))
+
+    Args:
+        value: Object to render (pydantic models, dicts, lists, strings, ...).
+        limit (int, optional): Cap for each string inside `value`.
+    """
+    return _Summary(value, MAX_FIELD_CHARS if limit is None else limit)
+
+
+class TextFormatter(logging.Formatter):
+    """Classic text lines with the rendered message capped in size."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = truncate(record.message, MAX_MESSAGE_CHARS)
+        return super().formatMessage(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields are included, each truncated."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate(record.getMessage(), MAX_MESSAGE_CHARS),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = _shrink(value, MAX_FIELD_CHARS)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class VerboseSampler(logging.Filter):
+    """
+    Keeps only a fraction of records logged with `extra={"verbose": True}`.
+
+    Args:
+        rate (float): Probability that a verbose record is kept.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "verbose", False):
+            return True
+        return self.rate >= 1.0 or random.random() < self.rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks and leaves formatting to the listener.
+
+    The stock handler renders the message in the calling thread; here the
+    record is passed on as is. When the queue is full the record is dropped
+    and counted in `dropped` rather than stalling the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: logging.handlers.QueueListener | None = None
+_handler: DroppingQueueHandler | None = None
+
+
+def configure_logging() -> logging.handlers.QueueListener:
+    """
+    Install the queue-backed handler on the root logger and start its listener.
+
+    Safe to call more than once; later calls return the running listener.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return _listener
+
+    if os.getenv("SNAPTOP_LOG_FORMAT", "text").lower() == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = TextFormatter()
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(formatter)
+
+    handler = DroppingQueueHandler(queue.Queue(get_env_int("SNAPTOP_LOG_QUEUE_SIZE", 10000)))
+    handler.addFilter(VerboseSampler(get_env_float("SNAPTOP_LOG_VERBOSE_SAMPLE_RATE", 0.05)))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    _handler = handler
+    root.setLevel(os.getenv("LOG_LEVEL", "info").upper())
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_records() -> int:
+    """Records discarded because the log queue was full."""
+    return _handler.dropped if _handler is not None else 0
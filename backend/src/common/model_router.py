@@ -0,0 +1,319 @@
+"""Per-request and per-turn choice of the Gemini model that runs an agent.
+
+`route_request` turns a request's features into a `ModelRoute`: the model
+tier for the final structured answer and the (cheaper) tier for the turns in
+which the agent only picks tools. Tiers, from cheapest to most capable, are
+`flash-lite`, `flash` and `pro`:
+
+- The answer tier starts at SNAPTOP_MODEL_ANSWER_TIER and moves up to `pro`
+  once the request scores SNAPTOP_MODEL_PRO_SCORE or more. Complexity
+  (medium 1, hard 2), target macros (1) and more than
+  SNAPTOP_MODEL_MANY_INGREDIENTS available ingredients (1) add to the score.
+- An endpoint can cap the tier with SNAPTOP_MODEL_MAX_TIER_<ENDPOINT>, e.g.
+  `SNAPTOP_MODEL_MAX_TIER_STREAM=flash` for the latency-bound stream.
+- Tool turns use SNAPTOP_MODEL_TOOL_TIER, never above the answer tier. The
+  turn after the agent's last tools (`answer_after`, e.g. the nutrition
+  lookups that come right before the recipe) runs directly on the answer tier.
+- A final answer that a tool-turn model produces anyway (after other tools,
+  or without calling any) is repeated on the answer tier, which costs one
+  extra answer-tier call with the whole conversation as its prompt.
+  SNAPTOP_MODEL_REPEAT_ANSWERS=false keeps the tool-tier answer instead.
+- Once a run has spent SNAPTOP_MODEL_COST_BUDGET_USD (estimated from token
+  usage) or SNAPTOP_MODEL_LATENCY_BUDGET seconds in model calls, the remaining
+  turns use the cheapest tier and no answer is repeated.
+
+`ModelRouterMiddleware` applies the route (passed as the agent's runtime
+context) to every model call of the agent, and records which models served
+the run in metrics and in the request's `Server-Timing` breakdown.
+SNAPTOP_MODEL_ROUTING=false runs every turn on the answer tier, without budgets.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+
+from backend.src.common.metrics import record_timing, registry
+from backend.src.common.utils import get_env_bool, get_env_float, get_env_int
+
+logger = logging.getLogger(__name__)
+
+TIERS = ("flash-lite", "flash", "pro")
+MODEL_NAMES = {
+    "flash-lite": "gemini-2.5-flash-lite",
+    "flash": "gemini-2.5-flash",
+    "pro": "gemini-2.5-pro",
+}
+# USD per million (input, output) tokens, used to estimate spend against the budget
+PRICES = {
+    "flash-lite": (0.10, 0.40),
+    "flash": (0.30, 2.50),
+    "pro": (1.25, 10.00),
+}
+
+COMPLEXITY_SCORES = {"easy": 0, "simple": 0, "medium": 1, "hard": 2, "complex": 2}
+
+model_turns_total = registry.counter(
+    "snaptop_model_turns_total",
+    "Agent model calls by model and phase (plan, tools, answer, budget)",
+    ("model", "phase"),
+)
+routed_requests_total = registry.counter(
+    "snaptop_model_routed_requests_total",
+    "Agent runs by endpoint and the tier chosen for their answer",
+    ("endpoint", "tier"),
+)
+tool_tier_answers_total = registry.counter(
+    "snaptop_model_tool_tier_answers_total",
+    "Final answers produced by a tool-turn model, by answer tier and whether they were repeated on it",
+    ("tier", "repeated"),
+)
+run_cost_usd = registry.histogram(
+    "snaptop_agent_run_cost_usd",
+    "Estimated model cost of one agent run",
+    buckets=(0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0),
+)
+
+
+def _tier_setting(name: str, default: str) -> str:
+    value = (os.getenv(name) or "").strip().lower()
+    return value if value in TIERS else default
+
+
+def _routing_enabled() -> bool:
+    return get_env_bool("SNAPTOP_MODEL_ROUTING", True)
+
+
+def _cheaper(a: str, b: str) -> str:
+    return a if TIERS.index(a) <= TIERS.index(b) else b
+
+
+@dataclass
+class ModelRoute:
+    """
+    Models for one agent run, and what the run has spent so far.
+
+    Passed as the agent's runtime `context`; the middleware updates the
+    spending fields as turns complete.
+
+    Args:
+        endpoint (str): Endpoint that started the run, for metrics.
+        answer_tier (str): Tier for the final structured answer.
+        tool_tier (str): Tier for turns that only select tools.
+        cost_budget (float): Estimated USD after which only the cheapest tier is used.
+        latency_budget (float): Model seconds after which only the cheapest tier is used.
+        reason (str): Features that decided the tiers, for logs.
+    """
+
+    endpoint: str
+    answer_tier: str
+    tool_tier: str
+    cost_budget: float
+    latency_budget: float
+    reason: str = ""
+    spent_usd: float = 0.0
+    model_seconds: float = 0.0
+    # model name -> turns served
+    served: dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def over_budget(self) -> bool:
+        with self._lock:
+            return self.spent_usd >= self.cost_budget or self.model_seconds >= self.latency_budget
+
+    def record(self, tier: str, seconds: float, usage: dict | None):
+        input_price, output_price = PRICES[tier]
+        cost = 0.0
+        if usage:
+            cost = (usage.get("input_tokens", 0) * input_price + usage.get("output_tokens", 0) * output_price) / 1e6
+        with self._lock:
+            self.spent_usd += cost
+            self.model_seconds += seconds
+            model = MODEL_NAMES[tier]
+            self.served[model] = self.served.get(model, 0) + 1
+
+    def summary(self) -> str:
+        with self._lock:
+            served = ", ".join(f"{model} x{turns}" for model, turns in self.served.items())
+            return f"{served or 'no model calls'}; ~${self.spent_usd:.4f}, {self.model_seconds:.1f}s in models"
+
+    def finish(self):
+        """Record the run's estimated cost; call once the agent is done."""
+        with self._lock:
+            spent = self.spent_usd
+        run_cost_usd.observe(spent)
+
+
+def route_for(
+    endpoint: str,
+    complexity: str | None = None,
+    ingredient_count: int = 0,
+    has_macros: bool = False,
+    record: bool = True,
+) -> ModelRoute:
+    """
+    Choose the models for one agent run from request features.
+
+    Args:
+        endpoint (str): e.g. generate, batch, stream, job, regenerate, modify
+        complexity (str, optional): Requested recipe complexity (easy, medium, hard)
+        ingredient_count (int): Number of available ingredients the recipe should use
+        has_macros (bool): Whether target macros were given
+        record (bool): Whether to count the run in `routed_requests_total`
+
+    Returns:
+        ModelRoute: Tiers and budgets for the run
+    """
+    score = COMPLEXITY_SCORES.get((complexity or "").strip().lower(), 0)
+    if has_macros:
+        score += 1
+    if ingredient_count > get_env_int("SNAPTOP_MODEL_MANY_INGREDIENTS", 8):
+        score += 1
+
+    answer_tier = _tier_setting("SNAPTOP_MODEL_ANSWER_TIER", "flash")
+    if score >= get_env_int("SNAPTOP_MODEL_PRO_SCORE", 3):
+        answer_tier = "pro"
+    max_tier = _tier_setting(f"SNAPTOP_MODEL_MAX_TIER_{endpoint.upper()}", "pro")
+    answer_tier = _cheaper(answer_tier, max_tier)
+    tool_tier = answer_tier
+    if _routing_enabled():
+        tool_tier = _cheaper(_tier_setting("SNAPTOP_MODEL_TOOL_TIER", "flash-lite"), answer_tier)
+
+    if record:
+        routed_requests_total.inc(endpoint=endpoint, tier=answer_tier)
+    return ModelRoute(
+        endpoint=endpoint,
+        answer_tier=answer_tier,
+        tool_tier=tool_tier,
+        cost_budget=get_env_float("SNAPTOP_MODEL_COST_BUDGET_USD", 0.05),
+        latency_budget=get_env_float("SNAPTOP_MODEL_LATENCY_BUDGET", 90.0),
+        reason=f"complexity={complexity or '-'} ingredients={ingredient_count} macros={has_macros} score={score}",
+    )
+
+
+def route_request(request, endpoint: str) -> ModelRoute:
+    """`route_for` with the features of a `GenerateRecipeRequest`."""
+    return route_for(
+        endpoint,
+        complexity=request.complexity,
+        ingredient_count=len(request.available_ingredients or []),
+        has_macros=request.target_macros is not None,
+    )
+
+
+def _is_final(response: ModelResponse, tool_names: set[str]) -> bool:
+    """Whether a turn produced the agent's answer rather than calls to its tools."""
+    if response.structured_response is not None:
+        return True
+    for message in response.result:
+        if isinstance(message, AIMessage):
+            return not any(call["name"] in tool_names for call in message.tool_calls)
+    return False
+
+
+class ModelRouterMiddleware(AgentMiddleware):
+    """
+    Runs each model turn of an agent on the tier its `ModelRoute` calls for.
+
+    Args:
+        models (callable): Returns the chat model for a tier; called on every turn,
+            so it should return cached clients.
+        default_route (callable): Builds the route for each turn of runs invoked
+            without one; their spending is not tracked across turns.
+        answer_after (iterable): Tools the agent calls last; the turn after their
+            results runs on the answer tier.
+        repeat_answers (bool): Repeat a final answer produced on the tool tier
+            with the answer tier (one extra model call); defaults to
+            SNAPTOP_MODEL_REPEAT_ANSWERS (true).
+    """
+
+    def __init__(
+        self,
+        models: Callable[[str], BaseChatModel],
+        default_route: Callable[[], ModelRoute] = lambda: route_for("default", record=False),
+        answer_after: Iterable[str] = (),
+        repeat_answers: bool | None = None,
+    ):
+        super().__init__()
+        self._models = models
+        self._default_route = default_route
+        self._answer_after = frozenset(answer_after)
+        self._repeat_answers = repeat_answers
+
+    def _route(self, request: ModelRequest) -> ModelRoute:
+        route = getattr(request.runtime, "context", None)
+        return route if isinstance(route, ModelRoute) else self._default_route()
+
+    def _phase(self, route: ModelRoute, request: ModelRequest) -> tuple[str, str]:
+        if _routing_enabled() and route.over_budget:
+            return "budget", TIERS[0]
+        # Tools whose results the model is about to read
+        latest = set()
+        for message in reversed(request.messages):
+            if not isinstance(message, ToolMessage):
+                break
+            latest.add(message.name)
+        if latest & self._answer_after:
+            return "answer", route.answer_tier
+        if any(isinstance(m, ToolMessage) for m in request.messages):
+            return "tools", route.tool_tier
+        return "plan", route.tool_tier
+
+    def _call(self, route: ModelRoute, request: ModelRequest, handler, tier: str, phase: str) -> ModelResponse:
+        started = time.perf_counter()
+        response = handler(request.override(model=self._models(tier)))
+        self._observe(route, tier, phase, time.perf_counter() - started, response)
+        return response
+
+    @staticmethod
+    def _observe(route: ModelRoute, tier: str, phase: str, seconds: float, response: ModelResponse):
+        usage = None
+        for message in response.result:
+            if isinstance(message, AIMessage):
+                usage = message.usage_metadata
+        route.record(tier, seconds, usage)
+        model_turns_total.inc(model=MODEL_NAMES[tier], phase=phase)
+        record_timing(f"model.{MODEL_NAMES[tier]}", seconds)
+
+    def _escalate(self, route: ModelRoute, request: ModelRequest, tier: str, phase: str, response: ModelResponse) -> bool:
+        if phase == "budget" or tier == route.answer_tier or route.over_budget:
+            return False
+        tool_names = {t.name for t in request.tools if hasattr(t, "name")}
+        if not _is_final(response, tool_names):
+            return False
+        repeat = self._repeat_answers
+        if repeat is None:
+            repeat = get_env_bool("SNAPTOP_MODEL_REPEAT_ANSWERS", True)
+        tool_tier_answers_total.inc(tier=route.answer_tier, repeated=str(repeat).lower())
+        if not repeat:
+            logger.info("%s produced the answer; keeping it", MODEL_NAMES[tier])
+            return False
+        logger.info("%s produced the answer; repeating the turn with %s", MODEL_NAMES[tier], MODEL_NAMES[route.answer_tier])
+        return True
+
+    def wrap_model_call(self, request: ModelRequest, handler) -> ModelResponse:
+        route = self._route(request)
+        phase, tier = self._phase(route, request)
+        response = self._call(route, request, handler, tier, phase)
+        if self._escalate(route, request, tier, phase, response):
+            response = self._call(route, request, handler, route.answer_tier, "answer")
+        return response
+
+    async def awrap_model_call(self, request: ModelRequest, handler) -> ModelResponse:
+        route = self._route(request)
+        phase, tier = self._phase(route, request)
+        started = time.perf_counter()
+        response = await handler(request.override(model=self._models(tier)))
+        self._observe(route, tier, phase, time.perf_counter() - started, response)
+        if self._escalate(route, request, tier, phase, response):
+            started = time.perf_counter()
+            response = await handler(request.override(model=self._models(route.answer_tier)))
+            self._observe(route, route.answer_tier, "answer", time.perf_counter() - started, response)
+        return response
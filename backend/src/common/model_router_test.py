@@ -0,0 +1,142 @@
+import asyncio
+from typing import Any
+
+import pytest
+from langchain.agents import create_agent
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from pydantic import BaseModel
+
+from backend.src.common.model_router import ModelRoute, ModelRouterMiddleware, route_for
+
+
+class Answer(BaseModel):
+    title: str
+
+
+class FakeModel(BaseChatModel):
+    """Calls `lookup` once, then answers; records which tier served each turn."""
+
+    tier: str
+    # Any: a list field would be copied on validation
+    calls: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls.append(self.tier)
+        if not any(isinstance(m, ToolMessage) for m in messages):
+            call = {"name": "lookup", "args": {"q": "chicken"}, "id": f"call-{len(self.calls)}"}
+        else:
+            call = {"name": "Answer", "args": {"title": f"by {self.tier}"}, "id": f"call-{len(self.calls)}"}
+        message = AIMessage(content="", tool_calls=[call])
+        message.usage_metadata = {"input_tokens": 1000, "output_tokens": 500, "total_tokens": 1500}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@tool
+def lookup(q: str) -> str:
+    """Look an ingredient up."""
+    return "found"
+
+
+def _agent(calls: list, **middleware):
+    models = {tier: FakeModel(tier=tier, calls=calls) for tier in ("flash-lite", "flash", "pro")}
+    return create_agent(
+        model=models["flash"],
+        tools=[lookup],
+        middleware=[ModelRouterMiddleware(models.__getitem__, **middleware)],
+        context_schema=ModelRoute,
+        response_format=Answer,
+    )
+
+
+def _run(agent, route: ModelRoute):
+    result = agent.invoke({"messages": [{"role": "user", "content": "dinner"}]}, context=route)
+    return result["structured_response"]
+
+
+def test_turn_after_the_last_tools_runs_on_the_answer_tier():
+    calls = []
+    route = route_for("generate", record=False)
+    answer = _run(_agent(calls, answer_after=("lookup",)), route)
+    assert calls == ["flash-lite", "flash"]
+    assert answer.title == "by flash"
+    assert route.served == {"gemini-2.5-flash-lite": 1, "gemini-2.5-flash": 1}
+
+
+def test_answer_after_other_tools_is_repeated_on_the_answer_tier_by_default(monkeypatch):
+    # e.g. a recipe written straight after recipe_search, without nutrition lookups
+    monkeypatch.delenv("SNAPTOP_MODEL_REPEAT_ANSWERS", raising=False)
+    calls = []
+    answer = _run(_agent(calls), route_for("generate", record=False))
+    assert calls == ["flash-lite", "flash-lite", "flash"]
+    assert answer.title == "by flash"
+
+
+def test_answer_from_the_tool_tier_is_kept_when_repeats_are_disabled(monkeypatch):
+    monkeypatch.setenv("SNAPTOP_MODEL_REPEAT_ANSWERS", "false")
+    calls = []
+    answer = _run(_agent(calls), route_for("generate", record=False))
+    assert calls == ["flash-lite", "flash-lite"]
+    assert answer.title == "by flash-lite"
+
+
+def test_routing_switch_is_read_per_run(monkeypatch):
+    calls = []
+    agent = _agent(calls, answer_after=("lookup",))
+    monkeypatch.setenv("SNAPTOP_MODEL_ROUTING", "false")
+    route = route_for("generate", record=False)
+    route.cost_budget = 0.0
+    assert _run(agent, route).title == "by flash"
+    assert calls == ["flash", "flash"]
+
+
+def test_over_budget_runs_stay_on_the_cheapest_tier():
+    calls = []
+    route = route_for("generate", record=False)
+    route.cost_budget = 0.0001
+    answer = _run(_agent(calls, answer_after=("lookup",), repeat_answers=True), route)
+    assert calls == ["flash-lite", "flash-lite"]
+    assert answer.title == "by flash-lite"
+    assert route.over_budget
+
+
+def test_async_runs_route_like_sync_runs():
+    calls = []
+    agent = _agent(calls, answer_after=("lookup",))
+    route = route_for("generate", record=False)
+    result = asyncio.run(agent.ainvoke({"messages": [{"role": "user", "content": "dinner"}]}, context=route))
+    assert calls == ["flash-lite", "flash"]
+    assert result["structured_response"].title == "by flash"
+
+
+@pytest.mark.parametrize(
+    "endpoint, complexity, ingredients, macros, answer_tier",
+    [
+        ("generate", "easy", 2, False, "flash"),
+        ("generate", "hard", 2, True, "pro"),
+        ("generate", "medium", 12, True, "pro"),
+        ("generate", "medium", 2, True, "flash"),
+        ("stream", "hard", 12, True, "flash"),
+    ],
+)
+def test_route_for_picks_the_answer_tier(monkeypatch, endpoint, complexity, ingredients, macros, answer_tier):
+    monkeypatch.setenv("SNAPTOP_MODEL_MAX_TIER_STREAM", "flash")
+    route = route_for(endpoint, complexity=complexity, ingredient_count=ingredients, has_macros=macros, record=False)
+    assert route.answer_tier == answer_tier
+    assert route.tool_tier == "flash-lite"
+
+
+def test_tool_tier_is_never_above_the_answer_tier(monkeypatch):
+    monkeypatch.setenv("SNAPTOP_MODEL_ANSWER_TIER", "flash-lite")
+    monkeypatch.setenv("SNAPTOP_MODEL_TOOL_TIER", "pro")
+    route = route_for("generate", record=False)
+    assert (route.answer_tier, route.tool_tier) == ("flash-lite", "flash-lite")
@@ -0,0 +1,195 @@
+"""Deterministic recipe nutrition from ingredient lines and per-100 g profiles.
+
+Each ingredient line is converted to grams (`units.to_grams`) and its
+canonical ingredient's per-100 g profile becomes one row of a nutrient matrix
+(columns in `NUTRIENT_FIELDS` order, NaN where the profile has no value). The
+recipe totals are then a single product `grams @ matrix / 100`.
+
+`check_recipe_nutrition` uses this to fill in or correct the `nutrition` the
+recipe agent returns, so the model is not relied on for arithmetic.
+"""
+
+import functools
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from backend.src.common.ingredient_names import canonical_ids
+from backend.src.common.ingredient_nutrition import (
+    NUTRIENT_FIELDS,
+    lookup_profiles,
+    profile_to_nutrition,
+)
+from backend.src.common.metrics import registry
+from backend.src.common.units import to_grams
+from backend.src.common.utils import get_env_bool, get_env_float
+from backend.src.models import Ingredient, NutritionProfile, Recipe
+
+logger = logging.getLogger(__name__)
+
+# Relative difference above which the agent's value is reported as corrected
+TOLERANCE = get_env_float("SNAPTOP_NUTRITION_TOLERANCE", 0.2)
+# Absolute differences below these never count as disagreement
+_ABSOLUTE_SLACK = {"calories": 50.0, "sodium_mg": 100.0}
+_DEFAULT_SLACK = 5.0
+
+nutrition_checks_total = registry.counter(
+    "snaptop_nutrition_checks_total",
+    "Agent nutrition checked against the computed totals, by outcome",
+    ("outcome",),
+)
+
+
+@dataclass
+class NutritionCalculation:
+    """
+    Nutrient totals of a list of ingredient lines.
+
+    Attributes:
+        totals: Sum per `NUTRIENT_FIELDS` entry, counting missing values as 0
+        reported: Whether every resolved line's profile has a value for the field
+        unresolved: Lines without a profile or with a unit that cannot be
+            converted to grams; they are left out of `totals`
+    """
+
+    totals: np.ndarray
+    reported: np.ndarray
+    unresolved: list[Ingredient] = field(default_factory=list)
+
+    @property
+    def complete(self) -> bool:
+        return not self.unresolved
+
+    def as_dict(self) -> dict:
+        """`{field: total}` for the reported fields."""
+        return {
+            name: float(total)
+            for name, total, ok in zip(NUTRIENT_FIELDS, self.totals, self.reported)
+            if ok
+        }
+
+
+@functools.lru_cache(maxsize=4096)
+def _grams_per_unit(unit: str, name: str) -> float:
+    grams = to_grams(1.0, unit, name)
+    return np.nan if grams is None else grams
+
+
+def ingredient_grams(ingredients: list[Ingredient]) -> np.ndarray:
+    """Weight of each line in grams, NaN where the unit is unknown."""
+    quantities = np.array([ing.quantity for ing in ingredients], dtype=np.float64)
+    factors = np.array([_grams_per_unit(ing.unit, ing.name) for ing in ingredients], dtype=np.float64)
+    return quantities * factors
+
+
+def profile_matrix(profiles: list[dict | None]) -> np.ndarray:
+    """Stack per-100 g profiles into an `(n, len(NUTRIENT_FIELDS))` matrix, NaN for missing values."""
+    matrix = np.full((len(profiles), len(NUTRIENT_FIELDS)), np.nan, dtype=np.float64)
+    for row, profile in enumerate(profiles):
+        if profile:
+            matrix[row] = [profile.get(name, np.nan) for name in NUTRIENT_FIELDS]
+    return matrix
+
+
+def calculate_nutrition(
+    ingredients: list[Ingredient],
+    profiles: dict[str, dict | None] | None = None,
+    signs: Iterable[float] | None = None,
+) -> NutritionCalculation:
+    """
+    Total the nutrients of ingredient lines.
+
+    Args:
+        ingredients: Recipe lines
+        profiles: Per-100 g profiles keyed by canonical ID; looked up with
+            `lookup_profiles` when not given
+        signs: Optional weight per line, e.g. -1 for removed lines to get the
+            change between two ingredient lists
+
+    Returns:
+        NutritionCalculation: Totals of the lines that could be resolved
+    """
+    ids = canonical_ids(ing.name for ing in ingredients)
+    if profiles is None:
+        profiles = lookup_profiles(ids)
+    matrix = profile_matrix([profiles.get(i) for i in ids])
+    grams = ingredient_grams(ingredients)
+    if signs is not None:
+        grams = grams * np.fromiter(signs, dtype=np.float64, count=len(ingredients))
+
+    resolved = ~np.isnan(grams) & ~np.isnan(matrix).all(axis=1)
+    present = ~np.isnan(matrix[resolved])
+    totals = np.where(resolved, grams, 0.0) @ np.nan_to_num(matrix) / 100.0
+    return NutritionCalculation(
+        totals=totals,
+        reported=present.all(axis=0) if resolved.any() else np.zeros(len(NUTRIENT_FIELDS), dtype=bool),
+        unresolved=[ing for ing, ok in zip(ingredients, resolved) if not ok],
+    )
+
+
+def _disagrees(name: str, stated: float, computed: float) -> bool:
+    difference = abs(stated - computed)
+    slack = _ABSOLUTE_SLACK.get(name, _DEFAULT_SLACK)
+    return difference > slack and difference > TOLERANCE * max(abs(stated), abs(computed))
+
+
+def reconcile_nutrition(
+    stated: NutritionProfile | None, calculation: NutritionCalculation
+) -> tuple[NutritionProfile | None, str]:
+    """
+    Merge the agent's nutrition with computed totals.
+
+    Computed values replace stated ones for every reported field when all
+    lines were resolved; a partial calculation would understate the totals,
+    so the stated values are kept as they are.
+
+    Returns:
+        tuple: The nutrition to store, and the outcome: `"filled"` (nothing was
+            stated), `"agreed"`, `"corrected"` (a field was off by more than the
+            tolerance) or `"unverified"`
+    """
+    if not calculation.complete or not calculation.reported.any():
+        return stated, "unverified"
+    computed = calculation.as_dict()
+    if stated is None:
+        return profile_to_nutrition(computed), "filled"
+
+    values = stated.model_dump()
+    outcome = "agreed"
+    for name, total in computed.items():
+        if values.get(name) is not None and _disagrees(name, values[name], total):
+            logger.info("Agent %s %s corrected to %.1f", name, values[name], total)
+            outcome = "corrected"
+        values[name] = total
+    return profile_to_nutrition(values), outcome
+
+
+def check_recipe_nutrition(recipe: Recipe) -> Recipe:
+    """
+    Fill or correct a generated recipe's `nutrition` from its ingredients.
+
+    Blocks on the lookups of ingredients not cached yet. Disabled by
+    SNAPTOP_NUTRITION_CHECK=false, in which case the agent's values are kept.
+
+    Returns:
+        Recipe: The same recipe, updated in place
+    """
+    if not get_env_bool("SNAPTOP_NUTRITION_CHECK", True) or not recipe.ingredients:
+        return recipe
+    try:
+        calculation = calculate_nutrition(recipe.ingredients)
+    except Exception as e:
+        logger.warning("Nutrition check for %s failed: %s", recipe.recipe_id, e, exc_info=True)
+        nutrition_checks_total.inc(outcome="error")
+        return recipe
+    if calculation.unresolved:
+        logger.info(
+            "Nutrition of %s not verified; unresolved: %s",
+            recipe.recipe_id,
+            ", ".join(f"{ing.quantity} {ing.unit} {ing.name}" for ing in calculation.unresolved),
+        )
+    recipe.nutrition, outcome = reconcile_nutrition(recipe.nutrition, calculation)
+    nutrition_checks_total.inc(outcome=outcome)
+    return recipe
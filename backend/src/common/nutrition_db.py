@@ -0,0 +1,493 @@
+"""Offline nutrition database: per-100 g profiles in memory-mapped columnar files.
+
+Nutrition dumps (OpenFoodFacts CSV/TSV or JSONL exports, USDA-style CSVs) are
+ingested once into a directory of NumPy arrays:
+
+- `keys.npy`: canonical food names (`ingredient_names.canonical_name`), sorted,
+  as fixed-width UTF-8 bytes
+- `nutrients.npy`: float32 matrix, one row per key and one column per
+  `NUTRIENT_FIELDS` entry, per 100 g; NaN where the dump had no value
+- `names.npy`: a representative food name per key
+- `counts.npy`: how many dump rows were merged into each key (their median is stored)
+- `meta.json`: source file, field order and row counts
+
+At runtime the arrays are opened with `mmap_mode="r"`, so start-up costs a few
+`open` calls whatever the size of the database, pages are shared between worker
+processes through the OS page cache, and a lookup is a binary search over the
+sorted keys.
+
+Ingest never merges different names: "chicken sausage" and "ground chicken"
+stay separate rows. Synonyms and misspellings are resolved at lookup instead,
+which tries the name's canonical form, then its canonical ID and the other
+synonyms of that ID. A misspelling only counts when the ingredient index scored
+it at least SNAPTOP_NUTRITION_DB_MATCH_MIN_SCORE.
+
+Build a database with:
+
+    python -m backend.src.common.nutrition_db ingest en.openfoodfacts.org.products.csv.gz data/nutrition_db
+
+and point SNAPTOP_NUTRITION_DB_PATH at the output directory.
+"""
+
+import argparse
+import csv
+import functools
+import gzip
+import json
+import logging
+import math
+import os
+import shutil
+import sys
+import time
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+
+from backend.src.common.ingredient_names import canonical_name, get_ingredient_index
+from backend.src.common.metrics import registry
+from backend.src.common.utils import get_env_float
+
+logger = logging.getLogger(__name__)
+
+# `NutritionProfile` fields, in a fixed order; also the column order of `nutrients.npy`
+NUTRIENT_FIELDS = (
+    "calories",
+    "protein_grams",
+    "carbs_grams",
+    "fat_grams",
+    "fiber_grams",
+    "sugar_grams",
+    "sodium_mg",
+)
+
+# Dump columns holding the food name, in order of preference
+NAME_COLUMNS = ("name", "food_name", "product_name", "product_name_en", "description", "generic_name")
+
+# Dump column (lower-cased) -> (nutrient field, factor to the field's unit).
+# Values are expected per 100 g, as in OpenFoodFacts `*_100g` and USDA exports.
+COLUMN_ALIASES = {
+    "calories": ("calories", 1.0),
+    "energy-kcal_100g": ("calories", 1.0),
+    "energy_kcal_100g": ("calories", 1.0),
+    "energy-kcal": ("calories", 1.0),
+    "energy (kcal)": ("calories", 1.0),
+    "protein_grams": ("protein_grams", 1.0),
+    "proteins_100g": ("protein_grams", 1.0),
+    "protein": ("protein_grams", 1.0),
+    "protein (g)": ("protein_grams", 1.0),
+    "carbs_grams": ("carbs_grams", 1.0),
+    "carbohydrates_100g": ("carbs_grams", 1.0),
+    "carbohydrate": ("carbs_grams", 1.0),
+    "carbs": ("carbs_grams", 1.0),
+    "carbohydrate, by difference (g)": ("carbs_grams", 1.0),
+    "fat_grams": ("fat_grams", 1.0),
+    "fat_100g": ("fat_grams", 1.0),
+    "fat": ("fat_grams", 1.0),
+    "total_fat": ("fat_grams", 1.0),
+    "total lipid (fat) (g)": ("fat_grams", 1.0),
+    "fiber_grams": ("fiber_grams", 1.0),
+    "fiber_100g": ("fiber_grams", 1.0),
+    "fiber": ("fiber_grams", 1.0),
+    "fiber, total dietary (g)": ("fiber_grams", 1.0),
+    "sugar_grams": ("sugar_grams", 1.0),
+    "sugars_100g": ("sugar_grams", 1.0),
+    "sugars": ("sugar_grams", 1.0),
+    "sugar": ("sugar_grams", 1.0),
+    "sugars, total including nlea (g)": ("sugar_grams", 1.0),
+    "sodium_mg": ("sodium_mg", 1.0),
+    "sodium_100g": ("sodium_mg", 1000.0),  # OpenFoodFacts reports grams
+    "sodium": ("sodium_mg", 1.0),
+    "sodium, na (mg)": ("sodium_mg", 1.0),
+}
+# Energy in kJ, used only when a row has no kcal value
+_KJ_COLUMNS = ("energy_100g", "energy-kj_100g", "energy_kj_100g", "energy (kj)")
+_KJ_PER_KCAL = 4.184
+
+# Rows with values outside these bounds (per 100 g) are dropped as bad data
+_MAX_PER_100G = {"calories": 902.0, "sodium_mg": 40000.0}
+_MAX_GRAMS_PER_100G = 100.0
+
+_CHUNK_ROWS = 65536
+_NAME_BYTES = 96
+
+lookups_total = registry.counter(
+    "snaptop_nutrition_db_lookups_total",
+    "Ingredient lookups against the local nutrition database",
+    ("result",),
+)
+
+
+def _open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace", newline="")
+    return open(path, "r", encoding="utf-8", errors="replace", newline="")
+
+
+def _iter_records(path: str) -> Iterator[dict]:
+    """Records of a CSV/TSV or JSONL dump as flat dicts; nested `nutriments` are flattened."""
+    stem = path[:-3] if path.endswith(".gz") else path
+    with _open_text(path) as f:
+        if stem.endswith((".jsonl", ".ndjson", ".json")):
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                nutriments = record.pop("nutriments", None)
+                if isinstance(nutriments, dict):
+                    record.update(nutriments)
+                yield record
+            return
+        header = f.readline()
+        delimiter = "\t" if stem.endswith(".tsv") or header.count("\t") > header.count(",") else ","
+        csv.field_size_limit(sys.maxsize)
+        fieldnames = next(csv.reader([header], delimiter=delimiter))
+        yield from csv.DictReader(f, fieldnames=fieldnames, delimiter=delimiter)
+
+
+def _to_float(value) -> float:
+    if value is None or value == "":
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _valid(values: np.ndarray) -> np.ndarray:
+    """Row mask of plausible per-100 g values (calories required, nothing negative or too large)."""
+    limits = np.array(
+        [_MAX_PER_100G.get(field, _MAX_GRAMS_PER_100G) for field in NUTRIENT_FIELDS],
+        dtype=np.float32,
+    )
+    with np.errstate(invalid="ignore"):
+        in_range = np.isnan(values) | ((values >= 0) & (values <= limits))
+    return ~np.isnan(values[:, 0]) & in_range.all(axis=1)
+
+
+class _Columns:
+    """Where each nutrient and the name are found in a dump's records."""
+
+    def __init__(self, keys: Iterable[str]):
+        lowered = {key.lower().strip(): key for key in keys}
+        self.name = next((lowered[c] for c in NAME_COLUMNS if c in lowered), None)
+        self.fields = {}
+        for column, (field, factor) in COLUMN_ALIASES.items():
+            if column in lowered and field not in self.fields:
+                self.fields[field] = (lowered[column], factor)
+        self.kj = next((lowered[c] for c in _KJ_COLUMNS if c in lowered), None)
+
+    def row(self, record: dict) -> list[float]:
+        values = []
+        for field in NUTRIENT_FIELDS:
+            column = self.fields.get(field)
+            values.append(_to_float(record.get(column[0])) * column[1] if column else math.nan)
+        if math.isnan(values[0]) and self.kj is not None:
+            values[0] = _to_float(record.get(self.kj)) / _KJ_PER_KCAL
+        return values
+
+
+def _write_database(out_dir: str, keys: list[str], names: list[str], values: np.ndarray, counts: np.ndarray, meta: dict):
+    """Write the arrays to a temporary directory, then swap it into place."""
+    encoded = np.array([key.encode("utf-8") for key in keys], dtype=bytes)
+    order = np.argsort(encoded, kind="stable")
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+    np.save(os.path.join(tmp_dir, "keys.npy"), encoded[order])
+    np.save(os.path.join(tmp_dir, "nutrients.npy"), values[order].astype(np.float32))
+    np.save(
+        os.path.join(tmp_dir, "names.npy"),
+        np.array([names[i].encode("utf-8")[:_NAME_BYTES] for i in order], dtype=bytes),
+    )
+    np.save(os.path.join(tmp_dir, "counts.npy"), counts[order].astype(np.int32))
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    old_dir = f"{out_dir}.old-{os.getpid()}"
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def ingest(source: str, out_dir: str, limit: int | None = None) -> dict:
+    """
+    Build a database directory from a nutrition dump.
+
+    Rows are keyed by the canonical name of their food name, with no synonym
+    or fuzzy matching, so only spellings of the same food are merged ("Chicken
+    Breasts" and "chicken breast, raw"); they are merged by taking the median
+    of each nutrient, so one odd product does not skew a common ingredient.
+    Rows without calories or with implausible values are skipped.
+
+    Args:
+        source (str): CSV, TSV or JSONL file, optionally gzip-compressed
+        out_dir (str): Output directory; an existing database there is replaced
+        limit (int, optional): Stop after this many source rows
+
+    Returns:
+        dict: The metadata written to `meta.json`
+    """
+    start = time.perf_counter()
+    columns = None
+    key_codes: dict[str, int] = {}
+    names: list[str] = []
+    chunk_names, chunk_values = [], []
+    codes, values = [], []
+    rows_read = 0
+
+    def flush():
+        if not chunk_names:
+            return
+        block = np.array(chunk_values, dtype=np.float32)
+        keep = _valid(block)
+        block_codes = []
+        for name in (n for n, ok in zip(chunk_names, keep) if ok):
+            code = key_codes.setdefault(canonical_name(name), len(key_codes))
+            if code == len(names):
+                names.append(name)
+            block_codes.append(code)
+        codes.append(np.array(block_codes, dtype=np.int64))
+        values.append(block[keep])
+        chunk_names.clear()
+        chunk_values.clear()
+
+    for record in _iter_records(source):
+        if columns is None:
+            columns = _Columns(record.keys())
+            if columns.name is None or ("calories" not in columns.fields and columns.kj is None):
+                raise ValueError(f"{source} has no recognizable name and calorie columns")
+        rows_read += 1
+        name = (record.get(columns.name) or "").strip()
+        if name:
+            chunk_names.append(name)
+            chunk_values.append(columns.row(record))
+            if len(chunk_names) >= _CHUNK_ROWS:
+                flush()
+        if limit is not None and rows_read >= limit:
+            break
+    flush()
+
+    all_codes = np.concatenate(codes) if codes else np.zeros(0, dtype=np.int64)
+    all_values = np.concatenate(values) if values else np.zeros((0, len(NUTRIENT_FIELDS)), np.float32)
+    counts = np.bincount(all_codes, minlength=len(key_codes))
+
+    # Median per key: single-row keys are copied directly, the rest grouped after a sort
+    merged = np.full((len(key_codes), len(NUTRIENT_FIELDS)), np.nan, dtype=np.float32)
+    single = counts[all_codes] == 1
+    merged[all_codes[single]] = all_values[single]
+    order = np.argsort(all_codes[~single], kind="stable")
+    grouped_codes = all_codes[~single][order]
+    grouped_values = all_values[~single][order]
+    boundaries = np.flatnonzero(np.diff(grouped_codes)) + 1
+    with np.errstate(all="ignore"):
+        for start_row, end_row in zip(np.r_[0, boundaries], np.r_[boundaries, len(grouped_codes)]):
+            if end_row > start_row:
+                block = grouped_values[start_row:end_row]
+                present = ~np.isnan(block).all(axis=0)
+                merged[grouped_codes[start_row], present] = np.nanmedian(block[:, present], axis=0)
+
+    meta = {
+        "source": os.path.abspath(source),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "fields": list(NUTRIENT_FIELDS),
+        "keys": "canonical_name",
+        "rows_read": rows_read,
+        "rows_kept": int(len(all_codes)),
+        "entries": len(key_codes),
+    }
+    _write_database(out_dir, list(key_codes), names, merged, counts, meta)
+    logger.info(
+        "Nutrition database %s built from %d rows (%d ingredients) in %.1fs",
+        out_dir,
+        rows_read,
+        len(key_codes),
+        time.perf_counter() - start,
+    )
+    return meta
+
+
+class NutritionDB:
+    """
+    Read-only view of an ingested database directory.
+
+    Args:
+        path (str): Directory written by `ingest`
+        min_score (float): Minimum ingredient-index score of a misspelled name
+            for its canonical ID to be looked up
+    """
+
+    def __init__(self, path: str, min_score: float = 0.9):
+        self.path = path
+        self.min_score = min_score
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        if tuple(self.meta.get("fields", ())) != NUTRIENT_FIELDS:
+            raise ValueError(f"{path} was built with different nutrient fields")
+        self.keys = np.load(os.path.join(path, "keys.npy"), mmap_mode="r")
+        self.nutrients = np.load(os.path.join(path, "nutrients.npy"), mmap_mode="r")
+        self.names = np.load(os.path.join(path, "names.npy"), mmap_mode="r")
+        self.counts = np.load(os.path.join(path, "counts.npy"), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _rows(self, ids: list[str]) -> np.ndarray:
+        """Row of each canonical ID, or -1 where it is not in the database."""
+        if not len(self.keys):
+            return np.full(len(ids), -1, dtype=np.int64)
+        wanted = np.array([i.encode("utf-8") for i in ids], dtype=bytes)
+        rows = np.searchsorted(self.keys, wanted)
+        rows = np.minimum(rows, len(self.keys) - 1)
+        # Keys longer than the stored width cannot be present
+        fits = np.array([len(w) <= self.keys.dtype.itemsize for w in wanted], dtype=bool)
+        found = fits & (self.keys[rows] == wanted)
+        return np.where(found, rows, -1)
+
+    def _candidates(self, name: str) -> list[str]:
+        """Keys to try for a name, best first: its canonical form, then its ID's synonyms."""
+        candidates = [canonical_name(name)]
+        index = get_ingredient_index()
+        match = index.match(name)
+        if match.method == "exact" or (match.method == "fuzzy" and match.score >= self.min_score):
+            candidates.append(match.id)
+            candidates.extend(index.synonyms(match.id))
+        return list(dict.fromkeys(candidates))
+
+    def _find(self, names: list[str]) -> np.ndarray:
+        """Row of each name, or -1 where none of its candidate keys is in the database."""
+        candidates = [self._candidates(name) for name in names]
+        rows = self._rows([key for keys in candidates for key in keys])
+        found = np.full(len(names), -1, dtype=np.int64)
+        offset = 0
+        for i, keys in enumerate(candidates):
+            hits = rows[offset:offset + len(keys)]
+            hits = hits[hits >= 0]
+            if len(hits):
+                found[i] = hits[0]
+            offset += len(keys)
+        lookups = int((found >= 0).sum())
+        lookups_total.inc(lookups, result="hit")
+        lookups_total.inc(len(found) - lookups, result="miss")
+        return found
+
+    def _profile(self, row: int) -> dict:
+        return {
+            # float32 storage: round away the representation noise
+            field: round(float(value), 4)
+            for field, value in zip(NUTRIENT_FIELDS, self.nutrients[row])
+            if not math.isnan(value)
+        }
+
+    def lookup(self, name: str) -> dict | None:
+        """
+        Per-100 g nutrition of an ingredient.
+
+        Args:
+            name (str): Ingredient name as written; matched by canonical name,
+                then by canonical ID and its synonyms
+
+        Returns:
+            dict | None: `{field: value per 100 g}` for the nutrients the dump
+                had, or None if the ingredient is not in the database
+        """
+        return self.lookup_many([name])[0]
+
+    def lookup_many(self, names: Iterable[str]) -> list[dict | None]:
+        """`lookup` for many names with a single vectorized search."""
+        rows = self._find(list(names))
+        return [self._profile(row) if row >= 0 else None for row in rows]
+
+    def food(self, name: str) -> dict | None:
+        """
+        An ingredient in the shape FatSecret search results have.
+
+        Returns:
+            dict | None: `{"food_name", "food_description", "source"}`, where the
+                description reads `"Per 100g - Calories: 165kcal | Fat: 3.57g | ..."`
+        """
+        row = int(self._find([name])[0])
+        if row < 0:
+            return None
+        return {
+            "food_name": bytes(self.names[row]).decode("utf-8", errors="ignore") or canonical_name(name),
+            "food_description": food_description(self._profile(row)),
+            "source": "local",
+        }
+
+
+_DESCRIPTION_FORMAT = (
+    ("calories", "Calories", "kcal"),
+    ("fat_grams", "Fat", "g"),
+    ("carbs_grams", "Carbs", "g"),
+    ("protein_grams", "Protein", "g"),
+    ("fiber_grams", "Fiber", "g"),
+    ("sugar_grams", "Sugar", "g"),
+    ("sodium_mg", "Sodium", "mg"),
+)
+
+
+def food_description(profile: dict) -> str:
+    """Render a per-100 g profile like a FatSecret food description."""
+    parts = [
+        f"{label}: {profile[field]:.2f}{unit}"
+        for field, label, unit in _DESCRIPTION_FORMAT
+        if field in profile
+    ]
+    return "Per 100g - " + " | ".join(parts)
+
+
+@functools.cache
+def get_nutrition_db() -> NutritionDB | None:
+    """
+    The database at SNAPTOP_NUTRITION_DB_PATH, opened on first use.
+
+    Returns:
+        NutritionDB | None: None if no path is configured or it cannot be
+            opened, in which case callers go straight to the remote APIs
+    """
+    path = os.getenv("SNAPTOP_NUTRITION_DB_PATH")
+    if not path:
+        return None
+    try:
+        db = NutritionDB(path, min_score=get_env_float("SNAPTOP_NUTRITION_DB_MATCH_MIN_SCORE", 0.9))
+    except (OSError, ValueError) as e:
+        logger.warning("Local nutrition database at %s unavailable: %s", path, e)
+        return None
+    logger.info("Local nutrition database %s opened with %d ingredients", path, len(db))
+    return db
+
+
+def local_food(name: str) -> dict | None:
+    """FatSecret-shaped local entry for an ingredient, or None if there is no local match."""
+    db = get_nutrition_db()
+    return db.food(name) if db is not None else None
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Local nutrition database tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = commands.add_parser("ingest", help="Build a database from a CSV/TSV/JSONL dump")
+    ingest_parser.add_argument("source", help="Dump file, optionally .gz")
+    ingest_parser.add_argument("out_dir", help="Database directory to (re)write")
+    ingest_parser.add_argument("--limit", type=int, default=None, help="Read at most this many rows")
+    lookup_parser = commands.add_parser("lookup", help="Look ingredients up in a database")
+    lookup_parser.add_argument("db", help="Database directory")
+    lookup_parser.add_argument("names", nargs="+")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "ingest":
+        print(json.dumps(ingest(args.source, args.out_dir, limit=args.limit), indent=2))
+    else:
+        db = NutritionDB(args.db)
+        for name in args.names:
+            print(f"{name}: {db.food(name)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import csv
+
+import pytest
+
+from backend.src.common.nutrition_db import NutritionDB, ingest
+
+ROWS = [
+    ("Ground Chicken", 143, 17.4),
+    ("ground chicken, raw", 151, 17.9),
+    ("ground chicken", 160, 18.0),
+    ("Chicken Sausage", 210, 14.0),
+    ("Red Wine Vinegar", 19, 0.0),
+    ("Rice Vinegar", 18, 0.3),
+    ("Scallions", 32, 1.8),
+    ("Chickpea Flour", 387, 22.4),
+    ("Mozzarella Cheese", 280, 28.0),
+    ("Bad row", 5000, 1.0),
+]
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    root = tmp_path_factory.mktemp("nutrition")
+    source = root / "dump.csv"
+    with open(source, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["product_name", "energy-kcal_100g", "proteins_100g"])
+        writer.writerows(ROWS)
+    meta = ingest(str(source), str(root / "db"))
+    assert meta["rows_read"] == len(ROWS)
+    assert meta["rows_kept"] == len(ROWS) - 1
+    return NutritionDB(str(root / "db"))
+
+
+def test_ingest_merges_only_spellings_of_the_same_name(db):
+    assert len(db) == 7
+    assert db.lookup("ground chicken")["calories"] == 151
+    assert db.lookup("chicken sausage")["calories"] == 210
+
+
+@pytest.mark.parametrize(
+    "name, calories",
+    [
+        ("red wine vinegar", 19),
+        ("rice vinegar", 18),
+        ("chickpea flour", 387),
+    ],
+)
+def test_ingest_keeps_different_products_apart(db, name, calories):
+    assert db.lookup(name)["calories"] == calories
+
+
+def test_lookup_does_not_fall_back_to_a_related_product(db):
+    assert db.lookup("chickpea") is None
+    assert db.lookup("ground turkey") is None
+
+
+def test_lookup_resolves_synonyms(db):
+    # "green onion" is the ID of "scallion"; the dump only has the synonym
+    assert db.lookup("green onions")["calories"] == 32
+    assert db.lookup("spring onion")["calories"] == 32
+
+
+def test_lookup_accepts_only_close_misspellings(db):
+    # The ingredient index scores this misspelling about 0.91
+    assert db.lookup("mozarella cheese")["calories"] == 280
+    strict = NutritionDB(db.path, min_score=0.95)
+    assert strict.lookup("mozarella cheese") is None
+    assert db.lookup("mozzarella sticks") is None
+
+
+def test_food_is_fatsecret_shaped(db):
+    food = db.food("Scallions, sliced")
+    assert food["food_name"] == "Scallions"
+    assert food["food_description"].startswith("Per 100g - Calories: 32.00kcal")
+    assert db.lookup_many(["ground chicken", "unknown thing"])[1] is None
@@ -0,0 +1,215 @@
+"""Nutrition search across several providers with hedging and circuit breakers.
+
+A `NutritionResolver` holds the providers (FatSecret, OpenFoodFacts) in
+fallback order. Resolving a query:
+
+1. Sends it to the first provider whose circuit breaker is closed and whose
+   rate limiter has a token.
+2. If that call is still running after the provider's observed p95 latency,
+   sends a hedged backup request to the next available provider (or the same
+   one if it is the only one). Whichever returns foods first wins.
+3. If a call fails or finds nothing, moves on to the next provider.
+
+Each provider's errors feed its own circuit breaker, so a provider having a
+bad minute is skipped instead of stalling every recipe on its timeouts.
+"""
+
+import contextvars
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from backend.src.common.metrics import registry
+from backend.src.common.resilience import CircuitBreaker, LatencyWindow, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+provider_requests_total = registry.counter(
+    "snaptop_nutrition_provider_requests_total",
+    "Nutrition provider calls by outcome (ok, empty, error, open_circuit, rate_limited)",
+    ("provider", "outcome"),
+)
+hedged_requests_total = registry.counter(
+    "snaptop_nutrition_hedged_requests_total",
+    "Backup requests sent because a nutrition provider call passed its p95 latency",
+    ("provider",),
+)
+
+
+class NoProviderAvailable(Exception):
+    """Every provider failed, was rate limited or had its circuit open."""
+
+
+@dataclass
+class NutritionProvider:
+    """
+    One nutrition search backend.
+
+    Args:
+        name (str): Provider name used in logs and metrics.
+        search (callable): `search(query) -> list` of FatSecret-shaped foods;
+            raises on failure and returns an empty list when nothing matched.
+        breaker (CircuitBreaker): Breaker fed by this provider's outcomes.
+        limiter (TokenBucket, optional): Rate limiter matching the provider's quota.
+        latency (LatencyWindow): Recent successful call durations.
+    """
+
+    name: str
+    search: Callable[[str], list]
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    limiter: TokenBucket | None = None
+    latency: LatencyWindow = field(default_factory=LatencyWindow)
+
+    def admit(self, wait: float) -> bool:
+        """Whether a call may start now, waiting up to `wait` seconds for a rate-limit token."""
+        if not self.breaker.allow():
+            provider_requests_total.inc(provider=self.name, outcome="open_circuit")
+            return False
+        if self.limiter is not None and not self.limiter.acquire(wait):
+            # Not the provider's fault: give a half-open trial back unused
+            self.breaker.release()
+            provider_requests_total.inc(provider=self.name, outcome="rate_limited")
+            return False
+        return True
+
+    def call(self, query: str) -> list:
+        """Run one admitted search, recording its latency and outcome."""
+        started = time.perf_counter()
+        try:
+            foods = self.search(query)
+        except Exception:
+            self.breaker.record(False)
+            provider_requests_total.inc(provider=self.name, outcome="error")
+            raise
+        self.latency.observe(time.perf_counter() - started)
+        self.breaker.record(True)
+        provider_requests_total.inc(provider=self.name, outcome="ok" if foods else "empty")
+        return foods
+
+
+@dataclass
+class Resolution:
+    """Outcome of `NutritionResolver.resolve`."""
+
+    foods: list
+    provider: str | None  # None when every provider came back empty
+    hedged: bool = False
+
+
+class NutritionResolver:
+    """
+    Resolves food queries against providers in fallback order.
+
+    Args:
+        providers (list[NutritionProvider]): Providers, most preferred first.
+        hedge (bool): Whether to send backup requests for slow calls.
+        hedge_percentile (float): Latency percentile after which a call is hedged.
+        min_hedge_delay (float): Never hedge sooner than this many seconds.
+        timeout (float): Seconds `resolve` waits in total before giving up.
+        rate_limit_wait (float): Seconds to wait for a rate-limit token before
+            moving on to the next provider.
+        max_workers (int): Threads running provider calls.
+    """
+
+    def __init__(
+        self,
+        providers: list[NutritionProvider],
+        hedge: bool = True,
+        hedge_percentile: float = 95.0,
+        min_hedge_delay: float = 0.2,
+        timeout: float = 8.0,
+        rate_limit_wait: float = 0.5,
+        max_workers: int = 16,
+    ):
+        self.providers = providers
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.timeout = timeout
+        self.rate_limit_wait = rate_limit_wait
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nutrition")
+
+    def breaker_states(self) -> dict[str, str]:
+        return {p.name: p.breaker.state for p in self.providers}
+
+    def resolve(self, query: str) -> Resolution:
+        """
+        Search providers for `query`. Blocks until a provider answers.
+
+        Returns:
+            Resolution: Foods from the first provider that found any, or an
+                empty list if every provider that answered found nothing
+        Raises:
+            NoProviderAvailable: If no provider could answer
+        """
+        deadline = time.monotonic() + self.timeout
+        remaining = list(self.providers)
+        pending: dict[Future, NutritionProvider] = {}
+        errors: list[str] = []
+        answered_empty = False
+        hedged = False
+
+        def launch(allow_repeat: bool = False) -> NutritionProvider | None:
+            while remaining:
+                provider = remaining.pop(0)
+                if provider.admit(self.rate_limit_wait):
+                    return submit(provider)
+                errors.append(f"{provider.name}: unavailable")
+            if allow_repeat and pending:
+                # Only one provider: hedge with a second request to it
+                provider = next(iter(pending.values()))
+                if provider.admit(0.0):
+                    return submit(provider)
+            return None
+
+        def submit(provider: NutritionProvider) -> NutritionProvider:
+            # Copy the context so timings of the call reach the caller's request
+            future = self._executor.submit(contextvars.copy_context().run, provider.call, query)
+            pending[future] = provider
+            return provider
+
+        current = launch()
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                errors.append("timed out")
+                break
+            wait_for = deadline - now
+            if self.hedge and not hedged:
+                hedge_delay = max(self.min_hedge_delay, current.latency.percentile(self.hedge_percentile))
+                wait_for = min(wait_for, hedge_delay)
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            if not done:
+                if self.hedge and not hedged and time.monotonic() < deadline:
+                    hedged = True
+                    backup = launch(allow_repeat=True)
+                    if backup is not None:
+                        hedged_requests_total.inc(provider=backup.name)
+                        logger.info(
+                            "Hedged %r: %s slower than p%g, also asking %s",
+                            query,
+                            current.name,
+                            self.hedge_percentile,
+                            backup.name,
+                        )
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    foods = future.result()
+                except Exception as e:
+                    errors.append(f"{provider.name}: {e}")
+                    logger.warning("Nutrition provider %s failed for %r: %s", provider.name, query, e)
+                    continue
+                if foods:
+                    return Resolution(foods=foods, provider=provider.name, hedged=hedged)
+                answered_empty = True
+            if not pending:
+                # Fall back to the next provider after an error or an empty answer
+                current = launch() or current
+
+        if answered_empty:
+            return Resolution(foods=[], provider=None, hedged=hedged)
+        raise NoProviderAvailable(f"No nutrition provider answered {query!r}: " + "; ".join(errors))
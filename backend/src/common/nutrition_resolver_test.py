@@ -0,0 +1,124 @@
+import time
+
+import pytest
+import requests
+
+from backend.src.common.nutrition_resolver import NoProviderAvailable, NutritionProvider, NutritionResolver
+from backend.src.common.resilience import CircuitBreaker, LatencyWindow, TokenBucket
+
+FOODS = [{"food_name": "Chicken Breast", "food_description": "Per 100g - Calories: 165kcal"}]
+
+
+def _search(server):
+    def search(query: str) -> list:
+        resp = requests.get(server.url, params={"q": query}, timeout=5)
+        resp.raise_for_status()
+        return resp.json()
+    return search
+
+
+def test_breaker_opens_then_half_opens(stub_server):
+    server = stub_server()
+    server.status = 500
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=3, window=30.0, cooldown=0.3)
+    resolver = NutritionResolver([NutritionProvider("stub", _search(server), breaker=breaker)], hedge=False)
+
+    for _ in range(3):
+        with pytest.raises(NoProviderAvailable):
+            resolver.resolve("chicken breast")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Open: rejected without reaching the server
+    with pytest.raises(NoProviderAvailable, match="unavailable"):
+        resolver.resolve("chicken breast")
+    assert len(server.requests) == 3
+
+    time.sleep(0.35)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    server.status = 200
+    server.body = FOODS
+    resolution = resolver.resolve("chicken breast")
+    assert resolution.provider == "stub" and resolution.foods == FOODS
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert len(server.requests) == 4
+
+
+def test_half_open_breaker_admits_one_trial_and_reopens_on_failure():
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=2, window=30.0, cooldown=0.05)
+    breaker.record(False)
+    breaker.record(False)
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def _primed_latency(seconds: float) -> LatencyWindow:
+    window = LatencyWindow(min_samples=20)
+    for _ in range(20):
+        window.observe(seconds)
+    return window
+
+
+def test_hedge_fires_after_p95_delay(stub_server):
+    slow, backup = stub_server(), stub_server()
+    slow.delay = 1.0
+    slow.body = backup.body = FOODS
+    resolver = NutritionResolver(
+        [
+            NutritionProvider("slow", _search(slow), latency=_primed_latency(0.15)),
+            NutritionProvider("backup", _search(backup)),
+        ],
+        min_hedge_delay=0.05,
+    )
+
+    started = time.monotonic()
+    resolution = resolver.resolve("chicken breast")
+    elapsed = time.monotonic() - started
+
+    assert resolution.provider == "backup" and resolution.hedged
+    assert elapsed < 0.8
+    # The backup was asked only once the slow call passed its p95 (0.15 s)
+    assert backup.requests[0] - slow.requests[0] >= 0.14
+
+
+def test_no_hedge_when_the_call_is_fast(stub_server):
+    fast, backup = stub_server(), stub_server()
+    fast.body = backup.body = FOODS
+    resolver = NutritionResolver(
+        [
+            NutritionProvider("fast", _search(fast), latency=_primed_latency(0.5)),
+            NutritionProvider("backup", _search(backup)),
+        ]
+    )
+    resolution = resolver.resolve("chicken breast")
+    assert resolution.provider == "fast" and not resolution.hedged
+    assert backup.requests == []
+
+
+def test_empty_token_bucket_refuses_and_falls_back(stub_server):
+    limited, fallback = stub_server(), stub_server()
+    limited.body = fallback.body = FOODS
+    bucket = TokenBucket(rate=0.01, capacity=2)
+    resolver = NutritionResolver(
+        [
+            NutritionProvider("limited", _search(limited), limiter=bucket),
+            NutritionProvider("fallback", _search(fallback)),
+        ],
+        hedge=False,
+        rate_limit_wait=0.0,
+    )
+
+    assert [resolver.resolve("egg").provider for _ in range(3)] == ["limited", "limited", "fallback"]
+    assert len(limited.requests) == 2
+    # A refused call is not the provider's failure
+    assert resolver.breaker_states()["limited"] == CircuitBreaker.CLOSED
+
+
+def test_token_bucket_waits_for_a_token_within_its_timeout():
+    bucket = TokenBucket(rate=20.0, capacity=1)
+    assert bucket.acquire()
+    assert not bucket.acquire(timeout=0.0)
+    assert bucket.acquire(timeout=0.2)
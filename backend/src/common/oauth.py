@@ -0,0 +1,152 @@
+"""OAuth client-credentials tokens shared by all threads.
+
+`OAuthTokenManager` keeps one access token per provider:
+
+- Concurrent callers that find the token missing or expired wait for a single
+  refresh instead of each requesting a token (no thundering herd at expiry).
+- Once the token is within `refresh_margin` seconds of expiring, the next
+  caller still gets it immediately and a background thread fetches the next
+  one, so requests do not wait on the token endpoint in steady state. The
+  margin is capped at half the token's lifetime, so a short-lived token is not
+  refreshed on every call. A failed background refresh is retried with capped
+  exponential backoff while the current token stays valid.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+from backend.src.common.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+token_refresh_seconds = registry.histogram(
+    "snaptop_oauth_token_refresh_seconds",
+    "Time taken to fetch an OAuth access token",
+    ("provider",),
+)
+token_refreshes_total = registry.counter(
+    "snaptop_oauth_token_refreshes_total",
+    "OAuth access token fetches by outcome (ok, error) and mode (blocking, background)",
+    ("provider", "outcome", "mode"),
+)
+
+
+class OAuthTokenManager:
+    """
+    Caches an access token and refreshes it once, ahead of expiry.
+
+    Args:
+        name (str): Provider name used in logs and metrics.
+        fetch (callable): Requests a new token; returns `(token, expires_in_seconds)`
+            and raises on failure.
+        refresh_margin (float): Seconds before expiry when a background refresh
+            starts; at most half of each token's lifetime.
+        min_validity (float): A token closer than this to expiry is not handed out.
+        retry_backoff (float): Delay before retrying a failed background refresh;
+            doubles with each consecutive failure.
+        max_retry_backoff (float): Cap on that delay.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[], tuple[str, float]],
+        refresh_margin: float = 120.0,
+        min_validity: float = 10.0,
+        retry_backoff: float = 5.0,
+        max_retry_backoff: float = 60.0,
+    ):
+        self.name = name
+        self._fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.min_validity = min_validity
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self._cond = threading.Condition()
+        self._token: str | None = None
+        self._expires_at = 0.0
+        # When the next background refresh is due
+        self._refresh_at = 0.0
+        self._refreshing = False
+        # Consecutive failed background refreshes, for their backoff
+        self._failures = 0
+        # Incremented by every finished refresh, so waiters can tell theirs failed
+        self._generation = 0
+        self._last_error: Exception | None = None
+
+    def _usable_locked(self, now: float) -> bool:
+        return self._token is not None and now < self._expires_at - self.min_validity
+
+    def get(self) -> str:
+        """
+        A valid access token. Blocks only when there is none, while one refresh runs.
+
+        Raises:
+            Exception: Whatever `fetch` raised, if the refresh this call waited for failed
+        """
+        with self._cond:
+            generation = self._generation
+            while True:
+                now = time.time()
+                if self._usable_locked(now):
+                    if now >= self._refresh_at and not self._refreshing:
+                        self._refreshing = True
+                        threading.Thread(
+                            target=self._refresh,
+                            args=("background",),
+                            name=f"{self.name}-token-refresh",
+                            daemon=True,
+                        ).start()
+                    return self._token
+                if self._generation != generation and self._last_error is not None:
+                    raise self._last_error
+                if not self._refreshing:
+                    self._refreshing = True
+                    break
+                self._cond.wait()
+        return self._refresh("blocking")
+
+    def invalidate(self):
+        """Forget the current token, e.g. after the provider rejected it."""
+        with self._cond:
+            self._token = None
+            self._expires_at = 0.0
+            self._refresh_at = 0.0
+
+    def _refresh(self, mode: str) -> str | None:
+        """Fetch a token; the caller has set `_refreshing`."""
+        started = time.perf_counter()
+        try:
+            token, expires_in = self._fetch()
+        except Exception as e:
+            token_refreshes_total.inc(provider=self.name, outcome="error", mode=mode)
+            logger.warning("%s token refresh (%s) failed: %s", self.name, mode, e)
+            with self._cond:
+                if mode == "background":
+                    # Retry later, but still before the current token becomes unusable
+                    delay = min(self.retry_backoff * 2**self._failures, self.max_retry_backoff)
+                    self._failures += 1
+                    self._refresh_at = min(time.time() + delay, self._expires_at - self.min_validity)
+                self._refreshing = False
+                self._generation += 1
+                self._last_error = e
+                self._cond.notify_all()
+            if mode == "blocking":
+                raise
+            return None
+        elapsed = time.perf_counter() - started
+        token_refresh_seconds.observe(elapsed, provider=self.name)
+        token_refreshes_total.inc(provider=self.name, outcome="ok", mode=mode)
+        logger.info("%s token refreshed (%s) in %.2fs, valid for %.0fs", self.name, mode, elapsed, expires_in)
+        with self._cond:
+            self._token = token
+            self._expires_at = time.time() + expires_in
+            self._refresh_at = self._expires_at - min(self.refresh_margin, expires_in / 2)
+            self._refreshing = False
+            self._failures = 0
+            self._generation += 1
+            self._last_error = None
+            self._cond.notify_all()
+        return token
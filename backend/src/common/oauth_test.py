@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from backend.src.common.oauth import OAuthTokenManager
+
+
+class FakeTokenEndpoint:
+    """Counts fetches; each returns a new token with the configured lifetime."""
+
+    def __init__(self, expires_in: float = 3600.0, delay: float = 0.0):
+        self.expires_in = expires_in
+        self.delay = delay
+        self.error: Exception | None = None
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> tuple[str, float]:
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        if self.error is not None:
+            raise self.error
+        return f"token-{calls}", self.expires_in
+
+
+def _wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_concurrent_callers_share_one_refresh():
+    endpoint = FakeTokenEndpoint(delay=0.1)
+    manager = OAuthTokenManager("test", endpoint)
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(manager.get())) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert tokens == ["token-1"] * 16
+    assert endpoint.calls == 1
+
+
+def test_token_near_expiry_is_served_while_refreshing_in_background():
+    endpoint = FakeTokenEndpoint(expires_in=3600.0)
+    manager = OAuthTokenManager("test", endpoint, refresh_margin=120.0)
+    assert manager.get() == "token-1"
+    # Move into the refresh margin without expiring the token
+    manager._refresh_at = time.time() - 1
+    endpoint.delay = 0.1
+    assert manager.get() == "token-1"
+    _wait_for(lambda: endpoint.calls == 2)
+    _wait_for(lambda: manager.get() == "token-2")
+
+
+def test_refresh_margin_is_capped_at_half_the_lifetime():
+    # A 300 s fallback lifetime against a 300 s margin must not refresh on every call
+    endpoint = FakeTokenEndpoint(expires_in=300.0)
+    manager = OAuthTokenManager("test", endpoint, refresh_margin=300.0)
+    for _ in range(5):
+        assert manager.get() == "token-1"
+    time.sleep(0.05)
+    assert endpoint.calls == 1
+    assert manager._refresh_at == pytest.approx(manager._expires_at - 150.0)
+
+
+def test_failed_background_refresh_backs_off():
+    endpoint = FakeTokenEndpoint(expires_in=3600.0)
+    manager = OAuthTokenManager("test", endpoint, retry_backoff=0.2, max_retry_backoff=0.3)
+    assert manager.get() == "token-1"
+    endpoint.error = RuntimeError("token endpoint down")
+    manager._refresh_at = time.time() - 1
+
+    # The failed refresh is not retried on every call
+    for _ in range(20):
+        assert manager.get() == "token-1"
+        time.sleep(0.005)
+    assert endpoint.calls == 2
+    assert manager._refresh_at > time.time()
+
+    # It is retried once the backoff has passed, and succeeds
+    endpoint.error = None
+    time.sleep(0.25)
+    assert manager.get() == "token-1"
+    _wait_for(lambda: manager.get() == "token-3")
+
+
+def test_backoff_never_runs_past_the_current_token():
+    endpoint = FakeTokenEndpoint(expires_in=30.0)
+    manager = OAuthTokenManager("test", endpoint, refresh_margin=20.0, retry_backoff=60.0)
+    manager.get()
+    endpoint.error = RuntimeError("token endpoint down")
+    manager._refresh_at = time.time() - 1
+    manager.get()
+    _wait_for(lambda: endpoint.calls == 2)
+    _wait_for(lambda: not manager._refreshing)
+    assert manager._refresh_at == pytest.approx(manager._expires_at - manager.min_validity)
+
+
+def test_failed_refresh_reaches_every_waiter():
+    endpoint = FakeTokenEndpoint(delay=0.1)
+    endpoint.error = RuntimeError("token endpoint down")
+    manager = OAuthTokenManager("test", endpoint)
+    errors = []
+
+    def get():
+        try:
+            manager.get()
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == ["token endpoint down"] * 4
+    assert endpoint.calls == 1
+
+    endpoint.error = None
+    assert manager.get() == "token-2"
+
+
+def test_invalidate_forces_a_new_token():
+    endpoint = FakeTokenEndpoint()
+    manager = OAuthTokenManager("test", endpoint)
+    assert manager.get() == "token-1"
+    manager.invalidate()
+    assert manager.get() == "token-2"
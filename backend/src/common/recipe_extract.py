@@ -0,0 +1,454 @@
+"""Compact recipe content from web pages, for the recipe agent's context.
+
+A recipe blog page is typically 20-80 KB of text once ads, comments and
+navigation are included, and everything `fetch_url_content` returns is sent
+to the model on every later agent step. `fetch_recipe_page` instead returns:
+
+1. The schema.org `Recipe` from the page's JSON-LD, if there is one.
+2. Otherwise the `Recipe` marked up with microdata (`itemtype=.../Recipe`).
+3. Otherwise the page's main content, picked readability-style: the block
+   with the most paragraph text and the fewest links, without navigation,
+   headers, footers, sidebars, forms or comments.
+
+Pages are streamed and the download stops after `MAX_PAGE_BYTES`, so a huge
+page costs neither bandwidth nor parse time. The text is capped at
+`MAX_CONTENT_CHARS`, and extracted results are cached per URL.
+`prefetch_recipe_pages` fills that cache in the background, e.g. with the
+pages of search results the agent is likely to open next.
+"""
+
+import json
+import logging
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from bs4 import BeautifulSoup, Tag
+
+from backend.src.common.cache import LRUCache
+from backend.src.common.http_client import get_session
+from backend.src.common.metrics import registry, timed_dependency
+from backend.src.common.utils import get_env_float, get_env_int
+
+logger = logging.getLogger(__name__)
+
+# Bytes of HTML read before the download is stopped
+MAX_PAGE_BYTES = get_env_int("SNAPTOP_FETCH_MAX_BYTES", 1_500_000)
+# Characters of extracted text returned to the agent
+MAX_CONTENT_CHARS = get_env_int("SNAPTOP_FETCH_MAX_CHARS", 12_000)
+
+_CHUNK_SIZE = 64 * 1024
+
+_page_cache = LRUCache(
+    max_entries=get_env_int("SNAPTOP_FETCH_CACHE_MAX_ENTRIES", 512),
+    ttl=get_env_float("SNAPTOP_FETCH_CACHE_TTL", 6 * 3600.0),
+)
+# Error pages (4xx/5xx, bot blocks) are often transient: cache them only briefly
+PAGE_ERROR_TTL = get_env_float("SNAPTOP_FETCH_CACHE_ERROR_TTL", 60.0)
+
+# Fetches in progress, by URL, so concurrent requests for a page share one download
+_inflight: dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+_prefetch_executor = ThreadPoolExecutor(
+    max_workers=get_env_int("SNAPTOP_FETCH_PREFETCH_WORKERS", 4),
+    thread_name_prefix="prefetch",
+)
+
+page_lookups_total = registry.counter(
+    "snaptop_recipe_page_lookups_total",
+    "fetch_url_content pages by source (cached, in_flight, fetched)",
+    ("result",),
+)
+prefetches_total = registry.counter(
+    "snaptop_recipe_page_prefetches_total",
+    "Result pages fetched in the background after a search",
+)
+extractions_total = registry.counter(
+    "snaptop_recipe_page_extractions_total",
+    "Fetched pages by how their content was extracted (jsonld, microdata, readability, empty)",
+    ("method",),
+)
+extracted_chars = registry.histogram(
+    "snaptop_recipe_page_extracted_chars",
+    "Characters of page content returned to the agent",
+    buckets=(500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+
+# Elements that never hold the main content
+_BOILERPLATE_TAGS = ("script", "style", "noscript", "template", "svg", "iframe", "nav", "header", "footer", "aside", "form", "button")
+# Class/id fragments of ads, comments, share bars and similar blocks
+_BOILERPLATE_ATTRS = re.compile(
+    r"comment|reply|sidebar|widget|advert|\bads?\b|promo|sponsor|share|social|newsletter|subscribe|"
+    r"related|popup|modal|cookie|breadcrumb|footer|header|menu|\bnav",
+    re.IGNORECASE,
+)
+# ...unless they also look like the content itself, e.g. "entry-content has-sidebar"
+_CONTENT_ATTRS = re.compile(r"article|main|content|recipe|post|entry|body", re.IGNORECASE)
+# Elements whose text scores their containers
+_PARAGRAPH_TAGS = ("p", "pre", "li", "td")
+
+
+def _is_recipe_type(value) -> bool:
+    types = value if isinstance(value, list) else [value]
+    return any(isinstance(t, str) and t.rsplit("/", 1)[-1] == "Recipe" for t in types)
+
+
+def _find_recipe(data) -> dict | None:
+    """The first object typed `Recipe` in a JSON-LD document, searching `@graph` and nested lists."""
+    if isinstance(data, list):
+        for item in data:
+            found = _find_recipe(item)
+            if found is not None:
+                return found
+    elif isinstance(data, dict):
+        if _is_recipe_type(data.get("@type")):
+            return data
+        for key in ("@graph", "mainEntity", "mainEntityOfPage"):
+            if key in data:
+                found = _find_recipe(data[key])
+                if found is not None:
+                    return found
+    return None
+
+
+def _text(value) -> str:
+    """Plain text of a JSON-LD value: strings, numbers, `{"name"/"text": ...}` objects or lists of them."""
+    if value is None or isinstance(value, bool):
+        return ""
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, str):
+        return _clean(_strip_tags(value, " "))
+    if isinstance(value, list):
+        return ", ".join(t for t in (_text(v) for v in value) if t)
+    if isinstance(value, dict):
+        return _text(value.get("text") or value.get("name") or value.get("@value"))
+    return ""
+
+
+def _clean(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _strip_tags(text: str, separator: str) -> str:
+    """Text of a value that may contain HTML, as some sites put markup in JSON-LD strings."""
+    return BeautifulSoup(text, "html.parser").get_text(separator) if "<" in text else text
+
+
+def _instruction_lines(value) -> list[tuple[bool, str]]:
+    """
+    Steps from `recipeInstructions`: a string, `HowToStep`s, or `HowToSection`s of steps.
+
+    Returns:
+        list[tuple[bool, str]]: `(is_section_heading, text)` per line
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        text = _strip_tags(value, "\n")
+        return [(False, _clean(line)) for line in text.splitlines() if _clean(line)]
+    if isinstance(value, list):
+        return [line for item in value for line in _instruction_lines(item)]
+    if isinstance(value, dict):
+        if "itemListElement" in value:
+            steps = _instruction_lines(value["itemListElement"])
+            name = _text(value.get("name"))
+            return ([(True, f"{name}:")] if name else []) + steps
+        step = _text(value.get("text") or value.get("name"))
+        return [(False, step)] if step else []
+    return []
+
+
+def format_recipe(recipe: dict) -> str:
+    """
+    Compact text of a schema.org `Recipe` object.
+
+    Args:
+        recipe (dict): The recipe, as found in JSON-LD or rebuilt from microdata
+
+    Returns:
+        str: Name, description, yield, times, ingredients, steps and nutrition, one item per line
+    """
+    lines = []
+    for label, key in (
+        ("Recipe", "name"),
+        ("Description", "description"),
+        ("Yield", "recipeYield"),
+        ("Prep time", "prepTime"),
+        ("Cook time", "cookTime"),
+        ("Total time", "totalTime"),
+    ):
+        value = _text(recipe.get(key))
+        if value:
+            lines.append(f"{label}: {value}")
+
+    ingredients = recipe.get("recipeIngredient") or recipe.get("ingredients") or []
+    if isinstance(ingredients, str):
+        ingredients = [ingredients]
+    ingredients = [t for t in (_text(i) for i in ingredients) if t]
+    if ingredients:
+        lines.append("Ingredients:")
+        lines.extend(f"- {i}" for i in ingredients)
+
+    steps = _instruction_lines(recipe.get("recipeInstructions"))
+    if steps:
+        lines.append("Instructions:")
+        number = 0
+        for is_heading, text in steps:
+            if is_heading:
+                lines.append(text)
+            else:
+                number += 1
+                lines.append(f"{number}. {text}")
+
+    nutrition = recipe.get("nutrition")
+    if isinstance(nutrition, dict):
+        facts = [
+            f"{key}: {_text(value)}"
+            for key, value in nutrition.items()
+            if not key.startswith("@") and _text(value)
+        ]
+        if facts:
+            lines.append("Nutrition (per serving): " + " | ".join(facts))
+    return "\n".join(lines)
+
+
+def _jsonld_recipe(soup: BeautifulSoup) -> dict | None:
+    for script in soup.find_all("script", type=re.compile(r"ld\+json", re.IGNORECASE)):
+        raw = script.string or script.get_text()
+        if not raw or "Recipe" not in raw:
+            continue
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            # Some sites emit trailing commas or stray control characters
+            try:
+                data = json.loads(re.sub(r",\s*([\]}])", r"\1", raw), strict=False)
+            except ValueError:
+                continue
+        recipe = _find_recipe(data)
+        if recipe is not None:
+            return recipe
+    return None
+
+
+# Microdata properties kept as lists even with a single value
+_LIST_PROPERTIES = ("recipeIngredient", "ingredients", "recipeInstructions")
+
+
+def _microdata_value(element: Tag):
+    if element.has_attr("itemscope"):
+        return _microdata_item(element)
+    for attr in ("content", "datetime"):
+        if element.has_attr(attr):
+            return element[attr]
+    items = element.find_all("li")
+    if items:
+        # e.g. recipeInstructions on an <ol> of steps
+        return [_clean(li.get_text(" ")) for li in items]
+    return _clean(element.get_text(" "))
+
+
+def _microdata_item(scope: Tag) -> dict:
+    """An `itemscope` element's properties, excluding those of nested items."""
+    item = {}
+    for element in scope.find_all(itemprop=True):
+        # Skip properties that belong to a nested itemscope
+        owner = element.find_parent(itemscope=True)
+        if owner is not scope:
+            continue
+        value = _microdata_value(element)
+        for prop in element["itemprop"].split():
+            item.setdefault(prop, []).extend(value if isinstance(value, list) else [value])
+    return {k: v[0] if len(v) == 1 and k not in _LIST_PROPERTIES else v for k, v in item.items()}
+
+
+def _microdata_recipe(soup: BeautifulSoup) -> dict | None:
+    scope = soup.find(itemscope=True, itemtype=re.compile(r"schema\.org/Recipe\b", re.IGNORECASE))
+    if scope is None:
+        return None
+    return _microdata_item(scope)
+
+
+def _link_density(element: Tag) -> float:
+    text_length = len(element.get_text(" ", strip=True))
+    link_length = sum(len(a.get_text(" ", strip=True)) for a in element.find_all("a"))
+    return link_length / text_length if text_length else 1.0
+
+
+def _main_content(soup: BeautifulSoup) -> str:
+    """Readability-style main text: the block whose paragraphs score highest, discounted by link density."""
+    for element in soup.find_all(_BOILERPLATE_TAGS):
+        element.decompose()
+    for element in soup.find_all(True):
+        if element.decomposed or element.name in ("html", "body"):
+            continue
+        marker = " ".join(element.get("class") or []) + " " + (element.get("id") or "")
+        if not _BOILERPLATE_ATTRS.search(marker) or _CONTENT_ATTRS.search(marker):
+            continue
+        # A wrapper such as "site has-sidebar" may still hold the content
+        if element.find(class_=_CONTENT_ATTRS) or element.find(id=_CONTENT_ATTRS):
+            continue
+        element.decompose()
+
+    # Each paragraph scores its parent fully and its grandparent by half
+    scores: dict[int, list] = {}
+    for paragraph in soup.find_all(_PARAGRAPH_TAGS):
+        text = paragraph.get_text(" ", strip=True)
+        if len(text) < 20:
+            continue
+        score = 1 + text.count(",") + min(len(text) // 100, 3)
+        for ancestor, weight in ((paragraph.parent, 1.0), (paragraph.parent and paragraph.parent.parent, 0.5)):
+            if ancestor is None or ancestor.name in ("html", "[document]"):
+                continue
+            entry = scores.setdefault(id(ancestor), [ancestor, 0.0])
+            entry[1] += score * weight
+
+    best, best_score = None, 0.0
+    for element, score in scores.values():
+        score *= 1.0 - _link_density(element)
+        if score > best_score:
+            best, best_score = element, score
+    root = best or soup.body or soup
+    lines = (_clean(line) for line in root.get_text("\n").splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def extract_content(html: str) -> tuple[str, str]:
+    """
+    Compact content of an HTML page.
+
+    Returns:
+        tuple[str, str]: The extraction method (jsonld, microdata, readability or
+            empty) and the extracted text, capped at `MAX_CONTENT_CHARS`
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    title = _clean(soup.title.get_text()) if soup.title else ""
+    method, text = "empty", ""
+    for name, find in (("jsonld", _jsonld_recipe), ("microdata", _microdata_recipe)):
+        recipe = find(soup)
+        if recipe:
+            text = format_recipe(recipe)
+            if text:
+                method = name
+                break
+    if not text:
+        text = _main_content(soup)
+        if text:
+            method = "readability"
+            if title and not text.startswith(title):
+                text = f"{title}\n{text}"
+    if len(text) > MAX_CONTENT_CHARS:
+        text = text[:MAX_CONTENT_CHARS].rsplit("\n", 1)[0] + "\n[truncated]"
+    return method, text
+
+
+def download_html(url: str, max_bytes: int = MAX_PAGE_BYTES) -> tuple[int, str]:
+    """
+    Stream a page, stopping after `max_bytes`.
+
+    Non-HTML responses are abandoned after their headers. Like `WebBaseLoader`,
+    error statuses are not raised: their body is returned as the page.
+
+    Returns:
+        tuple[int, str]: The HTTP status, and the (possibly truncated) HTML or
+            "" for non-HTML content
+    """
+    with get_session().get(url, stream=True) as resp:
+        content_type = resp.headers.get("Content-Type", "")
+        if content_type and not any(t in content_type for t in ("html", "xml", "text/plain")):
+            logger.info("Skipping %s: content type %s", url, content_type)
+            return resp.status_code, ""
+        declared = resp.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            logger.info("%s is %s bytes, reading only the first %s", url, declared, max_bytes)
+        chunks, received = [], 0
+        for chunk in resp.iter_content(_CHUNK_SIZE):
+            chunks.append(chunk)
+            received += len(chunk)
+            if received >= max_bytes:
+                logger.info("Stopped downloading %s after %s bytes", url, received)
+                break
+        # requests assumes ISO-8859-1 for text/* without a charset; pages are almost always UTF-8
+        encoding = resp.encoding if "charset" in content_type.lower() else "utf-8"
+    return resp.status_code, b"".join(chunks)[:max_bytes].decode(encoding or "utf-8", errors="replace")
+
+
+def _fetch_and_extract(url: str) -> str:
+    with timed_dependency("fetch_url"):
+        status, html = download_html(url)
+    method, text = extract_content(html) if html else ("empty", "")
+    extractions_total.inc(method=method)
+    extracted_chars.observe(len(text))
+    logger.info(
+        "Extracted %s chars from %s (HTTP %s, %s chars of HTML) via %s", len(text), url, status, len(html), method
+    )
+    _page_cache.put(url, text, ttl=None if 200 <= status < 300 else PAGE_ERROR_TTL)
+    return text
+
+
+def fetch_recipe_page(url: str) -> str:
+    """
+    Compact content of the page at `url`, from the cache when possible.
+
+    If the page is already being fetched (e.g. by a prefetch), waits for that
+    fetch instead of starting another one.
+
+    Returns:
+        str: The page's recipe or main content, or "" if nothing was found
+    """
+    cached = _page_cache.get(url)
+    if cached is not None:
+        page_lookups_total.inc(result="cached")
+        return cached
+    with _inflight_lock:
+        future = _inflight.get(url)
+        owner = future is None
+        if owner:
+            future = _inflight[url] = Future()
+    if not owner:
+        page_lookups_total.inc(result="in_flight")
+        return future.result()
+    page_lookups_total.inc(result="fetched")
+    try:
+        text = _fetch_and_extract(url)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(text)
+        return text
+    finally:
+        with _inflight_lock:
+            _inflight.pop(url, None)
+
+
+def _prefetch(url: str):
+    try:
+        fetch_recipe_page(url)
+    except Exception as e:
+        logger.info("Prefetching %s failed: %s", url, e)
+
+
+def prefetch_recipe_pages(urls: list[str]) -> int:
+    """
+    Start fetching pages in the background so later `fetch_recipe_page` calls find them ready.
+
+    Pages that are cached or already being fetched are skipped.
+
+    Returns:
+        int: Number of fetches started
+    """
+    started = 0
+    for url in dict.fromkeys(urls):
+        if _page_cache.peek(url) is not None:
+            continue
+        with _inflight_lock:
+            if url in _inflight:
+                continue
+        # No context copy: this work belongs to no request's timings
+        _prefetch_executor.submit(_prefetch, url)
+        started += 1
+    if started:
+        prefetches_total.inc(started)
+    return started
@@ -0,0 +1,119 @@
+import time
+
+from backend.src.common import recipe_extract
+from backend.src.common.recipe_extract import download_html, extract_content, fetch_recipe_page
+
+JSONLD_PAGE = """<html><head><title>Best Chili</title>
+<script type="application/ld+json">{"@context": "https://schema.org", "@graph": [
+  {"@type": "WebPage"},
+  {"@type": ["Recipe", "Thing"], "name": "Best Chili", "recipeYield": ["4", "4 servings"], "totalTime": "PT1H",
+   "recipeIngredient": ["1 lb beef", "2 cups <b>beans</b>"],
+   "recipeInstructions": [{"@type": "HowToSection", "name": "Cook", "itemListElement": [
+     {"@type": "HowToStep", "text": "Brown beef."}, {"@type": "HowToStep", "text": "Add beans."}]}],
+   "nutrition": {"@type": "NutritionInformation", "calories": "400 kcal"}},
+]}</script></head><body>""" + "<p>Advertisement</p>" * 500 + "</body></html>"
+
+MICRODATA_PAGE = """<html><body><div itemscope itemtype="http://schema.org/Recipe">
+<h1 itemprop="name">Pancakes</h1><meta itemprop="totalTime" content="PT20M">
+<ul><li itemprop="recipeIngredient">1 cup flour</li><li itemprop="recipeIngredient">1 egg</li></ul>
+<div itemprop="nutrition" itemscope itemtype="http://schema.org/NutritionInformation">
+<span itemprop="calories">200 kcal</span></div>
+<ol itemprop="recipeInstructions"><li>Mix</li><li>Fry</li></ol>
+</div></body></html>"""
+
+PLAIN_PAGE = (
+    "<html><head><title>Soup</title></head><body><nav><a href=/>Home</a> Menu</nav>"
+    "<div class='site-wrap has-sidebar'><div class='entry-content'><p>"
+    + "Simmer the vegetables slowly, stirring now and then. " * 20
+    + "</p><p>Serve hot with crusty bread.</p></div><div class='comments'><p>"
+    + "Great recipe, thanks! " * 50
+    + "</p></div><div class='sidebar'>"
+    + "<p><a href=/x>Another recipe you might like</a></p>" * 30
+    + "</div></div><footer>Copyright</footer></body></html>"
+)
+
+
+def test_jsonld_recipe_is_formatted_compactly():
+    method, text = extract_content(JSONLD_PAGE)
+    assert method == "jsonld"
+    assert text.splitlines() == [
+        "Recipe: Best Chili",
+        "Yield: 4, 4 servings",
+        "Total time: PT1H",
+        "Ingredients:",
+        "- 1 lb beef",
+        "- 2 cups beans",
+        "Instructions:",
+        "Cook:",
+        "1. Brown beef.",
+        "2. Add beans.",
+        "Nutrition (per serving): calories: 400 kcal",
+    ]
+
+
+def test_microdata_recipe_without_jsonld():
+    method, text = extract_content(MICRODATA_PAGE)
+    assert method == "microdata"
+    assert "Recipe: Pancakes" in text
+    assert "- 1 cup flour\n- 1 egg" in text
+    assert "1. Mix\n2. Fry" in text
+    assert "calories: 200 kcal" in text
+
+
+def test_readability_keeps_the_main_content_only():
+    method, text = extract_content(PLAIN_PAGE)
+    assert method == "readability"
+    assert text.startswith("Soup\nSimmer the vegetables")
+    assert "Serve hot" in text
+    for boilerplate in ("Home", "Great recipe", "Another recipe", "Copyright"):
+        assert boilerplate not in text
+
+
+def test_extracted_text_is_capped(monkeypatch):
+    monkeypatch.setattr(recipe_extract, "MAX_CONTENT_CHARS", 200)
+    method, text = extract_content(PLAIN_PAGE.replace("</p><p>", "</p>\n<p>"))
+    assert len(text) <= 200 + len("\n[truncated]")
+    assert text.endswith("[truncated]")
+    assert extract_content("<html><body></body></html>") == ("empty", "")
+
+
+def test_download_stops_at_the_byte_limit(stub_server):
+    server = stub_server()
+    server.body = "<html><body><p>" + "x" * 2_000_000 + "</p></body></html>"
+    status, html = download_html(server.url, max_bytes=100_000)
+    assert status == 200 and len(html) == 100_000
+
+
+def test_non_html_content_is_skipped(stub_server):
+    server = stub_server()
+    server.body = b"%PDF-1.4"
+    server.content_type = "application/pdf"
+    assert download_html(server.url) == (200, "")
+
+
+def test_pages_are_fetched_once_and_cached(stub_server):
+    server = stub_server()
+    server.body = JSONLD_PAGE
+    url = f"{server.url}/chili"
+    first = fetch_recipe_page(url)
+    assert first.startswith("Recipe: Best Chili")
+    assert fetch_recipe_page(url) == first
+    assert len(server.requests) == 1
+    assert recipe_extract.prefetch_recipe_pages([url]) == 0
+
+
+def test_error_pages_are_cached_only_briefly(stub_server, monkeypatch):
+    monkeypatch.setattr(recipe_extract, "PAGE_ERROR_TTL", 0.1)
+    server = stub_server()
+    server.status = 503
+    server.body = "<html><body><p>Service unavailable, please retry later.</p></body></html>"
+    url = f"{server.url}/busy"
+    fetch_recipe_page(url)
+    fetch_recipe_page(url)
+    assert len(server.requests) == 1
+
+    time.sleep(0.15)
+    server.status = 200
+    server.body = JSONLD_PAGE
+    assert fetch_recipe_page(url).startswith("Recipe: Best Chili")
+    assert len(server.requests) == 2
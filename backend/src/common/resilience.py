@@ -0,0 +1,180 @@
+"""Building blocks for calling flaky external providers.
+
+- `LatencyWindow`: recent call durations and their percentiles, used to decide
+  when a call is slow enough to hedge.
+- `CircuitBreaker`: stops sending requests to a provider whose recent error
+  rate is too high, and lets a single trial request through after a cooldown.
+- `TokenBucket`: client-side rate limiting to stay within a provider's quota.
+
+All of them are thread-safe; tools call providers from worker threads.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class LatencyWindow:
+    """
+    Durations of the most recent successful calls.
+
+    Args:
+        size (int): Number of durations kept.
+        min_samples (int): Below this many samples `percentile` returns `default`.
+        default (float): Seconds reported until there are enough samples.
+    """
+
+    def __init__(self, size: int = 200, min_samples: int = 20, default: float = 1.0):
+        self.min_samples = min_samples
+        self.default = default
+        self._durations: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._durations.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        """The `q`-th percentile (0-100) of recent durations, in seconds."""
+        with self._lock:
+            if len(self._durations) < self.min_samples:
+                return self.default
+            ordered = sorted(self._durations)
+        index = min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker over a sliding time window.
+
+    Closed: calls go through and their outcomes are recorded. Once at least
+    `min_calls` calls in the last `window` seconds have failed at `failure_rate`
+    or more, the breaker opens and rejects calls for `cooldown` seconds. Then it
+    is half-open: one trial call goes through, and its outcome closes or
+    reopens the breaker.
+
+    Args:
+        failure_rate (float): Fraction of failed calls that opens the breaker.
+        min_calls (int): Calls needed in the window before the rate is trusted.
+        window (float): Seconds of history considered.
+        cooldown (float): Seconds the breaker stays open.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window: float = 30.0,
+        cooldown: float = 30.0,
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        # (monotonic time, succeeded)
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh_locked(time.monotonic())
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may be made now; a half-open breaker admits one trial at a time."""
+        with self._lock:
+            self._refresh_locked(time.monotonic())
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release(self):
+        """Give back a half-open trial that `allow` admitted but that was never made."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record(self, succeeded: bool):
+        """Record the outcome of a call that `allow` admitted."""
+        now = time.monotonic()
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+                if succeeded:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open_locked(now)
+                return
+            self._outcomes.append((now, succeeded))
+            self._trim_locked(now)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if (
+                self._state == self.CLOSED
+                and len(self._outcomes) >= self.min_calls
+                and failures >= self.failure_rate * len(self._outcomes)
+            ):
+                self._open_locked(now)
+
+    def _open_locked(self, now: float):
+        self._state = self.OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+
+    def _refresh_locked(self, now: float):
+        if self._state == self.OPEN and now - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+
+    def _trim_locked(self, now: float):
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter.
+
+    Args:
+        rate (float): Tokens added per second, i.e. the sustained request rate.
+        capacity (float): Maximum tokens, i.e. the burst size.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        """
+        Take one token, waiting up to `timeout` seconds for it.
+
+        Returns:
+            bool: False if no token became available in time
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return True
+                wait = (1.0 - self._tokens) / self.rate if self.rate > 0 else float("inf")
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
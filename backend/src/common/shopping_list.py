@@ -0,0 +1,315 @@
+"""Deterministic shopping-list aggregation.
+
+Summing quantities across a meal plan does not need a model. Every recipe line
+is mapped to its canonical ingredient ID (`ingredient_names.canonical_id`),
+its unit is normalized,
+and the quantity is converted to the base unit of the dimension chosen for
+that ingredient:
+
+- count, if every line of the ingredient uses the same count unit ("3 eggs"),
+- volume (millilitres), if every line is measured by volume,
+- mass (grams) otherwise: when any line is weighed, or dimensions or count
+  units are mixed ("1 can tomatoes" and "2 tomatoes").
+
+Conversions between dimensions use the density and piece-weight tables in
+`units`. Parsing is per line but cached per distinct name and unit; the
+conversions and per-ingredient sums are NumPy array operations, so a plan with
+thousands of lines aggregates in a few milliseconds.
+
+Pantry items are converted the same way and subtracted; ingredients fully
+covered by the pantry are left off the list. Lines in units that cannot be
+converted ("to taste", "handful") are summed separately per unit.
+"""
+
+import functools
+import logging
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+from backend.src.common.ingredient_names import canonical_ids
+from backend.src.common.units import COUNT, MASS, UNITS, VOLUME, density, normalize_unit, piece_weight
+from backend.src.models import Ingredient, MealPlan, PantryItem, Recipe, ShoppingItem
+
+logger = logging.getLogger(__name__)
+
+# Dimension codes used in the arrays
+_MASS, _VOLUME, _COUNT = 0, 1, 2
+_DIMENSION_CODES = {MASS: _MASS, VOLUME: _VOLUME, COUNT: _COUNT}
+
+# Canonical units as array indices
+_UNIT_NAMES = tuple(UNITS)
+_UNIT_CODES = {unit: code for code, unit in enumerate(_UNIT_NAMES)}
+_UNIT_DIMENSIONS = np.array([_DIMENSION_CODES[dim] for dim, _size in UNITS.values()], dtype=np.int8)
+_UNIT_SIZES = np.array([size for _dim, size in UNITS.values()], dtype=np.float64)
+
+# Totals below this (in base units) count as nothing left to buy
+_EPSILON = 1e-6
+
+# Name and unit parsing repeat for every line; cache them per distinct string
+_canonical_unit_code = functools.lru_cache(maxsize=1024)(
+    lambda unit: _UNIT_CODES.get(normalize_unit(unit), -1)
+)
+_density = functools.lru_cache(maxsize=16384)(density)
+_piece_weight = functools.lru_cache(maxsize=16384)(piece_weight)
+
+
+@dataclass(frozen=True)
+class RecipeLine:
+    """One ingredient line of a recipe, scaled to the servings being cooked."""
+
+    recipe_id: str
+    ingredient: Ingredient
+    scale: float = 1.0
+
+
+def meal_plan_lines(meal_plan: MealPlan, recipes: dict[str, Recipe]) -> list[RecipeLine]:
+    """
+    Ingredient lines of every meal in a plan, scaled from the recipe's servings
+    to the servings the meal plan calls for.
+
+    Args:
+        meal_plan: The meal plan
+        recipes: The plan's recipes by `recipe_id` (e.g. from `MealPlanStore.get_recipes`)
+
+    Returns:
+        list[RecipeLine]: Lines to pass to `aggregate_ingredients`
+    """
+    lines = []
+    for skeleton in meal_plan.recipes:
+        if not skeleton.recipe_id:
+            continue
+        recipe = recipes.get(skeleton.recipe_id)
+        if recipe is None:
+            logger.warning("Recipe %s of %s not found", skeleton.recipe_id, meal_plan.meal_plan_id)
+            continue
+        scale = skeleton.servings / recipe.servings if recipe.servings > 0 else 1.0
+        lines.extend(RecipeLine(recipe.recipe_id, ing, scale) for ing in recipe.ingredients)
+    return lines
+
+
+class _ParsedLines:
+    """
+    Lines as parallel arrays of ingredient code, unit code and quantity.
+
+    Ingredient codes index `names`, shared across instances through `name_codes`.
+    Lines whose unit is unknown are kept aside in `unknown`.
+    """
+
+    def __init__(self, items: Iterable[tuple[str, str, float]], name_codes: dict[str, int]):
+        codes, units, quantities = [], [], []
+        self.unknown: list[tuple[str, str, float]] = []
+        # Grouping key of every line, in input order
+        self.keys: list[str | tuple[str, str]] = []
+        items = list(items)
+        for key, (_name, unit, quantity) in zip(canonical_ids(item[0] for item in items), items):
+            unit_code = _canonical_unit_code(unit)
+            if unit_code < 0:
+                raw_unit = (unit or "").strip().lower()
+                self.unknown.append((key, raw_unit, quantity))
+                self.keys.append((key, raw_unit))
+                continue
+            codes.append(name_codes.setdefault(key, len(name_codes)))
+            units.append(unit_code)
+            quantities.append(quantity)
+            self.keys.append(key)
+        self.codes = np.array(codes, dtype=np.int64)
+        self.units = np.array(units, dtype=np.int64)
+        self.dimensions = _UNIT_DIMENSIONS[self.units]
+        # Quantity in the base unit of the line's own dimension (g, ml or pieces)
+        self.base = np.array(quantities, dtype=np.float64) * _UNIT_SIZES[self.units]
+
+    def grams(self, names: list[str], densities: np.ndarray) -> np.ndarray:
+        """Every line's quantity as a weight."""
+        # Piece weights are looked up once per distinct (ingredient, count unit)
+        units = len(_UNIT_NAMES)
+        counted = self.dimensions == _COUNT
+        piece_grams = np.zeros(len(self.base), dtype=np.float64)
+        if counted.any():
+            pairs, inverse = np.unique(
+                self.codes[counted] * units + self.units[counted], return_inverse=True
+            )
+            weights = np.array(
+                [_piece_weight(names[p // units], _UNIT_NAMES[p % units]) for p in pairs.tolist()],
+                dtype=np.float64,
+            )
+            piece_grams[counted] = weights[inverse]
+        return np.select(
+            [self.dimensions == _MASS, self.dimensions == _VOLUME],
+            [self.base, self.base * densities[self.codes]],
+            self.base * piece_grams,
+        )
+
+    def in_target_units(self, plan: "_TargetPlan", names: list[str]) -> np.ndarray:
+        """Every line's quantity in the base unit of its ingredient's target dimension."""
+        grams = self.grams(names, plan.densities)
+        targets = plan.dimensions[self.codes]
+        same_count_unit = self.units == plan.count_units[self.codes]
+        return np.select(
+            [
+                targets == _MASS,
+                targets == _VOLUME,
+                same_count_unit,
+            ],
+            [
+                grams,
+                np.where(self.dimensions == _VOLUME, self.base, grams / plan.densities[self.codes]),
+                self.base,
+            ],
+            grams / plan.piece_grams[self.codes],
+        )
+
+
+@dataclass
+class _TargetPlan:
+    """Per ingredient: target dimension, and the constants to convert into it."""
+
+    dimensions: np.ndarray
+    densities: np.ndarray
+    # Count unit of count-target ingredients (-1 otherwise) and its weight per piece
+    count_units: np.ndarray
+    piece_grams: np.ndarray
+
+    @classmethod
+    def for_lines(cls, lines: _ParsedLines, names: list[str]) -> "_TargetPlan":
+        count = len(names)
+        units = len(_UNIT_NAMES)
+        has = np.zeros((3, count), dtype=bool)
+        has[lines.dimensions, lines.codes] = True
+        # Distinct count units per ingredient
+        counted = lines.dimensions == _COUNT
+        pairs = np.unique(lines.codes[counted] * units + lines.units[counted])
+        distinct_count_units = np.bincount(pairs // units, minlength=count)
+        count_only = ~has[_MASS] & ~has[_VOLUME] & (distinct_count_units == 1)
+
+        dimensions = np.where(
+            count_only, _COUNT, np.where(has[_VOLUME] & ~has[_MASS] & ~has[_COUNT], _VOLUME, _MASS)
+        ).astype(np.int8)
+        count_units = np.full(count, -1, dtype=np.int64)
+        count_units[pairs // units] = np.where(count_only[pairs // units], pairs % units, -1)
+        densities = np.array([_density(name) for name in names], dtype=np.float64)
+        piece_grams = np.array(
+            [
+                _piece_weight(name, _UNIT_NAMES[unit] if unit >= 0 else None)
+                for name, unit in zip(names, count_units.tolist())
+            ],
+            dtype=np.float64,
+        )
+        return cls(dimensions, densities, count_units, piece_grams)
+
+    def extended(self, names: list[str]) -> "_TargetPlan":
+        """The plan with pantry-only ingredients appended (converted to mass)."""
+        extra = len(names) - len(self.dimensions)
+        if extra <= 0:
+            return self
+        new_names = names[len(self.dimensions):]
+        return _TargetPlan(
+            dimensions=np.concatenate([self.dimensions, np.full(extra, _MASS, dtype=np.int8)]),
+            densities=np.concatenate(
+                [self.densities, np.array([_density(n) for n in new_names], dtype=np.float64)]
+            ),
+            count_units=np.concatenate([self.count_units, np.full(extra, -1, dtype=np.int64)]),
+            piece_grams=np.concatenate(
+                [self.piece_grams, np.array([_piece_weight(n) for n in new_names], dtype=np.float64)]
+            ),
+        )
+
+
+def _display_units(lines: _ParsedLines, plan: _TargetPlan, count: int) -> np.ndarray:
+    """Per ingredient, the unit its lines used most within the target dimension."""
+    units = len(_UNIT_NAMES)
+    if count == 0:
+        return np.zeros(0, dtype=np.int64)
+    in_target = lines.dimensions == plan.dimensions[lines.codes]
+    usage = np.bincount(
+        lines.codes[in_target] * units + lines.units[in_target], minlength=count * units
+    ).reshape(count, units)
+    display = usage.argmax(axis=1)
+    # Ingredients converted to mass from volumes and counts only are shown in grams
+    unused = usage.max(axis=1) == 0
+    display[unused] = _UNIT_CODES["g"]
+    return display
+
+
+def aggregate_ingredients(
+    lines: Sequence[RecipeLine],
+    pantry: Sequence[Ingredient | PantryItem] = (),
+    decimals: int = 2,
+) -> list[ShoppingItem]:
+    """
+    Sum recipe lines into shopping items and subtract what is in the pantry.
+
+    Each item is reported in the unit its recipes used most for the chosen
+    dimension, e.g. rice measured in cups stays in cups unless a recipe
+    weighs it.
+
+    Args:
+        lines: Ingredient lines of all recipes in the plan
+        pantry: Items already at home
+        decimals: Rounding of the reported quantities
+
+    Returns:
+        list[ShoppingItem]: One item per canonical ingredient (and per unit
+            for unconvertible units), sorted by name
+    """
+    name_codes: dict[str, int] = {}
+    parsed = _ParsedLines(
+        (
+            (line.ingredient.name, line.ingredient.unit, line.ingredient.quantity * line.scale)
+            for line in lines
+        ),
+        name_codes,
+    )
+    names = list(name_codes)
+    count = len(names)
+    plan = _TargetPlan.for_lines(parsed, names)
+    totals = np.bincount(parsed.codes, weights=parsed.in_target_units(plan, names), minlength=count)
+
+    unknown_totals: dict[tuple[str, str], float] = defaultdict(float)
+    for key, unit, quantity in parsed.unknown:
+        unknown_totals[(key, unit)] += quantity
+
+    if pantry:
+        stock = _ParsedLines(((item.name, item.unit, item.quantity) for item in pantry), name_codes)
+        # Pantry-only ingredients get codes past `count` and are dropped after summing
+        all_names = list(name_codes)
+        on_hand = np.bincount(
+            stock.codes,
+            weights=stock.in_target_units(plan.extended(all_names), all_names),
+            minlength=len(all_names),
+        )
+        totals = totals - on_hand[:count]
+        for key, unit, quantity in stock.unknown:
+            if (key, unit) in unknown_totals:
+                unknown_totals[(key, unit)] -= quantity
+
+    # Recipes needing each ingredient, in order of first use
+    recipes: dict = defaultdict(dict)
+    for line, key in zip(lines, parsed.keys):
+        recipes[key].setdefault(line.recipe_id)
+
+    display = _display_units(parsed, plan, count)
+    quantities = np.round(totals / _UNIT_SIZES[display], decimals)
+    items = [
+        ShoppingItem(
+            ingredient_name=names[code],
+            total_quantity=float(quantities[code]),
+            unit=_UNIT_NAMES[display[code]],
+            needed_for_recipes=list(recipes[names[code]]),
+        )
+        for code in np.flatnonzero(totals > _EPSILON).tolist()
+    ]
+    items.extend(
+        ShoppingItem(
+            ingredient_name=name,
+            total_quantity=round(quantity, decimals),
+            unit=unit,
+            needed_for_recipes=list(recipes[(name, unit)]),
+        )
+        for (name, unit), quantity in unknown_totals.items()
+        if quantity > _EPSILON
+    )
+    items.sort(key=lambda item: (item.ingredient_name, item.unit))
+    return items
@@ -0,0 +1,112 @@
+import time
+
+import pytest
+
+from backend.src.common.shopping_list import RecipeLine, aggregate_ingredients, meal_plan_lines
+from backend.src.models import (
+    Ingredient,
+    MacroPercentages,
+    MealPlan,
+    MealType,
+    PantryItem,
+    Recipe,
+    RecipeSkeleton,
+)
+
+
+def _line(name: str, quantity: float, unit: str, recipe_id: str = "r1", scale: float = 1.0) -> RecipeLine:
+    return RecipeLine(recipe_id, Ingredient(name=name, quantity=quantity, unit=unit), scale)
+
+
+def _items(lines, pantry=()) -> dict[tuple[str, str], float]:
+    return {
+        (item.ingredient_name, item.unit): item.total_quantity
+        for item in aggregate_ingredients(lines, pantry)
+    }
+
+
+def test_spellings_and_units_of_one_ingredient_are_summed():
+    items = _items([
+        _line("olive oil", 2, "T"),
+        _line("Extra virgin olive oil", 1, "tablespoon", "r2"),
+        _line("eggs", 3, "pieces"),
+        _line("egg", 2, "piece", "r2"),
+    ])
+    assert items == {("olive oil", "tbsp"): 3.0, ("egg", "piece"): 5.0}
+
+
+def test_mixed_dimensions_are_summed_by_weight():
+    items = _items([
+        # A can and single tomatoes: two count units, so both become grams
+        _line("tomatoes", 2, "piece"),
+        _line("tomato", 1, "can", "r2"),
+        # Volume and weight of rice
+        _line("rice", 1, "cup"),
+        _line("white rice", 100, "g", "r2"),
+    ])
+    assert items[("tomato", "g")] == pytest.approx(400 + 2 * 120)
+    assert items[("white rice", "g")] == pytest.approx(236.588 * 0.85 + 100, abs=0.01)
+
+
+def test_pantry_is_subtracted_in_the_ingredient_dimension():
+    lines = [
+        _line("olive oil", 3, "tbsp"),
+        _line("white rice", 2, "cup"),
+        _line("garlic", 4, "cloves"),
+        _line("salt", 1, "to taste"),
+    ]
+    pantry = [
+        PantryItem(name="evoo", quantity=1, unit="tbsp"),
+        PantryItem(name="rice", quantity=1, unit="cup"),
+        PantryItem(name="garlic", quantity=10, unit="cloves"),
+        PantryItem(name="pasta", quantity=500, unit="g"),
+    ]
+    items = _items(lines, pantry)
+    # Garlic is fully covered; the pantry-only pasta never appears
+    assert items == {
+        ("olive oil", "tbsp"): 2.0,
+        ("white rice", "cup"): 1.0,
+        ("salt", "to taste"): 1.0,
+    }
+
+
+def test_meal_plan_lines_scale_to_the_servings_cooked():
+    recipe = Recipe(
+        recipe_id="r1",
+        title="Rice",
+        description="",
+        ingredients=[Ingredient(name="rice", quantity=1, unit="cup")],
+        instructions=[],
+        prep_time_minutes=5,
+        cook_time_minutes=20,
+        servings=2,
+    )
+    skeleton = RecipeSkeleton(
+        skeleton_id="s1",
+        title="Rice",
+        recipe_id="r1",
+        target_calories_per_serving=400,
+        servings=6,
+        macro_percentages=MacroPercentages(protein_percent=20, carb_percent=50, fat_percent=30),
+        meal_type=MealType.DINNER,
+    )
+    missing = skeleton.model_copy(update={"skeleton_id": "s2", "recipe_id": "gone"})
+    meal_plan = MealPlan(meal_plan_id="m1", user_id="u1", recipes=[skeleton, missing])
+    lines = meal_plan_lines(meal_plan, {"r1": recipe})
+    assert [(line.recipe_id, line.scale) for line in lines] == [("r1", 3.0)]
+    assert _items(lines) == {("white rice", "cup"): 3.0}
+
+
+def test_large_plan_aggregates_quickly():
+    names = ["chicken breasts", "rice", "olive oil", "eggs", "garlic", "tomatoes", "milk", "onion"]
+    units = ["g", "cup", "tbsp", "piece", "cloves", "can", "ml", "piece"]
+    lines = [
+        _line(names[i % len(names)], 1 + i % 3, units[i % len(units)], f"r{i % 50}", 1.5)
+        for i in range(5000)
+    ]
+    aggregate_ingredients(lines)
+    started = time.perf_counter()
+    items = aggregate_ingredients(lines)
+    elapsed = time.perf_counter() - started
+    assert len(items) == len(names)
+    assert elapsed < 0.5
@@ -0,0 +1,197 @@
+"""Cooking unit normalization and conversion to grams.
+
+Ingredient quantities come from the agent and from users in free-form units
+("cups", "Tbsp", "oz", "cloves"). Units are normalized to a canonical symbol
+and classified by dimension (mass, volume or count). Volumes and counts are
+turned into grams with small per-ingredient density and piece-weight tables,
+matched on words of the ingredient name, with generic defaults otherwise.
+"""
+
+import re
+
+MASS = "mass"
+VOLUME = "volume"
+COUNT = "count"
+
+# Canonical unit -> (dimension, size in the dimension's base unit: g, ml or piece)
+UNITS = {
+    "mg": (MASS, 0.001),
+    "g": (MASS, 1.0),
+    "kg": (MASS, 1000.0),
+    "oz": (MASS, 28.3495),
+    "lb": (MASS, 453.592),
+    "ml": (VOLUME, 1.0),
+    "cl": (VOLUME, 10.0),
+    "dl": (VOLUME, 100.0),
+    "l": (VOLUME, 1000.0),
+    "tsp": (VOLUME, 4.92892),
+    "tbsp": (VOLUME, 14.7868),
+    "fl oz": (VOLUME, 29.5735),
+    "cup": (VOLUME, 236.588),
+    "pint": (VOLUME, 473.176),
+    "quart": (VOLUME, 946.353),
+    "gallon": (VOLUME, 3785.41),
+    "pinch": (VOLUME, 0.31),
+    "dash": (VOLUME, 0.62),
+    "piece": (COUNT, 1.0),
+    "clove": (COUNT, 1.0),
+    "slice": (COUNT, 1.0),
+    "can": (COUNT, 1.0),
+    "bunch": (COUNT, 1.0),
+    "sprig": (COUNT, 1.0),
+    "stalk": (COUNT, 1.0),
+    "head": (COUNT, 1.0),
+    "leaf": (COUNT, 1.0),
+    "fillet": (COUNT, 1.0),
+    "dozen": (COUNT, 12.0),
+}
+
+# Spellings and plurals -> canonical unit
+_ALIASES = {
+    "milligram": "mg", "milligrams": "mg",
+    "gram": "g", "grams": "g", "gr": "g", "grs": "g",
+    "kilogram": "kg", "kilograms": "kg", "kgs": "kg", "kilo": "kg", "kilos": "kg",
+    "ounce": "oz", "ounces": "oz",
+    "pound": "lb", "pounds": "lb", "lbs": "lb",
+    "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml", "mls": "ml",
+    "centiliter": "cl", "centilitre": "cl",
+    "deciliter": "dl", "decilitre": "dl",
+    "liter": "l", "liters": "l", "litre": "l", "litres": "l",
+    "teaspoon": "tsp", "teaspoons": "tsp", "tsps": "tsp",
+    "tablespoon": "tbsp", "tablespoons": "tbsp", "tbsps": "tbsp", "tbs": "tbsp", "tbl": "tbsp",
+    "fluid ounce": "fl oz", "fluid ounces": "fl oz", "floz": "fl oz", "fl. oz": "fl oz",
+    "cups": "cup", "c": "cup",
+    "pints": "pint", "pt": "pint",
+    "quarts": "quart", "qt": "quart",
+    "gallons": "gallon", "gal": "gallon",
+    "pinches": "pinch", "dashes": "dash",
+    "": "piece", "pieces": "piece", "pc": "piece", "pcs": "piece", "whole": "piece",
+    "each": "piece", "ea": "piece", "unit": "piece", "units": "piece", "item": "piece",
+    "items": "piece", "small": "piece", "medium": "piece", "large": "piece",
+    "cloves": "clove", "slices": "slice", "cans": "can", "bunches": "bunch",
+    "sprigs": "sprig", "stalks": "stalk", "heads": "head", "leaves": "leaf",
+    "fillets": "fillet",
+}
+
+# Single letters whose case matters, resolved before lower-casing
+_CASED_ALIASES = {"T": "tbsp", "t": "tsp"}
+
+# Grams per millilitre, matched on a word of the ingredient name
+DENSITY_G_PER_ML = {
+    "water": 1.0, "broth": 1.0, "stock": 1.0, "milk": 1.03, "cream": 1.0, "yogurt": 1.03,
+    "oil": 0.92, "butter": 0.91, "honey": 1.42, "syrup": 1.33, "vinegar": 1.01,
+    "sauce": 1.05, "juice": 1.04, "flour": 0.53, "sugar": 0.85, "salt": 1.2,
+    "rice": 0.85, "oats": 0.41, "quinoa": 0.72, "lentils": 0.82, "beans": 0.75,
+    "cheese": 0.45, "parmesan": 0.4, "spinach": 0.13, "peas": 0.6, "corn": 0.65,
+    "nuts": 0.55, "almonds": 0.6, "walnuts": 0.45, "cocoa": 0.45, "powder": 0.5,
+    "pepper": 0.5, "cinnamon": 0.56, "paprika": 0.46, "cumin": 0.42,
+}
+# Used when nothing in the name matches
+DEFAULT_DENSITY_G_PER_ML = 0.8
+
+# Grams per piece, matched on a word of the ingredient name
+PIECE_WEIGHT_G = {
+    "egg": 50.0, "eggs": 50.0, "garlic": 5.0, "onion": 110.0, "onions": 110.0,
+    "shallot": 40.0, "tomato": 120.0, "tomatoes": 120.0, "potato": 170.0,
+    "potatoes": 170.0, "carrot": 60.0, "carrots": 60.0, "apple": 180.0, "apples": 180.0,
+    "banana": 120.0, "bananas": 120.0, "lemon": 60.0, "lime": 45.0, "avocado": 150.0,
+    "pepper": 120.0, "zucchini": 200.0, "cucumber": 300.0, "tortilla": 45.0,
+    "tortillas": 45.0, "bread": 30.0, "breast": 175.0, "thigh": 110.0, "fillet": 150.0,
+    "can": 400.0, "bunch": 100.0, "head": 500.0, "stalk": 40.0, "sprig": 1.0, "leaf": 0.5,
+}
+# Used when nothing in the name matches
+DEFAULT_PIECE_WEIGHT_G = 50.0
+
+# Container unit -> grams per container of a specific ingredient, matched on a
+# word of its name; these take precedence over the generic unit weight above
+# ("1 head garlic" is about 50 g, not the 500 g of a head of lettuce)
+CONTAINER_WEIGHT_G = {
+    "head": {
+        "garlic": 50.0, "lettuce": 500.0, "cabbage": 900.0, "cauliflower": 600.0,
+        "broccoli": 350.0, "fennel": 250.0, "radicchio": 200.0, "endive": 100.0,
+    },
+    "bunch": {
+        "parsley": 60.0, "cilantro": 60.0, "coriander": 60.0, "basil": 40.0, "dill": 30.0,
+        "mint": 40.0, "thyme": 20.0, "chive": 25.0, "chives": 25.0, "spinach": 300.0,
+        "kale": 250.0, "asparagus": 450.0, "scallion": 100.0, "scallions": 100.0,
+    },
+}
+
+_WORD = re.compile(r"[a-z]+")
+
+
+def normalize_unit(unit: str | None) -> str | None:
+    """
+    Canonical symbol of a unit, e.g. `"Tablespoons"` -> `"tbsp"`. The cook's
+    abbreviations "T" (tablespoon) and "t" (teaspoon) keep their meaning.
+
+    Returns:
+        str | None: Key of `UNITS`, or None for unknown units
+    """
+    cased = (unit or "").strip().rstrip(".")
+    if cased in _CASED_ALIASES:
+        return _CASED_ALIASES[cased]
+    key = cased.lower()
+    key = " ".join(key.split())
+    if key in UNITS:
+        return key
+    return _ALIASES.get(key)
+
+
+def unit_dimension(unit: str | None) -> str | None:
+    """`MASS`, `VOLUME` or `COUNT` for a unit, or None if it is unknown."""
+    canonical = normalize_unit(unit)
+    return UNITS[canonical][0] if canonical else None
+
+
+def _lookup_by_word(table: dict, name: str | None, default: float) -> float:
+    """Value of the last word of `name` found in `table` (the head noun usually comes last)."""
+    for word in reversed(_WORD.findall((name or "").lower())):
+        # Canonical names are singular; the tables list some words in the plural
+        for candidate in (word, word + "s", word + "es"):
+            if candidate in table:
+                return table[candidate]
+    return default
+
+
+def density(name: str | None) -> float:
+    """Grams per millilitre of an ingredient."""
+    return _lookup_by_word(DENSITY_G_PER_ML, name, DEFAULT_DENSITY_G_PER_ML)
+
+
+def piece_weight(name: str | None, unit: str | None = None) -> float:
+    """
+    Grams per piece of an ingredient.
+
+    Container units ("can", "bunch", "head") take precedence over the
+    ingredient's own piece weight: first the weight of that container of that
+    ingredient, then the generic weight of the container.
+    """
+    canonical = normalize_unit(unit) or ""
+    weight = _lookup_by_word(CONTAINER_WEIGHT_G.get(canonical, {}), name, 0.0)
+    weight = weight or PIECE_WEIGHT_G.get(canonical, 0.0)
+    return weight or _lookup_by_word(PIECE_WEIGHT_G, name, DEFAULT_PIECE_WEIGHT_G)
+
+
+def to_grams(quantity: float, unit: str | None, name: str | None = None) -> float | None:
+    """
+    Convert an ingredient quantity to grams.
+
+    Args:
+        quantity (float): Amount in `unit`
+        unit (str): Unit as written, e.g. `"cups"`
+        name (str, optional): Ingredient name, used for densities and piece weights
+
+    Returns:
+        float | None: Weight in grams, or None if the unit is unknown
+    """
+    canonical = normalize_unit(unit)
+    if canonical is None:
+        return None
+    dimension, size = UNITS[canonical]
+    amount = quantity * size
+    if dimension == MASS:
+        return amount
+    if dimension == VOLUME:
+        return amount * density(name)
+    return amount * piece_weight(name, canonical)
@@ -0,0 +1,45 @@
+import pytest
+
+from backend.src.common.units import normalize_unit, piece_weight, to_grams
+
+
+@pytest.mark.parametrize(
+    "quantity, unit, name, grams",
+    [
+        (1, "head", "garlic", 50.0),
+        (2, "heads", "Garlic", 100.0),
+        (1, "head", "romaine lettuce", 500.0),
+        (1, "head", "celeriac", 500.0),  # no specific weight: generic head
+        (3, "cloves", "garlic", 15.0),
+        (1, "bunch", "cilantro", 60.0),
+        (1, "can", "diced tomatoes", 400.0),
+        (2, "pieces", "eggs", 100.0),
+        (250, "g", "flour", 250.0),
+    ],
+)
+def test_to_grams(quantity, unit, name, grams):
+    assert to_grams(quantity, unit, name) == grams
+
+
+def test_piece_weight_without_container_uses_the_ingredient():
+    assert piece_weight("garlic") == 5.0
+    assert piece_weight("red onion", "piece") == 110.0
+    assert piece_weight("mystery fruit") == 50.0
+
+
+def test_normalize_unit():
+    assert normalize_unit("Tablespoons") == "tbsp"
+    assert normalize_unit("heads") == "head"
+    assert normalize_unit("handfuls of") is None
+
+
+@pytest.mark.parametrize(
+    "unit, canonical",
+    [("T", "tbsp"), ("T.", "tbsp"), ("t", "tsp"), (" t ", "tsp"), ("TBSP", "tbsp"), ("Tsp.", "tsp")],
+)
+def test_single_letter_spoons_keep_their_case(unit, canonical):
+    assert normalize_unit(unit) == canonical
+
+
+def test_capital_t_weighs_a_tablespoon():
+    assert to_grams(2, "T", "olive oil") == pytest.approx(3 * to_grams(2, "t", "olive oil"), rel=1e-4)
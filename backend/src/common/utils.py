@@ -1,6 +1,20 @@
-from google.cloud import secretmanager
+import functools
 import os
 
+from backend.src.common.cache import LRUCache
+
+# Secret values are cached process-wide so each secret is fetched once per TTL
+_SECRET_CACHE = LRUCache(max_entries=256)
+
+
+@functools.cache
+def _get_secret_manager_client():
+    """Return the process-wide Secret Manager client, creating it on first use."""
+    # Imported lazily: the client library is slow to import and only needed in GCP mode
+    from google.cloud import secretmanager
+
+    return secretmanager.SecretManagerServiceClient()
+
 
 def get_gcp_secret(
     secret_id: str, version: str = "latest", project_id: str = None
@@ -16,12 +30,64 @@ def get_gcp_secret(
     """
     if not project_id:
         project_id = os.getenv("GCP_PROJECT_ID") or "171070825881"
-    client = secretmanager.SecretManagerServiceClient()
+    client = _get_secret_manager_client()
     name = f"projects/{project_id}/secrets/{secret_id}/versions/{version}"
     response = client.access_secret_version(request={"name": name})
     return response.payload.data.decode("UTF-8")
 
 
+def get_local_secret(secret_id: str) -> str | None:
+    """
+    Look up a secret in the local environment instead of Secret Manager.
+
+    Checks the `SNAPTOP_SECRET_<SECRET_ID>` env var (upper-cased, dashes as
+    underscores), then a file named `<secret_id>` in the `SNAPTOP_SECRETS_DIR`
+    directory.
+    Args:
+        secret_id (str): Secret name
+    Returns:
+        str | None: Secret value, or None if not configured locally
+    """
+    env_name = "SNAPTOP_SECRET_" + secret_id.upper().replace("-", "_")
+    if os.getenv(env_name):
+        return os.environ[env_name]
+    secrets_dir = os.getenv("SNAPTOP_SECRETS_DIR")
+    if secrets_dir:
+        path = os.path.join(secrets_dir, secret_id)
+        if os.path.isfile(path):
+            with open(path, "r") as f:
+                return f.read().strip()
+    return None
+
+
+def get_secret(secret_id: str, version: str = "latest") -> str:
+    """
+    Fetch a secret through the process-wide secret provider.
+
+    Values are cached for SNAPTOP_SECRET_TTL seconds (default: 3600). Local
+    secrets (see `get_local_secret`) take precedence; Secret Manager is used
+    otherwise, unless SNAPTOP_SECRETS_BACKEND is set to 'local'.
+    Args:
+        secret_id (str): Secret name
+        version (str): Secret Manager version (default: 'latest')
+    Returns:
+        str: Secret value
+    """
+    key = (secret_id, version)
+    value = _SECRET_CACHE.get(key)
+    if value is not None:
+        return value
+
+    value = get_local_secret(secret_id)
+    if value is None:
+        if os.getenv("SNAPTOP_SECRETS_BACKEND", "gcp") == "local":
+            raise KeyError(f"Secret {secret_id} is not configured locally")
+        value = get_gcp_secret(secret_id, version=version)
+
+    _SECRET_CACHE.put(key, value, ttl=get_env_float("SNAPTOP_SECRET_TTL", 3600.0))
+    return value
+
+
 def get_project_name() -> str:
     """
     Returns the GCP project name from the PROJECT_NAME env var, or 'recipellm' if not set.
@@ -34,3 +100,42 @@ def get_bigquery_dataset_name() -> str:
     Returns the BigQuery dataset name from the BIGQUERY_DATASET env var, or 'mealprep' if not set.
     """
     return os.getenv("BIGQUERY_DATASET", "mealprep")
+
+
+def get_env_int(name: str, default: int) -> int:
+    """
+    Returns an integer setting from the environment, or `default` if unset or invalid.
+    """
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def get_env_bool(name: str, default: bool) -> bool:
+    """
+    Returns a boolean setting from the environment ('1'/'true'/'yes'/'on' are
+    true, '0'/'false'/'no'/'off' false), or `default` if unset or invalid.
+    """
+    value = (os.getenv(name) or "").strip().lower()
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off"):
+        return False
+    return default
+
+
+def get_env_float(name: str, default: float) -> float:
+    """
+    Returns a float setting from the environment, or `default` if unset or invalid.
+    """
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StubServer:
+    """
+    Local HTTP server answering every request with a configurable status, body and delay.
+
+    A `str` or `bytes` body is sent as is, with `content_type`; anything else as JSON.
+    """
+
+    def __init__(self):
+        self.status = 200
+        self.body: object = {}
+        self.content_type = "text/html; charset=utf-8"
+        self.delay = 0.0
+        # monotonic arrival time of every request
+        self.requests: list[float] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _answer(self):
+                stub.requests.append(time.monotonic())
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                time.sleep(stub.delay)
+                body = stub.body
+                if isinstance(body, (str, bytes)):
+                    content_type = stub.content_type
+                    payload = body.encode() if isinstance(body, str) else body
+                else:
+                    content_type = "application/json"
+                    payload = json.dumps(body).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except ConnectionError:
+                    # The client stopped reading, e.g. after a size limit
+                    pass
+
+            do_GET = do_POST = _answer
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    """Factory of `StubServer`s, shut down after the test."""
+    servers = []
+
+    def start() -> StubServer:
+        server = StubServer()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
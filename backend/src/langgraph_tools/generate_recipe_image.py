@@ -1,6 +1,7 @@
 import base64
 from langchain.tools import tool
 from backend.src.common.img_generation_models import get_imagen_fast
+from backend.src.common.metrics import timed_dependency
 
 
 @tool
@@ -27,13 +28,14 @@ def generate_recipe_image(recipe_description: str) -> str:
         enhanced_prompt = f"Professional food photography of {recipe_description}, appetizing, well-lit, high quality, detailed"
 
         # Generate the image
-        response = model.generate_images(
-            prompt=enhanced_prompt,
-            number_of_images=1,
-            aspect_ratio="1:1",
-            safety_filter_level="block_some",
-            person_generation="dont_allow"
-        )
+        with timed_dependency("imagen"):
+            response = model.generate_images(
+                prompt=enhanced_prompt,
+                number_of_images=1,
+                aspect_ratio="1:1",
+                safety_filter_level="block_some",
+                person_generation="dont_allow"
+            )
 
         # Get the first (and only) generated image
         image = response.images[0]
@@ -1,82 +1,150 @@
-import requests
 from langchain.tools import tool
-from backend.src.common.utils import get_gcp_secret
+from backend.src.common.api_cache import MISSING, TieredCache, cache_key
+from backend.src.common.http_client import get_session
+from backend.src.common.metrics import timed_dependency
+from backend.src.common.nutrition_db import COLUMN_ALIASES, food_description, local_food
+from backend.src.common.nutrition_resolver import NoProviderAvailable, NutritionProvider, NutritionResolver
+from backend.src.common.oauth import OAuthTokenManager
+from backend.src.common.resilience import CircuitBreaker, TokenBucket
+from backend.src.common.utils import get_env_bool, get_env_int, get_env_float, get_secret
+from concurrent.futures import ThreadPoolExecutor
 import base64
+import contextvars
+import functools
 import json
-import time
+import os
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
-FATSECRET_TOKEN_URL = "https://oauth.fatsecret.com/connect/token"
-FATSECRET_API_URL = "https://platform.fatsecret.com/rest/server.api"
+# Overridable so tests can point the tools at local stub servers
+FATSECRET_TOKEN_URL = os.getenv("SNAPTOP_FATSECRET_TOKEN_URL", "https://oauth.fatsecret.com/connect/token")
+FATSECRET_API_URL = os.getenv("SNAPTOP_FATSECRET_API_URL", "https://platform.fatsecret.com/rest/server.api")
+OPENFOODFACTS_URL = os.getenv("SNAPTOP_OPENFOODFACTS_URL", "https://world.openfoodfacts.org")
 
 class NutritionAPIError(Exception):
     pass
 
-# simple in-memory caches to avoid repeated Secret Manager calls and token requests
+# Search results, in memory and (with SNAPTOP_NUTRITION_CACHE_PATH) on disk
+_CACHE_PATH = os.getenv("SNAPTOP_NUTRITION_CACHE_PATH") or None
+fatsecret_cache = TieredCache(
+    "fatsecret",
+    max_entries=get_env_int("SNAPTOP_NUTRITION_CACHE_MAX_ENTRIES", 8192),
+    ttl=get_env_float("SNAPTOP_NUTRITION_CACHE_TTL", 7 * 86400.0),
+    negative_ttl=get_env_float("SNAPTOP_NUTRITION_CACHE_NEGATIVE_TTL", 3600.0),
+    path=_CACHE_PATH,
+)
+openfoodfacts_cache = TieredCache(
+    "openfoodfacts",
+    max_entries=get_env_int("SNAPTOP_NUTRITION_CACHE_MAX_ENTRIES", 8192),
+    ttl=get_env_float("SNAPTOP_NUTRITION_CACHE_TTL", 7 * 86400.0),
+    negative_ttl=get_env_float("SNAPTOP_NUTRITION_CACHE_NEGATIVE_TTL", 3600.0),
+    path=_CACHE_PATH,
+)
+# `get_nutrition` results are cached per provider that answered, as
+# `{"provider": name, "foods": [...]}`; answers from a fallback provider expire
+# sooner so the preferred provider is asked again once it recovers
+NUTRITION_FALLBACK_TTL = get_env_float("SNAPTOP_NUTRITION_CACHE_FALLBACK_TTL", 3600.0)
+_PROVIDER_CACHES = {"fatsecret": fatsecret_cache, "openfoodfacts": openfoodfacts_cache}
+
+# Queried by `warm_nutrition_cache` unless SNAPTOP_NUTRITION_CACHE_WARM_FILE lists others
+COMMON_INGREDIENTS = (
+    "olive oil", "garlic", "onion", "salt", "black pepper", "butter", "egg", "milk",
+    "all purpose flour", "sugar", "brown rice", "white rice", "chicken breast", "ground beef",
+    "salmon", "tofu", "tomato", "potato", "carrot", "broccoli", "spinach", "bell pepper",
+    "lemon", "lime", "cheddar cheese", "parmesan", "greek yogurt", "black beans", "chickpeas",
+    "lentils", "quinoa", "oats", "pasta", "bread", "avocado", "banana", "apple", "honey",
+    "soy sauce", "vegetable oil",
+)
+
+# Concurrent lookups of one `get_nutrition_batch` call
+BATCH_MAX_WORKERS = get_env_int("SNAPTOP_NUTRITION_BATCH_CONCURRENCY", 8)
+
+# Seconds before expiry when the FatSecret token is refreshed in the background
+FATSECRET_TOKEN_REFRESH_MARGIN = get_env_float("SNAPTOP_FATSECRET_TOKEN_REFRESH_MARGIN", 300.0)
+
+# Cached to avoid repeated Secret Manager calls
 _FATSECRET_CREDS_CACHE: dict | None = None
-_FATSECRET_TOKEN = None
-_FATSECRET_TOKEN_EXP = 0
+_FATSECRET_CREDS_LOCK = threading.Lock()
 
 
 def get_fatsecret_creds() -> dict:
     global _FATSECRET_CREDS_CACHE
     if _FATSECRET_CREDS_CACHE:
         return _FATSECRET_CREDS_CACHE
-    _FATSECRET_CREDS_CACHE = json.loads(get_gcp_secret("fat-secret-api-id", version="latest"))
+    with _FATSECRET_CREDS_LOCK:
+        if not _FATSECRET_CREDS_CACHE:
+            _FATSECRET_CREDS_CACHE = json.loads(get_secret("fat-secret-api-id", version="latest"))
     return _FATSECRET_CREDS_CACHE
 
 
-def get_fatsecret_token(client_id: str, client_secret: str) -> str:
-    global _FATSECRET_TOKEN, _FATSECRET_TOKEN_EXP
-    now = time.time()
-    if _FATSECRET_TOKEN and _FATSECRET_TOKEN_EXP > now + 10:
-        return _FATSECRET_TOKEN
+def _fetch_fatsecret_token() -> tuple[str, float]:
+    """
+    Request a client-credentials token from FatSecret.
 
-    auth = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
-    resp = requests.post(
-        FATSECRET_TOKEN_URL,
-        headers={"Authorization": f"Basic {auth}", "Content-Type": "application/x-www-form-urlencoded"},
-        data={"grant_type": "client_credentials", "scope": "basic"},
-        timeout=10,
-    )
+    Returns:
+        tuple[str, float]: The access token and its lifetime in seconds
+    Raises:
+        NutritionAPIError: If the token endpoint returns an error
+    """
+    creds = get_fatsecret_creds()
+    auth = base64.b64encode(f"{creds['client_id']}:{creds['client_secret']}".encode()).decode()
+    with timed_dependency("fatsecret_token"):
+        resp = get_session().post(
+            FATSECRET_TOKEN_URL,
+            headers={"Authorization": f"Basic {auth}", "Content-Type": "application/x-www-form-urlencoded"},
+            data={"grant_type": "client_credentials", "scope": "basic"},
+        )
     if resp.status_code != 200:
         raise NutritionAPIError(f"FatSecret token error {resp.status_code}: {resp.text}")
 
     j = resp.json()
-    _FATSECRET_TOKEN = j.get("access_token")
-    _FATSECRET_TOKEN_EXP = now + int(j.get("expires_in", 300))
-    return _FATSECRET_TOKEN
+    if not j.get("access_token"):
+        raise NutritionAPIError("FatSecret token response has no access_token")
+    # FatSecret tokens normally last a day; the manager caps the refresh margin
+    # at half the lifetime, so this fallback is not refreshed on every call
+    return j["access_token"], float(j.get("expires_in", 300))
 
 
-@tool
-def get_nutrition(query: str) -> dict:
+# One token for the whole process, refreshed once and ahead of expiry
+fatsecret_tokens = OAuthTokenManager(
+    "fatsecret",
+    _fetch_fatsecret_token,
+    refresh_margin=FATSECRET_TOKEN_REFRESH_MARGIN,
+)
+
+
+def get_fatsecret_token() -> str:
+    """A valid FatSecret access token; see `OAuthTokenManager.get`."""
+    return fatsecret_tokens.get()
+
+
+def _search_fatsecret(query: str) -> list:
     """
-    Fetch nutrition info for a food item using FatSecret Platform API.
-    Args:
-        query (str): Food name or recipe description
+    One FatSecret `foods.search` call.
+
     Returns:
-        dict: Nutrition data from FatSecret API
+        list: Food entries, empty if nothing matched
     Raises:
-        NutritionAPIError: If API call fails or returns error
+        NutritionAPIError: If the API returns an error or invalid JSON
     """
-    creds = get_fatsecret_creds()
-    token = get_fatsecret_token(creds["client_id"], creds["client_secret"])
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = {"Authorization": f"Bearer {get_fatsecret_token()}"}
     params = {"method": "foods.search", "max_results": "3", "search_expression": query, "format": "json"}
 
-    resp = requests.get(FATSECRET_API_URL, headers=headers, params=params, timeout=10)
+    # No retry here: the resolver falls back to the next provider instead
+    with timed_dependency("fatsecret"):
+        resp = get_session().get(FATSECRET_API_URL, headers=headers, params=params)
+    if resp.status_code == 401:
+        # Revoked or expired early: the next call fetches a new token
+        fatsecret_tokens.invalidate()
     if resp.status_code != 200:
-        # one quick retry
-        resp = requests.get(FATSECRET_API_URL, headers=headers, params=params, timeout=10)
-        if resp.status_code != 200:
-            return []
+        raise NutritionAPIError(f"FatSecret API error {resp.status_code}: {resp.text}")
 
     try:
         data = resp.json()
-    except Exception:
-        return []
+    except Exception as e:
+        raise NutritionAPIError(f"Error parsing FatSecret JSON: {e}")
 
     # tolerate common shapes and return a list
     if isinstance(data, dict):
@@ -92,6 +160,279 @@ def get_nutrition(query: str) -> dict:
         return data
     return []
 
+
+def _search_openfoodfacts(query: str, max_results: int = 5, page: int = 1, language: str = "en") -> list:
+    """
+    One OpenFoodFacts search call.
+
+    Returns:
+        list: Product dicts, see `search_openfoodfacts`
+    Raises:
+        NutritionAPIError: If the request fails or returns invalid JSON
+    """
+    url = f"{OPENFOODFACTS_URL}/cgi/search.pl"
+    params = {
+        "search_terms": query,
+        "search_simple": 1,
+        "action": "process",
+        "json": 1,
+        "page_size": max_results,
+        "page": page,
+        # language/locale fields may be honored by the API when available
+        "lc": language,
+    }
+
+    try:
+        with timed_dependency("openfoodfacts"):
+            resp = get_session().get(url, params=params)
+    except Exception as e:
+        raise NutritionAPIError(f"OpenFoodFacts request error: {e}")
+
+    if resp.status_code != 200:
+        raise NutritionAPIError(
+            f"OpenFoodFacts API error {resp.status_code}: {resp.text}"
+        )
+
+    try:
+        data = resp.json()
+    except Exception as e:
+        raise NutritionAPIError(f"Error parsing OpenFoodFacts JSON: {e}")
+
+    products = data.get("products", [])
+    results = []
+    for p in products:
+        code = p.get("code")
+        results.append({
+            "name": p.get("product_name") or p.get(f"product_name_{language}") or p.get("generic_name"),
+            "brand": p.get("brands"),
+            "upc": code,
+            "categories": p.get("categories_tags") or p.get("categories"),
+            "categories_hierarchy": p.get("categories_hierarchy"),
+            "nutriments": p.get("nutriments"),
+            "nutrient_levels": p.get("nutrient_levels"),
+            "image": p.get("image_small_url") or p.get("image_url"),
+            "ingredients_text": p.get("ingredients_text"),
+            "ingredients": p.get("ingredients"),
+            "labels": p.get("labels"),
+            "stores": p.get("stores"),
+            "countries": p.get("countries_tags") or p.get("countries"),
+            "serving_size": p.get("serving_size"),
+            "packaging": p.get("packaging"),
+            "nova_group": p.get("nova_group"),
+            "ecoscore_grade": p.get("ecoscore_grade"),
+            "url": p.get("url") or (f"{OPENFOODFACTS_URL}/product/{code}" if code else None),
+        })
+    return results
+
+
+def _openfoodfacts_foods(query: str) -> list:
+    """OpenFoodFacts products with per-100 g nutriments, as FatSecret-shaped foods."""
+    foods = []
+    for product in _search_openfoodfacts(query, max_results=3):
+        profile = {}
+        for name, value in (product.get("nutriments") or {}).items():
+            alias = COLUMN_ALIASES.get(name.lower()) if name.endswith("_100g") else None
+            if alias is None or alias[0] in profile:
+                continue
+            try:
+                profile[alias[0]] = float(value) * alias[1]
+            except (TypeError, ValueError):
+                continue
+        if product.get("name") and "calories" in profile:
+            foods.append({
+                "food_name": product["name"],
+                "food_description": food_description(profile),
+                "food_url": product.get("url"),
+                "source": "openfoodfacts",
+            })
+    return foods
+
+
+@functools.cache
+def get_nutrition_resolver() -> NutritionResolver:
+    """
+    The resolver behind `get_nutrition`, built on first use.
+
+    Providers are tried in SNAPTOP_NUTRITION_PROVIDERS order. FatSecret calls
+    are rate limited to SNAPTOP_FATSECRET_RATE_PER_SECOND to stay within the quota.
+    """
+    def breaker() -> CircuitBreaker:
+        return CircuitBreaker(
+            failure_rate=get_env_float("SNAPTOP_NUTRITION_BREAKER_FAILURE_RATE", 0.5),
+            min_calls=get_env_int("SNAPTOP_NUTRITION_BREAKER_MIN_CALLS", 10),
+            window=get_env_float("SNAPTOP_NUTRITION_BREAKER_WINDOW", 30.0),
+            cooldown=get_env_float("SNAPTOP_NUTRITION_BREAKER_COOLDOWN", 30.0),
+        )
+
+    available = {
+        "fatsecret": NutritionProvider(
+            "fatsecret",
+            _search_fatsecret,
+            breaker=breaker(),
+            limiter=TokenBucket(
+                rate=get_env_float("SNAPTOP_FATSECRET_RATE_PER_SECOND", 5.0),
+                capacity=get_env_float("SNAPTOP_FATSECRET_BURST", 10.0),
+            ),
+        ),
+        "openfoodfacts": NutritionProvider("openfoodfacts", _openfoodfacts_foods, breaker=breaker()),
+    }
+    order = os.getenv("SNAPTOP_NUTRITION_PROVIDERS", "fatsecret,openfoodfacts")
+    providers = []
+    for name in (n.strip().lower() for n in order.split(",")):
+        if name in available:
+            providers.append(available.pop(name))
+        elif name:
+            logger.warning("Unknown nutrition provider %r in SNAPTOP_NUTRITION_PROVIDERS", name)
+    return NutritionResolver(
+        providers,
+        hedge=get_env_bool("SNAPTOP_NUTRITION_HEDGE", True),
+        hedge_percentile=get_env_float("SNAPTOP_NUTRITION_HEDGE_PERCENTILE", 95.0),
+        timeout=get_env_float("SNAPTOP_NUTRITION_RESOLVE_TIMEOUT", 8.0),
+    )
+
+
+@tool
+def get_nutrition(query: str) -> dict:
+    """
+    Fetch nutrition info for a food item from FatSecret, falling back to OpenFoodFacts.
+    Args:
+        query (str): Food name or recipe description
+    Returns:
+        dict: Nutrition data, as FatSecret food entries
+    """
+    resolver = get_nutrition_resolver()
+    key = cache_key(query, max_results=3)
+    cached = _cached_nutrition(resolver, key)
+    if cached is not MISSING:
+        return cached["foods"]
+    try:
+        resolution = resolver.resolve(query)
+    except NoProviderAvailable as e:
+        # Failures are not cached; the next call tries again
+        logger.warning("%s", e)
+        return []
+    preferred = resolver.providers[0].name
+    if resolution.provider is None:
+        # Nothing anywhere: a negative entry under the preferred provider
+        _PROVIDER_CACHES[preferred].put(key, [])
+        return []
+    cache = _PROVIDER_CACHES[resolution.provider]
+    ttl = None if resolution.provider == preferred else min(NUTRITION_FALLBACK_TTL, cache.ttl)
+    cache.put(key, {"provider": resolution.provider, "foods": resolution.foods}, ttl=ttl)
+    return resolution.foods
+
+
+def _cached_nutrition(resolver: NutritionResolver, key: str):
+    """Cached `get_nutrition` entry from the providers' caches, in preference order, or MISSING."""
+    for provider in resolver.providers:
+        cached = _PROVIDER_CACHES[provider.name].get(key)
+        if isinstance(cached, list):
+            # Negative entries, and entries written before results recorded their provider
+            cached = {"provider": provider.name if cached else None, "foods": cached}
+        if cached is not MISSING:
+            return cached
+    return MISSING
+
+def food_entries(result) -> list[dict]:
+    """Flatten the shapes `get_nutrition` returns into a list of food dicts."""
+    foods = []
+    for item in result if isinstance(result, list) else [result]:
+        if not isinstance(item, dict):
+            continue
+        nested = item.get("food")
+        if nested is not None:
+            foods.extend(nested if isinstance(nested, list) else [nested])
+        else:
+            foods.append(item)
+    return [food for food in foods if isinstance(food, dict)]
+
+
+@tool
+def get_ingredient_nutrition(query: str) -> list:
+    """
+    Fetch per-100 g nutrition info for a single ingredient.
+    Answers from the local nutrition database and only searches FatSecret when
+    the ingredient is not found there.
+    Args:
+        query (str): Ingredient name, e.g. "chicken breast"
+    Returns:
+        list: Foods with `food_name` and a `food_description` such as
+            "Per 100g - Calories: 165.00kcal | Fat: 3.57g | Carbs: 0.00g | Protein: 31.02g"
+    """
+    food = local_food(query)
+    if food is not None:
+        return [food]
+    return get_nutrition.invoke({"query": query})
+
+
+def _batch_entry(query: str) -> dict:
+    """Best match for one ingredient of a batch, reduced to name and description."""
+    food = local_food(query)
+    if food is None:
+        foods = food_entries(get_nutrition.func(query))
+        food = next((f for f in foods if f.get("food_description")), None)
+    if food is None:
+        return {"ingredient": query, "error": "not found"}
+    return {
+        "ingredient": query,
+        "food_name": food.get("food_name"),
+        "food_description": food["food_description"],
+    }
+
+
+@tool
+def get_nutrition_batch(ingredients: list[str]) -> list:
+    """
+    Fetch nutrition info for several ingredients in one call.
+    Prefer this over looking ingredients up one at a time: all lookups run
+    concurrently and come back in a single response.
+    Args:
+        ingredients (list[str]): Ingredient names, e.g. ["chicken breast", "brown rice", "olive oil"]
+    Returns:
+        list: One entry per distinct ingredient, in order, with `food_name` and a
+            `food_description` such as "Per 100g - Calories: 165kcal | Fat: 3.57g | Carbs: 0.00g | Protein: 31.02g",
+            or `error` if nothing was found
+    """
+    queries = list(dict.fromkeys(q.strip() for q in ingredients if q and q.strip()))
+    if not queries:
+        return []
+    workers = min(BATCH_MAX_WORKERS, len(queries))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Each lookup gets its own context copy so its timings reach the request
+        futures = [executor.submit(contextvars.copy_context().run, _batch_entry, q) for q in queries]
+        return [future.result() for future in futures]
+
+
+def warm_nutrition_cache(ingredients: list[str] | None = None, max_workers: int = 4) -> int:
+    """
+    Make sure common ingredients are in the nutrition caches.
+
+    Entries already on disk are loaded into memory; the rest are fetched.
+
+    Args:
+        ingredients (list[str], optional): Queries to warm; defaults to the lines of
+            SNAPTOP_NUTRITION_CACHE_WARM_FILE or `COMMON_INGREDIENTS`
+        max_workers (int): Concurrent FatSecret calls
+
+    Returns:
+        int: Number of queries that had to be fetched
+    """
+    if ingredients is None:
+        path = os.getenv("SNAPTOP_NUTRITION_CACHE_WARM_FILE")
+        if path:
+            with open(path, "r") as f:
+                ingredients = [line.strip() for line in f if line.strip()]
+        else:
+            ingredients = list(COMMON_INGREDIENTS)
+    resolver = get_nutrition_resolver()
+    missing = [q for q in ingredients if _cached_nutrition(resolver, cache_key(q, max_results=3)) is MISSING]
+    if missing:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(lambda q: get_nutrition.invoke({"query": q}), missing))
+    logger.info("Nutrition cache warmed: %s cached, %s fetched", len(ingredients) - len(missing), len(missing))
+    return len(missing)
+
+
 @tool
 def get_reccomended_daily_calorie_intake(
     age: int = 30,
@@ -187,59 +528,13 @@ def search_openfoodfacts(
     Raises:
         NutritionAPIError: If the OpenFoodFacts request fails or returns invalid JSON.
     """
-    url = "https://world.openfoodfacts.org/cgi/search.pl"
-    headers = {"User-Agent": "SnapTop/1.0 (contact: dev@snaptop.example)"}
-    params = {
-        "search_terms": query,
-        "search_simple": 1,
-        "action": "process",
-        "json": 1,
-        "page_size": max_results,
-        "page": page,
-        # language/locale fields may be honored by the API when available
-        "lc": language,
-    }
-
-    try:
-        resp = requests.get(url, headers=headers, params=params, timeout=10)
-    except Exception as e:
-        raise NutritionAPIError(f"OpenFoodFacts request error: {e}")
-
-    if resp.status_code != 200:
-        raise NutritionAPIError(
-            f"OpenFoodFacts API error {resp.status_code}: {resp.text}"
-        )
-
-    try:
-        data = resp.json()
-    except Exception as e:
-        raise NutritionAPIError(f"Error parsing OpenFoodFacts JSON: {e}")
-
-    products = data.get("products", [])
-    results = []
-    for p in products:
-        code = p.get("code")
-        results.append({
-            "name": p.get("product_name") or p.get(f"product_name_{language}") or p.get("generic_name"),
-            "brand": p.get("brands"),
-            "upc": code,
-            "categories": p.get("categories_tags") or p.get("categories"),
-            "categories_hierarchy": p.get("categories_hierarchy"),
-            "nutriments": p.get("nutriments"),
-            "nutrient_levels": p.get("nutrient_levels"),
-            "image": p.get("image_small_url") or p.get("image_url"),
-            "ingredients_text": p.get("ingredients_text"),
-            "ingredients": p.get("ingredients"),
-            "labels": p.get("labels"),
-            "stores": p.get("stores"),
-            "countries": p.get("countries_tags") or p.get("countries"),
-            "serving_size": p.get("serving_size"),
-            "packaging": p.get("packaging"),
-            "nova_group": p.get("nova_group"),
-            "ecoscore_grade": p.get("ecoscore_grade"),
-            "url": p.get("url") or (f"https://world.openfoodfacts.org/product/{code}" if code else None),
-        })
+    key = cache_key(query, max_results=max_results, page=page, language=language)
+    cached = openfoodfacts_cache.get(key)
+    if cached is not MISSING:
+        return cached
 
+    results = _search_openfoodfacts(query, max_results=max_results, page=page, language=language)
+    openfoodfacts_cache.put(key, results)
     return results
 
 
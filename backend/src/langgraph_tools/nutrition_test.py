@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from backend.src.common.api_cache import MISSING, cache_key
+from backend.src.langgraph_tools import nutrition
+
+FATSECRET_FOODS = {"foods": {"food": [{"food_name": "Chicken Breast", "food_description": "Per 100g - Calories: 165kcal"}]}}
+OPENFOODFACTS_PRODUCTS = {
+    "products": [{"product_name": "Chicken Breast", "code": "1", "nutriments": {"energy-kcal_100g": 120, "proteins_100g": 23}}]
+}
+
+
+@pytest.fixture
+def providers(stub_server, monkeypatch):
+    """FatSecret token, FatSecret API and OpenFoodFacts stubs wired into the tools."""
+    token, fatsecret, openfoodfacts = stub_server(), stub_server(), stub_server()
+    token.body = {"access_token": "token", "expires_in": 3600}
+    fatsecret.body = FATSECRET_FOODS
+    openfoodfacts.body = OPENFOODFACTS_PRODUCTS
+    monkeypatch.setattr(nutrition, "FATSECRET_TOKEN_URL", token.url)
+    monkeypatch.setattr(nutrition, "FATSECRET_API_URL", fatsecret.url)
+    monkeypatch.setattr(nutrition, "OPENFOODFACTS_URL", openfoodfacts.url)
+    monkeypatch.setattr(nutrition, "_FATSECRET_CREDS_CACHE", {"client_id": "id", "client_secret": "secret"})
+    monkeypatch.delenv("SNAPTOP_NUTRITION_PROVIDERS", raising=False)
+    nutrition.fatsecret_tokens.invalidate()
+    nutrition.get_nutrition_resolver.cache_clear()
+    yield fatsecret, openfoodfacts
+    nutrition.get_nutrition_resolver.cache_clear()
+    nutrition.fatsecret_tokens.invalidate()
+
+
+def test_preferred_provider_results_are_cached_under_it(providers):
+    fatsecret, _ = providers
+    foods = nutrition.get_nutrition.func("chicken breast fs")
+    assert foods == [FATSECRET_FOODS["foods"]]
+
+    key = cache_key("chicken breast fs", max_results=3)
+    assert nutrition.fatsecret_cache.get(key) == {"provider": "fatsecret", "foods": foods}
+    assert nutrition.openfoodfacts_cache.get(key) is MISSING
+    assert nutrition.get_nutrition.func("chicken breast fs") == foods
+    assert len(fatsecret.requests) == 1
+
+
+def test_fallback_results_are_cached_under_the_fallback_with_a_short_ttl(providers, monkeypatch):
+    fatsecret, openfoodfacts = providers
+    monkeypatch.setattr(nutrition, "NUTRITION_FALLBACK_TTL", 0.2)
+    fatsecret.status = 500
+
+    foods = nutrition.get_nutrition.func("chicken breast off")
+    assert foods[0]["source"] == "openfoodfacts"
+    key = cache_key("chicken breast off", max_results=3)
+    assert nutrition.openfoodfacts_cache.get(key) == {"provider": "openfoodfacts", "foods": foods}
+    assert nutrition.fatsecret_cache.get(key) is MISSING
+
+    # Served from the fallback's cache until it expires, then FatSecret is asked again
+    assert nutrition.get_nutrition.func("chicken breast off") == foods
+    assert len(openfoodfacts.requests) == 1
+    fatsecret.status = 200
+    time.sleep(0.25)
+    assert nutrition.get_nutrition.func("chicken breast off") == [FATSECRET_FOODS["foods"]]
+    assert nutrition.fatsecret_cache.get(key)["provider"] == "fatsecret"
+
+
+def test_empty_results_are_cached_as_negative_entries(providers):
+    fatsecret, openfoodfacts = providers
+    fatsecret.body = {"foods": []}
+    openfoodfacts.body = {"products": []}
+    assert nutrition.get_nutrition.func("no such food") == []
+    assert nutrition.fatsecret_cache.get(cache_key("no such food", max_results=3)) == []
+    assert nutrition.get_nutrition.func("no such food") == []
+    assert len(fatsecret.requests) == 1
+
+
+def test_batch_resolves_each_distinct_ingredient_once_in_order(providers, monkeypatch):
+    fatsecret, _ = providers
+    olive_oil = {"food_name": "Olive Oil", "food_description": "Per 100g - Calories: 884kcal"}
+    monkeypatch.setattr(nutrition, "local_food", lambda query: olive_oil if query == "olive oil" else None)
+
+    entries = nutrition.get_nutrition_batch.func(["chicken batch", " olive oil", "", "chicken batch", "olive oil "])
+    assert entries == [
+        {"ingredient": "chicken batch", "food_name": "Chicken Breast", "food_description": "Per 100g - Calories: 165kcal"},
+        {"ingredient": "olive oil", "food_name": "Olive Oil", "food_description": "Per 100g - Calories: 884kcal"},
+    ]
+    # Only the ingredient missing from the local database reaches FatSecret
+    assert len(fatsecret.requests) == 1
+    assert nutrition.get_nutrition_batch.func([" ", ""]) == []
+
+
+def test_batch_marks_unknown_ingredients_and_looks_up_concurrently(providers, monkeypatch):
+    fatsecret, openfoodfacts = providers
+    monkeypatch.setattr(nutrition, "local_food", lambda query: None)
+    fatsecret.body = {"foods": []}
+    openfoodfacts.body = {"products": []}
+    fatsecret.delay = 0.3
+
+    queries = [f"unknown batch food {i}" for i in range(4)]
+    entries = nutrition.get_nutrition_batch.func(queries)
+    assert entries == [{"ingredient": q, "error": "not found"} for q in queries]
+    # All four searches were in flight together
+    assert len(fatsecret.requests) == 4
+    assert max(fatsecret.requests) - min(fatsecret.requests) < fatsecret.delay
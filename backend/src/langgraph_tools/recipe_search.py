@@ -1,30 +1,66 @@
-from backend.src.common.utils import get_gcp_secret
+import functools
+import os
+
+from backend.src.common.api_cache import MISSING, TieredCache, cache_key
+from backend.src.common.metrics import timed_dependency
+from backend.src.common.recipe_extract import fetch_recipe_page, prefetch_recipe_pages
+from backend.src.common.utils import get_env_float, get_env_int, get_secret
 
 from langchain_core.tools import Tool
 from langchain_google_community import GoogleSearchAPIWrapper
-from langchain_community.document_loaders import WebBaseLoader
 
 from langchain.tools import tool
 
 
+SEARCH_RESULTS = 3
+# Result pages fetched in the background after each search; 0 disables prefetching
+PREFETCH_PAGES = get_env_int("SNAPTOP_SEARCH_PREFETCH_PAGES", SEARCH_RESULTS)
+
+search_cache = TieredCache(
+    "google_cse",
+    max_entries=get_env_int("SNAPTOP_SEARCH_CACHE_MAX_ENTRIES", 1024),
+    ttl=get_env_float("SNAPTOP_SEARCH_CACHE_TTL", 86400.0),
+    negative_ttl=get_env_float("SNAPTOP_SEARCH_CACHE_NEGATIVE_TTL", 600.0),
+    path=os.getenv("SNAPTOP_SEARCH_CACHE_PATH") or None,
+)
+
+
 @tool
 def fetch_url_content(url: str) -> str:
-    """Fetch text content from a URL"""
-    loader = WebBaseLoader(url)
-    documents = loader.load()
-    if documents:
-        return documents[0].page_content
-    else:
-        return ""
+    """Fetch the recipe (name, yield, times, ingredients, steps, nutrition) or main text content from a URL"""
+    # Structured recipe data when the page has it, else its main content, capped in size
+    return fetch_recipe_page(url)
+
 
+@functools.cache
+def get_search_wrapper() -> GoogleSearchAPIWrapper:
+    """Build the Google CSE wrapper on first use, once per process."""
+    api_key = get_secret("google-cloud-api-key", version="1")
+    cse_id = get_secret("recipe-search-id", version="1")
+    return GoogleSearchAPIWrapper(google_api_key=api_key, google_cse_id=cse_id, k=10)
 
-api_key = get_gcp_secret("google-cloud-api-key", version="1")
-cse_id = get_gcp_secret("recipe-search-id", version="1")
-search = GoogleSearchAPIWrapper(google_api_key=api_key, google_cse_id=cse_id, k=10)
 
+def top3_results(query: str) -> list:
+    """
+    Top search results for `query`, cached, with their pages prefetched.
 
-def top3_results(query: str) -> str:
-    return search.results(query, 3)
+    Cuisine queries repeat constantly, so results are cached by normalized query.
+    The agent usually opens some of the results next; fetching the top
+    SNAPTOP_SEARCH_PREFETCH_PAGES of them now means `fetch_url_content` finds
+    them in the page cache.
+    """
+    key = cache_key(query, num=SEARCH_RESULTS)
+    results = search_cache.get(key)
+    if results is MISSING:
+        search = get_search_wrapper()
+        with timed_dependency("google_cse"):
+            results = search.results(query, SEARCH_RESULTS)
+        # The wrapper reports "no results" as a single entry without a link
+        results = [r for r in results if r.get("link")]
+        search_cache.put(key, results)
+    if PREFETCH_PAGES:
+        prefetch_recipe_pages([r["link"] for r in results[:PREFETCH_PAGES]])
+    return results
 
 
 search_tool = Tool(
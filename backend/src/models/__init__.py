@@ -1,10 +1,13 @@
 """Pydantic models for the SnapTop API."""
 
 from backend.src.models.recipe import (
+    ImageStatus,
     Ingredient,
     InstructionSection,
     NutritionProfile,
     Recipe,
+    RecipeBatchResult,
+    RecipeImageStatus,
 )
 from backend.src.models.user import (
     Allergen,
@@ -24,8 +27,10 @@ from backend.src.models.meal_plan import (
     MealPlan,
     RecipeSkeleton,
 )
+from backend.src.models.jobs import JobStatus, RecipeJob
 from backend.src.models.shopping import ShoppingItem, ShoppingList
 from backend.src.models.requests import (
+    GenerateRecipeBatchRequest,
     GenerateRecipeRequest,
     GenerateWeeklyMealsRequest,
     ModifyRecipeRequest,
@@ -35,10 +40,13 @@ from backend.src.models.requests import (
 
 __all__ = [
     # Recipe models
+    "ImageStatus",
     "Ingredient",
     "InstructionSection",
     "NutritionProfile",
     "Recipe",
+    "RecipeBatchResult",
+    "RecipeImageStatus",
     # User models
     "Allergen",
     "DietaryProfile",
@@ -58,7 +66,11 @@ __all__ = [
     # Shopping models
     "ShoppingItem",
     "ShoppingList",
+    # Job models
+    "JobStatus",
+    "RecipeJob",
     # Request models
+    "GenerateRecipeBatchRequest",
     "GenerateRecipeRequest",
     "GenerateWeeklyMealsRequest",
     "ModifyRecipeRequest",
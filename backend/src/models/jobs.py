@@ -0,0 +1,31 @@
+"""Asynchronous job-related Pydantic models."""
+
+from enum import Enum
+from pydantic import BaseModel, Field
+
+from backend.src.models.recipe import Recipe
+from backend.src.models.requests import GenerateRecipeRequest
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of an asynchronous job."""
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+
+class RecipeJob(BaseModel):
+    """Asynchronous recipe generation job."""
+
+    job_id: str = Field(..., description="Unique job identifier")
+    status: JobStatus = Field(..., description="Current job status")
+    request: GenerateRecipeRequest = Field(..., description="Original generation request")
+    result: Recipe | None = Field(None, description="Generated recipe once SUCCEEDED")
+    error: str | None = Field(None, description="Failure reason when FAILED")
+    created_at: int = Field(..., description="Unix timestamp of job creation")
+    updated_at: int = Field(..., description="Unix timestamp of the last status change")
+    expires_at: int | None = Field(
+        None, description="Unix timestamp after which a finished job is discarded"
+    )
@@ -1,8 +1,17 @@
 """Recipe-related Pydantic models."""
 
+from enum import Enum
 from pydantic import BaseModel, Field
 
 
+class ImageStatus(str, Enum):
+    """Lifecycle of a recipe's generated image."""
+
+    PENDING = "PENDING"
+    READY = "READY"
+    FAILED = "FAILED"
+
+
 class Ingredient(BaseModel):
     """Recipe ingredient with quantity and unit."""
 
@@ -46,3 +55,27 @@ class Recipe(BaseModel):
     serving_size: str | None = Field(None, description="Description of serving size")
     citations: list[str] | None = Field(None, description="Recipe sources and citations")
     image_base64: str | None = Field(None, description="Base64 encoded recipe image")
+    image_url: str | None = Field(
+        None, description="URL of the recipe image served as a cacheable binary resource"
+    )
+    image_status: ImageStatus | None = Field(
+        None, description="Image generation status; PENDING while generated in the background"
+    )
+
+
+class RecipeImageStatus(BaseModel):
+    """Status of a recipe image being generated in the background."""
+
+    recipe_id: str = Field(..., description="Recipe the image belongs to")
+    status: ImageStatus = Field(..., description="Current image status")
+    image_url: str | None = Field(None, description="Image URL once status is READY")
+    error: str | None = Field(None, description="Failure reason when status is FAILED")
+
+
+class RecipeBatchResult(BaseModel):
+    """Outcome of one item of a batch generation, streamed as an NDJSON line."""
+
+    index: int = Field(..., description="Position of the item in the batch request")
+    status_code: int = Field(..., description="HTTP-style status for this item")
+    recipe: Recipe | None = Field(None, description="Generated recipe on success")
+    error: str | None = Field(None, description="Failure reason on error")
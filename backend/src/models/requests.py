@@ -21,6 +21,17 @@ class GenerateRecipeRequest(BaseModel):
     )
 
 
+class GenerateRecipeBatchRequest(BaseModel):
+    """Request to generate many recipes in one call."""
+
+    requests: list[GenerateRecipeRequest] = Field(
+        ..., description="Recipe generation requests"
+    )
+    concurrency: int | None = Field(
+        None, ge=1, description="Maximum number of recipes generated at once"
+    )
+
+
 class GenerateWeeklyMealsRequest(BaseModel):
     """Request to generate a weekly meal plan."""
 
@@ -50,5 +61,5 @@ class GetShoppingListRequest(BaseModel):
 
     meal_plan_id: str = Field(..., description="Meal plan ID")
     pantry_items: list[Ingredient] | None = Field(
-        None, description="Items already in pantry"
+        None, description="Items in pantry beyond the user's saved profile pantry"
     )
@@ -0,0 +1,99 @@
+"""LangChain callback handler that records agent steps in the `agent_logs` table."""
+
+import threading
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from backend.src.persistence.rows import agent_log_row
+from backend.src.persistence.write_behind import persistence
+
+
+def _message_text(message) -> str:
+    """Content of a message, plus its tool calls if it made any."""
+    text = message.content if isinstance(message.content, str) else str(message.content)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        calls = ", ".join(f"{c['name']}({c['args']})" for c in tool_calls)
+        text = f"{text}\n[tool calls] {calls}" if text else f"[tool calls] {calls}"
+    return text
+
+
+class AgentLogHandler(BaseCallbackHandler):
+    """
+    Queues one `agent_logs` row per model turn and per tool call of an agent run.
+
+    Rows go through the write-behind queue, so logging never waits on storage.
+
+    Args:
+        agent_name (str): Value of the `agent_name` column.
+        meal_plan_id (str, optional): Meal plan the run belongs to.
+    """
+
+    def __init__(self, agent_name: str, meal_plan_id: str | None = None):
+        self.agent_name = agent_name
+        self.meal_plan_id = meal_plan_id
+        self._lock = threading.Lock()
+        # run_id -> (action, input)
+        self._inputs: dict[UUID, tuple[str, str]] = {}
+
+    def _remember(self, run_id: UUID, action: str, value: str):
+        with self._lock:
+            self._inputs[run_id] = (action, value)
+
+    def _record(self, run_id: UUID, output_key: str, output) -> None:
+        with self._lock:
+            started = self._inputs.pop(run_id, None)
+        if started is None:
+            return
+        action, input_value = started
+        input_key = "tool_input" if action.startswith("tool:") else "last_message"
+        persistence.enqueue(
+            "agent_logs",
+            agent_log_row(
+                agent_name=self.agent_name,
+                action=action,
+                input_key=input_key,
+                input_value=input_value,
+                output_key=output_key,
+                output_value=output,
+                meal_plan_id=self.meal_plan_id,
+            ),
+        )
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        if not persistence.enabled:
+            return
+        params = kwargs.get("invocation_params") or {}
+        model = (
+            params.get("model_name")
+            or params.get("model")
+            or (serialized or {}).get("name")
+            or "unknown"
+        )
+        # The full history is already in earlier rows; keep only the newest message
+        last = messages[0][-1] if messages and messages[0] else None
+        self._remember(run_id, f"llm:{model}", _message_text(last) if last else "")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        if not persistence.enabled:
+            return
+        try:
+            output = _message_text(response.generations[0][0].message)
+        except (AttributeError, IndexError):
+            output = str(response)
+        self._record(run_id, "response", output)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._record(run_id, "error", error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        if not persistence.enabled:
+            return
+        self._remember(run_id, f"tool:{(serialized or {}).get('name') or 'unknown'}", input_str)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._record(run_id, "tool_output", getattr(output, "content", output))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._record(run_id, "error", error)
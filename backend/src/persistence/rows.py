@@ -0,0 +1,72 @@
+"""Conversion of API models to rows of the BigQuery tables in `bigquery/*.sql`."""
+
+import uuid
+from datetime import datetime, timezone
+
+from backend.src.common.logging_config import truncate
+from backend.src.common.utils import get_env_int
+from backend.src.models import Recipe
+
+# Cap on each free-text value written to agent_logs
+MAX_LOG_VALUE_CHARS = get_env_int("SNAPTOP_PERSIST_MAX_LOG_VALUE_CHARS", 10000)
+
+
+def utc_timestamp() -> str:
+    """Current time as an RFC 3339 string, as BigQuery TIMESTAMP columns accept."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def recipe_row(recipe: Recipe, version: int = 1) -> dict:
+    """
+    Build a `recipes` row. Only the image's URL is part of the table.
+
+    Args:
+        recipe (Recipe): Recipe to store
+        version (int): Recipe version (1 for newly generated recipes)
+
+    Returns:
+        dict: Row matching `bigquery/recipes.sql`
+    """
+    data = recipe.model_dump(mode="json", exclude={"image_base64", "image_status"})
+    data["citations"] = data.get("citations") or []
+    data["version"] = version
+    data["created_at"] = utc_timestamp()
+    return data
+
+
+def agent_log_row(
+    agent_name: str,
+    action: str,
+    input_key: str,
+    input_value,
+    output_key: str,
+    output_value,
+    meal_plan_id: str | None = None,
+    feedback: str | None = None,
+) -> dict:
+    """
+    Build an `agent_logs` row for one agent step or tool call.
+
+    Args:
+        agent_name (str): Agent that acted (e.g. `recipe_agent`)
+        action (str): What happened, e.g. `llm:gemini-2.5-flash` or `tool:get_nutrition`
+        input_key (str): Name of the input (e.g. `tool_input`)
+        input_value: Input, stringified and truncated
+        output_key (str): Name of the output
+        output_value: Output, stringified and truncated
+        meal_plan_id (str, optional): Meal plan the step belongs to
+        feedback (str, optional): Validator feedback, if any
+
+    Returns:
+        dict: Row matching `bigquery/agent_logs.sql`
+    """
+    return {
+        "log_id": uuid.uuid4().hex,
+        "meal_plan_id": meal_plan_id,
+        "agent_name": agent_name,
+        "timestamp": utc_timestamp(),
+        "action": action,
+        "input": {"key": input_key, "value": truncate(str(input_value), MAX_LOG_VALUE_CHARS)},
+        "output": {"key": output_key, "value": truncate(str(output_value), MAX_LOG_VALUE_CHARS)},
+        "feedback": feedback,
+    }
@@ -0,0 +1,223 @@
+"""Destinations for batched row writes.
+
+A `Sink` receives lists of JSON-ready rows for one table at a time. Rows are
+shaped like the BigQuery tables in `bigquery/*.sql` whatever the sink, so the
+local sinks can stand in for BigQuery in development and tests.
+
+Sinks:
+- `BigQuerySink`: streaming inserts into `<project>.<dataset>.<table>`
+- `SQLiteSink`: one SQLite table per BigQuery table, rows stored as JSON
+- `JsonlFileSink`: appends rows to `<dir>/<table>.jsonl`
+- `NullSink`: discards rows (persistence disabled)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from backend.src.common.utils import get_bigquery_dataset_name, get_project_name
+
+# Column that identifies a row in each table
+TABLE_KEYS = {
+    "recipes": "recipe_id",
+    "meal_plans": "meal_plan_id",
+    "agent_logs": "log_id",
+    "users": "user_id",
+}
+
+
+class SinkError(Exception):
+    """A batch could not be written; the caller may retry it."""
+
+
+class Sink(ABC):
+    """Interface for a batch row destination."""
+
+    @abstractmethod
+    def write(self, table: str, rows: list[dict]):
+        """
+        Write all `rows` to `table`.
+
+        Raises:
+            SinkError: If the batch was not (fully) written.
+        """
+
+    def close(self):
+        """Release any resources held by the sink."""
+
+
+class NullSink(Sink):
+    """Discards every row."""
+
+    def write(self, table, rows):
+        pass
+
+
+def _insert_id(row: dict, key: str) -> str:
+    # A retried batch resends the same row dicts; a later write of the same
+    # version (e.g. to record its image) has a new `created_at`
+    return ":".join(str(row[column]) for column in (key, "version", "created_at") if column in row)
+
+
+class BigQuerySink(Sink):
+    """
+    Streams rows into BigQuery with `insert_rows_json`.
+
+    Each row's key column, plus its `version` and `created_at` where the
+    table has them, is used as its insert ID, so a batch retried after a
+    timeout is de-duplicated by BigQuery on a best-effort basis while new
+    writes of a row are not.
+
+    Args:
+        project (str): GCP project holding the dataset.
+        dataset (str): BigQuery dataset name.
+    """
+
+    def __init__(self, project: str, dataset: str):
+        self.project = project
+        self.dataset = dataset
+        self._client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        """The BigQuery client, created on first use and shared by readers and writers."""
+        with self._lock:
+            if self._client is None:
+                # Imported lazily: only needed when BigQuery is the configured sink
+                from google.cloud import bigquery
+
+                self._client = bigquery.Client(project=self.project)
+            return self._client
+
+    def write(self, table, rows):
+        key = TABLE_KEYS.get(table)
+        row_ids = [_insert_id(row, key) for row in rows] if key else None
+        try:
+            errors = self.client().insert_rows_json(
+                f"{self.project}.{self.dataset}.{table}", rows, row_ids=row_ids
+            )
+        except Exception as e:
+            raise SinkError(f"BigQuery insert into {table} failed: {e}") from e
+        if errors:
+            raise SinkError(f"BigQuery rejected rows for {table}: {errors[:3]}")
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+class SQLiteSink(Sink):
+    """
+    Stores rows in a SQLite file, one table per BigQuery table.
+
+    Each table has the row's key column (see `TABLE_KEYS`), the full row as
+    JSON and an insertion timestamp. Rows are appended, never updated, like
+    BigQuery streaming inserts.
+
+    Args:
+        path (str): Path to the SQLite database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._created: set[str] = set()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def ensure_table(self, conn: sqlite3.Connection, table: str):
+        """Create `table` and its key index if this sink has not done so yet."""
+        if table in self._created:
+            return
+        if not table.isidentifier():
+            raise SinkError(f"Invalid table name: {table}")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "row_key TEXT, data TEXT NOT NULL, inserted_at REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_row_key ON {table} (row_key)")
+        self._created.add(table)
+
+    def write(self, table, rows):
+        key = TABLE_KEYS.get(table)
+        now = time.time()
+        values = [
+            (row.get(key) if key else None, json.dumps(row, default=str), now) for row in rows
+        ]
+        try:
+            with self._connect() as conn:
+                self.ensure_table(conn, table)
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(
+                        f"INSERT INTO {table} (row_key, data, inserted_at) VALUES (?, ?, ?)",
+                        values,
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as e:
+            raise SinkError(f"SQLite insert into {table} failed: {e}") from e
+
+
+class JsonlFileSink(Sink):
+    """
+    Appends rows as JSON lines to `<directory>/<table>.jsonl`.
+
+    Args:
+        directory (str): Directory holding one file per table.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def write(self, table, rows):
+        if not table.isidentifier():
+            raise SinkError(f"Invalid table name: {table}")
+        lines = "".join(json.dumps(row, default=str) + "\n" for row in rows)
+        try:
+            with self._lock, open(os.path.join(self.directory, f"{table}.jsonl"), "a") as f:
+                f.write(lines)
+        except OSError as e:
+            raise SinkError(f"Writing {table} rows failed: {e}") from e
+
+
+def create_sink(url: str) -> Sink:
+    """
+    Build a sink from a URL.
+
+    Args:
+        url (str): `bigquery` (project and dataset from PROJECT_NAME and
+            BIGQUERY_DATASET), `sqlite:///path/to.db`, `file:///path/to/dir`,
+            or `none` to disable persistence.
+
+    Returns:
+        Sink: The configured sink
+    """
+    if url in ("", "none"):
+        return NullSink()
+    if url == "bigquery":
+        return BigQuerySink(get_project_name(), get_bigquery_dataset_name())
+    if url.startswith("sqlite:///"):
+        return SQLiteSink(url[len("sqlite:///"):])
+    if url.startswith("file:///"):
+        return JsonlFileSink(url[len("file://"):])
+    raise ValueError(f"Unsupported persistence sink: {url}")
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from backend.src.persistence.sinks import BigQuerySink, JsonlFileSink, SinkError, SQLiteSink
+
+
+class FakeBigQueryClient:
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.inserts = []
+
+    def insert_rows_json(self, table, rows, row_ids=None):
+        self.inserts.append((table, rows, row_ids))
+        return self.errors
+
+
+def _bigquery_sink(client) -> BigQuerySink:
+    sink = BigQuerySink("project", "dataset")
+    sink._client = client
+    return sink
+
+
+def test_bigquery_insert_ids_tell_versions_apart():
+    client = FakeBigQueryClient()
+    _bigquery_sink(client).write(
+        "recipes", [{"recipe_id": "r1", "version": 1}, {"recipe_id": "r1", "version": 2}]
+    )
+    _bigquery_sink(client).write("agent_logs", [{"log_id": "l1"}])
+    assert client.inserts[0][0] == "project.dataset.recipes"
+    assert client.inserts[0][2] == ["r1:1", "r1:2"]
+    assert client.inserts[1][2] == ["l1"]
+
+
+def test_bigquery_insert_ids_tell_rewrites_of_a_version_apart():
+    # e.g. a recipe's image recorded on the version written moments earlier
+    client = FakeBigQueryClient()
+    rows = [
+        {"recipe_id": "r1", "version": 1, "created_at": "2026-01-01T00:00:00+00:00"},
+        {"recipe_id": "r1", "version": 1, "created_at": "2026-01-01T00:00:05+00:00"},
+    ]
+    _bigquery_sink(client).write("recipes", rows)
+    assert client.inserts[0][2] == [
+        "r1:1:2026-01-01T00:00:00+00:00",
+        "r1:1:2026-01-01T00:00:05+00:00",
+    ]
+
+
+def test_bigquery_rejected_rows_raise_sink_error():
+    with pytest.raises(SinkError, match="rejected"):
+        _bigquery_sink(FakeBigQueryClient(errors=[{"index": 0}])).write("recipes", [{"recipe_id": "r1"}])
+
+
+def test_sqlite_sink_appends_rows_under_their_key(tmp_path):
+    sink = SQLiteSink(str(tmp_path / "rows.db"))
+    sink.write("recipes", [{"recipe_id": "r1", "version": 1}])
+    sink.write("recipes", [{"recipe_id": "r1", "version": 2}])
+    with sink._connect() as conn:
+        rows = conn.execute("SELECT row_key, data FROM recipes ORDER BY inserted_at, rowid").fetchall()
+    assert [(row["row_key"], json.loads(row["data"])["version"]) for row in rows] == [("r1", 1), ("r1", 2)]
+
+
+def test_jsonl_sink_appends_lines_and_rejects_invalid_table_names(tmp_path):
+    sink = JsonlFileSink(str(tmp_path))
+    sink.write("recipes", [{"recipe_id": "r1"}])
+    assert (tmp_path / "recipes.jsonl").read_text() == '{"recipe_id": "r1"}\n'
+    with pytest.raises(SinkError):
+        sink.write("../escape", [{}])
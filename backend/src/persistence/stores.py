@@ -0,0 +1,451 @@
+"""Recipe, meal plan and user profile repositories keyed by ID, with a read-through LRU cache.
+
+Stores read the same tables the write-behind queue writes (see `sinks.py`), so
+the storage backend follows SNAPTOP_PERSISTENCE_SINK:
+
+- `bigquery`: reads the `recipes`/`meal_plans`/`users` tables with one parameterized
+  query per lookup batch
+- `sqlite:///path`: reads the tables of the local SQLite sink
+- anything else: process-local memory (development and tests)
+
+Writes are queued on the write-behind writer; the cache is updated at once, so
+this process reads its own writes before they reach storage. `get_many` loads
+all cache misses in one query, which is how a meal plan's recipes are fetched.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from backend.src.common.cache import LRUCache
+from backend.src.common.utils import get_env_float, get_env_int
+from backend.src.models import MacroPercentages, MealPlan, MealType, Recipe, RecipeSkeleton, UserProfile
+from backend.src.persistence.rows import recipe_row, utc_timestamp
+from backend.src.persistence.sinks import BigQuerySink, SQLiteSink
+from backend.src.persistence.write_behind import WriteBehindWriter, persistence
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_SQLITE_CHUNK = 500
+
+
+def meal_plan_row(meal_plan: MealPlan) -> dict:
+    """
+    Build a `meal_plans` row.
+
+    The table keeps each meal's type, recipe and servings; skeleton titles,
+    calorie targets, macro splits and per-person dates are not stored.
+
+    Returns:
+        dict: Row matching `bigquery/meal_plans.sql`
+    """
+    dates = [
+        d
+        for skeleton in meal_plan.recipes
+        for person_dates in skeleton.dates.values()
+        for d in person_dates.dates
+    ]
+    return {
+        "meal_plan_id": meal_plan.meal_plan_id,
+        "user_id": meal_plan.user_id,
+        "week_start": min(dates).date().isoformat() if dates else None,
+        "meals": [
+            {
+                "meal_type": skeleton.meal_type.value,
+                "recipe_id": skeleton.recipe_id,
+                "servings": skeleton.servings,
+            }
+            for skeleton in meal_plan.recipes
+        ],
+        "created_at": utc_timestamp(),
+    }
+
+
+def meal_plan_from_row(row: dict) -> MealPlan:
+    """Rebuild a `MealPlan` from a `meal_plans` row (see `meal_plan_row` for what is lost)."""
+    skeletons = [
+        RecipeSkeleton(
+            skeleton_id=f"{row['meal_plan_id']}-{i}",
+            title="",
+            recipe_id=meal.get("recipe_id"),
+            target_calories_per_serving=0,
+            servings=meal.get("servings") or 1,
+            macro_percentages=MacroPercentages(
+                protein_percent=0, carb_percent=0, fat_percent=0
+            ),
+            meal_type=MealType(meal["meal_type"]),
+        )
+        for i, meal in enumerate(row.get("meals") or [])
+    ]
+    return MealPlan(meal_plan_id=row["meal_plan_id"], user_id=row["user_id"], recipes=skeletons)
+
+
+def user_row(profile: UserProfile) -> dict:
+    """
+    Build a `users` row.
+
+    Returns:
+        dict: Row matching `bigquery/users.sql`
+    """
+    data = profile.model_dump(mode="json")
+    data["created_at"] = utc_timestamp()
+    return data
+
+
+def user_from_row(row: dict) -> UserProfile:
+    """Rebuild a `UserProfile` from a `users` row."""
+    fields = {k: v for k, v in row.items() if k in UserProfile.model_fields and v is not None}
+    return UserProfile(**fields)
+
+
+def recipe_from_row(row: dict) -> Recipe:
+    """Rebuild a `Recipe` from a `recipes` row."""
+    fields = {k: v for k, v in row.items() if k in Recipe.model_fields}
+    return Recipe(**fields)
+
+
+@dataclass(frozen=True)
+class TableCodec:
+    """
+    How a model maps onto one table.
+
+    Args:
+        table (str): Table name.
+        key (str): ID column.
+        to_row (callable): `(model, version) -> row dict`.
+        from_row (callable): `row dict -> model`.
+        versioned (bool): Whether rows carry a `version` column.
+    """
+
+    table: str
+    key: str
+    to_row: callable
+    from_row: callable
+    versioned: bool
+
+
+RECIPES = TableCodec(
+    table="recipes",
+    key="recipe_id",
+    to_row=lambda recipe, version: recipe_row(recipe, version=version),
+    from_row=recipe_from_row,
+    versioned=True,
+)
+MEAL_PLANS = TableCodec(
+    table="meal_plans",
+    key="meal_plan_id",
+    to_row=lambda meal_plan, version: meal_plan_row(meal_plan),
+    from_row=meal_plan_from_row,
+    versioned=False,
+)
+USERS = TableCodec(
+    table="users",
+    key="user_id",
+    to_row=lambda profile, version: user_row(profile),
+    from_row=user_from_row,
+    versioned=False,
+)
+
+
+class StoreBackend(ABC):
+    """Reads and writes rows of one table for a store."""
+
+    @abstractmethod
+    def load_many(self, codec: TableCodec, ids: list[str]) -> dict[str, tuple[object, int]]:
+        """Return `{id: (model, version)}` for the latest row of each ID found."""
+
+    @abstractmethod
+    def write(self, codec: TableCodec, model, version: int):
+        """Store a new row for `model`."""
+
+
+class MemoryBackend(StoreBackend):
+    """
+    Keeps rows in process memory, bounded to `max_entries` per table.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._tables: dict[str, LRUCache] = {}
+        self._lock = threading.Lock()
+
+    def _table(self, name: str) -> LRUCache:
+        with self._lock:
+            if name not in self._tables:
+                self._tables[name] = LRUCache(max_entries=self.max_entries)
+            return self._tables[name]
+
+    def load_many(self, codec, ids):
+        table = self._table(codec.table)
+        found = {}
+        for item_id in ids:
+            entry = table.peek(item_id)
+            if entry is not None:
+                model, version = entry
+                found[item_id] = (model.model_copy(deep=True), version)
+        return found
+
+    def write(self, codec, model, version):
+        self._table(codec.table).put(getattr(model, codec.key), (model.model_copy(deep=True), version))
+
+
+class QueuedBackend(StoreBackend):
+    """Backend whose writes go through the write-behind queue."""
+
+    def __init__(self, writer: WriteBehindWriter):
+        self.writer = writer
+
+    def write(self, codec, model, version):
+        self.writer.enqueue(codec.table, codec.to_row(model, version))
+
+
+class SQLiteBackend(QueuedBackend):
+    """
+    Reads the tables written by `SQLiteSink` (key, JSON row, insertion time).
+
+    Args:
+        sink (SQLiteSink): Sink that writes the same database file.
+        writer (WriteBehindWriter): Queue feeding that sink.
+    """
+
+    def __init__(self, sink: SQLiteSink, writer: WriteBehindWriter):
+        super().__init__(writer)
+        self.sink = sink
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.sink.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def load_many(self, codec, ids):
+        found: dict[str, tuple[object, int]] = {}
+        with self._connect() as conn:
+            self.sink.ensure_table(conn, codec.table)
+            for start in range(0, len(ids), _SQLITE_CHUNK):
+                chunk = ids[start:start + _SQLITE_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                # Rows are append-only; the last one inserted per key is the latest
+                rows = conn.execute(
+                    f"SELECT row_key, data FROM {codec.table} "
+                    f"WHERE row_key IN ({placeholders}) ORDER BY inserted_at, rowid",
+                    chunk,
+                ).fetchall()
+                for key, data in rows:
+                    row = json.loads(data)
+                    found[key] = (codec.from_row(row), row.get("version") or 1)
+        return found
+
+
+class BigQueryBackend(QueuedBackend):
+    """
+    Reads the latest row per ID from BigQuery in a single query per batch.
+
+    Args:
+        sink (BigQuerySink): Sink that writes the same dataset (its client is shared).
+        writer (WriteBehindWriter): Queue feeding that sink.
+    """
+
+    def __init__(self, sink: BigQuerySink, writer: WriteBehindWriter):
+        super().__init__(writer)
+        self.sink = sink
+
+    def load_many(self, codec, ids):
+        from google.cloud import bigquery
+
+        order = "version DESC, created_at DESC" if codec.versioned else "created_at DESC"
+        query = (
+            f"SELECT * FROM `{self.sink.project}.{self.sink.dataset}.{codec.table}` "
+            f"WHERE {codec.key} IN UNNEST(@ids) "
+            f"QUALIFY ROW_NUMBER() OVER (PARTITION BY {codec.key} ORDER BY {order}) = 1"
+        )
+        config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ArrayQueryParameter("ids", "STRING", ids)]
+        )
+        found = {}
+        for row in self.sink.client().query(query, job_config=config).result():
+            data = _jsonable(dict(row.items()))
+            found[data[codec.key]] = (codec.from_row(data), data.get("version") or 1)
+        return found
+
+
+def _jsonable(value):
+    """Convert BigQuery row values (nested Rows, dates) to plain Python types."""
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if hasattr(value, "items") and not isinstance(value, (str, bytes)):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).isoformat()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+class _CachedStore:
+    """
+    ID-keyed repository over a `StoreBackend` with a read-through LRU cache.
+
+    Args:
+        codec (TableCodec): Table mapping.
+        backend (StoreBackend): Storage backend.
+        cache_entries (int): Maximum cached models.
+        cache_ttl (float): Seconds a cached model stays valid.
+    """
+
+    def __init__(self, codec: TableCodec, backend: StoreBackend, cache_entries: int, cache_ttl: float):
+        self.codec = codec
+        self.backend = backend
+        # id -> (model, version)
+        self._cache = LRUCache(max_entries=cache_entries, ttl=cache_ttl)
+
+    def get(self, item_id: str):
+        """Return the latest version of a model, or None if it is unknown."""
+        return self.get_many([item_id]).get(item_id)
+
+    def get_many(self, ids: list[str]) -> dict:
+        """
+        Look up several models at once; all cache misses are loaded together.
+
+        Returns:
+            dict: `{id: model}` for the IDs that exist (copies, safe to mutate).
+        """
+        found = {}
+        missing = []
+        for item_id in dict.fromkeys(ids):
+            entry = self._cache.get(item_id)
+            if entry is None:
+                missing.append(item_id)
+            else:
+                found[item_id] = entry[0].model_copy(deep=True)
+        if missing:
+            for item_id, (model, version) in self.backend.load_many(self.codec, missing).items():
+                self._cache.put(item_id, (model, version))
+                found[item_id] = model.model_copy(deep=True)
+        return found
+
+    def version(self, item_id: str) -> int | None:
+        """Current version of a model, or None if it is unknown."""
+        entry = self._cache.get(item_id)
+        if entry is None:
+            loaded = self.backend.load_many(self.codec, [item_id]).get(item_id)
+            if loaded is None:
+                return None
+            self._cache.put(item_id, loaded)
+            entry = loaded
+        return entry[1]
+
+    def _put(self, model, version: int):
+        stored = model.model_copy(deep=True)
+        self._cache.put(getattr(model, self.codec.key), (stored, version))
+        self.backend.write(self.codec, stored, version)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+class RecipeStore(_CachedStore):
+    """Recipes by `recipe_id`. Saving an existing ID stores a new version."""
+
+    def __init__(self, backend: StoreBackend, cache_entries: int, cache_ttl: float):
+        super().__init__(RECIPES, backend, cache_entries, cache_ttl)
+
+    def add(self, recipe: Recipe):
+        """Save a newly generated recipe as version 1. Never blocks on storage."""
+        self._put(self._strip(recipe), 1)
+
+    def put(self, recipe: Recipe) -> int:
+        """
+        Save a recipe as the next version of its `recipe_id`. May read storage
+        to find the current version, so call it off the event loop.
+
+        Returns:
+            int: The version stored.
+        """
+        version = (self.version(recipe.recipe_id) or 0) + 1
+        self._put(self._strip(recipe), version)
+        return version
+
+    def set_image(self, recipe_id: str, image_url: str):
+        """
+        Record a recipe's generated image on its current version, without
+        starting a new one. May read storage if the recipe is no longer
+        cached, so call it off the event loop.
+        """
+        entry = self._cache.get(recipe_id)
+        if entry is None:
+            entry = self.backend.load_many(self.codec, [recipe_id]).get(recipe_id)
+            if entry is None:
+                return
+        recipe, version = entry
+        if recipe.image_url != image_url:
+            self._put(recipe.model_copy(update={"image_url": image_url}), version)
+
+    @staticmethod
+    def _strip(recipe: Recipe) -> Recipe:
+        # Image bytes live in the image store; only the URL is kept
+        return recipe.model_copy(update={"image_base64": None, "image_status": None})
+
+
+class MealPlanStore(_CachedStore):
+    """Meal plans by `meal_plan_id`."""
+
+    def __init__(self, backend: StoreBackend, cache_entries: int, cache_ttl: float):
+        super().__init__(MEAL_PLANS, backend, cache_entries, cache_ttl)
+
+    def put(self, meal_plan: MealPlan):
+        """Save a meal plan."""
+        self._put(meal_plan, 1)
+
+    def get_recipes(self, meal_plan_id: str, recipe_store: RecipeStore) -> tuple[MealPlan, dict[str, Recipe]] | None:
+        """
+        Load a meal plan and all of its recipes with one recipe lookup.
+
+        Returns:
+            tuple | None: The meal plan and `{recipe_id: Recipe}`, or None if
+                the meal plan is unknown.
+        """
+        meal_plan = self.get(meal_plan_id)
+        if meal_plan is None:
+            return None
+        recipe_ids = [s.recipe_id for s in meal_plan.recipes if s.recipe_id]
+        return meal_plan, recipe_store.get_many(recipe_ids)
+
+
+class UserStore(_CachedStore):
+    """User profiles by `user_id`. Saving a profile replaces the previous one."""
+
+    def __init__(self, backend: StoreBackend, cache_entries: int, cache_ttl: float):
+        super().__init__(USERS, backend, cache_entries, cache_ttl)
+
+    def put(self, profile: UserProfile):
+        """Save a user profile."""
+        self._put(profile, 1)
+
+
+def create_backend(writer: WriteBehindWriter) -> StoreBackend:
+    """Pick the store backend matching the write-behind writer's sink."""
+    if isinstance(writer.sink, BigQuerySink):
+        return BigQueryBackend(writer.sink, writer)
+    if isinstance(writer.sink, SQLiteSink):
+        return SQLiteBackend(writer.sink, writer)
+    return MemoryBackend(get_env_int("SNAPTOP_STORE_MEMORY_MAX_ENTRIES", 10000))
+
+
+_backend = create_backend(persistence)
+_cache_entries = get_env_int("SNAPTOP_STORE_CACHE_MAX_ENTRIES", 2048)
+_cache_ttl = get_env_float("SNAPTOP_STORE_CACHE_TTL", 3600.0)
+
+recipe_store = RecipeStore(_backend, _cache_entries, _cache_ttl)
+meal_plan_store = MealPlanStore(_backend, _cache_entries, _cache_ttl)
+user_store = UserStore(_backend, _cache_entries, _cache_ttl)
@@ -0,0 +1,125 @@
+import pytest
+
+from backend.src.models import DietaryProfile, PantryItem, Recipe, UserProfile
+from backend.src.persistence.sinks import SQLiteSink
+from backend.src.persistence.stores import MemoryBackend, RecipeStore, SQLiteBackend, UserStore
+from backend.src.persistence.write_behind import WriteBehindWriter
+
+
+def _recipe(recipe_id="r1", title="Chicken and Rice", **fields) -> Recipe:
+    return Recipe(
+        recipe_id=recipe_id,
+        title=title,
+        description="",
+        ingredients=[],
+        instructions=[],
+        prep_time_minutes=5,
+        cook_time_minutes=20,
+        servings=2,
+        **fields,
+    )
+
+
+class CountingBackend(MemoryBackend):
+    """Memory backend that records the IDs of every `load_many` call."""
+
+    def __init__(self):
+        super().__init__(max_entries=100)
+        self.loads: list[list[str]] = []
+
+    def load_many(self, codec, ids):
+        self.loads.append(list(ids))
+        return super().load_many(codec, ids)
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    """A recipe store over a SQLite sink, and a factory of fresh stores on the same file."""
+    sink = SQLiteSink(str(tmp_path / "store.db"))
+    writer = WriteBehindWriter(
+        sink, max_queued=1000, batch_size=100, flush_interval=0.05, max_retries=0, retry_backoff=0.01
+    )
+    backend = SQLiteBackend(sink, writer)
+
+    def fresh(store_class=RecipeStore):
+        writer.flush(timeout=5)
+        return store_class(backend, cache_entries=100, cache_ttl=60.0)
+
+    yield fresh(), fresh
+    writer.stop(timeout=5)
+
+
+def test_image_url_is_stored_on_the_current_version(sqlite_store):
+    store, fresh = sqlite_store
+    store.add(_recipe())
+    store.set_image("r1", "/api/images/abc")
+    assert store.get("r1").image_url == "/api/images/abc"
+
+    reloaded = fresh()
+    assert reloaded.get("r1").image_url == "/api/images/abc"
+    assert reloaded.version("r1") == 1
+    # Setting the same image again writes nothing; unknown recipes are ignored
+    reloaded.set_image("r1", "/api/images/abc")
+    reloaded.set_image("missing", "/api/images/abc")
+    assert fresh().get("missing") is None
+
+
+def test_user_profile_round_trips_with_its_pantry(sqlite_store):
+    _store, fresh = sqlite_store
+    profile = UserProfile(
+        user_id="u1",
+        dietary_profile=DietaryProfile(),
+        pantry=[PantryItem(name="olive oil", quantity=0.5, unit="cup")],
+    )
+    fresh(UserStore).put(profile)
+    assert fresh(UserStore).get("u1") == profile
+
+
+def test_put_stores_the_next_version(sqlite_store):
+    store, fresh = sqlite_store
+    store.add(_recipe())
+    assert store.put(_recipe(title="Chicken and Brown Rice")) == 2
+    assert store.put(_recipe(title="Tofu and Rice")) == 3
+    assert store.version("r1") == 3
+
+    # A store with an empty cache finds the latest version in storage
+    reloaded = fresh()
+    assert reloaded.version("r1") == 3
+    assert reloaded.get("r1").title == "Tofu and Rice"
+    assert reloaded.put(_recipe(title="Tofu and Quinoa")) == 4
+
+
+def test_writes_are_read_back_before_they_reach_sqlite(tmp_path):
+    sink = SQLiteSink(str(tmp_path / "store.db"))
+    # Nothing is written before a flush
+    writer = WriteBehindWriter(
+        sink, max_queued=1000, batch_size=100, flush_interval=60.0, max_retries=0, retry_backoff=0.01
+    )
+    store = RecipeStore(SQLiteBackend(sink, writer), cache_entries=100, cache_ttl=60.0)
+    store.add(_recipe(image_base64="aGVsbG8="))
+    assert store.get("r1").title == "Chicken and Rice"
+    # Image bytes are never stored, not even in the cache
+    assert store.get("r1").image_base64 is None
+    assert RecipeStore(SQLiteBackend(sink, writer), cache_entries=100, cache_ttl=60.0).get("r1") is None
+    writer.stop(timeout=5)
+    assert RecipeStore(SQLiteBackend(sink, writer), cache_entries=100, cache_ttl=60.0).get("r1") is not None
+
+
+def test_get_many_loads_every_cache_miss_in_one_call():
+    backend = CountingBackend()
+    writer_store = RecipeStore(backend, cache_entries=100, cache_ttl=60.0)
+    for i in range(5):
+        writer_store.add(_recipe(recipe_id=f"r{i}"))
+
+    store = RecipeStore(backend, cache_entries=100, cache_ttl=60.0)
+    store.get("r0")
+    backend.loads.clear()
+    found = store.get_many(["r0", "r1", "r2", "r1", "missing", "r3"])
+    assert sorted(found) == ["r0", "r1", "r2", "r3"]
+    # r0 is cached; the other distinct IDs are loaded together
+    assert backend.loads == [["r1", "r2", "missing", "r3"]]
+
+    # Returned recipes are copies: changing one does not change the cache
+    found["r1"].title = "Changed"
+    assert store.get("r1").title == "Chicken and Rice"
+    assert len(backend.loads) == 1
@@ -0,0 +1,257 @@
+"""Write-behind persistence: rows are queued in memory and written in batches.
+
+Request handlers call `persistence.enqueue()` (or save through the stores in
+`stores.py`), which only puts the row on a bounded queue and never waits for
+storage. A single writer thread groups rows per table and writes a batch when
+it reaches `batch_size` rows or `flush_interval` seconds after its first row.
+Failed batches are retried with exponential backoff; rows are dropped (and
+counted) when the queue is full or a batch keeps failing, so a storage outage
+cannot exhaust memory or stall requests. `stop()` writes out everything still queued.
+"""
+
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+from backend.src.common.metrics import registry
+from backend.src.common.utils import get_env_float, get_env_int
+from backend.src.persistence.sinks import NullSink, Sink, SinkError, create_sink
+
+logger = logging.getLogger(__name__)
+
+rows_written_total = registry.counter(
+    "snaptop_persistence_rows_written_total",
+    "Rows written by the write-behind persistence queue",
+    ("table",),
+)
+rows_dropped_total = registry.counter(
+    "snaptop_persistence_rows_dropped_total",
+    "Rows dropped by the write-behind persistence queue",
+    ("table", "reason"),
+)
+flush_seconds = registry.histogram(
+    "snaptop_persistence_flush_duration_seconds",
+    "Duration of a batch write, including retries",
+    ("table",),
+)
+
+# Marker put on the queue to wake the writer for a flush or stop
+_WAKE = object()
+
+
+class WriteBehindWriter:
+    """
+    Buffers rows and writes them to a `Sink` in batches from a background thread.
+
+    Args:
+        sink (Sink): Destination of the rows.
+        max_queued (int): Rows held in memory before new rows are dropped.
+        batch_size (int): Rows per table that trigger an immediate write.
+        flush_interval (float): Longest time (seconds) a row waits to be written.
+        max_retries (int): Retries of a failed batch before it is dropped.
+        retry_backoff (float): Initial retry delay in seconds; doubles each retry.
+    """
+
+    def __init__(
+        self,
+        sink: Sink,
+        max_queued: int,
+        batch_size: int,
+        flush_interval: float,
+        max_retries: int,
+        retry_backoff: float,
+    ):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queued)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        # Flush requests are numbered; the writer reports the last one it served
+        self._flushed = threading.Condition()
+        self._flush_requested = 0
+        self._flush_served = 0
+
+    @property
+    def enabled(self) -> bool:
+        return not isinstance(self.sink, NullSink)
+
+    @property
+    def queued(self) -> int:
+        """Rows waiting to be picked up by the writer thread."""
+        return self._queue.qsize()
+
+    def start(self):
+        """Start the writer thread (idempotent; a no-op when persistence is disabled)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="snaptop-write-behind", daemon=True
+                )
+                self._thread.start()
+
+    def enqueue(self, table: str, row: dict) -> bool:
+        """
+        Queue a row for `table` without blocking.
+
+        Returns:
+            bool: False if the row was dropped because the queue is full.
+        """
+        if not self.enabled:
+            return True
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait((table, row))
+            return True
+        except queue.Full:
+            rows_dropped_total.inc(table=table, reason="queue_full")
+            return False
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Write every row queued so far and wait for it.
+
+        Returns:
+            bool: True if the flush finished within `timeout`.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        with self._flushed:
+            self._flush_requested += 1
+            target = self._flush_requested
+        self._wake()
+        with self._flushed:
+            return self._flushed.wait_for(
+                lambda: self._flush_served >= target, timeout=timeout
+            )
+
+    def stop(self, timeout: float = 30.0):
+        """Write out all queued rows and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopping.set()
+            self._wake()
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning("Write-behind writer did not finish within %ss", timeout)
+        with self._lock:
+            self._thread = None
+        self.sink.close()
+
+    def _wake(self):
+        try:
+            self._queue.put_nowait(_WAKE)
+        except queue.Full:
+            # The writer is busy with a full queue; it will notice the flag anyway
+            pass
+
+    def _run(self):
+        # table -> (rows, monotonic time of the oldest row)
+        buffers: dict[str, tuple[list[dict], float]] = {}
+        while True:
+            deadline = min(
+                (started + self.flush_interval for _rows, started in buffers.values()),
+                default=None,
+            )
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout if timeout is not None else 1.0)
+            except queue.Empty:
+                item = None
+
+            if item is not None and item is not _WAKE:
+                table, row = item
+                rows, _started = buffers.setdefault(table, ([], time.monotonic()))
+                rows.append(row)
+
+            stopping = self._stopping.is_set()
+            with self._flushed:
+                flush_target = self._flush_requested
+            flushing = flush_target > self._flush_served
+            if stopping or flushing:
+                # Drain everything that was queued before the request
+                self._drain_into(buffers)
+
+            now = time.monotonic()
+            for table in list(buffers):
+                rows, started = buffers[table]
+                if stopping or flushing or len(rows) >= self.batch_size or (
+                    now - started >= self.flush_interval
+                ):
+                    del buffers[table]
+                    for i in range(0, len(rows), self.batch_size):
+                        self._write(table, rows[i:i + self.batch_size])
+
+            if flushing:
+                with self._flushed:
+                    self._flush_served = flush_target
+                    self._flushed.notify_all()
+            if stopping:
+                return
+
+    def _drain_into(self, buffers: dict):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is _WAKE:
+                continue
+            table, row = item
+            rows, _started = buffers.setdefault(table, ([], time.monotonic()))
+            rows.append(row)
+
+    def _write(self, table: str, rows: list[dict]):
+        delay = self.retry_backoff
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.sink.write(table, rows)
+                rows_written_total.inc(len(rows), table=table)
+                flush_seconds.observe(time.perf_counter() - started, table=table)
+                return
+            except SinkError as e:
+                error = e
+            except Exception as e:
+                logger.error("Unexpected error writing %s rows: %s", table, e, exc_info=True)
+                error = e
+            if attempt < self.max_retries and not self._stopping.is_set():
+                # Full jitter keeps several processes from retrying in lockstep
+                time.sleep(random.uniform(0, delay))
+                delay *= 2
+            elif attempt < self.max_retries:
+                # Shutting down: one quick retry at most, do not hold up exit
+                time.sleep(min(delay, 0.5))
+                delay = self.retry_backoff
+        flush_seconds.observe(time.perf_counter() - started, table=table)
+        rows_dropped_total.inc(len(rows), table=table, reason="write_failed")
+        logger.error("Dropped %s %s rows after %s retries: %s", len(rows), table, self.max_retries, error)
+
+
+persistence = WriteBehindWriter(
+    sink=create_sink(os.getenv("SNAPTOP_PERSISTENCE_SINK", "none")),
+    max_queued=get_env_int("SNAPTOP_PERSISTENCE_MAX_QUEUED", 10000),
+    batch_size=get_env_int("SNAPTOP_PERSISTENCE_BATCH_SIZE", 500),
+    flush_interval=get_env_float("SNAPTOP_PERSISTENCE_FLUSH_INTERVAL", 5.0),
+    max_retries=get_env_int("SNAPTOP_PERSISTENCE_MAX_RETRIES", 5),
+    retry_backoff=get_env_float("SNAPTOP_PERSISTENCE_RETRY_BACKOFF", 0.5),
+)
+
+registry.callback(
+    "snaptop_persistence_queued_rows",
+    "Rows waiting in the write-behind persistence queue",
+    "gauge",
+    lambda: persistence.queued,
+)
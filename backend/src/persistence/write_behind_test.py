@@ -0,0 +1,138 @@
+import json
+import sqlite3
+import time
+
+import pytest
+
+from backend.src.persistence.sinks import JsonlFileSink, SinkError, SQLiteSink
+from backend.src.persistence.write_behind import WriteBehindWriter
+
+
+class RecordingSink(JsonlFileSink):
+    """Writes JSON lines and records each batch; the first `failures` writes raise."""
+
+    def __init__(self, directory: str, failures: int = 0):
+        super().__init__(directory)
+        self.failures = failures
+        self.attempts = 0
+        self.batches: list[int] = []
+        self.closed = False
+
+    def write(self, table, rows):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise SinkError("storage unavailable")
+        super().write(table, rows)
+        self.batches.append(len(rows))
+
+    def close(self):
+        self.closed = True
+
+    def rows(self, table: str) -> list[dict]:
+        try:
+            with open(f"{self.directory}/{table}.jsonl") as f:
+                return [json.loads(line) for line in f]
+        except FileNotFoundError:
+            return []
+
+
+def _writer(sink, batch_size=100, flush_interval=60.0, max_retries=0) -> WriteBehindWriter:
+    return WriteBehindWriter(
+        sink,
+        max_queued=1000,
+        batch_size=batch_size,
+        flush_interval=flush_interval,
+        max_retries=max_retries,
+        retry_backoff=0.01,
+    )
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def sink(tmp_path):
+    return RecordingSink(str(tmp_path / "rows"))
+
+
+def test_full_batches_are_written_at_once(sink):
+    writer = _writer(sink, batch_size=3)
+    for i in range(7):
+        assert writer.enqueue("agent_logs", {"log_id": str(i)})
+    _wait_for(lambda: len(sink.batches) == 2)
+    # The seventh row waits for the flush interval (or a flush)
+    time.sleep(0.05)
+    assert sink.batches == [3, 3]
+    assert writer.flush(timeout=5)
+    assert sink.batches == [3, 3, 1]
+    assert [row["log_id"] for row in sink.rows("agent_logs")] == [str(i) for i in range(7)]
+    writer.stop(timeout=5)
+
+
+def test_partial_batches_are_written_after_the_flush_interval(sink):
+    writer = _writer(sink, flush_interval=0.2)
+    started = time.monotonic()
+    writer.enqueue("agent_logs", {"log_id": "a"})
+    writer.enqueue("recipes", {"recipe_id": "r1"})
+    writer.enqueue("agent_logs", {"log_id": "b"})
+    _wait_for(lambda: len(sink.batches) == 2)
+    assert time.monotonic() - started >= 0.2
+    # One batch per table
+    assert sorted(sink.batches) == [1, 2]
+    writer.stop(timeout=5)
+
+
+def test_failed_batches_are_retried(tmp_path):
+    sink = RecordingSink(str(tmp_path / "rows"), failures=2)
+    writer = _writer(sink, max_retries=2)
+    writer.enqueue("agent_logs", {"log_id": "a"})
+    assert writer.flush(timeout=5)
+    assert sink.attempts == 3
+    assert [row["log_id"] for row in sink.rows("agent_logs")] == ["a"]
+    writer.stop(timeout=5)
+
+
+def test_batches_failing_every_retry_are_dropped(tmp_path):
+    sink = RecordingSink(str(tmp_path / "rows"), failures=3)
+    writer = _writer(sink, max_retries=2)
+    writer.enqueue("agent_logs", {"log_id": "lost"})
+    assert writer.flush(timeout=5)
+    assert sink.attempts == 3
+    assert sink.rows("agent_logs") == []
+    # The writer carries on with later rows
+    writer.enqueue("agent_logs", {"log_id": "kept"})
+    assert writer.flush(timeout=5)
+    assert [row["log_id"] for row in sink.rows("agent_logs")] == ["kept"]
+    writer.stop(timeout=5)
+
+
+def test_stop_writes_out_every_queued_row(tmp_path):
+    sink = SQLiteSink(str(tmp_path / "rows.db"))
+    writer = _writer(sink)
+    for i in range(250):
+        writer.enqueue("agent_logs", {"log_id": str(i)})
+    writer.stop(timeout=5)
+    conn = sqlite3.connect(sink.path)
+    try:
+        keys = [key for (key,) in conn.execute("SELECT row_key FROM agent_logs ORDER BY rowid")]
+    finally:
+        conn.close()
+    assert keys == [str(i) for i in range(250)]
+
+
+def test_stop_closes_the_sink_and_the_writer_restarts(sink):
+    writer = _writer(sink)
+    writer.enqueue("agent_logs", {"log_id": "a"})
+    writer.stop(timeout=5)
+    assert sink.closed
+    assert [row["log_id"] for row in sink.rows("agent_logs")] == ["a"]
+    # Enqueueing after a stop starts a new writer thread
+    writer.enqueue("agent_logs", {"log_id": "b"})
+    assert writer.flush(timeout=5)
+    assert [row["log_id"] for row in sink.rows("agent_logs")] == ["a", "b"]
+    writer.stop(timeout=5)
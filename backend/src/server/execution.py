@@ -0,0 +1,173 @@
+"""Bounded, back-pressured execution of blocking agent and image work.
+
+The recipe agent and Imagen calls are synchronous and can take up to a minute,
+so they must never run on the uvicorn event loop. A `WorkerPool` runs them on a
+dedicated thread pool, caps the number of in-flight jobs per process and lets a
+limited number of callers queue for a slot. Once the queue is full new callers
+are rejected immediately so the server can answer 429 with a Retry-After hint.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from backend.src.common.metrics import record_timing, registry
+from backend.src.common.utils import get_env_float, get_env_int
+
+logger = logging.getLogger(__name__)
+
+queue_wait_seconds = registry.histogram(
+    "snaptop_pool_queue_wait_seconds",
+    "Time spent waiting for a worker pool slot",
+    ("pool",),
+)
+pool_rejections_total = registry.counter(
+    "snaptop_pool_rejections_total",
+    "Callers turned away by a worker pool",
+    ("pool", "reason"),
+)
+
+
+class PoolSaturatedError(Exception):
+    """Raised when a pool's queue is full and the job cannot be accepted."""
+
+    def __init__(self, pool_name: str, retry_after: int):
+        super().__init__(f"{pool_name} pool is at capacity, retry in {retry_after}s")
+        self.pool_name = pool_name
+        self.retry_after = retry_after
+
+
+class PoolTimeoutError(Exception):
+    """Raised when a queued job does not get a slot before its queue timeout."""
+
+    def __init__(self, pool_name: str, retry_after: int):
+        super().__init__(
+            f"{pool_name} pool did not free up a slot in time, retry in {retry_after}s"
+        )
+        self.pool_name = pool_name
+        self.retry_after = retry_after
+
+
+class WorkerPool:
+    """
+    Runs blocking callables on a dedicated thread pool with admission control.
+
+    Args:
+        name (str): Pool name used in logs and error messages.
+        max_in_flight (int): Maximum number of jobs running at once.
+        max_queued (int): Maximum number of callers waiting for a slot.
+        queue_timeout (float): Seconds a caller may wait for a slot before giving up.
+        retry_after (int): Retry-After hint (seconds) returned to rejected callers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int,
+        max_queued: int,
+        queue_timeout: float,
+        retry_after: int,
+    ):
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queued = max(0, max_queued)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_in_flight, thread_name_prefix=f"snaptop-{name}"
+        )
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._in_flight = 0
+        self._queued = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of jobs currently holding a slot."""
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        """Number of callers currently waiting for a slot."""
+        return self._queued
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Reserve one in-flight slot for the duration of the `async with` block.
+
+        Raises:
+            PoolSaturatedError: If every slot is busy and the queue is full.
+            PoolTimeoutError: If no slot frees up within `queue_timeout` seconds.
+        """
+        # Count callers that are queued but not yet scheduled, so a burst of
+        # requests arriving in the same loop iteration cannot overshoot the cap.
+        if self._in_flight + self._queued >= self.max_in_flight + self.max_queued:
+            pool_rejections_total.inc(pool=self.name, reason="saturated")
+            raise PoolSaturatedError(self.name, self.retry_after)
+
+        self._queued += 1
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            pool_rejections_total.inc(pool=self.name, reason="timeout")
+            raise PoolTimeoutError(self.name, self.retry_after)
+        finally:
+            self._queued -= 1
+
+        waited = time.monotonic() - queued_at
+        queue_wait_seconds.observe(waited, pool=self.name)
+        record_timing(f"queue.{self.name}", waited)
+        if waited > 0.5:
+            logger.info("%s pool: waited %.1fs for a slot", self.name, waited)
+
+        self._in_flight += 1
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a blocking callable on the pool's threads without taking a slot.
+
+        Use inside `slot()` so the call counts against the in-flight limit. The
+        caller's context variables are propagated to the worker thread.
+        """
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, func, *args, **kwargs)
+        return await loop.run_in_executor(self._executor, call)
+
+    async def submit(self, func, *args, **kwargs):
+        """Reserve a slot and run a blocking callable in it."""
+        async with self.slot():
+            return await self.run(func, *args, **kwargs)
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work and release the pool's threads."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# Agent runs: long, expensive, and the main thing we need to protect the loop from.
+generation_pool = WorkerPool(
+    name="generation",
+    max_in_flight=get_env_int("SNAPTOP_MAX_CONCURRENT_GENERATIONS", 4),
+    max_queued=get_env_int("SNAPTOP_GENERATION_QUEUE_DEPTH", 16),
+    queue_timeout=get_env_float("SNAPTOP_GENERATION_QUEUE_TIMEOUT", 30.0),
+    retry_after=get_env_int("SNAPTOP_GENERATION_RETRY_AFTER", 30),
+)
+
+# Imagen calls: shorter, but still blocking network I/O.
+image_pool = WorkerPool(
+    name="image",
+    max_in_flight=get_env_int("SNAPTOP_MAX_CONCURRENT_IMAGES", 4),
+    max_queued=get_env_int("SNAPTOP_IMAGE_QUEUE_DEPTH", 32),
+    queue_timeout=get_env_float("SNAPTOP_IMAGE_QUEUE_TIMEOUT", 30.0),
+    retry_after=get_env_int("SNAPTOP_IMAGE_RETRY_AFTER", 10),
+)
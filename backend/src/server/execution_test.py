@@ -0,0 +1,118 @@
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from backend.src.server.execution import PoolSaturatedError, PoolTimeoutError, WorkerPool
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def _pool(max_in_flight=1, max_queued=1, queue_timeout=5.0) -> WorkerPool:
+    return WorkerPool("test", max_in_flight, max_queued, queue_timeout, retry_after=7)
+
+
+async def _hold(pool: WorkerPool, entered: asyncio.Event, release: asyncio.Event):
+    async with pool.slot():
+        entered.set()
+        await release.wait()
+
+
+def test_slots_are_counted_while_queued_and_in_flight():
+    async def main():
+        pool = _pool(max_in_flight=1, max_queued=1)
+        entered, release = asyncio.Event(), asyncio.Event()
+        first = asyncio.create_task(_hold(pool, entered, release))
+        await entered.wait()
+        assert (pool.in_flight, pool.queued) == (1, 0)
+
+        second_entered = asyncio.Event()
+        second = asyncio.create_task(_hold(pool, second_entered, release))
+        await asyncio.sleep(0)
+        assert (pool.in_flight, pool.queued) == (1, 1)
+
+        release.set()
+        await asyncio.gather(first, second)
+        assert second_entered.is_set()
+        assert (pool.in_flight, pool.queued) == (0, 0)
+
+    asyncio.run(main())
+
+
+def test_callers_beyond_the_queue_are_rejected_at_once():
+    async def main():
+        pool = _pool(max_in_flight=1, max_queued=1)
+        entered, release = asyncio.Event(), asyncio.Event()
+        holders = [
+            asyncio.create_task(_hold(pool, entered, release)),
+            asyncio.create_task(_hold(pool, asyncio.Event(), release)),
+        ]
+        await entered.wait()
+        # The server answers this with 429 and the pool's Retry-After
+        with pytest.raises(PoolSaturatedError) as rejected:
+            async with pool.slot():
+                pass
+        assert rejected.value.retry_after == 7
+        assert (pool.in_flight, pool.queued) == (1, 1)
+        release.set()
+        await asyncio.gather(*holders)
+
+    asyncio.run(main())
+
+
+def test_a_burst_in_one_loop_iteration_cannot_overshoot_the_cap():
+    async def main():
+        pool = _pool(max_in_flight=2, max_queued=1)
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(_hold(pool, asyncio.Event(), release)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert [type(r) for r in results].count(PoolSaturatedError) == 2
+
+    asyncio.run(main())
+
+
+def test_queued_callers_time_out_and_leave_the_queue():
+    async def main():
+        pool = _pool(max_in_flight=1, max_queued=2, queue_timeout=0.05)
+        entered, release = asyncio.Event(), asyncio.Event()
+        holder = asyncio.create_task(_hold(pool, entered, release))
+        await entered.wait()
+        # The server answers this with 503 and the pool's Retry-After
+        with pytest.raises(PoolTimeoutError) as timed_out:
+            async with pool.slot():
+                pass
+        assert timed_out.value.retry_after == 7
+        assert (pool.in_flight, pool.queued) == (1, 0)
+        release.set()
+        await holder
+
+    asyncio.run(main())
+
+
+def test_a_failing_job_releases_its_slot():
+    async def main():
+        pool = _pool(max_in_flight=1, max_queued=0)
+
+        def fail():
+            raise ValueError("model error")
+
+        with pytest.raises(ValueError):
+            await pool.submit(fail)
+        assert pool.in_flight == 0
+        assert await pool.submit(lambda: "ok") == "ok"
+
+    asyncio.run(main())
+
+
+def test_jobs_run_on_pool_threads_with_the_callers_context():
+    async def main():
+        pool = _pool()
+        request_id.set("req-1")
+        return await pool.submit(lambda: (threading.current_thread().name, request_id.get()))
+
+    thread_name, seen = asyncio.run(main())
+    assert thread_name.startswith("snaptop-test")
+    assert seen == "req-1"
@@ -1,30 +1,101 @@
 """FastAPI server for SnapTop meal prep service."""
 
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from enum import Enum
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, RedirectResponse, StreamingResponse
+from starlette.background import BackgroundTask
 import uvicorn
 
 from backend.src.models import (
+    GenerateRecipeBatchRequest,
     GenerateRecipeRequest,
     GenerateWeeklyMealsRequest,
     ModifyRecipeRequest,
     RegenerateRecipeRequest,
     GetShoppingListRequest,
+    ImageStatus,
     Recipe,
+    RecipeImageStatus,
+    RecipeJob,
     MealPlan,
     ShoppingList,
 )
-from backend.src.agents.recipe_agent import agent, system_prompt
-from backend.src.langgraph_tools.generate_recipe_image import generate_recipe_image
+from backend.src.common.http_client import close_http_clients
+from backend.src.common.image_store import image_store, is_valid_digest
+from backend.src.common.logging_config import configure_logging, summarize
+from backend.src.common.metrics import timed_stage
+from backend.src.common.model_router import ModelRoute, route_for, route_request
+from backend.src.common.shopping_list import aggregate_ingredients, meal_plan_lines
+from backend.src.persistence.stores import meal_plan_store, recipe_store, user_store
+from backend.src.persistence.write_behind import persistence
+from backend.src.server.execution import (
+    PoolSaturatedError,
+    PoolTimeoutError,
+    generation_pool,
+    image_pool,
+)
+from backend.src.server.image_tasks import image_tasks
+from backend.src.server.instrumentation import metrics_middleware, render_metrics
+from backend.src.server.jobs import job_runner
+from backend.src.server.readiness import readiness
+from backend.src.server.recipe_batch import MAX_BATCH_ITEMS, stream_batch_results
+from backend.src.server.recipe_cache import recipe_cache, request_cache_key
+from backend.src.server.recipe_modify import modify_incrementally
+from backend.src.server.recipe_stream import StreamSlot, stream_recipe_events
+from backend.src.server.recipe_service import (
+    build_modify_prompt,
+    build_recipe_prompt,
+    build_regenerate_prompt,
+    generate_image_url,
+    load_inline_image,
+    run_recipe_agent,
+)
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+# Stored images never change, so clients and CDNs may cache them forever
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Upper bound on how long a single image or job long-poll may hold the connection
+MAX_IMAGE_WAIT_SECONDS = 30.0
+MAX_JOB_WAIT_SECONDS = 30.0
+
+
+class ImageMode(str, Enum):
+    """How /api/recipes/generate delivers the recipe image."""
+
+    INLINE = "inline"  # wait for Imagen and embed the image in the response
+    BACKGROUND = "background"  # return immediately, fetch the image later
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start-up and shutdown hooks for the server process."""
+    # Build clients and agents in the background; /ready reports when done
+    readiness.start()
+    persistence.start()
+    job_runner.start()
+    yield
+    await job_runner.stop()
+    # Write out recipes and agent logs still waiting in the persistence queue
+    await asyncio.to_thread(persistence.stop)
+    # Release worker pool threads when the server stops
+    generation_pool.shutdown()
+    image_pool.shutdown()
+    await close_http_clients()
+
+
 app = FastAPI(
     title="SnapTop Meal Prep API",
     description="AI-powered meal planning and recipe generation service",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS to allow frontend access
@@ -34,114 +105,426 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Per-request latency histograms and the Server-Timing breakdown
+app.middleware("http")(metrics_middleware)
+
 
 @app.get("/")
 async def root():
-    """Health check endpoint."""
+    """Health check endpoint (liveness: the process is up and serving)."""
     return {"status": "healthy", "service": "SnapTop Meal Prep API"}
 
 
+@app.get("/ready")
+async def ready(response: Response):
+    """
+    Readiness check: 200 once warm-up has built the agent and its clients,
+    503 before that or if a required warm-up step failed.
+    """
+    status = readiness.status()
+    if not status["ready"]:
+        response.status_code = 503
+    return status
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Process metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.post("/api/recipes/generate", response_model=Recipe)
-async def generate_recipe(request: GenerateRecipeRequest) -> Recipe:
+async def generate_recipe(
+    request: GenerateRecipeRequest,
+    image_mode: ImageMode = Query(ImageMode.INLINE),
+    inline_image: bool = Query(
+        True, description="Embed the image as base64; set false to use only image_url"
+    ),
+) -> Recipe:
     """
     Generate a new recipe based on user description and preferences.
 
+    Responses are cached on a canonical form of the request, and concurrent
+    identical requests share a single agent run.
+
+    The agent and image calls run on dedicated worker pools, so the event loop
+    keeps serving other requests (including health checks) meanwhile.
+
+    With `image_mode=background` the recipe is returned as soon as the agent
+    finishes, with `image_status=PENDING`; the image is then fetched from
+    `GET /api/recipes/{recipe_id}/image`.
+
+    Images are always available from `image_url` as cacheable binary
+    resources; `inline_image=false` skips the large base64 copy.
+
     Args:
         request: Recipe generation request with description, complexity, macros, etc.
+        image_mode: Whether to embed the image inline or generate it in the background
+        inline_image: Whether to also return the image as `image_base64`
 
     Returns:
         Recipe: Generated recipe with ingredients, instructions, nutrition, and image
+
+    Raises:
+        HTTPException: 429 when the generation queue is full, 503 when a queued
+            request times out waiting for a slot, 500 on agent failure.
     """
-    logger.info(f"GenerateRecipe called with description: {request.description}")
-
-    # Build a single prompt string from all request fields
-    prompt_lines = []
-    prompt_lines.append(f"Recipe request: {request.description}")
-
-    if request.complexity:
-        prompt_lines.append(f"Desired complexity: {request.complexity}")
-
-    if request.target_macros:
-        macros = request.target_macros
-        macro_parts = []
-        if macros.calories:
-            macro_parts.append(f"calories={macros.calories}")
-        if macros.protein_grams:
-            macro_parts.append(f"protein={macros.protein_grams}g")
-        if macros.carbs_grams:
-            macro_parts.append(f"carbs={macros.carbs_grams}g")
-        if macros.fat_grams:
-            macro_parts.append(f"fat={macros.fat_grams}g")
-        if macros.fiber_grams:
-            macro_parts.append(f"fiber={macros.fiber_grams}g")
-        if macros.sugar_grams:
-            macro_parts.append(f"sugar={macros.sugar_grams}g")
-        if macros.sodium_mg:
-            macro_parts.append(f"sodium={macros.sodium_mg}mg")
-        if macro_parts:
-            prompt_lines.append("Target macros per serving: " + ", ".join(macro_parts))
-            prompt_lines.append("(Remember: nutrition facts in your response should be for the ENTIRE recipe, not per serving)")
-
-    if request.available_ingredients:
-        ing_list = []
-        for ing in request.available_ingredients:
-            ing_desc = (
-                f"{ing.quantity} {ing.unit} {ing.name}"
-                if ing.unit
-                else f"{ing.quantity} {ing.name}"
-            )
-            if ing.notes:
-                ing_desc += f" ({ing.notes})"
-            ing_list.append(ing_desc)
-        prompt_lines.append("Available ingredients: " + ", ".join(ing_list))
-
-    prompt = "\n".join(prompt_lines)
-    logger.info(f"Generated prompt: {prompt}")
+    logger.info("GenerateRecipe called with description: %s", summarize(request.description))
+    recipe_obj = await produce_recipe(request, image_mode)
+    return await _with_inline_image(recipe_obj, inline_image)
 
-    try:
-        # Invoke the recipe agent
-        agent_input = {
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt},
-            ]
-        }
-        logger.info("Invoking agent...")
-        result = agent.invoke(agent_input)
-        logger.info(f"Agent result: {result}")
-
-        recipe_obj = result["structured_response"]
-        logger.info(f"Recipe object: {recipe_obj}")
-
-        # Convert to our Pydantic model if needed
-        if not isinstance(recipe_obj, Recipe):
-            recipe_data = recipe_obj.model_dump() if hasattr(recipe_obj, "model_dump") else recipe_obj
-            recipe_obj = Recipe(**recipe_data)
-
-        # Generate recipe image using title and description
-        try:
-            logger.info(f"Generating image for recipe: {recipe_obj.title}")
-            image_description = f"{recipe_obj.title}. {recipe_obj.description}"
-            image_base64 = generate_recipe_image.invoke(
-                {"recipe_description": image_description}
-            )
-            recipe_obj.image_base64 = image_base64
-            logger.info(f"Image generated successfully (length: {len(image_base64)})")
-        except Exception as img_error:
-            logger.warning(f"Failed to generate image: {img_error}", exc_info=True)
-            # Continue without image if generation fails
 
-        logger.info(f"Returning recipe: {recipe_obj.title}")
+async def produce_recipe(
+    request: GenerateRecipeRequest, image_mode: ImageMode, endpoint: str = "generate"
+) -> Recipe:
+    """
+    Produce a recipe through the cache, the agent and the image pipeline.
+
+    Args:
+        request: Recipe generation request
+        image_mode: Whether to wait for the image or generate it in the background
+        endpoint: Endpoint name the model route is chosen and recorded for
+
+    Returns:
+        Recipe: Recipe with `image_url`/`image_status` set, without inline image data
+    """
+    prompt = build_recipe_prompt(request)
+    logger.info("Generated prompt: %s", summarize(prompt))
+
+    # Near-identical requests share one agent run (and its image)
+    cache_key = request_cache_key(request)
+    async def generate() -> Recipe:
+        recipe = await run_agent_in_slot(prompt, route_request(request, endpoint))
+        recipe_store.add(recipe)
+        return recipe
+
+    recipe_obj, from_cache = await recipe_cache.get_or_generate(cache_key, generate)
+
+    if recipe_obj.image_url:
+        recipe_obj.image_status = ImageStatus.READY
+        logger.info("Returning recipe: %s (cached: %s)", recipe_obj.title, from_cache)
         return recipe_obj
 
-    except Exception as e:
-        logger.error(f"Error in generate_recipe: {e}", exc_info=True)
+    async def record_image(url: str):
+        recipe_cache.attach_image(cache_key, recipe_obj.recipe_id, url)
+        await asyncio.to_thread(recipe_store.set_image, recipe_obj.recipe_id, url)
+
+    if image_mode == ImageMode.BACKGROUND:
+        entry = image_tasks.get(recipe_obj.recipe_id)
+        if entry is None or entry.status == ImageStatus.FAILED:
+            entry = image_tasks.start(recipe_obj, on_ready=record_image)
+        recipe_obj.image_status = entry.status
+        recipe_obj.image_url = entry.image_url
+        logger.info("Returning recipe %s, image %s", recipe_obj.title, entry.status.value)
+        return recipe_obj
+
+    # Generate recipe image using title and description
+    try:
+        recipe_obj.image_url = await recipe_cache.get_or_generate_image(
+            cache_key, recipe_obj, lambda: image_pool.submit(generate_image_url, recipe_obj)
+        )
+        recipe_obj.image_status = ImageStatus.READY
+        await asyncio.to_thread(recipe_store.set_image, recipe_obj.recipe_id, recipe_obj.image_url)
+        logger.info("Image generated successfully: %s", recipe_obj.image_url)
+    except Exception as img_error:
+        logger.warning("Failed to generate image: %s", img_error, exc_info=True)
+        # Continue without image if generation fails
+        recipe_obj.image_status = ImageStatus.FAILED
+
+    logger.info("Returning recipe: %s", recipe_obj.title)
+    return recipe_obj
+
+
+async def _with_inline_image(recipe: Recipe, inline_image: bool) -> Recipe:
+    """Load the stored image into `image_base64` if the client asked for it inline."""
+    if inline_image and recipe.image_url:
+        await asyncio.to_thread(load_inline_image, recipe)
+    return recipe
+
+
+async def run_agent_in_slot(prompt: str, route: ModelRoute) -> Recipe:
+    """
+    Run the recipe agent on the generation pool, mapping failures to HTTP errors.
+
+    Raises:
+        HTTPException: 429 when the generation queue is full, 503 when a queued
+            request times out waiting for a slot, 500 on agent failure.
+    """
+    return await run_in_generation_slot(run_recipe_agent, prompt, route)
+
+
+async def run_in_generation_slot(func, *args):
+    """
+    Run a blocking model call on the generation pool, mapping failures to HTTP errors.
+
+    Raises:
+        HTTPException: 429 when the generation queue is full, 503 when a queued
+            request times out waiting for a slot, 500 on model failure.
+    """
+    try:
+        async with generation_pool.slot():
+            try:
+                return await generation_pool.run(func, *args)
+            except Exception as e:
+                logger.error("Error in %s: %s", getattr(func, "__name__", func), e, exc_info=True)
+                raise HTTPException(
+                    status_code=500, detail=f"Error generating recipe: {str(e)}"
+                )
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+        )
+    except PoolTimeoutError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+@app.post("/api/recipes/generate-batch")
+async def generate_recipe_batch(
+    batch: GenerateRecipeBatchRequest,
+    image_mode: ImageMode = Query(ImageMode.INLINE),
+    inline_image: bool = Query(
+        False, description="Embed images as base64; by default only image_url is returned"
+    ),
+) -> StreamingResponse:
+    """
+    Generate many recipes and stream each one back as NDJSON when it finishes.
+
+    Identical requests within the batch (by canonical cache key) run once and
+    every matching item receives the result. Each line is a
+    `RecipeBatchResult`; a failed item yields an error line and does not stop
+    the batch.
+
+    Args:
+        batch: The requests to generate and an optional concurrency limit
+        image_mode: Whether to wait for images or generate them in the background
+        inline_image: Whether to embed images as `image_base64`
+
+    Returns:
+        StreamingResponse: `application/x-ndjson`, one line per request item
+    """
+    if len(batch.requests) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"Batch exceeds the {MAX_BATCH_ITEMS} item limit"
+        )
+    logger.info("GenerateRecipeBatch called with %s requests", len(batch.requests))
+
+    async def produce(request: GenerateRecipeRequest) -> Recipe:
+        recipe = await produce_recipe(request, image_mode, endpoint="batch")
+        return await _with_inline_image(recipe, inline_image)
+
+    return StreamingResponse(
+        stream_batch_results(batch.requests, produce, batch.concurrency),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.post("/api/recipes/generate/stream")
+async def generate_recipe_stream(
+    request: GenerateRecipeRequest,
+    inline_image: bool = Query(
+        True, description="Include base64 data in the image event, not just image_url"
+    ),
+) -> StreamingResponse:
+    """
+    Generate a recipe and stream progress as Server-Sent Events.
+
+    Emits `started` right away, `tool_start`/`tool_end` around each agent tool
+    call, `partial` with the recipe fields parsed so far, `recipe` once the
+    agent is done, then `image` (or `image_error`) and finally `done`.
+
+    Args:
+        request: Recipe generation request with description, complexity, macros, etc.
+        inline_image: Whether the `image` event also carries `image_base64`
+
+    Returns:
+        StreamingResponse: `text/event-stream` of generation events
+
+    Raises:
+        HTTPException: 429/503 when no generation slot is available.
+    """
+    logger.info(
+        "GenerateRecipeStream called with description: %s", summarize(request.description)
+    )
+    prompt = build_recipe_prompt(request)
+
+    # Reserve the slot before streaming starts so back-pressure is still an HTTP status
+    stack = AsyncExitStack()
+    try:
+        await stack.enter_async_context(generation_pool.slot())
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+        )
+    except PoolTimeoutError as e:
         raise HTTPException(
-            status_code=500, detail=f"Error generating recipe: {str(e)}"
+            status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)}
         )
 
+    slot = StreamSlot(stack)
+    try:
+        return StreamingResponse(
+            stream_recipe_events(
+                prompt,
+                slot=slot,
+                inline_image=inline_image,
+                route=route_request(request, "stream"),
+            ),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            # Frees the slot if the client left before the stream started
+            background=BackgroundTask(slot.release_unclaimed),
+        )
+    except BaseException:
+        await slot.release()
+        raise
+
+
+@app.get("/api/recipes/{recipe_id}/image/status", response_model=RecipeImageStatus)
+async def get_recipe_image_status(
+    recipe_id: str,
+    wait: float = Query(0.0, ge=0.0, description="Seconds to long-poll for completion"),
+) -> RecipeImageStatus:
+    """
+    Report the status of a recipe image generated in the background.
+
+    Args:
+        recipe_id: Recipe whose image to check
+        wait: Optional long-poll duration; returns early once the image is done
+
+    Returns:
+        RecipeImageStatus: PENDING, READY or FAILED (with the failure reason)
+    """
+    entry = await image_tasks.wait(recipe_id, min(wait, MAX_IMAGE_WAIT_SECONDS))
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No image tracked for recipe {recipe_id}")
+    return entry.to_status()
+
+
+@app.get(
+    "/api/recipes/{recipe_id}/image",
+    responses={303: {"description": "Redirect to the stored image"}, 202: {"model": RecipeImageStatus}},
+)
+async def get_recipe_image(
+    recipe_id: str,
+    wait: float = Query(0.0, ge=0.0, description="Seconds to long-poll for the image"),
+):
+    """
+    Fetch a recipe image generated in the background.
+
+    Args:
+        recipe_id: Recipe whose image to fetch
+        wait: Optional long-poll duration; returns as soon as the image is ready
+
+    Returns:
+        A redirect to the stored image when ready, or 202 with the current
+        status while pending.
+
+    Raises:
+        HTTPException: 404 for unknown recipes, 502 when image generation failed.
+    """
+    entry = await image_tasks.wait(recipe_id, min(wait, MAX_IMAGE_WAIT_SECONDS))
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No image tracked for recipe {recipe_id}")
+    if entry.status == ImageStatus.FAILED:
+        raise HTTPException(status_code=502, detail=f"Image generation failed: {entry.error}")
+    if entry.status == ImageStatus.PENDING:
+        return Response(
+            content=entry.to_status().model_dump_json(),
+            status_code=202,
+            media_type="application/json",
+            headers={"Retry-After": "2"},
+        )
+    return RedirectResponse(entry.image_url, status_code=303)
+
+
+@app.get("/api/images/{digest}", responses={200: {"content": {"image/png": {}}}})
+async def get_image(digest: str, request: Request) -> Response:
+    """
+    Serve a stored image by its content hash.
+
+    Responses carry a strong ETag (the hash itself) and are marked immutable;
+    `If-None-Match` requests for the same hash get 304 Not Modified.
+
+    Args:
+        digest: SHA-256 hex digest from a recipe's `image_url`
+
+    Returns:
+        Response: PNG bytes, or 304 when the client already has them
+    """
+    if not is_valid_digest(digest):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]:
+        if await asyncio.to_thread(image_store.exists, digest):
+            return Response(status_code=304, headers=headers)
+
+    data = await asyncio.to_thread(image_store.get, digest)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return Response(content=data, media_type="image/png", headers=headers)
+
+
+@app.post("/api/jobs/recipes", response_model=RecipeJob, status_code=202)
+async def create_recipe_job(
+    request: GenerateRecipeRequest,
+    response: Response,
+    idempotency_key: str | None = Header(None),
+) -> RecipeJob:
+    """
+    Queue a recipe generation job and return its ID immediately.
+
+    Retrying with the same `Idempotency-Key` header returns the original job
+    instead of starting a second generation.
+
+    Args:
+        request: Recipe generation request with description, complexity, macros, etc.
+        idempotency_key: Optional client-chosen key that deduplicates retries
+
+    Returns:
+        RecipeJob: The PENDING job; poll `GET /api/jobs/{job_id}` for the result
+    """
+    job, created = await job_runner.submit(request, idempotency_key)
+    logger.info("Recipe job %s %s", job.job_id, "created" if created else "reused")
+    response.headers["Location"] = f"/api/jobs/{job.job_id}"
+    return job
+
+
+@app.get("/api/jobs/{job_id}", response_model=RecipeJob)
+async def get_job(
+    job_id: str,
+    wait: float = Query(0.0, ge=0.0, description="Seconds to long-poll for completion"),
+    inline_image: bool = Query(
+        True, description="Embed the result image as base64; set false to use only image_url"
+    ),
+) -> RecipeJob:
+    """
+    Get the status, and once finished the result, of an asynchronous job.
+
+    Args:
+        job_id: Job ID returned by `POST /api/jobs/recipes`
+        wait: Optional long-poll duration; returns early once the job finishes
+        inline_image: Whether to also return the result image as `image_base64`
+
+    Returns:
+        RecipeJob: Job with status PENDING, RUNNING, SUCCEEDED (with result) or FAILED
+    """
+    job = await job_runner.get(job_id, min(wait, MAX_JOB_WAIT_SECONDS))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found or expired")
+    if job.result is not None:
+        await _with_inline_image(job.result, inline_image)
+    return job
+
 
 @app.post("/api/meals/generate-weekly", response_model=MealPlan)
 async def generate_weekly_meals(request: GenerateWeeklyMealsRequest) -> MealPlan:
@@ -159,7 +542,9 @@ async def generate_weekly_meals(request: GenerateWeeklyMealsRequest) -> MealPlan
         nutritionist agent and planner.
     """
     # TODO: Wire to nutritionist agent and planner
-    logger.info(f"GenerateWeeklyMeals called for user: {request.user_profile.user_id}")
+    logger.info("GenerateWeeklyMeals called for user: %s", request.user_profile.user_id)
+    # Kept for later requests about this user's plans, e.g. the shopping list's pantry
+    user_store.put(request.user_profile)
 
     meal_plan = MealPlan(
         meal_plan_id="dummy_id",
@@ -170,50 +555,116 @@ async def generate_weekly_meals(request: GenerateWeeklyMealsRequest) -> MealPlan
 
 
 @app.post("/api/recipes/regenerate", response_model=Recipe)
-async def regenerate_recipe(request: RegenerateRecipeRequest) -> Recipe:
+async def regenerate_recipe(
+    request: RegenerateRecipeRequest,
+    inline_image: bool = Query(
+        True, description="Embed the image as base64; set false to use only image_url"
+    ),
+) -> Recipe:
     """
     Regenerate an existing recipe with new parameters.
 
+    The stored recipe is looked up by ID, the agent produces a replacement,
+    and the result is saved as the next version under the same `recipe_id`.
+
     Args:
         request: Recipe regeneration request with recipe ID and reason
+        inline_image: Whether to also return the image as `image_base64`
 
     Returns:
         Recipe: Regenerated recipe
 
-    Note:
-        This endpoint is currently a stub and needs to be wired to the chef agent.
+    Raises:
+        HTTPException: 404 for unknown recipes, 429/503 when no generation
+            slot is available, 500 on agent failure.
     """
-    # TODO: Wire to chef agent
-    logger.info(f"RegenerateRecipe called for recipe: {request.recipe_id}")
+    logger.info("RegenerateRecipe called for recipe: %s", request.recipe_id)
 
-    raise HTTPException(
-        status_code=501, detail="Recipe regeneration not yet implemented"
-    )
+    original = await asyncio.to_thread(recipe_store.get, request.recipe_id)
+    if original is None:
+        raise HTTPException(status_code=404, detail=f"Recipe {request.recipe_id} not found")
+
+    prompt = build_regenerate_prompt(original, request.regeneration_reason)
+    recipe_obj = await run_agent_in_slot(prompt, route_for("regenerate"))
+    recipe_obj.recipe_id = original.recipe_id
+
+    try:
+        recipe_obj.image_url = await image_pool.submit(generate_image_url, recipe_obj)
+        recipe_obj.image_status = ImageStatus.READY
+    except Exception as img_error:
+        logger.warning("Failed to generate image: %s", img_error, exc_info=True)
+        recipe_obj.image_status = ImageStatus.FAILED
+
+    version = await asyncio.to_thread(recipe_store.put, recipe_obj)
+    logger.info("Regenerated recipe %s as version %s", recipe_obj.recipe_id, version)
+    return await _with_inline_image(recipe_obj, inline_image)
 
 
 @app.post("/api/recipes/modify", response_model=Recipe)
-async def modify_recipe(request: ModifyRecipeRequest) -> Recipe:
+async def modify_recipe(
+    request: ModifyRecipeRequest,
+    inline_image: bool = Query(
+        True, description="Embed the image as base64; set false to use only image_url"
+    ),
+) -> Recipe:
     """
     Modify an existing recipe based on instructions.
 
+    The recipe editor returns only the changed ingredients and text, and the
+    nutrition is recomputed from the stored totals by looking up just the
+    changed ingredients (see `recipe_modify`). The full agent runs only when
+    that is not possible. The image is regenerated only if the title or
+    description changed. The result is saved as the next version of the recipe.
+
     Args:
         request: Recipe modification request with recipe ID and instructions
+        inline_image: Whether to also return the image as `image_base64`
 
     Returns:
         Recipe: Modified recipe
 
-    Note:
-        This endpoint is currently a stub and needs to be wired to the chef agent.
+    Raises:
+        HTTPException: 404 for unknown recipes, 429/503 when no generation
+            slot is available, 500 on model failure.
     """
-    # TODO: Wire to chef agent with modification instructions
     logger.info(
-        f"ModifyRecipe called for recipe: {request.recipe_id} "
-        f"with instructions: {request.modification_instructions}"
+        "ModifyRecipe called for recipe: %s with instructions: %s",
+        request.recipe_id,
+        summarize(request.modification_instructions),
     )
 
-    raise HTTPException(
-        status_code=501, detail="Recipe modification not yet implemented"
+    original = await asyncio.to_thread(recipe_store.get, request.recipe_id)
+    if original is None:
+        raise HTTPException(status_code=404, detail=f"Recipe {request.recipe_id} not found")
+
+    recipe_obj = await run_in_generation_slot(
+        modify_incrementally, original, request.modification_instructions
     )
+    if recipe_obj is None:
+        logger.info("Recomputing %s with the recipe agent", original.recipe_id)
+        prompt = build_modify_prompt(original, request.modification_instructions)
+        recipe_obj = await run_agent_in_slot(prompt, route_for("modify"))
+        recipe_obj.recipe_id = original.recipe_id
+        recipe_obj.image_url = None
+
+    if (
+        recipe_obj.image_url
+        and recipe_obj.title == original.title
+        and recipe_obj.description == original.description
+    ):
+        recipe_obj.image_status = ImageStatus.READY
+    else:
+        try:
+            recipe_obj.image_url = await image_pool.submit(generate_image_url, recipe_obj)
+            recipe_obj.image_status = ImageStatus.READY
+        except Exception as img_error:
+            logger.warning("Failed to generate image: %s", img_error, exc_info=True)
+            recipe_obj.image_url = None
+            recipe_obj.image_status = ImageStatus.FAILED
+
+    version = await asyncio.to_thread(recipe_store.put, recipe_obj)
+    logger.info("Modified recipe %s as version %s", recipe_obj.recipe_id, version)
+    return await _with_inline_image(recipe_obj, inline_image)
 
 
 @app.post("/api/shopping-list/generate", response_model=ShoppingList)
@@ -221,21 +672,44 @@ async def get_shopping_list(request: GetShoppingListRequest) -> ShoppingList:
     """
     Generate a shopping list for a meal plan.
 
+    The plan's recipes are loaded in one store lookup and their ingredients
+    are summed deterministically (no model call): names are canonicalized,
+    units converted, quantities scaled to each meal's servings, and the
+    pantry subtracted. The pantry is the plan owner's saved profile pantry
+    plus any items sent with the request. See `common/shopping_list.py`.
+
     Args:
-        request: Shopping list request with meal plan ID and pantry items
+        request: Shopping list request with meal plan ID and extra pantry items
 
     Returns:
         ShoppingList: Generated shopping list
 
-    Note:
-        This endpoint is currently a stub and needs to be wired to the
-        shopping list agent.
+    Raises:
+        HTTPException: 404 if the meal plan is unknown.
     """
-    # TODO: Wire to shopping list agent
-    logger.info(f"GetShoppingList called for meal plan: {request.meal_plan_id}")
+    logger.info("GetShoppingList called for meal plan: %s", request.meal_plan_id)
 
-    raise HTTPException(
-        status_code=501, detail="Shopping list generation not yet implemented"
+    loaded = await asyncio.to_thread(
+        meal_plan_store.get_recipes, request.meal_plan_id, recipe_store
+    )
+    if loaded is None:
+        raise HTTPException(
+            status_code=404, detail=f"Meal plan {request.meal_plan_id} not found"
+        )
+    meal_plan, recipes = loaded
+    profile = await asyncio.to_thread(user_store.get, meal_plan.user_id)
+    pantry = [*(profile.pantry if profile else []), *(request.pantry_items or [])]
+    lines = meal_plan_lines(meal_plan, recipes)
+    with timed_stage("shopping_list"):
+        items = await asyncio.to_thread(aggregate_ingredients, lines, pantry)
+    logger.info(
+        "Shopping list for %s: %s items from %s ingredient lines",
+        meal_plan.meal_plan_id,
+        len(items),
+        len(lines),
+    )
+    return ShoppingList(
+        meal_plan_id=meal_plan.meal_plan_id, items=items, generated_at=int(time.time())
     )
 
 
@@ -0,0 +1,148 @@
+"""Background generation of recipe images.
+
+When a recipe is returned before its picture exists, the Imagen call is handed
+to an `ImageTaskRegistry`. The registry runs it on the image worker pool,
+keeps the result (or the failure reason) for a while and lets request handlers
+poll or long-poll until the image is ready.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from backend.src.common.utils import get_env_float, get_env_int
+from backend.src.models import ImageStatus, Recipe, RecipeImageStatus
+from backend.src.server.execution import image_pool
+from backend.src.server.recipe_service import generate_image_url
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ImageTask:
+    """State of one background image generation."""
+
+    recipe_id: str
+    status: ImageStatus = ImageStatus.PENDING
+    image_url: str | None = None
+    error: str | None = None
+    finished_at: float | None = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    task: asyncio.Task | None = None
+
+    def to_status(self) -> RecipeImageStatus:
+        return RecipeImageStatus(
+            recipe_id=self.recipe_id,
+            status=self.status,
+            image_url=self.image_url,
+            error=self.error,
+        )
+
+
+class ImageTaskRegistry:
+    """
+    Tracks background image generations by recipe ID.
+
+    Entries are kept for `ttl` seconds and at most `max_entries` are retained;
+    the oldest finished entries are evicted first.
+
+    Args:
+        max_entries (int): Maximum number of tracked images.
+        ttl (float): Seconds a finished image is kept.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._tasks: OrderedDict[str, ImageTask] = OrderedDict()
+
+    def __contains__(self, recipe_id: str) -> bool:
+        return self.get(recipe_id) is not None
+
+    def status_counts(self) -> dict[ImageStatus, int]:
+        """Number of tracked tasks per status."""
+        counts = {status: 0 for status in ImageStatus}
+        for entry in list(self._tasks.values()):
+            counts[entry.status] += 1
+        return counts
+
+    def get(self, recipe_id: str) -> ImageTask | None:
+        """Return the tracked task for a recipe, or None if unknown or expired."""
+        self._evict()
+        return self._tasks.get(recipe_id)
+
+    def start(self, recipe: Recipe, on_ready=None) -> ImageTask:
+        """
+        Schedule image generation for a recipe and mark it PENDING.
+
+        Must be called from the event loop. The recipe's `image_status` is
+        updated in place so the caller can return it straight away.
+
+        Args:
+            recipe (Recipe): Recipe to illustrate
+            on_ready (coroutine function, optional): Awaited with the image URL once it is ready
+        """
+        entry = ImageTask(recipe_id=recipe.recipe_id)
+        self._tasks[recipe.recipe_id] = entry
+        self._tasks.move_to_end(recipe.recipe_id)
+        self._evict()
+        entry.task = asyncio.create_task(self._generate(entry, recipe, on_ready))
+        recipe.image_status = ImageStatus.PENDING
+        return entry
+
+    async def wait(self, recipe_id: str, timeout: float) -> ImageTask | None:
+        """
+        Wait up to `timeout` seconds for a recipe's image to finish.
+
+        Returns:
+            ImageTask | None: The task in whatever state it reached, or None if unknown.
+        """
+        entry = self.get(recipe_id)
+        if entry is None or timeout <= 0:
+            return entry
+        try:
+            await asyncio.wait_for(asyncio.shield(entry.done.wait()), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return entry
+
+    async def _generate(self, entry: ImageTask, recipe: Recipe, on_ready):
+        try:
+            entry.image_url = await image_pool.submit(generate_image_url, recipe)
+            entry.status = ImageStatus.READY
+            logger.info("Background image ready for recipe %s: %s", entry.recipe_id, entry.image_url)
+        except Exception as e:
+            entry.status = ImageStatus.FAILED
+            entry.error = str(e)
+            logger.warning("Background image failed for recipe %s: %s", entry.recipe_id, e, exc_info=True)
+        finally:
+            entry.finished_at = time.monotonic()
+            entry.done.set()
+
+        if on_ready is not None and entry.status == ImageStatus.READY:
+            try:
+                await on_ready(entry.image_url)
+            except Exception as e:
+                logger.warning("Recording the image of recipe %s failed: %s", entry.recipe_id, e, exc_info=True)
+
+    def _evict(self):
+        now = time.monotonic()
+        for recipe_id in list(self._tasks):
+            entry = self._tasks[recipe_id]
+            if entry.finished_at is not None and now - entry.finished_at > self.ttl:
+                del self._tasks[recipe_id]
+        while len(self._tasks) > self.max_entries:
+            for recipe_id, entry in self._tasks.items():
+                if entry.finished_at is not None:
+                    del self._tasks[recipe_id]
+                    break
+            else:
+                break
+
+
+image_tasks = ImageTaskRegistry(
+    max_entries=get_env_int("SNAPTOP_IMAGE_TASK_MAX_ENTRIES", 256),
+    ttl=get_env_float("SNAPTOP_IMAGE_TASK_TTL", 3600.0),
+)
@@ -0,0 +1,192 @@
+"""HTTP request metrics, `Server-Timing` headers and the `/metrics` exposition.
+
+Every request gets a fresh `RequestTimings` in the `current_timings` context
+variable; pipeline stages, agent turns, tools and external calls add to it as
+they run (worker pools carry the context into their threads). When the
+endpoint returns, the breakdown is sent back as a `Server-Timing` header.
+Streaming endpoints send their headers before the work is done, so their
+header only covers what happened before the first byte.
+"""
+
+import time
+
+from fastapi import Request
+
+from backend.src.common.logging_config import dropped_records
+from backend.src.common.metrics import RequestTimings, current_timings, registry
+from backend.src.langgraph_tools.nutrition import (
+    fatsecret_cache,
+    get_nutrition_resolver,
+    openfoodfacts_cache,
+)
+from backend.src.langgraph_tools.recipe_search import search_cache
+from backend.src.persistence.stores import recipe_store
+from backend.src.server.execution import generation_pool, image_pool
+from backend.src.server.image_tasks import image_tasks
+from backend.src.server.recipe_cache import recipe_cache
+
+http_request_seconds = registry.histogram(
+    "snaptop_http_request_duration_seconds",
+    "Duration of HTTP requests until the response body is fully sent",
+    ("method", "route", "status"),
+)
+http_requests_in_progress = registry.gauge(
+    "snaptop_http_requests_in_progress",
+    "HTTP requests currently being served",
+    ("method",),
+)
+
+_POOLS = (generation_pool, image_pool)
+
+registry.callback(
+    "snaptop_pool_in_flight",
+    "Jobs currently running on a worker pool",
+    "gauge",
+    lambda: {(p.name,): p.in_flight for p in _POOLS},
+    ("pool",),
+)
+registry.callback(
+    "snaptop_pool_queued",
+    "Callers waiting for a worker pool slot",
+    "gauge",
+    lambda: {(p.name,): p.queued for p in _POOLS},
+    ("pool",),
+)
+registry.callback(
+    "snaptop_pool_capacity",
+    "Maximum in-flight jobs of a worker pool",
+    "gauge",
+    lambda: {(p.name,): p.max_in_flight for p in _POOLS},
+    ("pool",),
+)
+registry.callback(
+    "snaptop_recipe_cache_hits_total",
+    "Recipe cache lookups that found an entry",
+    "counter",
+    lambda: recipe_cache.stats()["hits"],
+)
+registry.callback(
+    "snaptop_recipe_cache_misses_total",
+    "Recipe cache lookups that found no entry",
+    "counter",
+    lambda: recipe_cache.stats()["misses"],
+)
+registry.callback(
+    "snaptop_recipe_cache_evictions_total",
+    "Recipe cache entries evicted to stay within bounds",
+    "counter",
+    lambda: recipe_cache.stats()["evictions"],
+)
+registry.callback(
+    "snaptop_recipe_cache_entries",
+    "Recipes currently cached",
+    "gauge",
+    lambda: recipe_cache.stats()["entries"],
+)
+registry.callback(
+    "snaptop_recipe_cache_bytes",
+    "Approximate size of the cached recipes",
+    "gauge",
+    lambda: recipe_cache.stats()["bytes"],
+)
+registry.callback(
+    "snaptop_recipe_store_cache_hits_total",
+    "Recipe store lookups served from the in-process cache",
+    "counter",
+    lambda: recipe_store.stats()["hits"],
+)
+registry.callback(
+    "snaptop_recipe_store_cache_misses_total",
+    "Recipe store lookups that went to storage",
+    "counter",
+    lambda: recipe_store.stats()["misses"],
+)
+registry.callback(
+    "snaptop_api_cache_entries",
+    "External API results cached, by cache and tier",
+    "gauge",
+    lambda: {
+        (cache.name, tier): stats[f"{tier}_entries"]
+        for cache in (fatsecret_cache, openfoodfacts_cache, search_cache)
+        for stats in [cache.stats()]
+        for tier in ("memory", "disk")
+        if f"{tier}_entries" in stats
+    },
+    ("cache", "tier"),
+)
+registry.callback(
+    "snaptop_nutrition_provider_circuit_open",
+    "Whether a nutrition provider's circuit breaker is rejecting calls (1) or not (0)",
+    "gauge",
+    lambda: {
+        (name,): int(state == "open")
+        for name, state in get_nutrition_resolver().breaker_states().items()
+    },
+    ("provider",),
+)
+registry.callback(
+    "snaptop_image_tasks",
+    "Background image tasks currently tracked, by status",
+    "gauge",
+    lambda: {(status.value,): n for status, n in image_tasks.status_counts().items()},
+    ("status",),
+)
+
+registry.callback(
+    "snaptop_log_records_dropped_total",
+    "Log records discarded because the log queue was full",
+    "counter",
+    dropped_records,
+)
+
+
+def _route_label(request: Request) -> str:
+    """Route template (e.g. `/api/jobs/{job_id}`) to keep label cardinality bounded."""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Time the request, collect its stage timings and attach `Server-Timing`."""
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    started = time.perf_counter()
+    http_requests_in_progress.inc(method=request.method)
+    try:
+        response = await call_next(request)
+    except Exception:
+        http_requests_in_progress.dec(method=request.method)
+        http_request_seconds.observe(
+            time.perf_counter() - started,
+            method=request.method, route=_route_label(request), status="500",
+        )
+        raise
+    finally:
+        current_timings.reset(token)
+
+    header = timings.server_timing()
+    total = f"total;dur={(time.perf_counter() - started) * 1000:.1f}"
+    response.headers["Server-Timing"] = f"{header}, {total}" if header else total
+
+    labels = {
+        "method": request.method,
+        "route": _route_label(request),
+        "status": str(response.status_code),
+    }
+    body = response.body_iterator
+
+    async def observed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            http_requests_in_progress.dec(method=labels["method"])
+            http_request_seconds.observe(time.perf_counter() - started, **labels)
+
+    response.body_iterator = observed_body()
+    return response
+
+
+def render_metrics() -> str:
+    """All process metrics in the Prometheus text format."""
+    return registry.render()
@@ -0,0 +1,379 @@
+"""Storage backends for asynchronous recipe jobs.
+
+A `JobStore` holds job state so that the process that accepted a job, the
+process that runs it and the process that answers a status poll do not have
+to be the same. Jobs are claimed with a lease: a worker that dies mid-run
+simply lets its lease lapse and another worker picks the job up again.
+
+Backends:
+- `InMemoryJobStore`: single process, for local development and tests
+- `SQLiteJobStore`: a SQLite file that several server processes can share
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from backend.src.models import GenerateRecipeRequest, JobStatus, Recipe, RecipeJob
+
+FINISHED_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+
+class JobStore(ABC):
+    """
+    Interface for job state storage.
+
+    Args:
+        ttl (float): Seconds a finished job is kept before it expires.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+
+    @abstractmethod
+    def create(
+        self, request: GenerateRecipeRequest, idempotency_key: str | None = None
+    ) -> tuple[RecipeJob, bool]:
+        """
+        Create a PENDING job, or return the live job with the same idempotency key.
+
+        Returns:
+            tuple[RecipeJob, bool]: The job, and whether it was newly created.
+        """
+
+    @abstractmethod
+    def get(self, job_id: str) -> RecipeJob | None:
+        """Return a job, or None if it does not exist or has expired."""
+
+    @abstractmethod
+    def claim_next(self, worker_id: str, lease_seconds: float) -> RecipeJob | None:
+        """
+        Atomically move the oldest runnable job to RUNNING for `worker_id`.
+
+        Runnable jobs are PENDING ones and RUNNING ones whose lease has lapsed.
+        """
+
+    @abstractmethod
+    def complete(self, job_id: str, worker_id: str, result: Recipe) -> bool:
+        """Mark a job SUCCEEDED if `worker_id` still holds its lease."""
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Mark a job FAILED if `worker_id` still holds its lease."""
+
+    @abstractmethod
+    def release(self, job_id: str, worker_id: str) -> bool:
+        """Return a job to PENDING, dropping its lease, if `worker_id` still holds it."""
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Delete expired jobs and return how many were removed."""
+
+
+def _new_job(request: GenerateRecipeRequest, now: float) -> RecipeJob:
+    return RecipeJob(
+        job_id=uuid.uuid4().hex,
+        status=JobStatus.PENDING,
+        request=request,
+        created_at=int(now),
+        updated_at=int(now),
+    )
+
+
+class InMemoryJobStore(JobStore):
+    """Process-local job store guarded by a lock."""
+
+    def __init__(self, ttl: float):
+        super().__init__(ttl)
+        self._lock = threading.Lock()
+        self._jobs: dict[str, RecipeJob] = {}
+        self._leases: dict[str, tuple[str, float]] = {}
+        self._keys: dict[str, str] = {}
+
+    def create(self, request, idempotency_key=None):
+        now = time.time()
+        with self._lock:
+            if idempotency_key and idempotency_key in self._keys:
+                existing = self._get_locked(self._keys[idempotency_key], now)
+                if existing is not None:
+                    return existing.model_copy(deep=True), False
+            job = _new_job(request, now)
+            self._jobs[job.job_id] = job
+            if idempotency_key:
+                self._keys[idempotency_key] = job.job_id
+            return job.model_copy(deep=True), True
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._get_locked(job_id, time.time())
+            return job.model_copy(deep=True) if job else None
+
+    def claim_next(self, worker_id, lease_seconds):
+        now = time.time()
+        with self._lock:
+            for job in sorted(self._jobs.values(), key=lambda j: j.created_at):
+                lease = self._leases.get(job.job_id)
+                stale = job.status == JobStatus.RUNNING and (lease is None or lease[1] < now)
+                if job.status == JobStatus.PENDING or stale:
+                    job.status = JobStatus.RUNNING
+                    job.updated_at = int(now)
+                    self._leases[job.job_id] = (worker_id, now + lease_seconds)
+                    return job.model_copy(deep=True)
+        return None
+
+    def complete(self, job_id, worker_id, result):
+        return self._finish(job_id, worker_id, JobStatus.SUCCEEDED, result=result)
+
+    def fail(self, job_id, worker_id, error):
+        return self._finish(job_id, worker_id, JobStatus.FAILED, error=error)
+
+    def release(self, job_id, worker_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            lease = self._leases.get(job_id)
+            if job is None or lease is None or lease[0] != worker_id:
+                return False
+            job.status = JobStatus.PENDING
+            job.updated_at = int(time.time())
+            del self._leases[job_id]
+            return True
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.expires_at is not None and job.expires_at <= now
+            ]
+            for job_id in expired:
+                self._drop_locked(job_id)
+            return len(expired)
+
+    def _finish(self, job_id, worker_id, status, result=None, error=None):
+        now = time.time()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            lease = self._leases.get(job_id)
+            if job is None or lease is None or lease[0] != worker_id:
+                return False
+            job.status = status
+            job.result = result
+            job.error = error
+            job.updated_at = int(now)
+            job.expires_at = math.ceil(now + self.ttl)
+            del self._leases[job_id]
+            return True
+
+    def _get_locked(self, job_id, now):
+        job = self._jobs.get(job_id)
+        if job is not None and job.expires_at is not None and job.expires_at <= now:
+            self._drop_locked(job_id)
+            return None
+        return job
+
+    def _drop_locked(self, job_id):
+        self._jobs.pop(job_id, None)
+        self._leases.pop(job_id, None)
+        for key in [k for k, v in self._keys.items() if v == job_id]:
+            del self._keys[key]
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Job store backed by a SQLite database file.
+
+    Every call opens its own connection, so the store is safe to use from any
+    thread and from several processes pointing at the same file.
+
+    Args:
+        path (str): Path to the SQLite database file.
+        ttl (float): Seconds a finished job is kept before it expires.
+    """
+
+    def __init__(self, path: str, ttl: float):
+        super().__init__(ttl)
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS recipe_jobs (
+                  job_id TEXT PRIMARY KEY,
+                  idempotency_key TEXT UNIQUE,
+                  status TEXT NOT NULL,
+                  request TEXT NOT NULL,
+                  result TEXT,
+                  error TEXT,
+                  created_at REAL NOT NULL,
+                  updated_at REAL NOT NULL,
+                  expires_at REAL,
+                  lease_owner TEXT,
+                  lease_expires_at REAL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS recipe_jobs_status ON recipe_jobs (status, created_at)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def create(self, request, idempotency_key=None):
+        now = time.time()
+        job = _new_job(request, now)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if idempotency_key:
+                    row = conn.execute(
+                        "SELECT * FROM recipe_jobs WHERE idempotency_key = ?",
+                        (idempotency_key,),
+                    ).fetchone()
+                    if row is not None:
+                        if row["expires_at"] is None or row["expires_at"] > now:
+                            conn.execute("COMMIT")
+                            return self._to_job(row), False
+                        conn.execute("DELETE FROM recipe_jobs WHERE job_id = ?", (row["job_id"],))
+                conn.execute(
+                    "INSERT INTO recipe_jobs (job_id, idempotency_key, status, request, "
+                    "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        job.job_id,
+                        idempotency_key,
+                        job.status.value,
+                        request.model_dump_json(),
+                        now,
+                        now,
+                    ),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return job, True
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM recipe_jobs WHERE job_id = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (job_id, time.time()),
+            ).fetchone()
+        return self._to_job(row) if row else None
+
+    def claim_next(self, worker_id, lease_seconds):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT job_id FROM recipe_jobs WHERE status = ? "
+                    "OR (status = ? AND lease_expires_at < ?) ORDER BY created_at LIMIT 1",
+                    (JobStatus.PENDING.value, JobStatus.RUNNING.value, now),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE recipe_jobs SET status = ?, updated_at = ?, lease_owner = ?, "
+                    "lease_expires_at = ? WHERE job_id = ?",
+                    (JobStatus.RUNNING.value, now, worker_id, now + lease_seconds, row["job_id"]),
+                )
+                claimed = conn.execute(
+                    "SELECT * FROM recipe_jobs WHERE job_id = ?", (row["job_id"],)
+                ).fetchone()
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self._to_job(claimed)
+
+    def complete(self, job_id, worker_id, result):
+        return self._finish(job_id, worker_id, JobStatus.SUCCEEDED, result.model_dump_json(), None)
+
+    def fail(self, job_id, worker_id, error):
+        return self._finish(job_id, worker_id, JobStatus.FAILED, None, error)
+
+    def release(self, job_id, worker_id):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE recipe_jobs SET status = ?, updated_at = ?, lease_owner = NULL, "
+                "lease_expires_at = NULL WHERE job_id = ? AND status = ? AND lease_owner = ?",
+                (JobStatus.PENDING.value, time.time(), job_id, JobStatus.RUNNING.value, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def purge_expired(self):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM recipe_jobs WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),),
+            )
+            return cursor.rowcount
+
+    def _finish(self, job_id, worker_id, status, result_json, error):
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE recipe_jobs SET status = ?, result = ?, error = ?, updated_at = ?, "
+                "expires_at = ?, lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE job_id = ? AND status = ? AND lease_owner = ?",
+                (
+                    status.value,
+                    result_json,
+                    error,
+                    now,
+                    now + self.ttl,
+                    job_id,
+                    JobStatus.RUNNING.value,
+                    worker_id,
+                ),
+            )
+            return cursor.rowcount == 1
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> RecipeJob:
+        return RecipeJob(
+            job_id=row["job_id"],
+            status=JobStatus(row["status"]),
+            request=GenerateRecipeRequest.model_validate_json(row["request"]),
+            result=Recipe.model_validate(json.loads(row["result"])) if row["result"] else None,
+            error=row["error"],
+            created_at=int(row["created_at"]),
+            updated_at=int(row["updated_at"]),
+            expires_at=math.ceil(row["expires_at"]) if row["expires_at"] is not None else None,
+        )
+
+
+def create_job_store(url: str, ttl: float) -> JobStore:
+    """
+    Build a job store from a URL-style setting.
+
+    Args:
+        url (str): "memory" or "sqlite:///path/to/jobs.db"
+        ttl (float): Seconds a finished job is kept
+
+    Returns:
+        JobStore: The configured store
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteJobStore(url[len("sqlite:///"):], ttl)
+    if url == "memory":
+        return InMemoryJobStore(ttl)
+    raise ValueError(f"Unsupported job store URL: {url}")
@@ -0,0 +1,134 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from backend.src.models import GenerateRecipeRequest, JobStatus, Recipe
+from backend.src.server import job_store
+from backend.src.server.job_store import InMemoryJobStore, SQLiteJobStore, create_job_store
+
+REQUEST = GenerateRecipeRequest(description="Quick chicken dinner")
+
+
+def _recipe() -> Recipe:
+    return Recipe(
+        recipe_id="r1",
+        title="Chicken and Rice",
+        description="",
+        ingredients=[],
+        instructions=[],
+        prep_time_minutes=5,
+        cook_time_minutes=20,
+        servings=2,
+    )
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryJobStore(ttl=60.0)
+    return SQLiteJobStore(str(tmp_path / "jobs.db"), ttl=60.0)
+
+
+def test_idempotency_key_returns_the_existing_job(store):
+    job, created = store.create(REQUEST, idempotency_key="abc")
+    again, created_again = store.create(REQUEST, idempotency_key="abc")
+    other, created_other = store.create(REQUEST, idempotency_key="def")
+    assert created and not created_again and created_other
+    assert again.job_id == job.job_id
+    assert other.job_id != job.job_id
+    assert store.create(REQUEST)[0].job_id not in (job.job_id, other.job_id)
+
+
+def _advance_clock(monkeypatch, seconds: float):
+    later = time.time() + seconds
+    monkeypatch.setattr(job_store, "time", SimpleNamespace(time=lambda: later))
+
+
+def test_idempotency_key_is_reusable_once_its_job_expires(store, monkeypatch):
+    job, _ = store.create(REQUEST, idempotency_key="abc")
+    store.claim_next("w1", lease_seconds=30.0)
+    assert store.complete(job.job_id, "w1", _recipe())
+    _advance_clock(monkeypatch, 61.0)
+    again, created = store.create(REQUEST, idempotency_key="abc")
+    assert created and again.job_id != job.job_id
+
+
+def test_claims_oldest_pending_job_once(store):
+    first, _ = store.create(REQUEST)
+    second, _ = store.create(REQUEST)
+    claimed = store.claim_next("w1", lease_seconds=30.0)
+    assert claimed.job_id == first.job_id and claimed.status == JobStatus.RUNNING
+    assert store.claim_next("w2", lease_seconds=30.0).job_id == second.job_id
+    assert store.claim_next("w3", lease_seconds=30.0) is None
+
+
+def test_lapsed_lease_is_claimed_by_another_worker(store):
+    job, _ = store.create(REQUEST)
+    assert store.claim_next("w1", lease_seconds=0.05).job_id == job.job_id
+    assert store.claim_next("w2", lease_seconds=30.0) is None
+    time.sleep(0.1)
+    assert store.claim_next("w2", lease_seconds=30.0).job_id == job.job_id
+    # The first worker lost its lease: its late result is rejected
+    assert not store.complete(job.job_id, "w1", _recipe())
+    assert store.complete(job.job_id, "w2", _recipe())
+    finished = store.get(job.job_id)
+    assert finished.status == JobStatus.SUCCEEDED and finished.result.title == "Chicken and Rice"
+    assert finished.expires_at is not None
+
+
+def test_fail_records_the_error(store):
+    job, _ = store.create(REQUEST)
+    store.claim_next("w1", lease_seconds=30.0)
+    assert store.fail(job.job_id, "w1", "agent failed")
+    failed = store.get(job.job_id)
+    assert failed.status == JobStatus.FAILED and failed.error == "agent failed"
+    assert store.claim_next("w1", lease_seconds=30.0) is None
+
+
+def test_released_job_is_pending_again(store):
+    job, _ = store.create(REQUEST)
+    store.claim_next("w1", lease_seconds=30.0)
+    assert not store.release(job.job_id, "w2")
+    assert store.release(job.job_id, "w1")
+    assert store.get(job.job_id).status == JobStatus.PENDING
+    # The lease is gone with it
+    assert not store.complete(job.job_id, "w1", _recipe())
+    assert store.claim_next("w2", lease_seconds=30.0).job_id == job.job_id
+
+
+def test_concurrent_workers_never_claim_the_same_job(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"), ttl=60.0)
+    created = {store.create(REQUEST)[0].job_id for _ in range(20)}
+    claimed = []
+    lock = threading.Lock()
+
+    def work(worker_id):
+        while (job := store.claim_next(worker_id, lease_seconds=30.0)) is not None:
+            with lock:
+                claimed.append(job.job_id)
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(created)
+
+
+def test_finished_jobs_expire_and_are_purged(store, monkeypatch):
+    job, _ = store.create(REQUEST)
+    store.claim_next("w1", lease_seconds=30.0)
+    store.complete(job.job_id, "w1", _recipe())
+    assert store.purge_expired() == 0
+    _advance_clock(monkeypatch, 61.0)
+    assert store.purge_expired() == 1
+    assert store.get(job.job_id) is None
+
+
+def test_create_job_store_from_url(tmp_path):
+    assert isinstance(create_job_store("memory", 60.0), InMemoryJobStore)
+    assert isinstance(create_job_store(f"sqlite:///{tmp_path}/jobs.db", 60.0), SQLiteJobStore)
+    with pytest.raises(ValueError):
+        create_job_store("redis://localhost", 60.0)
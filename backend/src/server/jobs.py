@@ -0,0 +1,158 @@
+"""Background runner for asynchronous recipe jobs.
+
+`POST /api/jobs/recipes` only records a PENDING job in the job store. Each
+server process runs a `RecipeJobRunner` that claims runnable jobs from the
+store whenever the generation pool has spare capacity, runs them through the
+same agent pipeline as `/api/recipes/generate` and writes the result back.
+Because work is pulled from the store, several processes sharing one store
+split the load between them and pick up jobs orphaned by a crashed peer.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from backend.src.common.model_router import route_request
+from backend.src.common.utils import get_env_float
+from backend.src.models import ImageStatus, RecipeJob
+from backend.src.persistence.stores import recipe_store
+from backend.src.server.execution import (
+    PoolSaturatedError,
+    PoolTimeoutError,
+    generation_pool,
+    image_pool,
+)
+from backend.src.server.job_store import FINISHED_STATUSES, JobStore, create_job_store
+from backend.src.server.recipe_service import (
+    build_recipe_prompt,
+    generate_image_url,
+    run_recipe_agent,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RecipeJobRunner:
+    """
+    Pulls recipe jobs from a `JobStore` and runs them on the generation pool.
+
+    Args:
+        store (JobStore): Shared job state.
+        lease_seconds (float): How long a claimed job stays owned by this process.
+        poll_interval (float): Seconds between store polls when idle.
+    """
+
+    def __init__(self, store: JobStore, lease_seconds: float, poll_interval: float):
+        self.store = store
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._wakeup = asyncio.Event()
+        self._loop_task: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+
+    async def submit(self, request, idempotency_key: str | None = None) -> tuple[RecipeJob, bool]:
+        """Record a new job (or find the existing one for this key) and wake the runner."""
+        job, created = await asyncio.to_thread(self.store.create, request, idempotency_key)
+        if created:
+            self._wakeup.set()
+        return job, created
+
+    async def get(self, job_id: str, wait: float = 0.0) -> RecipeJob | None:
+        """
+        Fetch a job, optionally polling up to `wait` seconds for it to finish.
+        """
+        deadline = asyncio.get_running_loop().time() + wait
+        while True:
+            job = await asyncio.to_thread(self.store.get, job_id)
+            if job is None or job.status in FINISHED_STATUSES:
+                return job
+            if asyncio.get_running_loop().time() + self.poll_interval > deadline:
+                return job
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        """Start the claim loop on the running event loop."""
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._claim_loop())
+
+    async def stop(self):
+        """Stop claiming new jobs. Jobs already running are left to finish or lapse."""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+
+    def _has_capacity(self) -> bool:
+        return generation_pool.in_flight + generation_pool.queued < generation_pool.max_in_flight
+
+    async def _claim_loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.store.purge_expired)
+                while self._has_capacity():
+                    job = await asyncio.to_thread(
+                        self.store.claim_next, self.worker_id, self.lease_seconds
+                    )
+                    if job is None:
+                        break
+                    task = asyncio.create_task(self._run(job))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+                    # Let the job take its pool slot before checking capacity again
+                    await asyncio.sleep(0)
+            except Exception as e:
+                logger.error("Job claim loop error: %s", e, exc_info=True)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, job: RecipeJob):
+        logger.info("Running recipe job %s", job.job_id)
+        prompt = build_recipe_prompt(job.request)
+        try:
+            async with generation_pool.slot():
+                recipe = await generation_pool.run(
+                    run_recipe_agent, prompt, route_request(job.request, "job")
+                )
+        except (PoolSaturatedError, PoolTimeoutError) as e:
+            # The pool filled up after the claim; the job is not at fault, so
+            # put it back for a later poll instead of failing it
+            logger.info("Recipe job %s returned to the queue: %s", job.job_id, e)
+            await asyncio.to_thread(self.store.release, job.job_id, self.worker_id)
+            return
+        except Exception as e:
+            logger.error("Recipe job %s failed: %s", job.job_id, e, exc_info=True)
+            await asyncio.to_thread(self.store.fail, job.job_id, self.worker_id, str(e))
+            self._wakeup.set()
+            return
+        try:
+            recipe.image_url = await image_pool.submit(generate_image_url, recipe)
+            recipe.image_status = ImageStatus.READY
+        except Exception as img_error:
+            logger.warning("Failed to generate image for job %s: %s", job.job_id, img_error)
+            recipe.image_status = ImageStatus.FAILED
+        recipe_store.add(recipe)
+
+        stored = await asyncio.to_thread(self.store.complete, job.job_id, self.worker_id, recipe)
+        if not stored:
+            logger.warning("Recipe job %s lease was lost before completion", job.job_id)
+        self._wakeup.set()
+
+
+job_runner = RecipeJobRunner(
+    store=create_job_store(
+        os.getenv("SNAPTOP_JOB_STORE", "memory"),
+        ttl=get_env_float("SNAPTOP_JOB_TTL", 3600.0),
+    ),
+    lease_seconds=get_env_float("SNAPTOP_JOB_LEASE_SECONDS", 600.0),
+    poll_interval=get_env_float("SNAPTOP_JOB_POLL_INTERVAL", 1.0),
+)
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from backend.src.models import GenerateRecipeRequest, JobStatus
+from backend.src.server.execution import PoolSaturatedError, PoolTimeoutError
+from backend.src.server.job_store import InMemoryJobStore
+
+pytest.importorskip("langchain_google_community")
+
+from backend.src.server import jobs  # noqa: E402
+from backend.src.server.jobs import RecipeJobRunner  # noqa: E402
+
+
+class FullPool:
+    """Generation pool whose slots are all taken."""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+    def slot(self):
+        raise self.error
+
+
+@pytest.mark.parametrize("error", [PoolSaturatedError("generation", 5), PoolTimeoutError("generation", 5)])
+def test_job_that_finds_the_pool_full_goes_back_to_pending(monkeypatch, error):
+    store = InMemoryJobStore(ttl=60.0)
+    runner = RecipeJobRunner(store, lease_seconds=30.0, poll_interval=0.05)
+    monkeypatch.setattr(jobs, "generation_pool", FullPool(error))
+    job, _ = store.create(GenerateRecipeRequest(description="Quick chicken dinner"))
+    claimed = store.claim_next(runner.worker_id, lease_seconds=30.0)
+
+    asyncio.run(runner._run(claimed))
+
+    assert store.get(job.job_id).status == JobStatus.PENDING
+    assert store.claim_next("other", lease_seconds=30.0).job_id == job.job_id
@@ -0,0 +1,139 @@
+"""Process warm-up and readiness tracking.
+
+Secrets, model clients and agents are created lazily, so importing the server
+is cheap and the process starts answering liveness checks immediately. Warm-up
+then builds them in a background thread so the first real request does not pay
+for it; `GET /ready` reports 503 until the required steps have finished.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from backend.src.agents.recipe_agent import get_recipe_agent
+from backend.src.common.img_generation_models import get_imagen_fast
+from backend.src.common.ingredient_names import get_ingredient_index
+from backend.src.common.llms import configure_genai
+from backend.src.common.nutrition_db import get_nutrition_db
+from backend.src.common.utils import get_env_bool
+from backend.src.langgraph_tools.nutrition import get_fatsecret_creds, get_fatsecret_token, warm_nutrition_cache
+from backend.src.langgraph_tools.recipe_search import get_search_wrapper
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmUpStep:
+    """
+    One warm-up action.
+
+    Args:
+        name (str): Name reported by `/ready`.
+        func (callable): Zero-argument function that initializes the resource.
+        required (bool): Whether the process is not ready until this step succeeds.
+    """
+
+    name: str
+    func: callable
+    required: bool = True
+
+
+WARM_UP_STEPS = [
+    WarmUpStep("recipe_agent", get_recipe_agent),
+    WarmUpStep("search", get_search_wrapper),
+    WarmUpStep("nutrition_credentials", get_fatsecret_creds),
+    # Optional: otherwise the first FatSecret search fetches the token
+    WarmUpStep("nutrition_token", get_fatsecret_token, required=False),
+    # Optional: the index is also built by the first request that needs it
+    WarmUpStep("ingredient_index", get_ingredient_index, required=False),
+    # Optional: without a local database nutrition comes from the remote APIs
+    WarmUpStep("nutrition_db", get_nutrition_db, required=False),
+    # Optional: image generation failures already degrade to a recipe without an image
+    WarmUpStep("genai", configure_genai, required=False),
+    WarmUpStep("imagen", get_imagen_fast, required=False),
+]
+if get_env_bool("SNAPTOP_NUTRITION_CACHE_WARM", False):
+    # Optional: looks up common ingredients so early recipes hit the cache
+    WARM_UP_STEPS.append(WarmUpStep("nutrition_cache", warm_nutrition_cache, required=False))
+
+
+class Readiness:
+    """
+    Runs the warm-up steps once and tracks their outcome.
+
+    Args:
+        steps (list[WarmUpStep]): Steps to run, in order.
+        enabled (bool): If False, skip warm-up and report ready straight away;
+            resources are then built by the first request that needs them.
+    """
+
+    def __init__(self, steps: list[WarmUpStep], enabled: bool = True):
+        self.steps = steps
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        # step name -> {"status": ..., "seconds": ..., "error": ...}
+        self._results: dict[str, dict] = {
+            step.name: {"status": "pending"} for step in steps
+        }
+        self._done = threading.Event()
+
+    def start(self):
+        """Start warm-up in a daemon thread so it never blocks server start-up or shutdown."""
+        if not self.enabled:
+            self._done.set()
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self.warm_up, name="snaptop-warm-up", daemon=True
+            )
+            self._thread.start()
+
+    def warm_up(self):
+        """Run every warm-up step, recording the duration and any error of each."""
+        for step in self.steps:
+            started = time.perf_counter()
+            try:
+                step.func()
+                result = {"status": "ok"}
+            except Exception as e:
+                logger.error("Warm-up step %s failed: %s", step.name, e, exc_info=True)
+                result = {"status": "failed", "error": str(e)}
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            with self._lock:
+                self._results[step.name] = result
+            logger.info("Warm-up step %s: %s in %ss", step.name, result["status"], result["seconds"])
+        self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        """True once warm-up finished and every required step succeeded."""
+        if not self.enabled:
+            return True
+        if not self._done.is_set():
+            return False
+        with self._lock:
+            return all(
+                self._results[step.name]["status"] == "ok"
+                for step in self.steps
+                if step.required
+            )
+
+    def status(self) -> dict:
+        """Readiness summary for the `/ready` endpoint."""
+        with self._lock:
+            steps = {name: dict(result) for name, result in self._results.items()}
+        return {
+            "ready": self.ready,
+            "warm_up": "disabled" if not self.enabled else (
+                "done" if self._done.is_set() else "running"
+            ),
+            "steps": steps,
+        }
+
+
+readiness = Readiness(
+    WARM_UP_STEPS,
+    enabled=get_env_bool("SNAPTOP_WARM_UP", True),
+)
@@ -0,0 +1,100 @@
+"""Batch recipe generation streamed back as NDJSON.
+
+Items are deduplicated on their canonical cache key, so identical requests in
+one batch share a single agent run. Unique items run with bounded concurrency,
+never above the generation pool's slots, and each result is written as a JSON
+line the moment it is ready, in completion order. An item turned away by a
+busy pool (429/503) is retried after its Retry-After delay, up to
+SNAPTOP_BATCH_RETRIES times. An item that fails produces an error line; it
+never aborts the rest of the batch.
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+
+from fastapi import HTTPException
+
+from backend.src.common.utils import get_env_int
+from backend.src.models import GenerateRecipeRequest, Recipe, RecipeBatchResult
+from backend.src.server.execution import generation_pool
+from backend.src.server.recipe_cache import request_cache_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_CONCURRENCY = get_env_int("SNAPTOP_BATCH_CONCURRENCY", 2)
+MAX_BATCH_CONCURRENCY = get_env_int("SNAPTOP_BATCH_MAX_CONCURRENCY", 8)
+MAX_BATCH_ITEMS = get_env_int("SNAPTOP_BATCH_MAX_ITEMS", 500)
+BATCH_RETRIES = get_env_int("SNAPTOP_BATCH_RETRIES", 3)
+
+# Statuses of an item the generation pool had no room for
+_RETRYABLE_STATUSES = (429, 503)
+
+
+def _retry_delay(error: HTTPException) -> float:
+    headers = error.headers or {}
+    try:
+        return max(float(headers.get("Retry-After", 1)), 0.0)
+    except ValueError:
+        return 1.0
+
+
+async def stream_batch_results(
+    requests: list[GenerateRecipeRequest],
+    produce,
+    concurrency: int | None = None,
+) -> AsyncIterator[str]:
+    """
+    Generate recipes for a batch and yield one NDJSON line per input item.
+
+    Args:
+        requests (list[GenerateRecipeRequest]): Batch items
+        produce: Coroutine function `(request) -> Recipe` for a single item
+        concurrency (int, optional): Unique items generated at once; capped at
+            SNAPTOP_BATCH_MAX_CONCURRENCY and the generation pool's slots
+
+    Yields:
+        str: `RecipeBatchResult` JSON followed by a newline
+    """
+    limit = min(
+        concurrency or DEFAULT_BATCH_CONCURRENCY, MAX_BATCH_CONCURRENCY, generation_pool.max_in_flight
+    )
+    semaphore = asyncio.Semaphore(limit)
+
+    # cache key -> indices of every item that maps to it
+    groups: dict[str, list[int]] = {}
+    for index, request in enumerate(requests):
+        groups.setdefault(request_cache_key(request), []).append(index)
+    logger.info("Batch of %s items, %s unique, concurrency %s", len(requests), len(groups), limit)
+
+    async def run_group(indices: list[int]) -> tuple[list[int], Recipe | None, int, str | None]:
+        async with semaphore:
+            attempt = 0
+            while True:
+                try:
+                    recipe = await produce(requests[indices[0]])
+                    return indices, recipe, 200, None
+                except HTTPException as e:
+                    if e.status_code not in _RETRYABLE_STATUSES or attempt >= BATCH_RETRIES:
+                        return indices, None, e.status_code, str(e.detail)
+                    attempt += 1
+                    delay = _retry_delay(e)
+                    logger.info("Batch item %s got %s, retry %s in %.0fs", indices[0], e.status_code, attempt, delay)
+                    await asyncio.sleep(delay)
+                except Exception as e:
+                    logger.error("Batch item %s failed: %s", indices[0], e, exc_info=True)
+                    return indices, None, 500, f"Error generating recipe: {str(e)}"
+
+    tasks = [asyncio.create_task(run_group(indices)) for indices in groups.values()]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            indices, recipe, status_code, error = await finished
+            for index in indices:
+                result = RecipeBatchResult(
+                    index=index, status_code=status_code, recipe=recipe, error=error
+                )
+                yield result.model_dump_json() + "\n"
+    finally:
+        # The client disconnected: stop starting new generations
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+from fastapi import HTTPException
+
+from backend.src.models import GenerateRecipeRequest, Recipe
+from backend.src.server import recipe_batch
+from backend.src.server.execution import generation_pool
+from backend.src.server.recipe_batch import stream_batch_results
+
+
+def _request(description: str) -> GenerateRecipeRequest:
+    return GenerateRecipeRequest(description=description)
+
+
+def _recipe(title: str) -> Recipe:
+    return Recipe(
+        recipe_id=title.lower().replace(" ", "-"),
+        title=title,
+        description="",
+        ingredients=[],
+        instructions=[],
+        prep_time_minutes=5,
+        cook_time_minutes=20,
+        servings=2,
+    )
+
+
+def _collect(requests, produce, concurrency=None) -> list[dict]:
+    async def main():
+        return [json.loads(line) async for line in stream_batch_results(requests, produce, concurrency)]
+
+    return asyncio.run(main())
+
+
+def test_results_stream_in_completion_order_and_duplicates_share_one_run():
+    delays = {"slow stew": 0.2, "quick salad": 0.0}
+    runs = []
+
+    async def produce(request):
+        runs.append(request.description)
+        await asyncio.sleep(delays[request.description])
+        return _recipe(request.description.title())
+
+    lines = _collect(
+        [_request("slow stew"), _request("quick salad"), _request("  Slow   STEW ")], produce, concurrency=2
+    )
+    assert sorted(runs) == ["quick salad", "slow stew"]
+    assert [line["index"] for line in lines] == [1, 0, 2]
+    assert [line["recipe"]["title"] for line in lines] == ["Quick Salad", "Slow Stew", "Slow Stew"]
+    assert {line["status_code"] for line in lines} == {200}
+
+
+def test_a_failed_item_does_not_stop_the_batch():
+    async def produce(request):
+        if request.description == "bad":
+            raise RuntimeError("agent failed")
+        if request.description == "missing":
+            raise HTTPException(status_code=404, detail="not found")
+        return _recipe("Good")
+
+    lines = sorted(_collect([_request("bad"), _request("good"), _request("missing")], produce), key=lambda line: line["index"])
+    assert [(line["status_code"], line["error"]) for line in lines] == [
+        (500, "Error generating recipe: agent failed"),
+        (200, None),
+        (404, "not found"),
+    ]
+
+
+def test_concurrency_is_capped_at_the_generation_pool(monkeypatch):
+    monkeypatch.setattr(recipe_batch, "MAX_BATCH_CONCURRENCY", 100)
+    running = peak = 0
+
+    async def produce(request):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return _recipe(request.description)
+
+    _collect([_request(f"dish {i}") for i in range(20)], produce, concurrency=50)
+    assert peak == generation_pool.max_in_flight
+
+
+def test_items_turned_away_by_a_busy_pool_are_retried(monkeypatch):
+    monkeypatch.setattr(recipe_batch, "BATCH_RETRIES", 2)
+    attempts = {"busy": 0, "full": 0}
+
+    async def produce(request):
+        attempts[request.description] += 1
+        if request.description == "busy" and attempts["busy"] < 3:
+            raise HTTPException(status_code=503, detail="pool timeout", headers={"Retry-After": "0"})
+        if request.description == "full":
+            raise HTTPException(status_code=429, detail="pool full", headers={"Retry-After": "0"})
+        return _recipe("Busy")
+
+    lines = sorted(_collect([_request("busy"), _request("full")], produce), key=lambda line: line["index"])
+    assert [line["status_code"] for line in lines] == [200, 429]
+    assert attempts == {"busy": 3, "full": 3}
@@ -0,0 +1,176 @@
+"""Response cache for recipe generation, keyed on a canonical request.
+
+Requests that differ only in casing, whitespace, ingredient order or spelling,
+unit spelling or small macro differences map to the same key, so they share one agent run. Concurrent
+identical requests are coalesced: only the first runs the agent and the rest
+wait for its result.
+"""
+
+import hashlib
+import json
+import logging
+import re
+
+from backend.src.common.cache import AsyncSingleFlight, LRUCache
+from backend.src.common.ingredient_names import canonical_id
+from backend.src.common.units import normalize_unit
+from backend.src.common.utils import get_env_float, get_env_int
+from backend.src.models import GenerateRecipeRequest, ImageStatus, Recipe
+
+logger = logging.getLogger(__name__)
+
+# Rounding steps applied to target macros before keying, per NutritionProfile field
+MACRO_ROUNDING = {
+    "calories": 10,
+    "protein_grams": 1,
+    "carbs_grams": 1,
+    "fat_grams": 1,
+    "fiber_grams": 1,
+    "sugar_grams": 1,
+    "sodium_mg": 10,
+}
+
+
+def normalize_text(text: str | None) -> str:
+    """Lower-case, collapse whitespace and drop trailing punctuation."""
+    if not text:
+        return ""
+    return re.sub(r"\s+", " ", text).strip().lower().rstrip(".!?,;")
+
+
+def canonical_request(request: GenerateRecipeRequest) -> dict:
+    """
+    Reduce a request to the fields that determine the generated recipe.
+
+    Args:
+        request: Recipe generation request
+
+    Returns:
+        dict: JSON-serializable canonical form
+    """
+    macros = None
+    if request.target_macros:
+        macros = {}
+        for name, step in MACRO_ROUNDING.items():
+            value = getattr(request.target_macros, name)
+            if value:
+                macros[name] = round(value / step) * step
+        macros = macros or None
+
+    ingredients = None
+    if request.available_ingredients:
+        ingredients = sorted(
+            (
+                canonical_id(ing.name),
+                round(ing.quantity, 2),
+                normalize_unit(ing.unit) or normalize_text(ing.unit),
+                normalize_text(ing.notes),
+            )
+            for ing in request.available_ingredients
+        )
+
+    return {
+        "description": normalize_text(request.description),
+        "complexity": normalize_text(request.complexity) or None,
+        "target_macros": macros,
+        "available_ingredients": ingredients,
+    }
+
+
+def request_cache_key(request: GenerateRecipeRequest) -> str:
+    """Stable hash of `canonical_request(request)`."""
+    canonical = json.dumps(canonical_request(request), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _recipe_size(recipe: Recipe) -> int:
+    # Images are cached by URL, but bound by serialized size in case one is inline
+    return len(recipe.model_dump_json())
+
+
+class RecipeCache:
+    """
+    LRU + TTL cache of generated recipes with single-flight generation.
+
+    Args:
+        max_entries (int): Maximum number of cached recipes.
+        max_bytes (int): Upper bound on the serialized size of all cached recipes.
+        ttl (float): Seconds a cached recipe is served.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self._cache = LRUCache(max_entries, ttl=ttl, max_bytes=max_bytes, sizeof=_recipe_size)
+        self._flights = AsyncSingleFlight()
+        self._image_flights = AsyncSingleFlight()
+
+    async def get_or_generate(self, key: str, generate) -> tuple[Recipe, bool]:
+        """
+        Return the cached recipe for `key`, or run `generate()` once to produce it.
+
+        Args:
+            key (str): Key from `request_cache_key`
+            generate: Coroutine function producing a `Recipe`; errors propagate
+                to every caller waiting on the same key.
+
+        Returns:
+            tuple[Recipe, bool]: A private copy of the recipe, and whether it came
+                from the cache or a concurrent identical request.
+        """
+        recipe = self._cache.get(key)
+        if recipe is not None:
+            logger.info("Recipe cache hit for %s", key[:12])
+            return recipe.model_copy(deep=True), True
+
+        async def generate_and_store():
+            generated = await generate()
+            self._cache.put(key, generated.model_copy(deep=True))
+            return generated
+
+        recipe, shared = await self._flights.do(key, generate_and_store)
+        if shared:
+            logger.info("Recipe request %s coalesced with an in-flight generation", key[:12])
+        return recipe.model_copy(deep=True), shared
+
+    async def get_or_generate_image(self, key: str, recipe: Recipe, generate) -> str:
+        """
+        Return the image URL for a cached recipe, generating it at most once at a time.
+
+        Args:
+            key (str): Key from `request_cache_key`
+            recipe (Recipe): The recipe returned by `get_or_generate`
+            generate: Coroutine function producing the stored image's URL
+
+        Returns:
+            str: Image URL
+        """
+        cached = self._cache.peek(key)
+        if cached is not None and cached.recipe_id == recipe.recipe_id and cached.image_url:
+            return cached.image_url
+
+        async def generate_and_attach():
+            url = await generate()
+            self.attach_image(key, recipe.recipe_id, url)
+            return url
+
+        url, _shared = await self._image_flights.do((key, recipe.recipe_id), generate_and_attach)
+        return url
+
+    def attach_image(self, key: str, recipe_id: str, url: str):
+        """Record a generated image's URL on the cached recipe for `key`, if still cached."""
+        cached = self._cache.peek(key)
+        if cached is None or cached.recipe_id != recipe_id:
+            return
+        updated = cached.model_copy(deep=True)
+        updated.image_url = url
+        updated.image_status = ImageStatus.READY
+        self._cache.put(key, updated)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+recipe_cache = RecipeCache(
+    max_entries=get_env_int("SNAPTOP_RECIPE_CACHE_MAX_ENTRIES", 512),
+    max_bytes=get_env_int("SNAPTOP_RECIPE_CACHE_MAX_BYTES", 256 * 1024 * 1024),
+    ttl=get_env_float("SNAPTOP_RECIPE_CACHE_TTL", 24 * 3600.0),
+)
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from backend.src.models import GenerateRecipeRequest, Recipe
+from backend.src.server.recipe_cache import RecipeCache, request_cache_key
+
+
+def _request(description="Quick chicken dinner", ingredients=None, macros=None, complexity="easy"):
+    return GenerateRecipeRequest.model_validate(
+        {
+            "description": description,
+            "complexity": complexity,
+            "target_macros": macros,
+            "available_ingredients": ingredients,
+        }
+    )
+
+
+def _ingredient(name, quantity=200, unit="g"):
+    return {"name": name, "quantity": quantity, "unit": unit}
+
+
+def test_key_ignores_casing_whitespace_and_order():
+    a = _request("Quick chicken dinner", [_ingredient("Chicken Breast"), _ingredient("Rice", 1, "cup")])
+    b = _request("  quick   CHICKEN dinner. ", [_ingredient("rice", 1, "Cups"), _ingredient("chicken breasts")])
+    assert request_cache_key(a) == request_cache_key(b)
+
+
+def test_key_resolves_synonyms_and_rounds_macros():
+    a = _request(ingredients=[_ingredient("scallions", 2, "piece")], macros={"calories": 604, "protein_grams": 40.2})
+    b = _request(ingredients=[_ingredient("green onion", 2, "pieces")], macros={"calories": 598, "protein_grams": 39.8})
+    assert request_cache_key(a) == request_cache_key(b)
+
+
+@pytest.mark.parametrize(
+    "other",
+    [
+        _request("Quick turkey dinner", [_ingredient("chicken breast")]),
+        _request(ingredients=[_ingredient("chicken sausage")]),
+        _request(ingredients=[_ingredient("chicken breast", 300)]),
+        _request(ingredients=[_ingredient("chicken breast")], complexity="hard"),
+        _request(ingredients=[_ingredient("chicken breast")], macros={"calories": 500}),
+    ],
+)
+def test_key_distinguishes_requests_that_change_the_recipe(other):
+    assert request_cache_key(_request(ingredients=[_ingredient("chicken breast")])) != request_cache_key(other)
+
+
+def _recipe(title="Chicken and Rice") -> Recipe:
+    return Recipe(
+        recipe_id="r1",
+        title=title,
+        description="",
+        ingredients=[],
+        instructions=[],
+        prep_time_minutes=5,
+        cook_time_minutes=20,
+        servings=2,
+    )
+
+
+def test_concurrent_identical_requests_share_one_generation():
+    cache = RecipeCache(max_entries=8, max_bytes=1 << 20, ttl=60.0)
+    runs = 0
+
+    async def generate():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.05)
+        return _recipe()
+
+    async def main():
+        results = await asyncio.gather(*(cache.get_or_generate("key", generate) for _ in range(5)))
+        cached, from_cache = await cache.get_or_generate("key", generate)
+        return results, cached, from_cache
+
+    results, cached, from_cache = asyncio.run(main())
+    assert runs == 1
+    assert [shared for _, shared in results].count(False) == 1
+    assert from_cache and cached.title == "Chicken and Rice"
+    # Every caller gets a private copy
+    cached.title = "changed"
+    assert asyncio.run(cache.get_or_generate("key", generate))[0].title == "Chicken and Rice"
+
+
+def test_failed_generation_is_not_cached():
+    cache = RecipeCache(max_entries=8, max_bytes=1 << 20, ttl=60.0)
+
+    async def fail():
+        raise RuntimeError("agent failed")
+
+    async def succeed():
+        return _recipe()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_generate("key", fail))
+    recipe, from_cache = asyncio.run(cache.get_or_generate("key", succeed))
+    assert not from_cache and recipe.title == "Chicken and Rice"
@@ -0,0 +1,232 @@
+"""Incremental recipe modification.
+
+Rerunning the recipe agent for "swap chicken for tofu" would repeat the recipe
+search, page fetches and a nutrition lookup per ingredient. Instead:
+
+1. The recipe editor (one tool-free model call) returns only what changes:
+   ingredients removed and added, and rewritten text for the affected fields
+   and instruction sections. Everything else is copied from the stored recipe.
+2. The old and new ingredient lists are diffed. Nutrition is looked up only
+   for lines that were removed or added; unchanged lines are already part of
+   the stored totals.
+3. The new `NutritionProfile` is the stored one minus what the removed lines
+   contributed plus what the added lines contribute.
+
+When a changed ingredient cannot be resolved to a per-100 g profile, or the
+stored recipe has no nutrition, `modify_incrementally` returns None and the caller
+falls back to a full agent run.
+"""
+
+import json
+import logging
+from collections import Counter
+from dataclasses import dataclass
+
+from backend.src.agents.recipe_editor import RecipeEdit, get_recipe_editor
+from backend.src.common.ingredient_nutrition import lookup_profiles, profile_to_nutrition
+from backend.src.common.ingredient_names import canonical_id
+from backend.src.common.logging_config import summarize
+from backend.src.common.metrics import registry, timed_stage
+from backend.src.common.nutrition_calculator import calculate_nutrition
+from backend.src.common.units import normalize_unit
+from backend.src.models import Ingredient, NutritionProfile, Recipe
+
+logger = logging.getLogger(__name__)
+
+modifications_total = registry.counter(
+    "snaptop_recipe_modifications_total",
+    "Recipe modifications by how they were computed",
+    ("path",),
+)
+ingredient_lookups_total = registry.counter(
+    "snaptop_recipe_modification_ingredient_lookups_total",
+    "Ingredients whose nutrition had to be looked up during a modification",
+)
+
+
+@dataclass
+class IngredientDiff:
+    """Old and new ingredient lines that differ, by name, quantity and unit."""
+
+    unchanged: list[Ingredient]
+    removed: list[Ingredient]
+    added: list[Ingredient]
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.removed or self.added)
+
+
+def _line_key(ingredient: Ingredient) -> tuple:
+    # Notes do not change nutrition, so "diced" vs "sliced" is not a change
+    unit = normalize_unit(ingredient.unit) or ingredient.unit.strip().lower()
+    return canonical_id(ingredient.name), unit, round(ingredient.quantity, 3)
+
+
+def diff_ingredients(old: list[Ingredient], new: list[Ingredient]) -> IngredientDiff:
+    """
+    Compare two ingredient lists as multisets of (name, unit, quantity).
+
+    Args:
+        old: Ingredients of the stored recipe
+        new: Ingredients after the edit
+
+    Returns:
+        IngredientDiff: Lines only in `old` (removed), only in `new` (added) and in both
+    """
+    remaining = Counter(_line_key(ing) for ing in old)
+    unchanged, added = [], []
+    for ing in new:
+        key = _line_key(ing)
+        if remaining[key] > 0:
+            remaining[key] -= 1
+            unchanged.append(ing)
+        else:
+            added.append(ing)
+    removed = []
+    for ing in old:
+        key = _line_key(ing)
+        if remaining[key] > 0:
+            remaining[key] -= 1
+            removed.append(ing)
+    return IngredientDiff(unchanged=unchanged, removed=removed, added=added)
+
+
+def build_edit_prompt(recipe: Recipe, instructions: str) -> str:
+    """
+    Build the editor prompt: the stored recipe's editable fields and the user's instructions.
+
+    Nutrition, citations and images are left out; the editor never changes them.
+    """
+    editable = recipe.model_dump(
+        mode="json",
+        include={
+            "title",
+            "description",
+            "ingredients",
+            "instructions",
+            "prep_time_minutes",
+            "cook_time_minutes",
+            "servings",
+            "serving_size",
+        },
+    )
+    return (
+        f"Recipe:\n{json.dumps(editable, indent=1)}\n\n"
+        f"Modification instructions: {instructions}"
+    )
+
+
+def apply_edit(recipe: Recipe, edit: RecipeEdit) -> Recipe:
+    """
+    Apply an editor result to a copy of `recipe`.
+
+    Returns:
+        Recipe: The modified recipe, still carrying the old nutrition
+    """
+    removed = Counter(canonical_id(name) for name in edit.remove_ingredients)
+    ingredients = []
+    for ing in recipe.ingredients:
+        key = canonical_id(ing.name)
+        if removed[key] > 0:
+            removed[key] -= 1
+        else:
+            ingredients.append(ing.model_copy())
+    for name, count in removed.items():
+        if count > 0:
+            logger.warning("Editor removed unknown ingredient %r; ignored", name)
+    ingredients.extend(edit.add_ingredients)
+
+    sections = {s.section_name: s for s in recipe.instructions}
+    for section in edit.instructions:
+        sections[section.section_name] = section
+    instructions = [s.model_copy() for s in sections.values() if s.steps]
+
+    updates = {"ingredients": ingredients, "instructions": instructions}
+    for field in (
+        "title",
+        "description",
+        "prep_time_minutes",
+        "cook_time_minutes",
+        "servings",
+        "serving_size",
+    ):
+        value = getattr(edit, field)
+        if value is not None:
+            updates[field] = value
+    return recipe.model_copy(deep=True, update=updates)
+
+
+def recompute_nutrition(nutrition: NutritionProfile | None, diff: IngredientDiff) -> NutritionProfile | None:
+    """
+    Adjust stored nutrition totals for an ingredient diff.
+
+    Only removed and added lines are looked up. A nutrient that a changed
+    ingredient's profile does not report (FatSecret search results have no
+    fiber, sugar or sodium) keeps its stored total.
+
+    Args:
+        nutrition: Totals of the stored recipe
+        diff: Ingredient changes
+
+    Returns:
+        NutritionProfile | None: New totals, or None if they cannot be
+            computed without the agent
+    """
+    if nutrition is None:
+        return None
+    if not diff.changed:
+        return nutrition.model_copy()
+
+    lines = diff.removed + diff.added
+    profiles = lookup_profiles(ing.name for ing in lines)
+    ingredient_lookups_total.inc(len(profiles))
+    # Removed lines count negatively, so the totals are the change in nutrition
+    delta = calculate_nutrition(lines, profiles, signs=[-1.0] * len(diff.removed) + [1.0] * len(diff.added))
+    if not delta.complete:
+        for ing in delta.unresolved:
+            logger.info("No nutrition for %s %s %r", ing.quantity, ing.unit, ing.name)
+        return None
+
+    totals = nutrition.model_dump()
+    for field, change in delta.as_dict().items():
+        if totals.get(field) is not None:
+            totals[field] += change
+    return profile_to_nutrition(totals)
+
+
+def modify_incrementally(recipe: Recipe, instructions: str) -> Recipe | None:
+    """
+    Modify a stored recipe incrementally. Blocks on the editor model and the
+    nutrition lookups of changed ingredients.
+
+    Args:
+        recipe: The stored recipe
+        instructions: What the user wants changed
+
+    Returns:
+        Recipe | None: The modified recipe with recomputed nutrition (same
+            `recipe_id` and image URL), or None if nutrition could not be
+            recomputed and the full agent is needed
+    """
+    with timed_stage("edit"):
+        edit = get_recipe_editor().invoke(build_edit_prompt(recipe, instructions))
+    logger.info("Recipe edit: %s", summarize(edit))
+    modified = apply_edit(recipe, edit)
+
+    diff = diff_ingredients(recipe.ingredients, modified.ingredients)
+    logger.info(
+        "Ingredient diff for %s: %s unchanged, %s removed, %s added",
+        recipe.recipe_id,
+        len(diff.unchanged),
+        len(diff.removed),
+        len(diff.added),
+    )
+    with timed_stage("nutrition"):
+        nutrition = recompute_nutrition(recipe.nutrition, diff)
+    if nutrition is None:
+        modifications_total.inc(path="agent")
+        return None
+    modified.nutrition = nutrition
+    modifications_total.inc(path="incremental")
+    return modified
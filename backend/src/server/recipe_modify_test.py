@@ -0,0 +1,112 @@
+import pytest
+
+from backend.src.common.ingredient_names import canonical_ids
+from backend.src.models import Ingredient, InstructionSection, NutritionProfile, Recipe
+
+pytest.importorskip("langchain_google_vertexai")
+
+from backend.src.agents.recipe_editor import RecipeEdit  # noqa: E402
+from backend.src.server import recipe_modify  # noqa: E402
+from backend.src.server.recipe_modify import apply_edit, diff_ingredients, recompute_nutrition  # noqa: E402
+
+PROFILES = {
+    "chicken breast": {"calories": 165.0, "protein_grams": 31.0, "carbs_grams": 0.0, "fat_grams": 3.6},
+    "tofu": {"calories": 76.0, "protein_grams": 8.0, "carbs_grams": 1.9, "fat_grams": 4.8},
+    "mystery sauce": None,
+}
+
+
+def _ing(name: str, quantity: float, unit: str = "g") -> Ingredient:
+    return Ingredient(name=name, quantity=quantity, unit=unit)
+
+
+def _recipe(ingredients: list[Ingredient]) -> Recipe:
+    return Recipe(
+        recipe_id="r1",
+        title="Chicken Stir Fry",
+        description="Quick stir fry",
+        ingredients=ingredients,
+        instructions=[
+            InstructionSection(section_name="Prep", steps=["Cube the chicken"]),
+            InstructionSection(section_name="Cook", steps=["Fry everything"]),
+        ],
+        prep_time_minutes=10,
+        cook_time_minutes=15,
+        servings=2,
+        image_url="/api/images/abc",
+    )
+
+
+@pytest.fixture(autouse=True)
+def profiles(monkeypatch):
+    """Serve per-100 g profiles from `PROFILES` instead of the nutrition sources."""
+    monkeypatch.setattr(
+        recipe_modify, "lookup_profiles", lambda names: {i: PROFILES.get(i) for i in canonical_ids(names)}
+    )
+
+
+def test_diff_compares_lines_as_multisets():
+    old = [_ing("garlic", 2, "cloves"), _ing("garlic", 2, "cloves"), _ing("chicken breast", 200), _ing("rice", 1, "cup")]
+    new = [_ing("Garlic", 2, "clove"), _ing("tofu", 300), _ing("Rice", 1, "cups"), _ing("rice", 1, "cup")]
+    diff = diff_ingredients(old, new)
+    assert [ing.name for ing in diff.unchanged] == ["Garlic", "Rice"]
+    assert [ing.name for ing in diff.removed] == ["garlic", "chicken breast"]
+    assert [ing.name for ing in diff.added] == ["tofu", "rice"]
+    assert diff.changed
+    assert not diff_ingredients(old, list(old)).changed
+
+
+def test_apply_edit_ignores_unknown_removals(caplog):
+    recipe = _recipe([_ing("chicken breasts", 200), _ing("soy sauce", 2, "tbsp")])
+    edit = RecipeEdit(
+        remove_ingredients=["Chicken Breast", "bacon"],
+        add_ingredients=[_ing("tofu", 300)],
+        title="Tofu Stir Fry",
+        instructions=[
+            InstructionSection(section_name="Prep", steps=["Press and cube the tofu"]),
+            InstructionSection(section_name="Cook", steps=[]),
+        ],
+    )
+    modified = apply_edit(recipe, edit)
+    assert [ing.name for ing in modified.ingredients] == ["soy sauce", "tofu"]
+    assert modified.title == "Tofu Stir Fry"
+    # Rewritten sections replace the old ones; sections left without steps are dropped
+    assert [(s.section_name, s.steps) for s in modified.instructions] == [("Prep", ["Press and cube the tofu"])]
+    assert (modified.description, modified.servings, modified.image_url) == ("Quick stir fry", 2, "/api/images/abc")
+    assert "bacon" in caplog.text
+    # The stored recipe is not touched
+    assert [ing.name for ing in recipe.ingredients] == ["chicken breasts", "soy sauce"]
+
+
+def test_nutrition_is_adjusted_by_the_changed_lines_only():
+    stored = NutritionProfile(calories=800, protein_grams=80.0, carbs_grams=50.0, fat_grams=30.0, fiber_grams=5.0)
+    diff = diff_ingredients(
+        [_ing("chicken breast", 200), _ing("mystery sauce", 1, "tbsp")],
+        [_ing("tofu", 300), _ing("mystery sauce", 1, "tbsp")],
+    )
+    nutrition = recompute_nutrition(stored, diff)
+    assert nutrition.calories == 800 - 330 + 228
+    assert nutrition.protein_grams == pytest.approx(80 - 62 + 24)
+    assert nutrition.carbs_grams == pytest.approx(50 + 5.7)
+    assert nutrition.fat_grams == pytest.approx(30 - 7.2 + 14.4)
+    # Not reported by the changed ingredients' profiles: stored totals are kept
+    assert nutrition.fiber_grams == 5.0
+    assert nutrition.sugar_grams is None
+
+
+@pytest.mark.parametrize(
+    "added",
+    [
+        _ing("mystery sauce", 2, "tbsp"),  # no profile
+        _ing("tofu", 1, "handful"),  # unit without a weight
+    ],
+)
+def test_nutrition_falls_back_when_a_changed_line_is_unresolved(added):
+    stored = NutritionProfile(calories=800, protein_grams=80.0)
+    diff = diff_ingredients([_ing("chicken breast", 200)], [_ing("chicken breast", 200), added])
+    assert recompute_nutrition(stored, diff) is None
+
+
+def test_nutrition_falls_back_without_stored_totals():
+    diff = diff_ingredients([_ing("chicken breast", 200)], [_ing("tofu", 300)])
+    assert recompute_nutrition(None, diff) is None
@@ -0,0 +1,242 @@
+"""Blocking building blocks of the recipe generation pipeline.
+
+These helpers are synchronous on purpose: the server runs them on a
+`WorkerPool` so the event loop stays free while the agent and Imagen work.
+"""
+
+import base64
+import logging
+import uuid
+
+from backend.src.common.agent_metrics import AgentMetricsHandler
+from backend.src.common.image_store import digest_from_url, image_store, image_url
+from backend.src.common.logging_config import summarize
+from backend.src.common.metrics import timed_stage
+from backend.src.common.model_router import ModelRoute, route_for
+from backend.src.common.nutrition_calculator import check_recipe_nutrition
+from backend.src.models import GenerateRecipeRequest, Recipe
+from backend.src.persistence.agent_logs import AgentLogHandler
+from backend.src.agents.recipe_agent import get_recipe_agent, system_prompt
+from backend.src.langgraph_tools.generate_recipe_image import generate_recipe_image
+
+logger = logging.getLogger(__name__)
+
+
+def build_recipe_prompt(request: GenerateRecipeRequest) -> str:
+    """
+    Build a single prompt string from all recipe request fields.
+
+    Args:
+        request: Recipe generation request with description, complexity, macros, etc.
+
+    Returns:
+        str: Prompt for the recipe agent
+    """
+    prompt_lines = []
+    prompt_lines.append(f"Recipe request: {request.description}")
+
+    if request.complexity:
+        prompt_lines.append(f"Desired complexity: {request.complexity}")
+
+    if request.target_macros:
+        macros = request.target_macros
+        macro_parts = []
+        if macros.calories:
+            macro_parts.append(f"calories={macros.calories}")
+        if macros.protein_grams:
+            macro_parts.append(f"protein={macros.protein_grams}g")
+        if macros.carbs_grams:
+            macro_parts.append(f"carbs={macros.carbs_grams}g")
+        if macros.fat_grams:
+            macro_parts.append(f"fat={macros.fat_grams}g")
+        if macros.fiber_grams:
+            macro_parts.append(f"fiber={macros.fiber_grams}g")
+        if macros.sugar_grams:
+            macro_parts.append(f"sugar={macros.sugar_grams}g")
+        if macros.sodium_mg:
+            macro_parts.append(f"sodium={macros.sodium_mg}mg")
+        if macro_parts:
+            prompt_lines.append("Target macros per serving: " + ", ".join(macro_parts))
+
+    if request.available_ingredients:
+        ing_list = []
+        for ing in request.available_ingredients:
+            ing_desc = (
+                f"{ing.quantity} {ing.unit} {ing.name}"
+                if ing.unit
+                else f"{ing.quantity} {ing.name}"
+            )
+            if ing.notes:
+                ing_desc += f" ({ing.notes})"
+            ing_list.append(ing_desc)
+        prompt_lines.append("Available ingredients: " + ", ".join(ing_list))
+
+    return "\n".join(prompt_lines)
+
+
+def build_regenerate_prompt(recipe: Recipe, reason: str | None = None) -> str:
+    """
+    Build a prompt asking the agent for a fresh take on an existing recipe.
+
+    Args:
+        recipe: The stored recipe to replace
+        reason: Why the user wants a different recipe, if given
+
+    Returns:
+        str: Prompt for the recipe agent
+    """
+    ingredients = ", ".join(
+        f"{ing.quantity} {ing.unit} {ing.name}".strip() for ing in recipe.ingredients
+    )
+    prompt_lines = [
+        f"Recipe request: a new alternative to \"{recipe.title}\" ({recipe.description})",
+        f"The previous version served {recipe.servings} and used: {ingredients}",
+    ]
+    if recipe.nutrition:
+        prompt_lines.append(
+            "Keep the total nutrition close to: "
+            + recipe.nutrition.model_dump_json(exclude_none=True)
+        )
+    if reason:
+        prompt_lines.append(f"The user asked for a new version because: {reason}")
+    else:
+        prompt_lines.append("Make it meaningfully different from the previous version.")
+    return "\n".join(prompt_lines)
+
+
+def build_modify_prompt(recipe: Recipe, instructions: str) -> str:
+    """
+    Build a prompt asking the agent to rework an existing recipe.
+
+    Used when the incremental path in `recipe_modify` cannot recompute the
+    nutrition and the agent has to look ingredients up itself.
+
+    Args:
+        recipe: The stored recipe to modify
+        instructions: What the user wants changed
+
+    Returns:
+        str: Prompt for the recipe agent
+    """
+    return "\n".join([
+        "Recipe request: modify this existing recipe and return the full updated recipe.",
+        recipe.model_dump_json(
+            exclude={"recipe_id", "image_base64", "image_url", "image_status"},
+            exclude_none=True,
+        ),
+        f"Modification instructions: {instructions}",
+    ])
+
+
+def build_agent_input(prompt: str) -> dict:
+    """Wrap a user prompt in the message list expected by the recipe agent."""
+    return {
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt},
+        ]
+    }
+
+
+def to_recipe(recipe_obj) -> Recipe:
+    """
+    Convert the agent's structured response to our Pydantic `Recipe` if needed.
+
+    The recipe gets a new server-side `recipe_id`: the model's own ID (often a
+    slug of the title) is not unique and would overwrite another stored recipe.
+    """
+    if not isinstance(recipe_obj, Recipe):
+        recipe_data = recipe_obj.model_dump() if hasattr(recipe_obj, "model_dump") else recipe_obj
+        recipe_obj = Recipe(**recipe_data)
+    recipe_obj.recipe_id = uuid.uuid4().hex
+    return recipe_obj
+
+
+def run_recipe_agent(prompt: str, route: ModelRoute | None = None) -> Recipe:
+    """
+    Run the recipe agent to completion. Blocks for the whole agent run.
+
+    Args:
+        prompt (str): User prompt built by `build_recipe_prompt`
+        route (ModelRoute, optional): Models for the run, from `route_request`;
+            defaults to the route for a request without features
+
+    Returns:
+        Recipe: Structured recipe produced by the agent (without an image), with
+            nutrition computed from its ingredients where they can be resolved
+    """
+    route = route or route_for("default")
+    logger.info("Invoking agent (answer: %s, tools: %s; %s)...", route.answer_tier, route.tool_tier, route.reason)
+    handler = AgentMetricsHandler()
+    with timed_stage("agent"):
+        result = get_recipe_agent().invoke(
+            build_agent_input(prompt),
+            config={"callbacks": [handler, AgentLogHandler("recipe_agent")]},
+            context=route,
+        )
+    handler.finish()
+    route.finish()
+    logger.info("Agent served by %s", route.summary())
+    logger.info(
+        "Agent finished: %d messages, %d tool calls",
+        len(result.get("messages", [])),
+        handler.tool_calls,
+    )
+    # The full message history includes every fetched page; only sample it
+    logger.info("Agent result: %s", summarize(result), extra={"verbose": True})
+
+    recipe_obj = to_recipe(result["structured_response"])
+    logger.info("Recipe object: %s", summarize(recipe_obj))
+    with timed_stage("nutrition"):
+        return check_recipe_nutrition(recipe_obj)
+
+
+def generate_image_base64(recipe: Recipe) -> str:
+    """
+    Generate a recipe image from its title and description. Blocks on Imagen.
+
+    Args:
+        recipe (Recipe): Recipe to illustrate
+
+    Returns:
+        str: Base64-encoded PNG image
+    """
+    logger.info("Generating image for recipe: %s", recipe.title)
+    image_description = f"{recipe.title}. {recipe.description}"
+    return generate_recipe_image.invoke({"recipe_description": image_description})
+
+
+def generate_image_url(recipe: Recipe) -> str:
+    """
+    Generate a recipe image and store it in the content-addressed image store.
+
+    Args:
+        recipe (Recipe): Recipe to illustrate
+
+    Returns:
+        str: URL under which the API serves the image
+    """
+    with timed_stage("image"):
+        image_base64 = generate_image_base64(recipe)
+    with timed_stage("image_store"):
+        digest = image_store.put(base64.b64decode(image_base64))
+    logger.info("Stored image for recipe %s as %s", recipe.recipe_id, digest)
+    return image_url(digest)
+
+
+def load_inline_image(recipe: Recipe) -> Recipe:
+    """
+    Fill `image_base64` from the image store for clients that want it inline.
+
+    Args:
+        recipe (Recipe): Recipe with an `image_url` from `generate_image_url`
+
+    Returns:
+        Recipe: The same recipe, updated in place
+    """
+    digest = digest_from_url(recipe.image_url)
+    if digest and not recipe.image_base64:
+        data = image_store.get(digest)
+        if data is not None:
+            recipe.image_base64 = base64.b64encode(data).decode("utf-8")
+    return recipe
@@ -0,0 +1,294 @@
+"""Server-Sent Events for streaming recipe generation.
+
+The recipe agent is streamed with LangGraph's `updates` and `messages` modes on
+a generation worker thread. Each chunk is translated into a small SSE event
+and handed to the event loop through an asyncio queue:
+
+- `started`: sent immediately so clients get their first byte within a second
+- `tool_start` / `tool_end`: one per tool call (recipe_search, fetch_url_content, ...)
+- `partial`: partially parsed `Recipe` fields as the final answer is written
+- `recipe`: the validated recipe, without its image
+- `image` / `image_error`: the generated picture, or why it failed
+- `error`: the agent failed; the stream ends after this event
+- `done`: the stream is complete
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from langchain_core.utils.json import parse_partial_json
+
+from backend.src.agents.recipe_agent import get_recipe_agent
+from backend.src.common.agent_metrics import AgentMetricsHandler
+from backend.src.common.metrics import timed_stage
+from backend.src.common.model_router import ModelRoute, route_for
+from backend.src.common.nutrition_calculator import check_recipe_nutrition
+from backend.src.models import ImageStatus
+from backend.src.persistence.agent_logs import AgentLogHandler
+from backend.src.persistence.stores import recipe_store
+from backend.src.server.execution import generation_pool, image_pool
+from backend.src.server.recipe_service import (
+    build_agent_input,
+    generate_image_url,
+    load_inline_image,
+    to_recipe,
+)
+
+logger = logging.getLogger(__name__)
+
+# Recipe fields surfaced in `partial` events while the final answer streams
+PARTIAL_FIELDS = ("title", "description", "ingredients", "instructions")
+
+# Minimum spacing between two `partial` events, to keep the stream readable
+PARTIAL_INTERVAL_SECONDS = 0.25
+
+# Name of the structured-output tool the agent uses for its final answer
+RESPONSE_TOOL_NAME = "Recipe"
+
+_END = object()
+
+
+class StreamSlot:
+    """
+    Generation slot reserved for a streamed response.
+
+    `stream_recipe_events` claims it on its first step and releases it once the
+    agent is done. A slot the stream never claimed, e.g. because the client went
+    away before the first event, is freed by `release_unclaimed`, which should
+    run as the response's background task.
+
+    Args:
+        stack (AsyncExitStack): Stack the slot was entered on; closing it frees the slot.
+    """
+
+    def __init__(self, stack: AsyncExitStack):
+        self._stack = stack
+        self.claimed = False
+
+    async def release(self):
+        await self._stack.aclose()
+
+    async def release_unclaimed(self):
+        if not self.claimed:
+            await self.release()
+
+
+def format_sse(event: str, data) -> str:
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class _PartialRecipeParser:
+    """Accumulates streamed answer chunks and extracts partial Recipe fields."""
+
+    def __init__(self):
+        self._buffers: dict[tuple, str] = {}
+        self._tool_names: dict[tuple, str | None] = {}
+        self._sent: dict[str, object] = {}
+        self._last_emit = 0.0
+
+    def feed(self, chunk: AIMessageChunk) -> dict | None:
+        """Add a chunk and return changed fields, or None if nothing to emit yet."""
+        if chunk.tool_call_chunks:
+            for call in chunk.tool_call_chunks:
+                key = (chunk.id, call.get("index"))
+                # Only the first chunk of a tool call carries its name
+                if call.get("name"):
+                    self._tool_names[key] = call["name"]
+                if self._tool_names.get(key) != RESPONSE_TOOL_NAME:
+                    continue
+                self._buffers[key] = self._buffers.get(key, "") + (call.get("args") or "")
+        elif isinstance(chunk.content, str) and chunk.content:
+            key = (chunk.id, None)
+            self._buffers[key] = self._buffers.get(key, "") + chunk.content
+        else:
+            return None
+        buffer = self._buffers.get(key)
+        if not buffer:
+            return None
+        return self._changed_fields(buffer)
+
+    def _changed_fields(self, buffer: str) -> dict | None:
+        now = time.monotonic()
+        if now - self._last_emit < PARTIAL_INTERVAL_SECONDS:
+            return None
+        start = buffer.find("{")
+        if start < 0:
+            return None
+        parsed = parse_partial_json(buffer[start:], strict=False)
+        if not isinstance(parsed, dict):
+            return None
+        changed = {
+            name: parsed[name]
+            for name in PARTIAL_FIELDS
+            if name in parsed and self._sent.get(name) != parsed[name]
+        }
+        if not changed:
+            return None
+        self._sent.update(changed)
+        self._last_emit = now
+        return changed
+
+
+def _pump_agent_events(prompt: str, emit, cancelled: threading.Event, route: ModelRoute):
+    """
+    Stream the agent on a worker thread, emitting (event, data) pairs.
+
+    Returns:
+        The agent's structured response, or None if it never produced one.
+    """
+    parser = _PartialRecipeParser()
+    tool_names: dict[str, str] = {}
+    structured_response = None
+    handler = AgentMetricsHandler()
+
+    with timed_stage("agent"):
+        events = get_recipe_agent().stream(
+            build_agent_input(prompt),
+            config={"callbacks": [handler, AgentLogHandler("recipe_agent")]},
+            stream_mode=["updates", "messages"],
+            context=route,
+        )
+        for mode, payload in events:
+            if cancelled.is_set():
+                logger.info("Client disconnected, stopping agent stream")
+                return None
+
+            if mode == "messages":
+                chunk, _metadata = payload
+                if isinstance(chunk, AIMessageChunk):
+                    fields = parser.feed(chunk)
+                    if fields:
+                        emit("partial", fields)
+                continue
+
+            for node_update in (payload or {}).values():
+                if not isinstance(node_update, dict):
+                    continue
+                if node_update.get("structured_response") is not None:
+                    structured_response = node_update["structured_response"]
+                for message in node_update.get("messages", []):
+                    if isinstance(message, AIMessage):
+                        for call in message.tool_calls:
+                            if call["name"] == RESPONSE_TOOL_NAME:
+                                continue
+                            tool_names[call["id"]] = call["name"]
+                            emit(
+                                "tool_start",
+                                {"id": call["id"], "tool": call["name"], "args": call["args"]},
+                            )
+                    elif isinstance(message, ToolMessage):
+                        if message.tool_call_id not in tool_names:
+                            continue
+                        emit(
+                            "tool_end",
+                            {
+                                "id": message.tool_call_id,
+                                "tool": tool_names[message.tool_call_id],
+                                "status": message.status,
+                            },
+                        )
+
+    handler.finish()
+    route.finish()
+    logger.info("Agent served by %s", route.summary())
+    return structured_response
+
+
+async def stream_recipe_events(
+    prompt: str, slot: StreamSlot, inline_image: bool = True, route: ModelRoute | None = None
+) -> AsyncIterator[str]:
+    """
+    Run the agent for `prompt` and yield SSE-encoded progress events.
+
+    Args:
+        prompt (str): User prompt built by `build_recipe_prompt`
+        slot (StreamSlot): The caller's generation slot; it is released once the
+            agent finishes, before the image is generated.
+        inline_image (bool): Whether the `image` event also carries base64 data
+        route (ModelRoute, optional): Models for the run, from `route_request`
+
+    Yields:
+        str: Encoded Server-Sent Events
+    """
+    slot.claimed = True
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def emit(event: str, data):
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    async def run_agent():
+        try:
+            return await generation_pool.run(
+                _pump_agent_events, prompt, emit, cancelled, route or route_for("stream")
+            )
+        finally:
+            queue.put_nowait(_END)
+
+    yield format_sse("started", {"stage": "agent"})
+
+    agent_task = asyncio.create_task(run_agent())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            yield format_sse(*item)
+
+        try:
+            structured_response = agent_task.result()
+            if structured_response is None:
+                raise ValueError("Agent finished without a structured recipe")
+            recipe = await asyncio.to_thread(check_recipe_nutrition, to_recipe(structured_response))
+            recipe_store.add(recipe)
+        except Exception as e:
+            logger.error("Error in streamed generation: %s", e, exc_info=True)
+            yield format_sse("error", {"detail": f"Error generating recipe: {str(e)}"})
+            return
+        finally:
+            await slot.release()
+
+        yield format_sse("recipe", recipe.model_dump(mode="json"))
+
+        try:
+            recipe.image_url = await image_pool.submit(generate_image_url, recipe)
+            await asyncio.to_thread(recipe_store.set_image, recipe.recipe_id, recipe.image_url)
+            if inline_image:
+                await asyncio.to_thread(load_inline_image, recipe)
+            yield format_sse(
+                "image",
+                {
+                    "recipe_id": recipe.recipe_id,
+                    "image_status": ImageStatus.READY,
+                    "image_url": recipe.image_url,
+                    "image_base64": recipe.image_base64,
+                },
+            )
+        except Exception as img_error:
+            logger.warning("Failed to generate image: %s", img_error, exc_info=True)
+            yield format_sse(
+                "image_error",
+                {
+                    "recipe_id": recipe.recipe_id,
+                    "image_status": ImageStatus.FAILED,
+                    "detail": str(img_error),
+                },
+            )
+
+        yield format_sse("done", {"recipe_id": recipe.recipe_id})
+    finally:
+        # Client went away (or we are done): stop the agent thread at its next
+        # chunk, and only give the slot back once that thread has returned.
+        cancelled.set()
+        if agent_task.done():
+            await slot.release()
+        else:
+            agent_task.add_done_callback(lambda _: asyncio.ensure_future(slot.release()))
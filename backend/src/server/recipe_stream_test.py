@@ -0,0 +1,128 @@
+import asyncio
+import json
+from contextlib import AsyncExitStack
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+from backend.src.models import Recipe
+
+pytest.importorskip("langchain_google_community")
+
+from backend.src.server import recipe_stream  # noqa: E402
+from backend.src.server.recipe_stream import StreamSlot, stream_recipe_events  # noqa: E402
+
+RECIPE = {
+    "recipe_id": "tofu-bowl",
+    "title": "Tofu Bowl",
+    "description": "Crispy tofu over rice",
+    "ingredients": [{"name": "tofu", "quantity": 1, "unit": "block"}],
+    "instructions": [{"section_name": "Cook", "steps": ["Fry the tofu"]}],
+    "prep_time_minutes": 5,
+    "cook_time_minutes": 15,
+    "servings": 2,
+}
+
+
+class FakeAgent:
+    """Streams one tool call, the answer in chunks, then the structured response."""
+
+    def __init__(self, answer=True):
+        self.answer = answer
+
+    def stream(self, agent_input, **kwargs):
+        call = {"id": "c1", "name": "recipe_search", "args": {"query": "tofu"}}
+        yield "updates", {"model": {"messages": [AIMessage(content="", tool_calls=[call])]}}
+        yield "updates", {"tools": {"messages": [ToolMessage(content="[]", tool_call_id="c1")]}}
+        if not self.answer:
+            return
+        args = json.dumps(RECIPE)
+        for i in range(0, len(args), 40):
+            first = i == 0
+            chunk = {
+                "name": "Recipe" if first else None,
+                "args": args[i : i + 40],
+                "id": "c2" if first else None,
+                "index": 0,
+            }
+            yield "messages", (AIMessageChunk(content="", id="m2", tool_call_chunks=[chunk]), {})
+        yield "updates", {"model": {"messages": [], "structured_response": Recipe(**RECIPE)}}
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    """Runs `stream_recipe_events` against a fake agent; returns events and slot releases."""
+    stored = []
+    monkeypatch.setattr(recipe_stream, "check_recipe_nutrition", lambda recipe: recipe)
+    monkeypatch.setattr(recipe_stream, "generate_image_url", lambda recipe: f"/api/images/{recipe.recipe_id}")
+    monkeypatch.setattr(recipe_stream.recipe_store, "add", stored.append)
+    monkeypatch.setattr(recipe_stream.recipe_store, "set_image", lambda recipe_id, url: None)
+    monkeypatch.setattr(recipe_stream, "PARTIAL_INTERVAL_SECONDS", 0.0)
+
+    def run(agent):
+        monkeypatch.setattr(recipe_stream, "get_recipe_agent", lambda: agent)
+        releases = []
+
+        async def main():
+            slot = StreamSlot(_slot_stack(releases))
+            events = [event async for event in stream_recipe_events("tofu", slot, inline_image=False)]
+            return [_parse(event) for event in events]
+
+        return asyncio.run(main()), releases, stored
+
+    return run
+
+
+def _slot_stack(releases: list, label: str = "released") -> AsyncExitStack:
+    """Stack standing in for a held pool slot; closing it records `label`."""
+
+    async def release():
+        releases.append(label)
+
+    stack = AsyncExitStack()
+    stack.push_async_callback(release)
+    return stack
+
+
+def _parse(event: str) -> tuple[str, dict]:
+    name, data = event.strip().split("\n")
+    return name.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+def test_events_arrive_in_order(stream):
+    events, releases, stored = stream(FakeAgent())
+    names = [name for name, _ in events]
+    assert names[:3] == ["started", "tool_start", "tool_end"]
+    assert names[-3:] == ["recipe", "image", "done"]
+    assert set(names[3:-3]) == {"partial"}
+    assert events[1][1]["tool"] == events[2][1]["tool"] == "recipe_search"
+    recipe = events[-3][1]
+    assert recipe["title"] == "Tofu Bowl"
+    # The model's slug is replaced with a server-side ID
+    assert recipe["recipe_id"] != "tofu-bowl"
+    assert events[-2][1]["image_url"] == f"/api/images/{recipe['recipe_id']}"
+    assert events[-1][1] == {"recipe_id": recipe["recipe_id"]}
+    assert releases == ["released"]
+    assert [recipe.title for recipe in stored] == ["Tofu Bowl"]
+
+
+def test_agent_without_an_answer_ends_with_an_error(stream):
+    events, releases, stored = stream(FakeAgent(answer=False))
+    assert [name for name, _ in events] == ["started", "tool_start", "tool_end", "error"]
+    assert releases == ["released"]
+    assert stored == []
+
+
+def test_unclaimed_slot_is_released_once():
+    releases = []
+
+    async def main():
+        claimed = StreamSlot(_slot_stack(releases, "claimed"))
+        unclaimed = StreamSlot(_slot_stack(releases, "unclaimed"))
+        claimed.claimed = True
+        for slot in (claimed, unclaimed):
+            await slot.release_unclaimed()
+            await slot.release_unclaimed()
+
+    asyncio.run(main())
+    assert releases == ["unclaimed"]
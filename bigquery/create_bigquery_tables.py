@@ -13,6 +13,12 @@ SQL_FILES = {
     "agent_logs": "agent_logs.sql",
 }
 
+# Columns added after the tables were first created: (table, column, type)
+ADDED_COLUMNS = [
+    ("recipes", "image_url", "STRING"),
+    ("users", "created_at", "TIMESTAMP"),
+]
+
 SQL_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
@@ -43,4 +49,10 @@ if __name__ == "__main__":
     for name, filename in SQL_FILES.items():
         ddl = read_sql_file(filename)
         create_table_if_not_exists(client, name, ddl)
+    for table, column, column_type in ADDED_COLUMNS:
+        print(f"Adding column {table}.{column} if missing...")
+        client.query(
+            f"ALTER TABLE `{PROJECT_ID}.{DATASET_ID}.{table}` "
+            f"ADD COLUMN IF NOT EXISTS {column} {column_type}"
+        ).result()
     print("All tables checked/created.")
@@ -10,6 +10,7 @@ CREATE TABLE recipes (
   servings INT64,
   serving_size STRING,
   citations ARRAY<STRING>,
+  image_url STRING,
   version INT64,
   created_at TIMESTAMP
 );
@@ -13,5 +13,6 @@ CREATE TABLE users (
     meal_requests ARRAY<STRUCT<type STRING, recipes_per_week INT64, servings_per_recipe INT64>>,
     daily_calorie_target INT64,
     macro_targets STRUCT<carbs_percent FLOAT64, fat_percent FLOAT64, protein_percent FLOAT64>
-  >
+  >,
+  created_at TIMESTAMP
 );